@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmarks for the kernel patch tooling.
+
+Runs against generated fixture data so results are reproducible and need
+no network access or real kernel tarballs.
+
+Usage:
+    python -m scripts.benchmark source-verification --files 200 --patches 2000
+    python -m scripts.benchmark version-compare --versions 500 --comparisons 200000
+"""
+
+import argparse
+import logging
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from scripts.common import logger, version_less_than
+from scripts.config import KernelConfig
+from scripts.models import KernelVersion
+from scripts.source_verification import SourceVerifier
+
+
+FIXTURE_VERSION = "6.1.0"
+
+
+def _fixture_line(file_idx: int, line_idx: int) -> str:
+    """Generate a distinct, significant line of C-like source."""
+    return f"\tret = fixture_call_{file_idx}_{line_idx}(dev, ctx->flags & {line_idx:#x});"
+
+
+def build_fixture_tree(
+    root: Path,
+    num_files: int = 100,
+    lines_per_file: int = 400,
+) -> List[str]:
+    """
+    Write a synthetic source tree.
+    
+    Args:
+        root: Directory to create the tree in
+        num_files: Number of source files
+        lines_per_file: Lines per source file
+    
+    Returns:
+        Tree-relative paths of the generated files
+    """
+    paths = []
+    for file_idx in range(num_files):
+        rel_path = f"drivers/fixture{file_idx % 10}/file{file_idx}.c"
+        target = root / rel_path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        body = "\n".join(_fixture_line(file_idx, n) for n in range(lines_per_file))
+        target.write_text(f"/* fixture file {file_idx} */\n{body}\n")
+        paths.append(rel_path)
+    return paths
+
+
+def build_fixture_patches(
+    paths: Sequence[str],
+    num_patches: int,
+    lines_per_file: int = 400,
+    seed: int = 0,
+) -> List[Tuple[str, str, Optional[str]]]:
+    """
+    Generate patches against a fixture tree, half of them already included.
+    
+    Returns:
+        List of (sha, patch_content, cve_id) tuples for ``verify_patches``
+    """
+    rng = random.Random(seed)
+    patches: List[Tuple[str, str, Optional[str]]] = []
+    for n in range(num_patches):
+        rel_path = rng.choice(paths)
+        file_idx = int(Path(rel_path).stem[len("file"):])
+        line_idx = rng.randrange(lines_per_file - 4)
+        context = [_fixture_line(file_idx, line_idx + k) for k in range(3)]
+        if n % 2 == 0:
+            added = [_fixture_line(file_idx, line_idx + 3)]
+        else:
+            added = [f"\tfixture_missing_{n}(dev);"]
+        lines = [
+            f"diff --git a/{rel_path} b/{rel_path}",
+            f"--- a/{rel_path}",
+            f"+++ b/{rel_path}",
+            f"@@ -{line_idx + 1},3 +{line_idx + 1},4 @@",
+        ]
+        lines += [f" {line}" for line in context]
+        lines += [f"+{line}" for line in added]
+        patches.append((f"{n:040x}", "\n".join(lines) + "\n", f"CVE-2024-{n + 10000}"))
+    return patches
+
+
+def benchmark_source_verification(
+    num_files: int = 100,
+    num_patches: int = 1000,
+    lines_per_file: int = 400,
+) -> Dict[str, float]:
+    """
+    Measure SourceVerifier throughput over a generated fixture tree.
+    
+    Args:
+        num_files: Number of files in the fixture tree
+        num_patches: Number of patches to verify
+        lines_per_file: Lines per fixture file
+    
+    Returns:
+        Dict with patches, included, seconds and patches_per_sec
+    """
+    with tempfile.TemporaryDirectory(prefix="kp-bench-") as tmp:
+        tmp_path = Path(tmp)
+        source_dir = tmp_path / f"linux-{FIXTURE_VERSION}"
+        paths = build_fixture_tree(source_dir, num_files, lines_per_file)
+        patches = build_fixture_patches(paths, num_patches, lines_per_file)
+        
+        # File indexes are built inside the timing
+        verifier = SourceVerifier(KernelConfig(cache_dir=tmp_path / "cache"))
+        verifier.use_source_dir(source_dir, FIXTURE_VERSION)
+        start = time.perf_counter()
+        verified = verifier.verify_patches(patches, FIXTURE_VERSION)
+        elapsed = time.perf_counter() - start
+    
+    return {
+        "patches": len(verified),
+        "included": sum(1 for r in verified.values() if r.is_included),
+        "seconds": elapsed,
+        "patches_per_sec": len(verified) / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def _unmemoized_less_than(v1: str, v2: str) -> bool:
+    """Reference comparison: split and validate a KernelVersion on every call."""
+    versions = []
+    for version_str in (v1, v2):
+        parts = version_str.split(".")
+        versions.append(KernelVersion(
+            major=int(parts[0]) if len(parts) > 0 else 0,
+            minor=int(parts[1]) if len(parts) > 1 else 0,
+            patch=int(parts[2]) if len(parts) > 2 else 0,
+        ))
+    return versions[0] < versions[1]
+
+
+def benchmark_version_compare(
+    num_versions: int = 500,
+    num_comparisons: int = 100000,
+    seed: int = 0,
+) -> List[Dict[str, Any]]:
+    """
+    Measure kernel version comparisons/sec with and without memoized parsing.
+    
+    Args:
+        num_versions: Distinct version strings to draw from
+        num_comparisons: Comparisons per run
+        seed: Random seed for the version pairs
+    
+    Returns:
+        One dict per implementation with name, comparisons, seconds and
+        comparisons_per_sec
+    """
+    rng = random.Random(seed)
+    series = ["5.10", "6.1", "6.6", "6.12"]
+    versions = [f"{rng.choice(series)}.{rng.randrange(300)}" for _ in range(num_versions)]
+    pairs = [(rng.choice(versions), rng.choice(versions)) for _ in range(num_comparisons)]
+    
+    results = []
+    for name, compare in (("unmemoized", _unmemoized_less_than), ("memoized", version_less_than)):
+        start = time.perf_counter()
+        for v1, v2 in pairs:
+            compare(v1, v2)
+        elapsed = time.perf_counter() - start
+        results.append({
+            "name": name,
+            "comparisons": len(pairs),
+            "seconds": elapsed,
+            "comparisons_per_sec": len(pairs) / elapsed if elapsed > 0 else 0.0,
+        })
+    return results
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark kernel patch tooling")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+    
+    verify = subparsers.add_parser(
+        "source-verification",
+        help="SourceVerifier.verify_patches throughput (patches/sec)",
+    )
+    verify.add_argument("--files", type=int, default=100, help="Fixture source files")
+    verify.add_argument("--lines", type=int, default=400, help="Lines per fixture file")
+    verify.add_argument("--patches", type=int, default=1000, help="Patches to verify")
+    
+    compare = subparsers.add_parser(
+        "version-compare",
+        help="Kernel version comparisons/sec before and after memoized parsing",
+    )
+    compare.add_argument("--versions", type=int, default=500, help="Distinct version strings")
+    compare.add_argument("--comparisons", type=int, default=100000, help="Comparisons per run")
+    
+    args = parser.parse_args(argv)
+    
+    # Per-patch progress logging would dominate the measurement
+    logger.setLevel(logging.WARNING)
+    
+    if args.benchmark == "source-verification":
+        row = benchmark_source_verification(args.files, args.patches, args.lines)
+        print(
+            f"patches={row['patches']:<6} included={row['included']:<6} "
+            f"{row['seconds']:.3f}s {row['patches_per_sec']:.1f} patches/sec"
+        )
+    elif args.benchmark == "version-compare":
+        for row in benchmark_version_compare(args.versions, args.comparisons):
+            print(
+                f"{row['name']:<11} comparisons={row['comparisons']:<8} "
+                f"{row['seconds']:.3f}s {row['comparisons_per_sec']:.0f} comparisons/sec"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
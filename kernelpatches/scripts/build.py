@@ -4,14 +4,21 @@ RPM build functions for kernel packages.
 
 import os
 import shutil
+import signal
 import subprocess
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Set, Tuple
 
 import requests
 
+from scripts.build_cache import CompilerCache, CompilerCacheStats
+from scripts.build_deps import BuildDepsCache
+from scripts.build_telemetry import BuildTelemetry
 from scripts.common import (
     calculate_sha512,
     download_file,
@@ -24,20 +31,133 @@ from scripts.config import (
     KernelConfig,
     get_kernel_org_url,
 )
+from scripts.kernel_source import get_shared_source_cache
 from scripts.models import BuildResult, KernelVersion
 from scripts.spec_file import SpecFile
 
 
+# SOURCES directory shared by local (non-SRPM) spec builds
+PHOTON_SOURCES_DIR = Path("/usr/src/photon/SOURCES")
+
+# Fewest CPUs each concurrent build gets when concurrency is auto-sized
+MIN_CPUS_PER_BUILD = 2
+
+
 class BuildError(Exception):
     """Exception raised for build failures."""
     pass
 
 
+@dataclass
+class BuildJob:
+    """One rpmbuild run scheduled by KernelBuilder.run_build_jobs."""
+    spec_path: Path
+    build_log: Path
+    canister: int = 0
+    acvp: int = 0
+    topdir: Optional[Path] = None  # Must be unique per concurrent job
+
+
+def _total_memory_mb() -> Optional[int]:
+    """Get physical memory in MB, or None if unknown."""
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") // (1024 * 1024)
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+def plan_build_concurrency(
+    num_jobs: int,
+    max_jobs: int = 0,
+    memory_per_job_mb: int = 4096,
+    cpu_count: Optional[int] = None,
+    memory_mb: Optional[int] = None,
+) -> Tuple[int, int]:
+    """
+    Decide how many builds run at once and the make -j of each.
+    
+    Without an explicit limit, concurrency is bounded by CPUs (at least
+    MIN_CPUS_PER_BUILD per build) and by memory (memory_per_job_mb per
+    build). The CPUs are then split evenly across the concurrent builds.
+    
+    Args:
+        num_jobs: Number of builds to schedule
+        max_jobs: Explicit concurrent build limit (0 = auto)
+        memory_per_job_mb: Memory to allow per concurrent build
+        cpu_count: CPUs to use (default: os.cpu_count())
+        memory_mb: Memory to use (default: physical memory)
+    
+    Returns:
+        Tuple of (concurrent_builds, make_jobs_per_build)
+    """
+    cpus = cpu_count or os.cpu_count() or 1
+    if memory_mb is None:
+        memory_mb = _total_memory_mb()
+    
+    if max_jobs > 0:
+        concurrent = max_jobs
+    else:
+        concurrent = max(1, cpus // MIN_CPUS_PER_BUILD)
+        if memory_mb:
+            concurrent = min(concurrent, max(1, memory_mb // memory_per_job_mb))
+    concurrent = max(1, min(concurrent, num_jobs))
+    
+    return concurrent, max(1, cpus // concurrent)
+
+
+def _kill_process_group(process: subprocess.Popen) -> None:
+    """Kill a process started with start_new_session and all its children."""
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except OSError:
+        pass
+
+
 class KernelBuilder:
     """Build kernel RPMs from spec files."""
     
     def __init__(self, config: Optional[KernelConfig] = None):
         self.config = config or DEFAULT_CONFIG
+        self.compiler_cache = CompilerCache(self.config)
+        self.deps_cache = BuildDepsCache(self.config)
+        # Compiler cache hits/misses of the last batch of builds
+        self.cache_stats: Optional[CompilerCacheStats] = None
+        # Running rpmbuild processes, killed when a batch is interrupted
+        self._processes: Set[subprocess.Popen] = set()
+        self._processes_lock = threading.Lock()
+        self._stopping = False
+    
+    def _build_env(self, base_dir: Optional[Path] = None) -> Optional[Dict[str, str]]:
+        """
+        Get the rpmbuild environment.
+        
+        Args:
+            base_dir: Directory containing the build topdirs
+        
+        Returns:
+            ccache environment if ``config.build_ccache`` is set and ccache
+            is usable, otherwise None (inherit)
+        """
+        if self.config.build_ccache and self.compiler_cache.prepare():
+            return self.compiler_cache.build_env(base_dir)
+        return None
+    
+    def _compiler_cache_snapshot(self) -> Optional[CompilerCacheStats]:
+        """Read compiler cache counters before a batch of builds."""
+        self.cache_stats = None
+        if not self.config.build_ccache:
+            return None
+        return self.compiler_cache.stats()
+    
+    def _report_compiler_cache(self, before: Optional[CompilerCacheStats]) -> None:
+        """Record and log compiler cache hits/misses since a snapshot."""
+        if before is None:
+            return
+        after = self.compiler_cache.stats()
+        if after is None:
+            return
+        self.cache_stats = after - before
+        logger.info(f"Compiler cache: {self.cache_stats.summary()}")
     
     def verify_build_deps(self) -> Tuple[bool, List[str]]:
         """
@@ -80,7 +200,47 @@ class KernelBuilder:
             logger.error(f"Spec file not found: {spec_path}")
             return False, []
         
-        # Get build requirements from spec file
+        return self.install_specs_build_deps([spec_path])
+    
+    def install_specs_build_deps(self, spec_paths: List[Path]) -> Tuple[bool, List[str]]:
+        """
+        Install the union of several specs' build dependencies.
+        
+        BuildRequires are evaluated with rpm (cached per spec version) and
+        whatever is missing is installed with a single tdnf call.
+        
+        Args:
+            spec_paths: Spec files to build
+        
+        Returns:
+            Tuple of (success, installed_packages)
+        """
+        requirements = []
+        queried = True
+        for spec_path in spec_paths:
+            requires = self._spec_build_requires(spec_path)
+            if requires is None:
+                queried = False
+                continue
+            requirements.extend(requires)
+        
+        success, installed = self._ensure_requirements(list(dict.fromkeys(requirements)))
+        return queried and success, installed
+    
+    def _spec_build_requires(self, spec_path: Path) -> Optional[List[str]]:
+        """
+        Get a spec's BuildRequires as evaluated by rpm.
+        
+        Args:
+            spec_path: Path to spec file
+        
+        Returns:
+            Package names, or None if rpm could not evaluate the spec
+        """
+        cached = self.deps_cache.spec_requires(spec_path)
+        if cached is not None:
+            return cached
+        
         logger.info(f"Checking build dependencies for {spec_path.name}")
         
         returncode, stdout, stderr = run_command([
@@ -89,7 +249,7 @@ class KernelBuilder:
         
         if returncode != 0:
             logger.warning(f"Could not query build requirements: {stderr}")
-            return False, []
+            return None
         
         # Parse required packages
         required_packages = []
@@ -97,59 +257,83 @@ class KernelBuilder:
             line = line.strip()
             if line and not line.startswith("#"):
                 # Handle versioned requirements like "openssl-devel >= 1.0"
-                pkg = line.split()[0] if line else ""
-                if pkg:
-                    required_packages.append(pkg)
-        
-        if not required_packages:
-            logger.info("No build dependencies to install")
-            return True, []
+                required_packages.append(line.split()[0])
         
         # Remove duplicates while preserving order
         required_packages = list(dict.fromkeys(required_packages))
+        self.deps_cache.store_spec_requires(spec_path, required_packages)
+        return required_packages
+    
+    def _missing_packages(self, requirements: List[str]) -> List[str]:
+        """
+        Find requirements no installed package provides, in one rpm query.
         
-        logger.info(f"Installing {len(required_packages)} build dependencies")
-        
-        # Install packages using tdnf
-        cmd = ["tdnf", "install", "-y"] + required_packages
-        
-        returncode, stdout, stderr = run_command(cmd, timeout=600)
-        
-        if returncode != 0:
-            logger.error(f"Failed to install dependencies: {stderr}")
-            return False, []
+        Args:
+            requirements: Package names or capabilities
         
-        logger.info(f"Successfully installed build dependencies")
-        return True, required_packages
+        Returns:
+            Missing requirements (all of them if rpm output is unexpected)
+        """
+        returncode, stdout, stderr = run_command(["rpm", "-q", "--whatprovides"] + requirements)
+        if returncode == 0:
+            return []
+        
+        prefix = "no package provides "
+        missing = [
+            line[len(prefix):].strip()
+            for line in (stdout + "\n" + stderr).splitlines()
+            if line.startswith(prefix)
+        ]
+        return missing or list(requirements)
     
-    def _parse_build_requires(self, spec_path: Path) -> List[str]:
+    def _ensure_requirements(self, requirements: List[str]) -> Tuple[bool, List[str]]:
         """
-        Parse BuildRequires from a spec file.
+        Make sure build requirements are installed.
+        
+        Skips all package queries when the same requirements were satisfied
+        and the rpmdb has not changed since, otherwise installs only the
+        missing packages with a single tdnf call.
         
         Args:
-            spec_path: Path to spec file
+            requirements: Package names or capabilities
         
         Returns:
-            List of package names
+            Tuple of (success, installed_packages)
         """
-        packages = []
-        try:
-            with open(spec_path, "r") as f:
-                for line in f:
-                    line = line.strip()
-                    if line.startswith("BuildRequires:"):
-                        # Extract package name, handle versioned deps like "pkg >= 1.0"
-                        parts = line.split(":", 1)[1].strip().split()
-                        if parts:
-                            packages.append(parts[0])
-        except Exception as e:
-            logger.warning(f"Could not parse {spec_path}: {e}")
-        return packages
+        if not requirements:
+            logger.info("No build dependencies to install")
+            return True, []
+        
+        if self.deps_cache.is_satisfied(requirements):
+            logger.info(f"All {len(requirements)} build dependencies installed (cached)")
+            return True, []
+        
+        missing = self._missing_packages(requirements)
+        if missing:
+            logger.info(f"Installing {len(missing)} of {len(requirements)} build dependencies")
+            logger.debug(f"Packages: {', '.join(missing)}")
+            
+            returncode, _, stderr = run_command(["tdnf", "install", "-y"] + missing, timeout=600)
+            
+            if returncode != 0:
+                logger.error(f"Failed to install dependencies: {stderr}")
+                return False, []
+            
+            logger.info("Successfully installed build dependencies")
+        else:
+            logger.info(f"All {len(requirements)} build dependencies already installed")
+        
+        self.deps_cache.mark_satisfied(requirements)
+        return True, missing
     
     def install_all_build_deps(self, spec_dir: Path, spec_files: List[str]) -> bool:
         """
         Install build dependencies for all spec files.
         
+        Same as install_specs_build_deps for the spec files that exist:
+        rpm-evaluated BuildRequires (cached per spec version) are unioned
+        and installed with a single tdnf call, skipped when satisfied.
+        
         Args:
             spec_dir: Directory containing spec files
             spec_files: List of spec file names
@@ -157,32 +341,9 @@ class KernelBuilder:
         Returns:
             True if all dependencies installed successfully
         """
-        all_packages = set()
-        
-        for spec_name in spec_files:
-            spec_path = spec_dir / spec_name
-            if not spec_path.exists():
-                continue
-            
-            packages = self._parse_build_requires(spec_path)
-            all_packages.update(packages)
-        
-        if not all_packages:
-            logger.info("No build dependencies to install")
-            return True
-        
-        logger.info(f"Installing {len(all_packages)} build dependencies")
-        logger.debug(f"Packages: {', '.join(sorted(all_packages))}")
-        
-        cmd = ["tdnf", "install", "-y"] + list(all_packages)
-        returncode, _, stderr = run_command(cmd, timeout=600)
-        
-        if returncode != 0:
-            logger.error(f"Failed to install dependencies: {stderr}")
-            return False
-        
-        logger.info("Successfully installed all build dependencies")
-        return True
+        spec_paths = [spec_dir / spec_name for spec_name in spec_files]
+        success, _ = self.install_specs_build_deps([p for p in spec_paths if p.exists()])
+        return success
     
     def setup_srpm_build_env(
         self,
@@ -381,10 +542,6 @@ diff -u .config.old .config || echo "Config differences detected (expected with
                 error_message=f"Spec file not found: {spec_path}",
             )
         
-        spec = SpecFile(spec_path)
-        version = spec.version
-        release = str(spec.release)
-        
         # Install build dependencies
         if install_deps:
             self.install_build_deps(spec_path)
@@ -392,88 +549,12 @@ diff -u .config.old .config || echo "Config differences detected (expected with
         # Create log directory
         output_dir = self.get_build_output_dir(kernel_version, self.config.get_repo_dir(kernel_version))
         build_log = output_dir / f"build_{naming_scheme}.log"
-        build_log.parent.mkdir(parents=True, exist_ok=True)
-        
-        logger.info(f"Building {naming_scheme}.spec (canister={canister}, acvp={acvp})")
-        logger.info(f"  Version: {version}-{release}")
-        logger.info(f"  Build topdir: {build_topdir}")
-        logger.info(f"  Log: {build_log}")
-        logger.info(f"  Output: {build_topdir}/RPMS/x86_64/")
         
-        # Build command
-        cmd = [
-            "rpmbuild", "-bb",
-            "--define", f"_topdir {build_topdir}",
-            "--define", f"canister_build {canister}",
-            "--define", f"acvp_build {acvp}",
-            str(spec_path),
-        ]
-        
-        # Run build
-        start_time = time.time()
-        
-        try:
-            with open(build_log, "w") as log_file:
-                process = subprocess.run(
-                    cmd,
-                    stdout=log_file,
-                    stderr=subprocess.STDOUT,
-                    timeout=self.config.build_timeout,
-                )
-            
-            duration = int(time.time() - start_time)
-            
-            if process.returncode == 0:
-                logger.info(f"Build successful in {duration}s")
-                logger.info(f"RPMs available in {build_topdir}/RPMS/x86_64/")
-                return BuildResult(
-                    spec_file=str(spec_path),
-                    success=True,
-                    version=version,
-                    release=release,
-                    duration_seconds=duration,
-                    log_file=str(build_log),
-                    canister_build=canister,
-                    acvp_build=acvp,
-                )
-            else:
-                logger.error(f"Build failed (exit code: {process.returncode}) after {duration}s")
-                return BuildResult(
-                    spec_file=str(spec_path),
-                    success=False,
-                    version=version,
-                    release=release,
-                    duration_seconds=duration,
-                    log_file=str(build_log),
-                    error_message=f"Build failed with exit code {process.returncode}",
-                    canister_build=canister,
-                    acvp_build=acvp,
-                )
-                
-        except subprocess.TimeoutExpired:
-            duration = int(time.time() - start_time)
-            logger.error(f"Build timed out after {self.config.build_timeout}s")
-            return BuildResult(
-                spec_file=str(spec_path),
-                success=False,
-                version=version,
-                release=release,
-                duration_seconds=duration,
-                log_file=str(build_log),
-                error_message=f"Build timed out after {self.config.build_timeout}s",
-                canister_build=canister,
-                acvp_build=acvp,
-            )
-        except Exception as e:
-            return BuildResult(
-                spec_file=str(spec_path),
-                success=False,
-                version=version,
-                release=release,
-                error_message=str(e),
-                canister_build=canister,
-                acvp_build=acvp,
-            )
+        logger.info(f"Build topdir: {build_topdir}")
+        result = self.build_rpm(spec_path, build_log, canister, acvp, topdir=build_topdir)
+        if result.success:
+            logger.info(f"RPMs available in {build_topdir}/RPMS/x86_64/")
+        return result
     
     def build_all_from_srpm(
         self,
@@ -534,6 +615,18 @@ diff -u .config.old .config || echo "Config differences detected (expected with
         output_dir = self.get_build_output_dir(kernel_version, self.config.get_repo_dir(kernel_version))
         output_dir.mkdir(parents=True, exist_ok=True)
         
+        # Install the union of all specs' build dependencies at once
+        if install_deps:
+            spec_paths = [build_topdir / "SPECS" / spec_name for spec_name in spec_files]
+            self.install_specs_build_deps([path for path in spec_paths if path.exists()])
+        
+        cache_before = self._compiler_cache_snapshot()
+        
+        # Determine %dist macro based on kernel version
+        photon_major = "4" if kernel_version == "5.10" else "5"
+        dist_macro = f".ph{photon_major}"
+        logger.info(f"Build topdir: {build_topdir}")
+        
         # Build each spec file
         for spec_name in spec_files:
             spec_path = build_topdir / "SPECS" / spec_name
@@ -541,106 +634,22 @@ diff -u .config.old .config || echo "Config differences detected (expected with
                 logger.warning(f"Spec file not found, skipping: {spec_path}")
                 continue
             
-            spec = SpecFile(spec_path)
-            version = spec.version
-            release = str(spec.release)
-            
-            # Install build dependencies for first spec
-            if install_deps and spec_name == spec_files[0]:
-                self.install_build_deps(spec_path)
-            
             build_log = output_dir / f"build_{spec_name.replace('.spec', '')}.log"
-            
-            logger.info(f"Building {spec_name} (canister={canister}, acvp={acvp})")
-            logger.info(f"  Version: {version}-{release}")
-            logger.info(f"  Build topdir: {build_topdir}")
-            logger.info(f"  Log: {build_log}")
-            logger.info(f"  Output: {build_topdir}/RPMS/x86_64/")
-            
-            # Build command
-            # Determine %dist macro based on kernel version
-            photon_major = "4" if kernel_version == "5.10" else "5"
-            dist_macro = f".ph{photon_major}"
-            
-            cmd = [
-                "rpmbuild", "-bb",
-                "--define", f"_topdir {build_topdir}",
-                "--define", f"dist {dist_macro}",
-                "--define", f"canister_build {canister}",
-                "--define", f"acvp_build {acvp}",
-                str(spec_path),
-            ]
-            
-            # Run build
-            start_time = time.time()
-            
-            try:
-                with open(build_log, "w") as log_file:
-                    process = subprocess.run(
-                        cmd,
-                        stdout=log_file,
-                        stderr=subprocess.STDOUT,
-                        timeout=self.config.build_timeout,
-                    )
-                
-                duration = int(time.time() - start_time)
-                
-                if process.returncode == 0:
-                    logger.info(f"Build of {spec_name} successful in {duration}s")
-                    results.append(BuildResult(
-                        spec_file=str(spec_path),
-                        success=True,
-                        version=version,
-                        release=release,
-                        duration_seconds=duration,
-                        log_file=str(build_log),
-                        canister_build=canister,
-                        acvp_build=acvp,
-                    ))
-                else:
-                    logger.error(f"Build of {spec_name} failed (exit code: {process.returncode}) after {duration}s")
-                    results.append(BuildResult(
-                        spec_file=str(spec_path),
-                        success=False,
-                        version=version,
-                        release=release,
-                        duration_seconds=duration,
-                        log_file=str(build_log),
-                        error_message=f"Build failed with exit code {process.returncode}",
-                        canister_build=canister,
-                        acvp_build=acvp,
-                    ))
-                    
-            except subprocess.TimeoutExpired:
-                duration = int(time.time() - start_time)
-                logger.error(f"Build of {spec_name} timed out after {self.config.build_timeout}s")
-                results.append(BuildResult(
-                    spec_file=str(spec_path),
-                    success=False,
-                    version=version,
-                    release=release,
-                    duration_seconds=duration,
-                    log_file=str(build_log),
-                    error_message=f"Build timed out after {self.config.build_timeout}s",
-                    canister_build=canister,
-                    acvp_build=acvp,
-                ))
-            except Exception as e:
-                results.append(BuildResult(
-                    spec_file=str(spec_path),
-                    success=False,
-                    version=version,
-                    release=release,
-                    error_message=str(e),
-                    canister_build=canister,
-                    acvp_build=acvp,
-                ))
+            results.append(self.build_rpm(
+                spec_path,
+                build_log,
+                canister,
+                acvp,
+                topdir=build_topdir,
+                defines={"dist": dist_macro},
+            ))
         
         # Summary
         success_count = sum(1 for r in results if r.success)
         fail_count = len(results) - success_count
         logger.info(f"Build Summary: Success={success_count}, Failed={fail_count}")
         logger.info(f"RPMs available in {build_topdir}/RPMS/x86_64/")
+        self._report_compiler_cache(cache_before)
         
         return results
     
@@ -651,16 +660,27 @@ diff -u .config.old .config || echo "Config differences detected (expected with
         canister: int = 0,
         acvp: int = 0,
         topdir: Optional[Path] = None,
+        sourcedir: Optional[Path] = None,
+        make_jobs: Optional[int] = None,
+        base_dir: Optional[Path] = None,
+        defines: Optional[Dict[str, str]] = None,
     ) -> BuildResult:
         """
         Build kernel RPM from spec file.
         
+        Output is streamed into the build log and parsed into phase events
+        (see BuildTelemetry); the JSON timeline is written next to the log.
+        
         Args:
             spec_path: Path to spec file
             build_log: Path for build log
             canister: canister_build value (0 or 1)
             acvp: acvp_build value (0 or 1)
             topdir: RPM build top directory
+            sourcedir: SOURCES directory, when not under topdir
+            make_jobs: make -j for the build (default: rpm's _smp_mflags)
+            base_dir: Compiler cache base directory (default: topdir)
+            defines: Extra rpm macros to define
         
         Returns:
             BuildResult with build outcome
@@ -691,28 +711,42 @@ diff -u .config.old .config || echo "Config differences detected (expected with
         
         if topdir:
             cmd.extend(["--define", f"_topdir {topdir}"])
+        if sourcedir:
+            cmd.extend(["--define", f"_sourcedir {sourcedir}"])
+        if make_jobs:
+            cmd.extend(["--define", f"_smp_mflags -j{make_jobs}"])
+        for name, value in (defines or {}).items():
+            cmd.extend(["--define", f"{name} {value}"])
         
         cmd.append(str(spec_path))
         
         # Run build
+        started_at = datetime.now()
         start_time = time.time()
         
-        build_log.parent.mkdir(parents=True, exist_ok=True)
+        telemetry = BuildTelemetry(spec_path.name)
         
         try:
-            with open(build_log, "w") as log_file:
-                process = subprocess.run(
-                    cmd,
-                    stdout=log_file,
-                    stderr=subprocess.STDOUT,
-                    timeout=self.config.build_timeout,
-                )
-            
+            self._run_rpmbuild(cmd, build_log, telemetry, self._build_env(base_dir or topdir))
             duration = int(time.time() - start_time)
             
-            if process.returncode == 0:
-                logger.info(f"  Build successful in {duration}s")
-                return BuildResult(
+            if telemetry.timed_out:
+                logger.error(f"  Build of {spec_path.name} timed out after {self.config.build_timeout}s")
+                
+                result = BuildResult(
+                    spec_file=str(spec_path),
+                    success=False,
+                    version=version,
+                    release=release,
+                    duration_seconds=duration,
+                    log_file=str(build_log),
+                    error_message=f"Build timed out after {self.config.build_timeout}s",
+                    canister_build=canister,
+                    acvp_build=acvp,
+                )
+            elif telemetry.returncode == 0:
+                logger.info(f"  Build of {spec_path.name} successful in {duration}s")
+                result = BuildResult(
                     spec_file=str(spec_path),
                     success=True,
                     version=version,
@@ -723,46 +757,29 @@ diff -u .config.old .config || echo "Config differences detected (expected with
                     acvp_build=acvp,
                 )
             else:
-                # Read last 20 lines of log for error
-                log_tail = ""
-                try:
-                    with open(build_log) as f:
-                        lines = f.readlines()
-                        log_tail = "".join(lines[-20:])
-                except Exception:
-                    pass
-                
-                logger.error(f"  Build failed (exit code: {process.returncode}) after {duration}s")
+                logger.error(
+                    f"  Build of {spec_path.name} failed (exit code: {telemetry.returncode}) after {duration}s"
+                )
                 
-                return BuildResult(
+                result = BuildResult(
                     spec_file=str(spec_path),
                     success=False,
                     version=version,
                     release=release,
                     duration_seconds=duration,
                     log_file=str(build_log),
-                    error_message=f"Build failed with exit code {process.returncode}",
+                    error_message=f"Build failed with exit code {telemetry.returncode}",
                     canister_build=canister,
                     acvp_build=acvp,
                 )
-                
-        except subprocess.TimeoutExpired:
-            duration = int(time.time() - start_time)
-            logger.error(f"  Build timed out after {self.config.build_timeout}s")
             
-            return BuildResult(
-                spec_file=str(spec_path),
-                success=False,
-                version=version,
-                release=release,
-                duration_seconds=duration,
-                log_file=str(build_log),
-                error_message=f"Build timed out after {self.config.build_timeout}s",
-                canister_build=canister,
-                acvp_build=acvp,
-            )
+            timeline = telemetry.write_timeline(build_log.with_suffix(".timeline.json"))
+            result.timeline_file = str(timeline)
+            result.phase_durations = dict(telemetry.phase_durations)
+            if result.phase_durations:
+                logger.info(f"  Phases of {spec_path.name}: {telemetry.summary()}")
         except Exception as e:
-            return BuildResult(
+            result = BuildResult(
                 spec_file=str(spec_path),
                 success=False,
                 version=version,
@@ -771,10 +788,166 @@ diff -u .config.old .config || echo "Config differences detected (expected with
                 canister_build=canister,
                 acvp_build=acvp,
             )
+        
+        result.started_at = started_at
+        result.finished_at = datetime.now()
+        if topdir:
+            result.rpm_dir = str(topdir / "RPMS")
+        return result
+    
+    def _run_rpmbuild(
+        self,
+        cmd: List[str],
+        build_log: Path,
+        telemetry: BuildTelemetry,
+        env: Optional[Dict[str, str]] = None,
+    ) -> None:
+        """
+        Run rpmbuild, streaming its output into the log and telemetry.
+        
+        The build runs in its own process group so a timeout also stops
+        the make processes it started. The group is outside the terminal's
+        foreground group and does not see Ctrl-C, so it is killed here on
+        any exception, including KeyboardInterrupt.
+        
+        Args:
+            cmd: rpmbuild command
+            build_log: Path for build log
+            telemetry: Receives every output line, finished on exit
+            env: Environment (default: inherit)
+        """
+        build_log.parent.mkdir(parents=True, exist_ok=True)
+        
+        with open(build_log, "w") as log_file:
+            process = subprocess.Popen(
+                cmd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                env=env,
+                text=True,
+                errors="replace",
+                start_new_session=True,
+            )
+            assert process.stdout is not None
+            with self._processes_lock:
+                self._processes.add(process)
+                if self._stopping:
+                    _kill_process_group(process)
+            timed_out = threading.Event()
+            
+            def kill() -> None:
+                timed_out.set()
+                _kill_process_group(process)
+            
+            timer = threading.Timer(self.config.build_timeout, kill)
+            timer.start()
+            try:
+                for line in process.stdout:
+                    log_file.write(line)
+                    telemetry.feed(line)
+                returncode = process.wait()
+            except BaseException:
+                _kill_process_group(process)
+                process.wait()
+                raise
+            finally:
+                timer.cancel()
+                with self._processes_lock:
+                    self._processes.discard(process)
+        
+        telemetry.finish(None if timed_out.is_set() else returncode, timed_out=timed_out.is_set())
+    
+    def kill_running_builds(self) -> None:
+        """Kill all running rpmbuild process groups and keep new ones from starting."""
+        with self._processes_lock:
+            self._stopping = True
+            for process in self._processes:
+                _kill_process_group(process)
+    
+    @staticmethod
+    def _remove_build_tree(topdir: Path) -> None:
+        """Remove the compiled BUILD and BUILDROOT trees of a job's topdir, keeping RPMS."""
+        for subdir in ("BUILD", "BUILDROOT"):
+            shutil.rmtree(topdir / subdir, ignore_errors=True)
+    
+    def run_build_jobs(
+        self,
+        jobs: List[BuildJob],
+        sourcedir: Optional[Path] = None,
+    ) -> List[BuildResult]:
+        """
+        Run rpmbuild jobs concurrently.
+        
+        Concurrency and the make -j of each build come from
+        plan_build_concurrency using ``config.build_jobs`` and
+        ``config.build_job_memory_mb``. Each job needs its own topdir so
+        concurrent builds do not share BUILD/BUILDROOT/RPMS trees. Once a
+        job finishes its BUILD and BUILDROOT trees are removed so only one
+        kernel tree per running build stays on disk; RPMS is kept.
+        
+        Args:
+            jobs: Builds to run
+            sourcedir: SOURCES directory shared by all jobs
+        
+        Returns:
+            BuildResult for each job, in job order
+        """
+        if not jobs:
+            return []
+        
+        concurrent, make_jobs = plan_build_concurrency(
+            len(jobs), self.config.build_jobs, self.config.build_job_memory_mb
+        )
+        logger.info(f"Running {len(jobs)} build(s), {concurrent} at a time with make -j{make_jobs}")
+        
+        # Hash paths relative to the common parent of the batch's topdirs
+        topdirs = [str(job.topdir) for job in jobs if job.topdir]
+        base_dir = Path(os.path.commonpath(topdirs)) if len(topdirs) == len(jobs) else None
+        cache_before = self._compiler_cache_snapshot()
+        
+        def run(job: BuildJob) -> BuildResult:
+            result = self.build_rpm(
+                job.spec_path,
+                job.build_log,
+                job.canister,
+                job.acvp,
+                topdir=job.topdir,
+                sourcedir=sourcedir,
+                make_jobs=make_jobs,
+                base_dir=base_dir,
+            )
+            if job.topdir:
+                self._remove_build_tree(job.topdir)
+            return result
+        
+        start_time = time.time()
+        self._stopping = False
+        with ThreadPoolExecutor(max_workers=concurrent) as executor:
+            try:
+                results = list(executor.map(run, jobs))
+            except BaseException:
+                # Ctrl-C only reaches this thread; stop queued and running
+                # builds so leaving the executor does not wait for them
+                executor.shutdown(wait=False, cancel_futures=True)
+                self.kill_running_builds()
+                raise
+        wall_clock = int(time.time() - start_time)
+        
+        for result in results:
+            status = "ok" if result.success else "FAILED"
+            logger.info(
+                f"  {Path(result.spec_file).name} (canister={result.canister_build}, "
+                f"acvp={result.acvp_build}): {status} in {result.duration_seconds}s"
+            )
+        build_time = sum(r.duration_seconds for r in results)
+        logger.info(f"Builds took {wall_clock}s wall clock for {build_time}s of build time")
+        self._report_compiler_cache(cache_before)
+        
+        return results
     
     def _copy_source_files_to_sources(self, spec_dir: Path) -> int:
         """
-        Copy source files from spec directory to /usr/src/photon/SOURCES/.
+        Copy source files from spec directory to PHOTON_SOURCES_DIR.
         
         RPM spec files reference source files that must be present in the
         SOURCES directory during build. This includes .inc files, config files,
@@ -786,7 +959,7 @@ diff -u .config.old .config || echo "Config differences detected (expected with
         Returns:
             Number of files copied
         """
-        sources_dir = Path("/usr/src/photon/SOURCES")
+        sources_dir = PHOTON_SOURCES_DIR
         sources_dir.mkdir(parents=True, exist_ok=True)
         
         # File patterns to copy (excludes .spec and .patch files)
@@ -861,48 +1034,38 @@ diff -u .config.old .config || echo "Config differences detected (expected with
         
         return build_dir
     
-    def build_all_specs(
+    def _prepare_spec_build(
         self,
         kernel_version: str,
         repo_dir: Path,
-        output_dir: Optional[Path] = None,
-        canister: int = 0,
-        acvp: int = 0,
         install_deps: bool = True,
-    ) -> List[BuildResult]:
+    ) -> Path:
         """
-        Build all kernel specs for a version.
+        Stage sources and dependencies for local spec builds.
+        
+        Copies the spec directory's sources to PHOTON_SOURCES_DIR, makes
+        sure the kernel tarball is there and optionally installs build
+        dependencies.
         
         Args:
             kernel_version: Kernel version
             repo_dir: Repository directory
-            output_dir: Output directory for logs (auto-generated if None)
-            canister: canister_build value
-            acvp: acvp_build value
             install_deps: Whether to install build dependencies via tdnf
         
         Returns:
-            List of BuildResult for each spec
+            Spec directory
         """
         mapping = KERNEL_MAPPINGS.get(kernel_version)
         if not mapping:
             raise ValueError(f"Invalid kernel version: {kernel_version}")
         
         spec_dir = repo_dir / mapping.spec_dir
-        results = []
-        
-        # Use auto-generated output directory if not specified
-        if output_dir is None:
-            output_dir = self.get_build_output_dir(kernel_version, repo_dir)
-        
-        output_dir.mkdir(parents=True, exist_ok=True)
-        logger.info(f"Build output directory: {output_dir}")
         
         # Copy source files to SOURCES directory before building
         self._copy_source_files_to_sources(spec_dir)
         
         # Get version from first available spec and ensure tarball exists
-        rpm_sources_dir = Path("/usr/src/photon/SOURCES")
+        rpm_sources_dir = PHOTON_SOURCES_DIR
         for spec_name in mapping.spec_files:
             spec_path = spec_dir / spec_name
             if spec_path.exists():
@@ -912,14 +1075,12 @@ diff -u .config.old .config || echo "Config differences detected (expected with
                 tarball_path = rpm_sources_dir / tarball_name
                 
                 if not tarball_path.exists():
-                    logger.info(f"Downloading kernel tarball {tarball_name}...")
-                    kernel_url = get_kernel_org_url(kernel_version)
-                    if kernel_url:
-                        tarball_url = f"{kernel_url}{tarball_name}"
-                        if not download_file(tarball_url, tarball_path):
-                            logger.error(f"Failed to download {tarball_name}")
-                        else:
-                            logger.info(f"Downloaded {tarball_name} to {rpm_sources_dir}")
+                    logger.info(f"Fetching kernel tarball {tarball_name}...")
+                    source_cache = get_shared_source_cache(self.config)
+                    if not source_cache.copy_tarball(full_version, rpm_sources_dir):
+                        logger.error(f"Failed to download {tarball_name}")
+                    else:
+                        logger.info(f"Placed {tarball_name} in {rpm_sources_dir}")
                 break
         
         # Install build dependencies if requested
@@ -927,17 +1088,82 @@ diff -u .config.old .config || echo "Config differences detected (expected with
             if not self.install_all_build_deps(spec_dir, mapping.spec_files):
                 logger.warning("Some build dependencies may not have been installed")
         
-        logger.info(f"Building kernel specs for {kernel_version}")
+        return spec_dir
+    
+    def _spec_build_jobs(
+        self,
+        spec_dir: Path,
+        spec_files: List[str],
+        output_dir: Path,
+        canister: int = 0,
+        acvp: int = 0,
+    ) -> List[BuildJob]:
+        """
+        Create one build job per existing spec file.
         
-        for spec_name in mapping.spec_files:
+        Logs go to ``output_dir/build_<spec>.log`` and each job builds in
+        its own ``output_dir/rpmbuild/<spec>`` topdir.
+        """
+        jobs = []
+        for spec_name in spec_files:
             spec_path = spec_dir / spec_name
             if not spec_path.exists():
                 logger.warning(f"Spec file not found: {spec_path}")
                 continue
             
-            build_log = output_dir / f"build_{spec_name.replace('.spec', '')}.log"
-            result = self.build_rpm(spec_path, build_log, canister, acvp)
-            results.append(result)
+            spec_stem = spec_name.replace(".spec", "")
+            jobs.append(BuildJob(
+                spec_path=spec_path,
+                build_log=output_dir / f"build_{spec_stem}.log",
+                canister=canister,
+                acvp=acvp,
+                topdir=output_dir / "rpmbuild" / spec_stem,
+            ))
+        return jobs
+    
+    def build_all_specs(
+        self,
+        kernel_version: str,
+        repo_dir: Path,
+        output_dir: Optional[Path] = None,
+        canister: int = 0,
+        acvp: int = 0,
+        install_deps: bool = True,
+    ) -> List[BuildResult]:
+        """
+        Build all kernel specs for a version.
+        
+        Specs are built concurrently (see run_build_jobs), each in its own
+        topdir under ``output_dir/rpmbuild``.
+        
+        Args:
+            kernel_version: Kernel version
+            repo_dir: Repository directory
+            output_dir: Output directory for logs (auto-generated if None)
+            canister: canister_build value
+            acvp: acvp_build value
+            install_deps: Whether to install build dependencies via tdnf
+        
+        Returns:
+            List of BuildResult for each spec
+        """
+        mapping = KERNEL_MAPPINGS.get(kernel_version)
+        if not mapping:
+            raise ValueError(f"Invalid kernel version: {kernel_version}")
+        
+        # Use auto-generated output directory if not specified
+        if output_dir is None:
+            output_dir = self.get_build_output_dir(kernel_version, repo_dir)
+        
+        output_dir.mkdir(parents=True, exist_ok=True)
+        logger.info(f"Build output directory: {output_dir}")
+        
+        spec_dir = self._prepare_spec_build(kernel_version, repo_dir, install_deps)
+        
+        logger.info(f"Building kernel specs for {kernel_version}")
+        
+        jobs = self._spec_build_jobs(spec_dir, mapping.spec_files, output_dir, canister, acvp)
+        results = self.run_build_jobs(jobs, sourcedir=PHOTON_SOURCES_DIR)
         
         success_count = sum(1 for r in results if r.success)
         fail_count = len(results) - success_count
@@ -951,18 +1177,27 @@ diff -u .config.old .config || echo "Config differences detected (expected with
         kernel_version: str,
         repo_dir: Path,
         output_dir: Path,
+        install_deps: bool = True,
     ) -> List[BuildResult]:
         """
         Build with all canister/acvp permutations.
         
+        Sources and dependencies are staged once, then every spec of every
+        permutation is scheduled as one batch of concurrent builds.
+        
         Args:
             kernel_version: Kernel version
             repo_dir: Repository directory
             output_dir: Output directory
+            install_deps: Whether to install build dependencies via tdnf
         
         Returns:
-            List of all BuildResults
+            List of all BuildResults, grouped by permutation
         """
+        mapping = KERNEL_MAPPINGS.get(kernel_version)
+        if not mapping:
+            raise ValueError(f"Invalid kernel version: {kernel_version}")
+        
         permutations = [
             (0, 0),  # Standard
             (1, 0),  # Canister
@@ -970,20 +1205,21 @@ diff -u .config.old .config || echo "Config differences detected (expected with
             (1, 1),  # Both
         ]
         
-        all_results = []
+        spec_dir = self._prepare_spec_build(kernel_version, repo_dir, install_deps)
         
+        jobs = []
         for canister, acvp in permutations:
-            logger.info(f"=== Permutation: canister={canister}, acvp={acvp} ===")
-            
             perm_output = output_dir / f"perm_c{canister}_a{acvp}"
             perm_output.mkdir(parents=True, exist_ok=True)
-            
-            results = self.build_all_specs(
-                kernel_version, repo_dir, perm_output, canister, acvp
-            )
-            all_results.extend(results)
+            jobs.extend(self._spec_build_jobs(spec_dir, mapping.spec_files, perm_output, canister, acvp))
+        
+        logger.info(f"Building {kernel_version} specs for {len(permutations)} canister/acvp permutations")
+        results = self.run_build_jobs(jobs, sourcedir=PHOTON_SOURCES_DIR)
+        
+        success_count = sum(1 for r in results if r.success)
+        logger.info(f"Build Summary: Success={success_count}, Failed={len(results) - success_count}")
         
-        return all_results
+        return results
 
 
 class KernelVersionUpdater:
@@ -1023,9 +1259,9 @@ class KernelVersionUpdater:
         
         logger.info(f"Downloading {tarball_name}...")
         
-        if download_file(tarball_url, tarball_path):
-            return tarball_path
-        return None
+        return get_shared_source_cache(self.config).copy_tarball(
+            full_version, sources_dir, [tarball_url]
+        )
     
     def update_version(
         self,
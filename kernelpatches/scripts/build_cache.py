@@ -0,0 +1,167 @@
+"""
+Compiler cache for kernel RPM builds.
+
+With ``config.build_ccache`` set, rpmbuild runs with a ccache masquerade
+directory first in PATH, so the kernel's ``gcc``/``cc`` calls go through
+ccache backed by ``config.cache_dir/ccache``. This speeds up repeated
+builds of the same spec and permutation, e.g. after a patch update only
+the affected objects are recompiled.
+
+Permutations do not generally share objects: Kbuild force-includes
+``kconfig.h`` and ``generated/autoconf.h`` in every compilation unit, so
+a canister/acvp define that changes ``.config`` makes every object miss.
+Objects can only be shared between topdirs with
+``config.build_ccache_share_topdirs`` (see ``build_env``).
+"""
+
+import os
+import shutil
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional
+
+from scripts.common import logger, run_command
+from scripts.config import DEFAULT_CONFIG, KernelConfig
+
+
+# Compiler names the kernel build invokes through PATH
+COMPILER_NAMES = ["gcc", "cc", "g++", "c++"]
+
+# Kernel builds embed no timestamps in most objects; freshly extracted
+# trees have new mtimes/ctimes that would otherwise force misses
+CCACHE_SLOPPINESS = "time_macros,include_file_mtime,include_file_ctime"
+
+
+@dataclass
+class CompilerCacheStats:
+    """ccache hit/miss counters."""
+    hits: int = 0
+    misses: int = 0
+    
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of cacheable compilations served from the cache."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+    
+    def __sub__(self, other: "CompilerCacheStats") -> "CompilerCacheStats":
+        return CompilerCacheStats(hits=self.hits - other.hits, misses=self.misses - other.misses)
+    
+    def summary(self) -> str:
+        """One-line human readable summary."""
+        return f"{self.hits} hits, {self.misses} misses ({self.hit_rate:.1%} hit rate)"
+
+
+class CompilerCache:
+    """
+    ccache setup and statistics for rpmbuild.
+    
+    Layout under ``config.cache_dir/ccache``:
+    - ``bin/`` masquerade symlinks (gcc, cc, ...) to the ccache binary
+    - everything else is ccache's own cache directory
+    """
+    
+    def __init__(self, config: Optional[KernelConfig] = None):
+        self.config = config or DEFAULT_CONFIG
+        self.cache_dir = self.config.cache_dir / "ccache"
+        self.bin_dir = self.cache_dir / "bin"
+        self.ccache = shutil.which("ccache")
+        self._prepared = False
+        self._lock = threading.Lock()
+    
+    @property
+    def available(self) -> bool:
+        """Check whether ccache is installed."""
+        return self.ccache is not None
+    
+    def _ccache_env(self) -> Dict[str, str]:
+        """Environment pointing ccache at this cache."""
+        return {**os.environ, "CCACHE_DIR": str(self.cache_dir)}
+    
+    def prepare(self) -> bool:
+        """
+        Create the cache and masquerade directory.
+        
+        Returns:
+            True if ccache can be used
+        """
+        with self._lock:
+            if self._prepared:
+                return True
+            if not self.available:
+                logger.warning("ccache not found, building without compiler cache")
+                return False
+            self._prepare()
+            self._prepared = True
+        return True
+    
+    def _prepare(self) -> None:
+        """Create masquerade links and size the cache."""
+        ccache = self.ccache
+        assert ccache is not None, "ccache is not available"
+        self.bin_dir.mkdir(parents=True, exist_ok=True)
+        for name in COMPILER_NAMES:
+            link = self.bin_dir / name
+            if link.is_symlink() and os.readlink(link) == ccache:
+                continue
+            if link.exists() or link.is_symlink():
+                link.unlink()
+            link.symlink_to(ccache)
+        
+        returncode, _, stderr = run_command(
+            [ccache, "--max-size", self.config.build_ccache_size], env=self._ccache_env()
+        )
+        if returncode != 0:
+            logger.warning(f"Could not set ccache size: {stderr.strip()}")
+        
+        logger.info(f"Using compiler cache {self.cache_dir} (max {self.config.build_ccache_size})")
+    
+    def build_env(self, base_dir: Optional[Path] = None) -> Dict[str, str]:
+        """
+        Get the environment for a cached rpmbuild run.
+        
+        Paths below ``base_dir`` are hashed relative to it. The working
+        directory is still hashed for ``-g`` compilations unless
+        ``config.build_ccache_share_topdirs`` is set; then topdirs share
+        objects, but the debug info of a hit records the working directory
+        of the topdir that first compiled it, which debugedit does not
+        rewrite for the other builds.
+        
+        Args:
+            base_dir: Directory containing all build topdirs
+        
+        Returns:
+            Environment variables for subprocess
+        """
+        env = self._ccache_env()
+        env["PATH"] = f"{self.bin_dir}{os.pathsep}{env.get('PATH', '')}"
+        env["CCACHE_SLOPPINESS"] = CCACHE_SLOPPINESS
+        if self.config.build_ccache_share_topdirs:
+            env["CCACHE_NOHASHDIR"] = "1"
+        if base_dir:
+            env["CCACHE_BASEDIR"] = str(base_dir)
+        return env
+    
+    def stats(self) -> Optional[CompilerCacheStats]:
+        """
+        Read the cache's cumulative hit/miss counters.
+        
+        Returns:
+            CompilerCacheStats, or None if they cannot be read
+        """
+        if self.ccache is None:
+            return None
+        returncode, stdout, _ = run_command([self.ccache, "--print-stats"], env=self._ccache_env())
+        if returncode != 0:
+            return None
+        
+        counters = {}
+        for line in stdout.splitlines():
+            key, _, value = line.partition("\t")
+            if value.strip().isdigit():
+                counters[key] = int(value)
+        return CompilerCacheStats(
+            hits=counters.get("direct_cache_hit", 0) + counters.get("preprocessed_cache_hit", 0),
+            misses=counters.get("cache_miss", 0),
+        )
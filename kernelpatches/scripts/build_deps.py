@@ -0,0 +1,161 @@
+"""
+Build dependency resolution cache for kernel RPM builds.
+
+Resolving BuildRequires means evaluating each spec with rpm and asking
+tdnf to install the result, which takes minutes even when nothing is
+missing. This module remembers, in ``config.cache_dir/build_deps.json``:
+
+- the BuildRequires rpm reported for each spec, keyed by path, size and
+  mtime, so unchanged specs are not evaluated again
+- which sets of requirements were satisfied, together with a fingerprint
+  of the rpm database at that time, so a repeated build with the same
+  requirements and an unchanged rpmdb does no package resolution at all
+"""
+
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from scripts.common import logger
+from scripts.config import DEFAULT_CONFIG, KernelConfig
+
+
+# rpm database directory; any install or removal changes its files
+RPMDB_DIR = Path("/var/lib/rpm")
+
+CACHE_VERSION = 1
+
+
+def rpmdb_fingerprint(rpmdb_dir: Optional[Path] = None) -> Optional[str]:
+    """
+    Fingerprint the installed package state.
+    
+    Hashes name, size and mtime of the rpm database files, which is much
+    cheaper than listing installed packages.
+    
+    Args:
+        rpmdb_dir: rpm database directory (default: RPMDB_DIR)
+    
+    Returns:
+        Hex digest, or None if the database cannot be read
+    """
+    rpmdb_dir = rpmdb_dir or RPMDB_DIR
+    try:
+        entries = sorted(
+            (entry.name, entry.stat().st_size, entry.stat().st_mtime_ns)
+            for entry in os.scandir(rpmdb_dir)
+            if entry.is_file()
+        )
+    except OSError:
+        return None
+    if not entries:
+        return None
+    return hashlib.sha256(repr(entries).encode()).hexdigest()
+
+
+def requirements_key(requirements: Iterable[str]) -> str:
+    """Get the cache key of a set of requirements."""
+    return hashlib.sha256("\n".join(sorted(set(requirements))).encode()).hexdigest()
+
+
+class BuildDepsCache:
+    """
+    Persistent cache of spec BuildRequires and satisfied requirement sets.
+    
+    Thread-safe; every update is written to disk atomically.
+    """
+    
+    def __init__(self, config: Optional[KernelConfig] = None):
+        self.config = config or DEFAULT_CONFIG
+        self.path = self.config.cache_dir / "build_deps.json"
+        self._lock = threading.Lock()
+        self._data: Optional[Dict] = None
+    
+    def _load(self) -> Dict:
+        """Load the cache file (caller holds the lock)."""
+        if self._data is None:
+            data = {}
+            try:
+                data = json.loads(self.path.read_text())
+            except FileNotFoundError:
+                pass
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable build dependency cache {self.path}: {e}")
+            if data.get("version") != CACHE_VERSION:
+                data = {"version": CACHE_VERSION, "specs": {}, "satisfied": {}}
+            self._data = data
+        return self._data
+    
+    def _save(self) -> None:
+        """Write the cache file atomically (caller holds the lock)."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(self._data, indent=2, sort_keys=True))
+        os.replace(tmp_path, self.path)
+    
+    @staticmethod
+    def _spec_stamp(spec_path: Path) -> Optional[List]:
+        """Identify a spec file version by size and mtime."""
+        try:
+            stat = spec_path.stat()
+        except OSError:
+            return None
+        return [stat.st_size, stat.st_mtime_ns]
+    
+    def spec_requires(self, spec_path: Path) -> Optional[List[str]]:
+        """
+        Get the cached BuildRequires of a spec.
+        
+        Returns:
+            Package names, or None if the spec changed or was never seen
+        """
+        stamp = self._spec_stamp(spec_path)
+        with self._lock:
+            entry = self._load()["specs"].get(str(spec_path.resolve()))
+        if stamp is None or not entry or entry["stamp"] != stamp:
+            return None
+        requires: List[str] = entry["requires"]
+        return requires
+    
+    def store_spec_requires(self, spec_path: Path, requires: List[str]) -> None:
+        """Remember the BuildRequires of a spec."""
+        stamp = self._spec_stamp(spec_path)
+        if stamp is None:
+            return
+        with self._lock:
+            self._load()["specs"][str(spec_path.resolve())] = {"stamp": stamp, "requires": requires}
+            self._save()
+    
+    def is_satisfied(self, requirements: Iterable[str]) -> bool:
+        """
+        Check whether requirements were satisfied with the current rpmdb.
+        
+        Args:
+            requirements: Package names or capabilities
+        
+        Returns:
+            True if the same set was satisfied and no package has been
+            installed or removed since
+        """
+        fingerprint = rpmdb_fingerprint()
+        if fingerprint is None:
+            return False
+        with self._lock:
+            entry = self._load()["satisfied"].get(requirements_key(requirements))
+        return bool(entry) and entry["rpmdb"] == fingerprint
+    
+    def mark_satisfied(self, requirements: Iterable[str]) -> None:
+        """Record that requirements are installed in the current rpmdb."""
+        fingerprint = rpmdb_fingerprint()
+        if fingerprint is None:
+            return
+        with self._lock:
+            self._load()["satisfied"][requirements_key(requirements)] = {
+                "rpmdb": fingerprint,
+                "checked": datetime.now().isoformat(),
+            }
+            self._save()
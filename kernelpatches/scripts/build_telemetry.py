@@ -0,0 +1,186 @@
+"""
+Live telemetry for rpmbuild runs.
+
+rpmbuild output is parsed line by line while the build runs. Section
+markers (``Executing(%prep)``, ``Executing(%build)``, ...), kernel make
+progress (``CC``/``LD``/``AR`` lines) and written packages become
+timestamped events. Per-phase durations end up in BuildResult and the full
+event list is written as a JSON timeline next to the build log, so slow
+phases can be compared between builds.
+"""
+
+import json
+import re
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from scripts.common import logger
+
+
+# "Executing(%build): /bin/sh -e /var/tmp/rpm-tmp.XYZ"
+PHASE_PATTERN = re.compile(r"^Executing\((%?[\w-]+)\):")
+
+# Kbuild quiet output, e.g. "  CC [M]  drivers/net/foo.o"
+COMPILE_PATTERN = re.compile(r"^\s+(CC|AS|LD|AR|HOSTCC|HOSTLD)( \[M\])?\s+\S")
+
+PACKAGE_PATTERN = re.compile(r"^Processing files: (\S+)")
+WROTE_PATTERN = re.compile(r"^Wrote: (\S+\.rpm)")
+
+# rpmbuild packages between %install/%check and %clean without a marker
+PACKAGE_PHASE = "package"
+
+# Emit a progress event every this many compiled objects
+PROGRESS_EVERY = 1000
+
+
+@dataclass
+class BuildEvent:
+    """One timestamped rpmbuild event."""
+    timestamp: datetime
+    elapsed: float  # Seconds since the build started
+    kind: str  # "phase", "progress", "rpm" or "end"
+    name: str
+    detail: Optional[str] = None
+    
+    def to_dict(self) -> Dict:
+        """Convert to a JSON-serializable dict."""
+        return {
+            "timestamp": self.timestamp.isoformat(),
+            "elapsed": round(self.elapsed, 3),
+            "kind": self.kind,
+            "name": self.name,
+            "detail": self.detail,
+        }
+
+
+class BuildTelemetry:
+    """
+    Turn a streaming rpmbuild log into phase events and durations.
+    
+    Example:
+        telemetry = BuildTelemetry("linux-esx.spec")
+        for line in process.stdout:
+            telemetry.feed(line)
+        telemetry.finish(process.wait())
+        telemetry.write_timeline(path)
+    """
+    
+    def __init__(self, spec_name: str):
+        self.spec_name = spec_name
+        self.started_at = datetime.now()
+        self.events: List[BuildEvent] = []
+        self.phase_durations: Dict[str, float] = {}
+        self.compiled_objects = 0
+        self.rpms: List[str] = []
+        self.returncode: Optional[int] = None
+        self.timed_out = False
+        self._start = time.monotonic()
+        self._phase: Optional[str] = None
+        self._phase_start = 0.0
+    
+    @property
+    def phase(self) -> Optional[str]:
+        """Currently running phase."""
+        return self._phase
+    
+    def _event(self, kind: str, name: str, detail: Optional[str] = None) -> BuildEvent:
+        """Record an event at the current time."""
+        event = BuildEvent(
+            timestamp=datetime.now(),
+            elapsed=time.monotonic() - self._start,
+            kind=kind,
+            name=name,
+            detail=detail,
+        )
+        self.events.append(event)
+        return event
+    
+    def _enter_phase(self, phase: Optional[str]) -> None:
+        """Close the running phase and start the next one."""
+        now = time.monotonic() - self._start
+        if self._phase is not None:
+            duration = now - self._phase_start
+            self.phase_durations[self._phase] = self.phase_durations.get(self._phase, 0.0) + duration
+        self._phase = phase
+        self._phase_start = now
+        if phase is not None:
+            self._event("phase", phase)
+            logger.info(f"  {self.spec_name}: {phase} started after {int(now)}s")
+    
+    def feed(self, line: str) -> None:
+        """
+        Parse one line of rpmbuild output.
+        
+        Args:
+            line: Output line, with or without trailing newline
+        """
+        match = PHASE_PATTERN.match(line)
+        if match:
+            self._enter_phase(match.group(1))
+            return
+        
+        if COMPILE_PATTERN.match(line):
+            self.compiled_objects += 1
+            if self.compiled_objects % PROGRESS_EVERY == 0:
+                event = self._event("progress", self._phase or "", f"{self.compiled_objects} objects")
+                logger.debug(f"  {self.spec_name}: {event.detail} after {int(event.elapsed)}s")
+            return
+        
+        match = PACKAGE_PATTERN.match(line)
+        if match:
+            if self._phase != PACKAGE_PHASE:
+                self._enter_phase(PACKAGE_PHASE)
+            return
+        
+        match = WROTE_PATTERN.match(line)
+        if match:
+            self.rpms.append(match.group(1))
+            self._event("rpm", Path(match.group(1)).name)
+    
+    def finish(self, returncode: Optional[int], timed_out: bool = False) -> None:
+        """
+        Close the last phase once rpmbuild exited.
+        
+        Args:
+            returncode: rpmbuild exit code (None if it was killed)
+            timed_out: Whether the build was killed for exceeding the timeout
+        """
+        self._enter_phase(None)
+        self.returncode = returncode
+        self.timed_out = timed_out
+        status = "timeout" if timed_out else f"exit {returncode}"
+        self._event("end", status, f"{self.compiled_objects} objects, {len(self.rpms)} rpms")
+    
+    def summary(self) -> str:
+        """One-line per-phase duration summary."""
+        return ", ".join(f"{phase} {int(seconds)}s" for phase, seconds in self.phase_durations.items())
+    
+    def to_dict(self) -> Dict:
+        """Convert to a JSON-serializable timeline."""
+        return {
+            "spec": self.spec_name,
+            "started": self.started_at.isoformat(),
+            "returncode": self.returncode,
+            "timed_out": self.timed_out,
+            "phase_durations": {phase: round(s, 3) for phase, s in self.phase_durations.items()},
+            "compiled_objects": self.compiled_objects,
+            "rpms": self.rpms,
+            "events": [event.to_dict() for event in self.events],
+        }
+    
+    def write_timeline(self, path: Path) -> Path:
+        """
+        Write the timeline as JSON.
+        
+        Args:
+            path: Output file
+        
+        Returns:
+            ``path``
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.to_dict(), indent=2))
+        return path
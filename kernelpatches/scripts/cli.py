@@ -182,8 +182,15 @@ def parse_kernel_arg(kernel: str) -> List[str]:
               help="Photon repository URL")
 @click.option("--skip-clone", is_flag=True, help="Skip cloning repos (use existing or fail)")
 @click.option("--update-repos", is_flag=True, help="Force update existing repos")
+@click.option("--jobs", "-j", type=int, default=None,
+              help="Parallel workers for patch analysis (default: CPU count)")
+@click.option("--partial-source", is_flag=True,
+              help="Extract only the kernel source files touched by CVE patches")
+@click.option("--since-last-run", is_flag=True,
+              help="Only re-evaluate CVEs changed since the previous matrix in the output directory")
 @click.pass_context
-def matrix(ctx, output: str, kernel: str, repo_base: Optional[str], repo_url: str, skip_clone: bool, update_repos: bool):
+def matrix(ctx, output: str, kernel: str, repo_base: Optional[str], repo_url: str, skip_clone: bool,
+           update_repos: bool, jobs: Optional[int], partial_source: bool, since_last_run: bool):
     """
     Generate comprehensive CVE coverage matrix.
     
@@ -215,10 +222,24 @@ def matrix(ctx, output: str, kernel: str, repo_base: Optional[str], repo_url: st
         
         # Update existing repos before generating matrix
         photon-kernel-backport matrix --kernel 5.10 --update-repos
+        
+        # Limit patch analysis to 8 parallel workers
+        photon-kernel-backport matrix --jobs 8
+        
+        # Extract only the source files the CVE patches touch
+        photon-kernel-backport matrix --partial-source
+        
+        # Daily cron: only re-evaluate CVEs changed since the previous run
+        photon-kernel-backport matrix --since-last-run
     """
     import asyncio
     from scripts.generate_full_matrix import (
         fetch_all_cves,
+        fetch_changed_cves,
+        load_matrix_state,
+        build_matrix_delta,
+        complete_cve_map,
+        save_matrix_state,
         download_stable_patches_async,
         collect_existing_cve_patches,
         download_cve_patches,
@@ -295,8 +316,12 @@ def matrix(ctx, output: str, kernel: str, repo_base: Optional[str], repo_url: st
                 console.print(f"  {kv}: [yellow]Could not determine version[/yellow]")
     
     async def run():
-        # Fetch CVEs (Step 3)
-        cves = await fetch_all_cves(output_dir, config, kernel_versions[0])
+        # Fetch CVEs (Step 3) - only those changed since the previous matrix in delta mode
+        previous = load_matrix_state(output_dir, kernel_versions) if since_last_run else None
+        if previous:
+            cves = await fetch_changed_cves(config, previous[1]["nvd_last_modified"], step_num=3)
+        else:
+            cves = await fetch_all_cves(output_dir, config, kernel_versions[0])
         
         # Download stable patches (Step 4 - only from current Photon version to latest)
         patch_dirs, photon_versions = await download_stable_patches_async(
@@ -305,7 +330,17 @@ def matrix(ctx, output: str, kernel: str, repo_base: Optional[str], repo_url: st
         
         # Build initial matrix (Step 5) to determine which CVE patches are missing
         current_step = 5
-        mat = build_matrix(cves, kernel_versions, repo_dirs, patch_dirs, config, photon_versions, step_num=current_step)
+        mat = None
+        if previous:
+            mat = build_matrix_delta(
+                *previous, cves, kernel_versions, repo_dirs, patch_dirs, config, photon_versions,
+                step_num=current_step,
+            )
+            if mat is None:
+                previous = None
+                cves = await fetch_all_cves(output_dir, config, kernel_versions[0])
+        if mat is None:
+            mat = build_matrix(cves, kernel_versions, repo_dirs, patch_dirs, config, photon_versions, step_num=current_step)
         current_step += 1
         
         # Download CVE patches (Step 6)
@@ -321,11 +356,14 @@ def matrix(ctx, output: str, kernel: str, repo_base: Optional[str], repo_url: st
             photon_versions,
             output_dir,
             config,
+            cve_patch_dirs=cve_patch_dirs if partial_source else None,
         )
         current_step += 1
         
         # Build CVE map for CPE lookup (no API calls needed - data from NVD feeds)
         cve_map = {cve.cve_id: cve for cve in cves}
+        if previous:
+            complete_cve_map(cve_map, kernel_versions, cve_patch_dirs, output_dir, config)
         
         # Analyze CVE patches against kernel source (Step 8)
         analysis_results = analyze_cve_patches_against_source(
@@ -337,6 +375,7 @@ def matrix(ctx, output: str, kernel: str, repo_base: Optional[str], repo_url: st
             step_num=current_step,
             source_dirs=source_dirs,
             cve_map=cve_map,
+            jobs=jobs,
         )
         current_step += 1
         
@@ -345,7 +384,8 @@ def matrix(ctx, output: str, kernel: str, repo_base: Optional[str], repo_url: st
         current_step += 1
         
         # Save matrix and print summary
-        save_matrix(mat, output_dir, step_num=current_step)
+        json_path = save_matrix(mat, output_dir, step_num=current_step)
+        save_matrix_state(output_dir, json_path, kernel_versions, repo_dirs, patch_dirs, config, photon_versions)
         print_summary(mat, analysis_results)
     
     asyncio.run(run())
@@ -353,30 +393,48 @@ def matrix(ctx, output: str, kernel: str, repo_base: Optional[str], repo_url: st
 
 
 @main.command()
-@click.option("--kernel", "-k", required=True, type=click.Choice(SUPPORTED_KERNELS),
-              help="Kernel version to analyze")
+@click.option("--kernel", "-k", required=True,
+              help="Kernel version(s) to analyze: 5.10, 6.1, 6.12, comma-separated list, or 'all'")
 @click.option("--cve-list", type=click.Path(exists=True),
               help="File with CVE IDs (one per line), or omit to analyze all kernel.org CVEs")
 @click.option("--output", "-o", type=click.Path(), help="Output directory for reports")
+@click.option("--modified-since", type=click.DateTime(),
+              help="Only analyze kernel.org CVEs modified in NVD after this UTC time")
 @click.pass_context
-def gaps(ctx, kernel: str, cve_list: Optional[str], output: Optional[str]):
+def gaps(ctx, kernel: str, cve_list: Optional[str], output: Optional[str],
+         modified_since: Optional[datetime]):
     """
     Detect CVE backport gaps using local NVD feed cache.
     
     Downloads NVD feeds once, then analyzes all CVEs locally (fast, no per-CVE API calls).
     Identifies CVEs that affect the target kernel but have no official stable backport.
+    Multiple kernels are analyzed in a single pass over the CVEs, one report each.
     
     Examples:
     
         # Analyze all kernel.org CVEs from NVD feeds
         kernel-backport gaps --kernel 6.1
         
+        # Analyze several kernels in one pass
+        kernel-backport gaps --kernel 5.10,6.1,6.12
+        
         # Analyze specific CVEs from a file
         kernel-backport gaps --kernel 5.10 --cve-list /tmp/cves.txt
+        
+        # Only CVEs changed in NVD since a date
+        kernel-backport gaps --kernel 6.1 --modified-since 2025-01-01
     """
-    from scripts.cve_gap_detection import run_gap_detection
+    from scripts.cve_gap_detection import run_gap_detection_multi
     from scripts.common import get_photon_kernel_version
     
+    kernel_versions = parse_kernel_arg(kernel)
+    unsupported = [kv for kv in kernel_versions if kv not in SUPPORTED_KERNELS]
+    if unsupported:
+        console.print(f"[red]Unsupported kernel(s): {', '.join(unsupported)} "
+                      f"(choose from {', '.join(SUPPORTED_KERNELS)})[/red]")
+        sys.exit(1)
+    kernels_str = ", ".join(kernel_versions)
+    
     config = KernelConfig.from_env()
     
     report_dir = Path(output) if output else config.gap_report_dir
@@ -386,31 +444,37 @@ def gaps(ctx, kernel: str, cve_list: Optional[str], output: Optional[str]):
     if cve_list:
         with open(cve_list) as f:
             cve_ids = [line.strip() for line in f if line.strip().startswith("CVE-")]
-        console.print(f"Analyzing {len(cve_ids)} CVEs from file for kernel {kernel}...")
+        console.print(f"Analyzing {len(cve_ids)} CVEs from file for kernel {kernels_str}...")
+    elif modified_since:
+        console.print(f"Analyzing kernel.org CVEs modified since {modified_since} for kernel {kernels_str}...")
     else:
-        console.print(f"Analyzing all kernel.org CVEs from NVD feeds for kernel {kernel}...")
+        console.print(f"Analyzing all kernel.org CVEs from NVD feeds for kernel {kernels_str}...")
     
     # Progress callback
     def progress(processed, total, cve_id):
         if processed % 500 == 0 or processed == total:
             console.print(f"  [{processed}/{total}] Processing...")
     
-    # Get current version
-    repo_dir = config.get_repo_dir(kernel)
-    current_version = "unknown"
-    if repo_dir and repo_dir.exists():
-        current_version = get_photon_kernel_version(kernel, repo_dir) or "unknown"
+    # Get current version per kernel
+    targets = {}
+    for kv in kernel_versions:
+        repo_dir = config.get_repo_dir(kv)
+        current_version = "unknown"
+        if repo_dir and repo_dir.exists():
+            current_version = get_photon_kernel_version(kv, repo_dir) or "unknown"
+        targets[kv] = current_version
     
     try:
-        report_path = run_gap_detection(
-            kernel,
-            current_version,
+        report_paths = run_gap_detection_multi(
+            targets,
             cve_ids,
             report_dir,
             config,
             progress_callback=progress,
+            modified_since=modified_since,
         )
-        console.print(f"[green]Gap detection complete. Report: {report_path}[/green]")
+        for kv, report_path in report_paths.items():
+            console.print(f"[green]Gap detection complete for {kv}. Report: {report_path}[/green]")
         
     except Exception as e:
         console.print(f"[red]Error: {e}[/red]")
@@ -509,6 +573,9 @@ def download(ctx, kernel: str, output: Optional[str]):
 @click.option("--acvp", type=int, default=0, help="acvp_build value (0 or 1)")
 @click.option("--all-permutations", is_flag=True, help="Build all canister/acvp combinations")
 @click.option("--skip-deps", is_flag=True, help="Skip installing build dependencies")
+@click.option("--jobs", "-j", type=int, default=0,
+              help="Concurrent rpmbuild jobs for --all-permutations (default: auto from CPUs and memory)")
+@click.option("--ccache", is_flag=True, help="Compile through ccache so repeated builds reuse objects")
 @click.pass_context
 def build(
     ctx,
@@ -519,6 +586,8 @@ def build(
     acvp: int,
     all_permutations: bool,
     skip_deps: bool,
+    jobs: int,
+    ccache: bool,
 ):
     """
     Build kernel RPMs using SRPM from packages.broadcom.com.
@@ -527,7 +596,7 @@ def build(
     and builds the kernel RPMs. Build dependencies are automatically
     installed via tdnf unless --skip-deps is specified.
     
-    Output RPMs are placed in /usr/local/src/RPMS/x86_64/
+    The RPM output directory of each build is listed in the results.
     
     Examples:
     
@@ -540,12 +609,17 @@ def build(
         # Build linux and linux-esx
         photon-kernel-backport build --kernel 5.10 --specs "linux.spec,linux-esx.spec"
         
-        # Build all canister/acvp permutations
-        photon-kernel-backport build --kernel 5.10 --all-permutations
+        # Build all canister/acvp permutations, at most 4 builds at a time
+        photon-kernel-backport build --kernel 5.10 --all-permutations --jobs 4
+        
+        # Reuse compiled objects between permutations
+        photon-kernel-backport build --kernel 5.10 --all-permutations --ccache
     """
     from scripts.build import KernelBuilder
     
     config = KernelConfig.from_env()
+    config.build_jobs = jobs
+    config.build_ccache = ccache
     builder = KernelBuilder(config)
     
     # Verify basic dependencies
@@ -568,7 +642,7 @@ def build(
                 console.print(f"[red]Repository not found for kernel {kernel}[/red]")
                 sys.exit(1)
             output_dir = Path(output) if output else builder.get_build_output_dir(kernel, repo_dir)
-            results = builder.build_all_permutations(kernel, repo_dir, output_dir)
+            results = builder.build_all_permutations(kernel, repo_dir, output_dir, install_deps=not skip_deps)
         else:
             if spec_filter:
                 console.print(f"[bold]Building kernel {kernel} from SRPM: {', '.join(spec_filter)}[/bold]")
@@ -593,12 +667,20 @@ def build(
             console.print(f"  {status} {Path(r.spec_file).name}: {r.version}-{r.release}")
             if r.duration_seconds:
                 console.print(f"       Duration: {r.duration_seconds}s")
+            if r.phase_durations:
+                phases = ", ".join(f"{phase} {int(seconds)}s" for phase, seconds in r.phase_durations.items())
+                console.print(f"       Phases: {phases}")
+            if r.timeline_file:
+                console.print(f"       Timeline: {r.timeline_file}")
             if not r.success and r.error_message:
                 console.print(f"       Error: {r.error_message}")
             if r.log_file:
                 console.print(f"       Log: {r.log_file}")
+            if r.rpm_dir:
+                console.print(f"       RPMs: {r.rpm_dir}")
         
-        console.print(f"\n  RPMs: /usr/local/src/RPMS/x86_64/")
+        if builder.cache_stats:
+            console.print(f"\n  Compiler cache: {builder.cache_stats.summary()}")
         
         if failed > 0:
             sys.exit(1)
@@ -0,0 +1,248 @@
+"""
+Shared store of upstream fix commit patches.
+
+CVE fix commits are downloaded from git.kernel.org once into
+``config.cache_dir/commit_patches``, keyed by commit SHA, and hard-linked
+into per-kernel directories such as ``cve_patches/<kv>``. Downloads share
+one HTTP session, are bounded by ``config.download_concurrency``, retry
+with backoff on 429/5xx, and a commit requested by several kernels at
+once is fetched a single time.
+"""
+
+import asyncio
+import os
+import re
+import shutil
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional
+
+import aiohttp
+
+from scripts.common import logger
+from scripts.config import DEFAULT_CONFIG, KernelConfig
+
+
+COMMIT_PATCH_URL = "https://git.kernel.org/pub/scm/linux/kernel/git/stable/linux.git/patch/?id={sha}"
+
+# HTTP statuses worth retrying (rate limiting and server errors)
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Upper bound in seconds for a server-requested Retry-After delay
+MAX_RETRY_DELAY = 60
+
+
+def commit_sha(commit: str) -> Optional[str]:
+    """
+    Get the commit SHA from a fix commit reference.
+    
+    Args:
+        commit: Bare SHA or a URL containing a 40-character SHA
+    
+    Returns:
+        The SHA, or None if a URL holds no SHA
+    """
+    if "/" not in commit:
+        return commit
+    match = re.search(r"/([a-f0-9]{40})", commit)
+    return match.group(1) if match else None
+
+
+@dataclass
+class PatchDownloadStats:
+    """Counters for one batch of commit patch downloads."""
+    downloaded: int = 0
+    reused: int = 0  # Already in the store or fetched for another kernel
+    failed: int = 0
+    bytes: int = 0
+    seconds: float = 0.0
+    
+    @property
+    def bytes_per_sec(self) -> float:
+        """Download throughput."""
+        return self.bytes / self.seconds if self.seconds > 0 else 0.0
+    
+    def summary(self) -> str:
+        """One-line human readable summary."""
+        return (
+            f"{self.downloaded} downloaded ({self.bytes / 1024 / 1024:.1f} MB in {self.seconds:.1f}s, "
+            f"{self.bytes_per_sec / 1024:.1f} KB/s), {self.reused} reused, {self.failed} failed"
+        )
+
+
+class CommitPatchStore:
+    """
+    Content-addressed store of git.kernel.org commit patches.
+    
+    Layout under ``config.cache_dir/commit_patches``:
+    - ``<sha[:2]>/<sha>.patch`` patch text of one upstream commit
+    
+    Patches are written to a temporary file and renamed into place, so a
+    stored patch is always complete. Stored patches are shared and must be
+    treated as read-only.
+    """
+    
+    def __init__(self, config: Optional[KernelConfig] = None):
+        self.config = config or DEFAULT_CONFIG
+        self.root = self.config.cache_dir / "commit_patches"
+        self.root.mkdir(parents=True, exist_ok=True)
+    
+    def patch_path(self, sha: str) -> Path:
+        """Get the stored patch path for a commit."""
+        return self.root / sha[:2] / f"{sha}.patch"
+    
+    def has(self, sha: str) -> bool:
+        """Check whether a commit's patch is stored."""
+        return self.patch_path(sha).exists()
+    
+    def link(self, sha: str, dest: Path) -> Path:
+        """
+        Place a stored patch at ``dest``.
+        
+        Hard-links when possible so each patch is stored once on disk.
+        
+        Returns:
+            ``dest``
+        """
+        if dest.exists():
+            return dest
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.link(self.patch_path(sha), dest)
+        except OSError:
+            shutil.copy2(self.patch_path(sha), dest)
+        return dest
+    
+    def write(self, sha: str, data: bytes) -> Path:
+        """Store a commit patch atomically."""
+        path = self.patch_path(sha)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+        return path
+    
+    def downloader(self) -> "CommitPatchDownloader":
+        """Create a downloader for one batch of commits (use as ``async with``)."""
+        return CommitPatchDownloader(self)
+
+
+class CommitPatchDownloader:
+    """
+    Download a batch of commit patches into a CommitPatchStore.
+    
+    One HTTP session is shared by the whole batch and concurrency is
+    bounded by ``config.download_concurrency``. Each commit is requested
+    at most once per batch: concurrent and repeated requests (e.g. the
+    same fix for several kernels) share the first result, including
+    failures.
+    
+    Example:
+        async with store.downloader() as downloader:
+            path = await downloader.fetch(sha)
+        print(downloader.stats.summary())
+    """
+    
+    def __init__(self, store: CommitPatchStore):
+        self.store = store
+        self.config = store.config
+        self.stats = PatchDownloadStats()
+        self._results: Dict[str, asyncio.Future[Optional[Path]]] = {}
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore = asyncio.Semaphore(max(1, self.config.download_concurrency))
+        self._start = 0.0
+    
+    async def __aenter__(self) -> "CommitPatchDownloader":
+        self._session = aiohttp.ClientSession()
+        self._start = time.perf_counter()
+        return self
+    
+    async def __aexit__(self, *args) -> None:
+        self.stats.seconds = time.perf_counter() - self._start
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+    
+    async def fetch(self, sha: str) -> Optional[Path]:
+        """
+        Get a commit's stored patch, downloading it if needed.
+        
+        Args:
+            sha: Commit SHA
+        
+        Returns:
+            Stored patch path, or None if the download failed
+        """
+        pending = self._results.get(sha)
+        if pending is not None:
+            self.stats.reused += 1
+            return await pending
+        if self.store.has(sha):
+            self.stats.reused += 1
+            return self.store.patch_path(sha)
+        
+        pending = asyncio.ensure_future(self._download(sha))
+        self._results[sha] = pending
+        return await pending
+    
+    async def _download(self, sha: str) -> Optional[Path]:
+        """
+        Download one commit patch, retrying with backoff on 429/5xx.
+        
+        A download slot is held only while a request is in flight, so a
+        commit that is backing off does not stall the rest of the batch.
+        """
+        session = self._session
+        assert session is not None, "use the downloader as 'async with'"
+        url = COMMIT_PATCH_URL.format(sha=sha)
+        retries = max(1, self.config.network_retries)
+        for attempt in range(1, retries + 1):
+            delay = 2 ** attempt
+            try:
+                async with self._semaphore:
+                    async with session.get(url, timeout=aiohttp.ClientTimeout(total=30)) as response:
+                        if response.status == 200:
+                            data = await response.read()
+                            path = await asyncio.to_thread(self.store.write, sha, data)
+                            self.stats.downloaded += 1
+                            self.stats.bytes += len(data)
+                            return path
+                        if response.status not in RETRY_STATUSES:
+                            logger.debug(f"Commit {sha[:12]}: HTTP {response.status}")
+                            break
+                        retry_after = response.headers.get("Retry-After", "")
+                        if retry_after.isdigit():
+                            delay = min(int(retry_after), MAX_RETRY_DELAY)
+                        logger.debug(f"Commit {sha[:12]}: HTTP {response.status} (attempt {attempt}/{retries})")
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.debug(f"Commit {sha[:12]}: {e} (attempt {attempt}/{retries})")
+            if attempt < retries:
+                await asyncio.sleep(delay)
+        self.stats.failed += 1
+        return None
+
+
+# Shared store instances, one per cache directory
+_shared_stores: Dict[Path, CommitPatchStore] = {}
+_shared_lock = threading.Lock()
+
+
+def get_shared_patch_store(config: Optional[KernelConfig] = None) -> CommitPatchStore:
+    """
+    Get the process-wide commit patch store for a configuration.
+    
+    Args:
+        config: Kernel configuration
+    
+    Returns:
+        Shared CommitPatchStore for ``config.cache_dir``
+    """
+    config = config or DEFAULT_CONFIG
+    with _shared_lock:
+        store = _shared_stores.get(config.cache_dir)
+        if store is None:
+            store = CommitPatchStore(config)
+            _shared_stores[config.cache_dir] = store
+        return store
@@ -11,14 +11,14 @@ import subprocess
 import time
 from datetime import datetime
 from pathlib import Path
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 
 import requests
 from rich.console import Console
 from rich.logging import RichHandler
 
 from scripts.config import KernelConfig, DEFAULT_CONFIG, KERNEL_MAPPINGS
-from scripts.models import KernelVersion, Patch, PatchTarget
+from scripts.models import Patch, PatchTarget, version_tuple
 
 
 # Rich console for output
@@ -173,6 +173,7 @@ def run_command(
     timeout: Optional[int] = None,
     capture_output: bool = True,
     check: bool = False,
+    env: Optional[Dict[str, str]] = None,
 ) -> Tuple[int, str, str]:
     """
     Run a shell command.
@@ -183,6 +184,7 @@ def run_command(
         timeout: Command timeout in seconds
         capture_output: Capture stdout and stderr
         check: Raise exception on non-zero exit
+        env: Environment (default: inherit)
     
     Returns:
         Tuple of (return_code, stdout, stderr)
@@ -195,6 +197,7 @@ def run_command(
             capture_output=capture_output,
             text=True,
             check=check,
+            env=env,
         )
         return result.returncode, result.stdout or "", result.stderr or ""
     except subprocess.TimeoutExpired:
@@ -242,9 +245,7 @@ def version_less_than(v1: str, v2: str) -> bool:
     Returns:
         True if v1 < v2
     """
-    kv1 = KernelVersion.parse(v1)
-    kv2 = KernelVersion.parse(v2)
-    return kv1 < kv2
+    return version_tuple(v1) < version_tuple(v2)
 
 
 def get_photon_kernel_version(kernel_version: str, repo_dir: Path) -> Optional[str]:
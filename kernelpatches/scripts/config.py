@@ -77,11 +77,13 @@ class KernelConfig:
     # Network settings
     network_timeout: int = 30
     network_retries: int = 3
+    download_concurrency: int = 8  # parallel patch downloads from kernel.org
     
     # NVD API configuration
     nvd_api_base: str = "https://services.nvd.nist.gov/rest/json/cves/2.0"
     nvd_feed_base: str = "https://nvd.nist.gov/feeds/json/cve/2.0"
     kernel_org_cna: str = "416baaa9-dc9f-4396-8d5f-8c081fb06d67"
+    nvd_feed_concurrency: int = 4  # parallel NVD feed downloads
     
     # GitHub API
     github_api_url: str = "https://api.github.com"
@@ -99,6 +101,13 @@ class KernelConfig:
     
     # Build settings
     build_timeout: int = 3600  # 1 hour
+    build_jobs: int = 0  # concurrent rpmbuild jobs (0 = auto from CPUs and memory)
+    build_job_memory_mb: int = 4096  # memory to allow per concurrent kernel build
+    build_ccache: bool = False  # compile through ccache in cache_dir/ccache
+    build_ccache_size: str = "20G"  # ccache max size
+    # Share ccache objects between topdirs; cache hits then carry the
+    # debug info working directory of the topdir that compiled them
+    build_ccache_share_topdirs: bool = False
     
     # Stable kernel branches for gap detection
     stable_branches: List[str] = field(
@@ -37,10 +37,11 @@ from scripts.config import (
     get_kernel_org_url,
 )
 from scripts.build import KernelBuilder
-from scripts.cve_gap_detection import GapDetector, NVDFeedCache
+from scripts.cve_gap_detection import GapDetector
 from scripts.cve_matrix import CVEMatrixBuilder, CVEPatchState
 from scripts.cve_sources import NVDFetcher
 from scripts.models import BuildResult, CVE, Severity
+from scripts.nvd_feeds import NVDFeedCache, get_shared_feed_cache
 from scripts.spec_file import SpecFile
 from scripts.stable_patches import StablePatchManager
 
@@ -462,9 +463,8 @@ class CVECoverageBuildWorkflow:
         downloaded = []
         
         if not self._feed_cache:
-            self._feed_cache = NVDFeedCache(self.config)
-            self._feed_cache.update_feeds()
-            self._feed_cache.load_index()
+            self._feed_cache = get_shared_feed_cache(self.config)
+            self._feed_cache.refresh()
         
         for cve_id in cve_ids[:100]:
             cve_data = self._feed_cache.get_cve(cve_id)
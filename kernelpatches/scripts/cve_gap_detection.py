@@ -5,16 +5,12 @@ Uses locally cached NVD feeds for fast offline analysis - NO per-CVE API calls.
 Downloads feeds once per run, then analyzes all CVEs from local cache.
 """
 
-import gzip
 import json
 import re
-import time
 from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Set, Tuple
-
-import requests
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
 
 from scripts.common import logger
 from scripts.config import DEFAULT_CONFIG, KernelConfig, SUPPORTED_KERNELS
@@ -22,9 +18,11 @@ from scripts.models import (
     CVE,
     GapAnalysisResult,
     GapReportSummary,
-    KernelVersion,
     Severity,
+    VersionTuple,
+    version_tuple,
 )
+from scripts.nvd_feeds import get_shared_feed_cache
 
 
 @dataclass
@@ -132,196 +130,22 @@ class GapReport:
         logger.info(f"Saved text gap report: {output_path}")
 
 
-class NVDFeedCache:
-    """
-    Local cache for NVD feeds.
-    
-    Downloads and caches NVD JSON feeds locally:
-    - Recent feed: updated every run
-    - Modified feed: updated every run  
-    - Yearly feeds (2023+): updated once per 24 hours
-    
-    All CVE analysis uses the local cache - NO per-CVE API calls.
-    """
-    
-    # NVD 2.0 feed URLs
-    NVD_FEED_BASE = "https://nvd.nist.gov/feeds/json/cve/2.0"
-    
-    def __init__(self, config: Optional[KernelConfig] = None):
-        self.config = config or DEFAULT_CONFIG
-        self.cache_dir = self.config.cache_dir / "nvd_feeds"
-        self.cache_dir.mkdir(parents=True, exist_ok=True)
-        
-        # In-memory CVE index: cve_id -> parsed CVE data
-        self._cve_index: Dict[str, Dict[str, Any]] = {}
-        self._loaded = False
-        
-        # Marker for yearly feed refresh
-        self._yearly_marker = self.cache_dir / ".yearly_last_update"
-    
-    def _get_feed_path(self, feed_name: str) -> Path:
-        """Get local path for a feed."""
-        return self.cache_dir / f"nvdcve-2.0-{feed_name}.json"
-    
-    def _should_update_yearly(self) -> bool:
-        """Check if yearly feeds need refresh (once per 24h)."""
-        if not self._yearly_marker.exists():
-            return True
-        try:
-            last_update = float(self._yearly_marker.read_text().strip())
-            age_hours = (time.time() - last_update) / 3600
-            if age_hours >= 24:
-                return True
-            logger.debug(f"Yearly feeds last updated {age_hours:.1f}h ago, skipping")
-            return False
-        except Exception:
-            return True
-    
-    def _mark_yearly_updated(self) -> None:
-        """Mark yearly feeds as updated."""
-        self._yearly_marker.write_text(str(time.time()))
-    
-    def _download_feed(self, feed_name: str, force: bool = False) -> bool:
-        """
-        Download a single NVD feed.
-        
-        Args:
-            feed_name: Feed identifier (recent, modified, 2024, 2025, etc.)
-            force: Force download even if cached
-        
-        Returns:
-            True if successful
-        """
-        feed_path = self._get_feed_path(feed_name)
-        gz_url = f"{self.NVD_FEED_BASE}/nvdcve-2.0-{feed_name}.json.gz"
-        
-        # Check if cached and not forcing refresh
-        if not force and feed_path.exists():
-            # For recent/modified, check if < 1 hour old
-            if feed_name in ("recent", "modified"):
-                age_hours = (time.time() - feed_path.stat().st_mtime) / 3600
-                if age_hours < 1:
-                    logger.debug(f"Using cached {feed_name} feed ({age_hours:.1f}h old)")
-                    return True
-            else:
-                # Yearly feeds - use cached if exists
-                logger.debug(f"Using cached {feed_name} feed")
-                return True
-        
-        logger.info(f"Downloading NVD feed: {feed_name}")
-        
-        try:
-            response = requests.get(gz_url, timeout=180, stream=True)
-            response.raise_for_status()
-            
-            # Decompress and save
-            gz_data = response.content
-            json_data = gzip.decompress(gz_data)
-            
-            feed_path.write_bytes(json_data)
-            logger.info(f"  Saved {feed_name} feed ({len(json_data) / 1024 / 1024:.1f} MB)")
-            return True
-            
-        except Exception as e:
-            logger.warning(f"Failed to download {feed_name} feed: {e}")
-            return False
-    
-    def update_feeds(self, force_yearly: bool = False) -> None:
-        """
-        Update all NVD feeds.
-        
-        Downloads:
-        - recent feed (always)
-        - modified feed (always)
-        - yearly feeds from 2023 to current year (once per 24h unless forced)
-        """
-        logger.info("Updating NVD feed cache...")
-        
-        # Always update recent and modified feeds
-        self._download_feed("recent", force=True)
-        self._download_feed("modified", force=True)
-        
-        # Update yearly feeds if needed
-        if force_yearly or self._should_update_yearly():
-            current_year = datetime.now().year
-            for year in range(2023, current_year + 1):
-                self._download_feed(str(year), force=force_yearly)
-            self._mark_yearly_updated()
-        
-        # Clear loaded index to force reload
-        self._cve_index.clear()
-        self._loaded = False
-    
-    def _load_feed(self, feed_name: str) -> int:
-        """Load a feed into the index. Returns count of CVEs loaded."""
-        feed_path = self._get_feed_path(feed_name)
-        if not feed_path.exists():
-            return 0
-        
-        try:
-            data = json.loads(feed_path.read_text())
-            vulnerabilities = data.get("vulnerabilities", [])
-            
-            count = 0
-            for vuln in vulnerabilities:
-                cve_data = vuln.get("cve", {})
-                cve_id = cve_data.get("id", "")
-                if cve_id.startswith("CVE-"):
-                    self._cve_index[cve_id] = cve_data
-                    count += 1
-            
-            return count
-        except Exception as e:
-            logger.warning(f"Failed to load {feed_name} feed: {e}")
-            return 0
-    
-    def load_index(self) -> None:
-        """Load all feeds into the in-memory index."""
-        if self._loaded:
-            return
-        
-        logger.info("Loading NVD feeds into memory...")
-        
-        total = 0
-        
-        # Load yearly feeds first (older data)
-        current_year = datetime.now().year
-        for year in range(2023, current_year + 1):
-            count = self._load_feed(str(year))
-            if count:
-                logger.debug(f"  {year}: {count} CVEs")
-                total += count
-        
-        # Load recent/modified last (newer data overwrites)
-        for feed in ["modified", "recent"]:
-            count = self._load_feed(feed)
-            if count:
-                logger.debug(f"  {feed}: {count} CVEs")
-        
-        self._loaded = True
-        logger.info(f"Loaded {len(self._cve_index)} unique CVEs into index")
-    
-    def get_cve(self, cve_id: str) -> Optional[Dict[str, Any]]:
-        """Get CVE data from cache."""
-        if not self._loaded:
-            self.load_index()
-        return self._cve_index.get(cve_id)
-    
-    def get_all_cve_ids(self) -> List[str]:
-        """Get all CVE IDs in cache."""
-        if not self._loaded:
-            self.load_index()
-        return list(self._cve_index.keys())
-    
-    def filter_by_source(self, source_identifier: str) -> List[str]:
-        """Filter CVEs by source identifier (e.g., kernel.org CNA)."""
-        if not self._loaded:
-            self.load_index()
-        
-        return [
-            cve_id for cve_id, data in self._cve_index.items()
-            if data.get("sourceIdentifier") == source_identifier
-        ]
+@dataclass
+class _ParsedCVE:
+    """Kernel-independent facts about one CVE, parsed once per run."""
+    cve_data: Dict[str, Any]
+    has_version_info: bool
+    ranges: List[Tuple[VersionTuple, VersionTuple, bool, bool]]
+    _details: Optional[Tuple[List[str], Severity, float, str]] = field(default=None, repr=False)
+    
+    def details(self, detector: "GapDetector") -> Tuple[List[str], Severity, float, str]:
+        """Fix branches, severity, CVSS and description (only needed for affected CVEs)."""
+        if self._details is None:
+            self._details = (
+                detector.get_fix_branches_from_references(self.cve_data),
+                *detector._severity_and_description(self.cve_data),
+            )
+        return self._details
 
 
 class GapDetector:
@@ -337,7 +161,7 @@ class GapDetector:
     
     def __init__(self, config: Optional[KernelConfig] = None):
         self.config = config or DEFAULT_CONFIG
-        self.feed_cache = NVDFeedCache(config)
+        self.feed_cache = get_shared_feed_cache(self.config)
     
     def parse_affected_versions(
         self, cve_data: Dict[str, Any]
@@ -380,29 +204,13 @@ class GapDetector:
     ) -> bool:
         """Check if a version falls within an affected range."""
         try:
-            v = KernelVersion.parse(version)
-            s = KernelVersion.parse(range_start)
-            e = KernelVersion.parse(range_end)
+            v = version_tuple(version)
+            s = version_tuple(range_start)
+            e = version_tuple(range_end)
         except Exception:
             return False
         
-        # Check start boundary
-        if start_inclusive:
-            if v < s:
-                return False
-        else:
-            if v <= s:
-                return False
-        
-        # Check end boundary
-        if end_exclusive:
-            if v >= e:
-                return False
-        else:
-            if v > e:
-                return False
-        
-        return True
+        return self._in_parsed_range(v, [(s, e, start_inclusive, end_exclusive)])
     
     def get_fix_branches_from_references(self, cve_data: Dict[str, Any]) -> List[str]:
         """
@@ -452,27 +260,71 @@ class GapDetector:
         
         return branches
     
-    def analyze_cve(
+    def _parse_cve(self, cve_data: Dict[str, Any]) -> _ParsedCVE:
+        """Parse a CVE's affected ranges once, dropping unparseable bounds."""
+        affected_ranges = self.parse_affected_versions(cve_data)
+        ranges = []
+        for start, end, start_inc, end_exc in affected_ranges:
+            try:
+                ranges.append((version_tuple(start), version_tuple(end), start_inc, end_exc))
+            except Exception:
+                # Unparseable bounds never match, as in is_version_in_range
+                continue
+        return _ParsedCVE(cve_data=cve_data, has_version_info=bool(affected_ranges), ranges=ranges)
+        
+    @staticmethod
+    def _severity_and_description(cve_data: Dict[str, Any]) -> Tuple[Severity, float, str]:
+        """Extract severity, CVSS score and English description."""
+        cvss_score = 0.0
+        severity = Severity.UNKNOWN
+        
+        metrics = cve_data.get("metrics", {})
+        for metric_key in ["cvssMetricV31", "cvssMetricV30", "cvssMetricV2"]:
+            metric_list = metrics.get(metric_key, [])
+            if metric_list:
+                cvss_data = metric_list[0].get("cvssData", {})
+                cvss_score = cvss_data.get("baseScore", 0.0)
+                sev_str = cvss_data.get("baseSeverity", "UNKNOWN")
+                try:
+                    severity = Severity(sev_str.upper())
+                except ValueError:
+                    severity = Severity.from_cvss(cvss_score)
+                break
+        
+        # Extract description
+        descriptions = cve_data.get("descriptions", [])
+        description = ""
+        for desc in descriptions:
+            if desc.get("lang") == "en":
+                description = desc.get("value", "")[:200]
+                break
+        
+        return severity, cvss_score, description
+    
+    @staticmethod
+    def _in_parsed_range(
+        version: VersionTuple,
+        ranges: List[Tuple[VersionTuple, VersionTuple, bool, bool]],
+    ) -> bool:
+        """Check if a parsed version falls within any of the parsed ranges."""
+        for start, end, start_inc, end_exc in ranges:
+            if (version < start) if start_inc else (version <= start):
+                continue
+            if (version >= end) if end_exc else (version > end):
+                continue
+            return True
+        return False
+    
+    def _evaluate(
         self,
         cve_id: str,
+        parsed: Optional[_ParsedCVE],
         target_kernel: str,
         current_version: str,
+        current_tuple: Optional[VersionTuple],
     ) -> GapAnalysisResult:
-        """
-        Analyze a single CVE for backport gaps using local cache.
-        
-        Args:
-            cve_id: CVE identifier
-            target_kernel: Target kernel series (e.g., "6.1")
-            current_version: Current Photon kernel version (e.g., "6.1.159")
-        
-        Returns:
-            GapAnalysisResult with analysis
-        """
-        # Get CVE data from local cache
-        cve_data = self.feed_cache.get_cve(cve_id)
-        
-        if not cve_data:
+        """Build the result for one kernel from a parsed CVE."""
+        if parsed is None:
             return GapAnalysisResult(
                 cve_id=cve_id,
                 status="not_in_cache",
@@ -480,10 +332,7 @@ class GapDetector:
                 current_version=current_version,
             )
         
-        # Parse affected versions
-        affected_ranges = self.parse_affected_versions(cve_data)
-        
-        if not affected_ranges:
+        if not parsed.has_version_info:
             return GapAnalysisResult(
                 cve_id=cve_id,
                 status="no_version_info",
@@ -492,13 +341,7 @@ class GapDetector:
             )
         
         # Check if target kernel is affected
-        is_affected = False
-        for start, end, start_inc, end_exc in affected_ranges:
-            if self.is_version_in_range(current_version, start, end, start_inc, end_exc):
-                is_affected = True
-                break
-        
-        if not is_affected:
+        if current_tuple is None or not self._in_parsed_range(current_tuple, parsed.ranges):
             return GapAnalysisResult(
                 cve_id=cve_id,
                 status="not_affected",
@@ -507,45 +350,12 @@ class GapDetector:
                 is_affected=False,
             )
         
-        # Get branches with fixes
-        fix_branches = self.get_fix_branches_from_references(cve_data)
+        # Branches with fixes and report fields are shared by all kernels
+        fix_branches, severity, cvss_score, description = parsed.details(self)
         
         # Check if target kernel has a fix
         has_fix = target_kernel in fix_branches
         
-        # Extract severity and CVSS
-        cvss_score = 0.0
-        severity = Severity.UNKNOWN
-        
-        metrics = cve_data.get("metrics", {})
-        for metric_key in ["cvssMetricV31", "cvssMetricV30", "cvssMetricV2"]:
-            metric_list = metrics.get(metric_key, [])
-            if metric_list:
-                cvss_data = metric_list[0].get("cvssData", {})
-                cvss_score = cvss_data.get("baseScore", 0.0)
-                sev_str = cvss_data.get("baseSeverity", "UNKNOWN")
-                try:
-                    severity = Severity(sev_str.upper())
-                except ValueError:
-                    severity = Severity.from_cvss(cvss_score)
-                break
-        
-        # Extract description
-        descriptions = cve_data.get("descriptions", [])
-        description = ""
-        for desc in descriptions:
-            if desc.get("lang") == "en":
-                description = desc.get("value", "")[:200]
-                break
-        
-        # Extract fix commits
-        fix_commits = []
-        for ref in cve_data.get("references", []):
-            url = ref.get("url", "")
-            match = re.search(r"/([a-f0-9]{40})", url)
-            if match:
-                fix_commits.append(match.group(1))
-        
         return GapAnalysisResult(
             cve_id=cve_id,
             status="has_backport" if has_fix else "gap_detected",
@@ -554,18 +364,69 @@ class GapDetector:
             target_kernel=target_kernel,
             current_version=current_version,
             is_affected=True,
-            fix_branches=fix_branches,
+            fix_branches=list(fix_branches),
             missing_backports=[target_kernel] if not has_fix else [],
             requires_manual_backport=not has_fix,
             description=description,
         )
     
+    def analyze_cve_multi(
+        self,
+        cve_id: str,
+        targets: Dict[str, str],
+    ) -> Dict[str, GapAnalysisResult]:
+        """
+        Analyze a single CVE for several kernels, parsing its data once.
+        
+        Args:
+            cve_id: CVE identifier
+            targets: Kernel series -> current Photon kernel version
+        
+        Returns:
+            Kernel series -> GapAnalysisResult
+        """
+        # Get CVE data from local cache
+        cve_data = self.feed_cache.get_cve(cve_id)
+        parsed = self._parse_cve(cve_data) if cve_data else None
+        
+        return {
+            kernel: self._evaluate(cve_id, parsed, kernel, version, self._parse_target(version))
+            for kernel, version in targets.items()
+        }
+    
+    @staticmethod
+    def _parse_target(current_version: str) -> Optional[VersionTuple]:
+        """Parse a target version, or None if it can never match a range."""
+        try:
+            return version_tuple(current_version)
+        except Exception:
+            return None
+    
+    def analyze_cve(
+        self,
+        cve_id: str,
+        target_kernel: str,
+        current_version: str,
+    ) -> GapAnalysisResult:
+        """
+        Analyze a single CVE for backport gaps using local cache.
+        
+        Args:
+            cve_id: CVE identifier
+            target_kernel: Target kernel series (e.g., "6.1")
+            current_version: Current Photon kernel version (e.g., "6.1.159")
+        
+        Returns:
+            GapAnalysisResult with analysis
+        """
+        return self.analyze_cve_multi(cve_id, {target_kernel: current_version})[target_kernel]
+    
     def run_detection(
         self,
         kernel_version: str,
         current_version: str,
         cve_ids: Optional[List[str]] = None,
-        progress_callback: Optional[callable] = None,
+        progress_callback: Optional[Callable[[int, int, str], None]] = None,
     ) -> GapReport:
         """
         Run gap detection for CVEs using local feed cache.
@@ -579,15 +440,49 @@ class GapDetector:
         Returns:
             GapReport with all results
         """
-        logger.info(f"Running gap detection for kernel {kernel_version}")
-        logger.info(f"Current version: {current_version}")
+        reports = self.run_detection_multi(
+            {kernel_version: current_version}, cve_ids, progress_callback
+        )
+        return reports[kernel_version]
+    
+    def run_detection_multi(
+        self,
+        targets: Dict[str, str],
+        cve_ids: Optional[List[str]] = None,
+        progress_callback: Optional[Callable[[int, int, str], None]] = None,
+        modified_since: Optional[datetime] = None,
+    ) -> Dict[str, GapReport]:
+        """
+        Run gap detection for several kernels in a single pass over the CVEs.
+        
+        Each CVE is loaded and its ranges and references parsed once, then
+        evaluated against every target kernel.
+        
+        Args:
+            targets: Kernel series -> current Photon kernel version
+            cve_ids: List of CVE IDs to analyze (None = all kernel.org CVEs)
+            progress_callback: Optional callback(processed, total, cve_id)
+            modified_since: With ``cve_ids`` None, only analyze kernel.org CVEs
+                            modified in NVD after this time
+        
+        Returns:
+            Kernel series -> GapReport
+        """
+        for kernel_version, current_version in targets.items():
+            logger.info(f"Running gap detection for kernel {kernel_version}")
+            logger.info(f"Current version: {current_version}")
         
         # Update and load feed cache
-        self.feed_cache.update_feeds()
-        self.feed_cache.load_index()
+        self.feed_cache.refresh()
         
         # Get CVE list
-        if cve_ids is None:
+        if cve_ids is None and modified_since is not None:
+            cve_ids = self.feed_cache.query_cve_ids(
+                source_identifier=self.config.kernel_org_cna,
+                modified_since=modified_since,
+            )
+            logger.info(f"Found {len(cve_ids)} kernel.org CVEs modified since {modified_since}")
+        elif cve_ids is None:
             # Default: all kernel.org CVEs
             cve_ids = self.feed_cache.filter_by_source(self.config.kernel_org_cna)
             logger.info(f"Found {len(cve_ids)} kernel.org CVEs in feed cache")
@@ -596,48 +491,63 @@ class GapDetector:
             cve_ids = [cve for cve in cve_ids if re.match(r"^CVE-\d{4}-\d+$", cve)]
             logger.info(f"Analyzing {len(cve_ids)} specified CVEs")
         
-        report = GapReport(
-            kernel_version=kernel_version,
-            photon_version=current_version,
-        )
+        reports = {
+            kernel_version: GapReport(
+                kernel_version=kernel_version,
+                photon_version=current_version,
+            )
+            for kernel_version, current_version in targets.items()
+        }
         
         if not cve_ids:
-            return report
+            return reports
         
         total = len(cve_ids)
+        target_tuples = {kernel: self._parse_target(version) for kernel, version in targets.items()}
         
         # Analyze all CVEs (fast - no network calls)
         for i, cve_id in enumerate(cve_ids, 1):
             if progress_callback and (i % 100 == 0 or i == total):
                 progress_callback(i, total, cve_id)
             
-            result = self.analyze_cve(cve_id, kernel_version, current_version)
+            cve_data = self.feed_cache.get_cve(cve_id)
+            parsed = self._parse_cve(cve_data) if cve_data else None
             
-            report.summary.total_cves_analyzed += 1
-            
-            if result.status == "gap_detected":
-                report.gaps.append(result)
-                report.summary.cves_with_gaps += 1
-            elif result.status == "has_backport":
-                report.patchable.append(result)
-                report.summary.cves_patchable += 1
-            elif result.status == "not_affected":
-                report.not_affected.append(result)
-                report.summary.cves_not_affected += 1
-            elif result.status == "no_version_info":
-                report.no_version_info.append(cve_id)
+            for kernel_version, current_version in targets.items():
+                result = self._evaluate(
+                    cve_id, parsed, kernel_version, current_version, target_tuples[kernel_version]
+                )
+                self._add_result(reports[kernel_version], result)
         
         # Sort gaps by severity
         severity_order = {"CRITICAL": 0, "HIGH": 1, "MEDIUM": 2, "LOW": 3, "UNKNOWN": 4}
-        report.gaps.sort(key=lambda x: (severity_order.get(x.severity.value, 5), -x.cvss_score))
-        
-        logger.info(f"Gap detection complete:")
-        logger.info(f"  Gaps found: {report.summary.cves_with_gaps}")
-        logger.info(f"  Patchable: {report.summary.cves_patchable}")
-        logger.info(f"  Not affected: {report.summary.cves_not_affected}")
-        logger.info(f"  No version info: {len(report.no_version_info)}")
-        
-        return report
+        for kernel_version, report in reports.items():
+            report.gaps.sort(key=lambda x: (severity_order.get(x.severity.value, 5), -x.cvss_score))
+            
+            logger.info(f"Gap detection complete for kernel {kernel_version}:")
+            logger.info(f"  Gaps found: {report.summary.cves_with_gaps}")
+            logger.info(f"  Patchable: {report.summary.cves_patchable}")
+            logger.info(f"  Not affected: {report.summary.cves_not_affected}")
+            logger.info(f"  No version info: {len(report.no_version_info)}")
+        
+        return reports
+    
+    @staticmethod
+    def _add_result(report: GapReport, result: GapAnalysisResult) -> None:
+        """File a result under the matching report section."""
+        report.summary.total_cves_analyzed += 1
+        
+        if result.status == "gap_detected":
+            report.gaps.append(result)
+            report.summary.cves_with_gaps += 1
+        elif result.status == "has_backport":
+            report.patchable.append(result)
+            report.summary.cves_patchable += 1
+        elif result.status == "not_affected":
+            report.not_affected.append(result)
+            report.summary.cves_not_affected += 1
+        elif result.status == "no_version_info":
+            report.no_version_info.append(result.cve_id)
 
 
 def run_gap_detection(
@@ -646,7 +556,7 @@ def run_gap_detection(
     cve_ids: Optional[List[str]],
     report_dir: Path,
     config: Optional[KernelConfig] = None,
-    progress_callback: Optional[callable] = None,
+    progress_callback: Optional[Callable[[int, int, str], None]] = None,
 ) -> Path:
     """
     Run gap detection and save reports.
@@ -662,22 +572,52 @@ def run_gap_detection(
     Returns:
         Path to JSON report file
     """
-    detector = GapDetector(config)
-    report = detector.run_detection(
-        kernel_version, current_version, cve_ids, progress_callback
+    paths = run_gap_detection_multi(
+        {kernel_version: current_version}, cve_ids, report_dir, config, progress_callback
     )
+    return paths[kernel_version]
+
+
+def run_gap_detection_multi(
+    targets: Dict[str, str],
+    cve_ids: Optional[List[str]],
+    report_dir: Path,
+    config: Optional[KernelConfig] = None,
+    progress_callback: Optional[Callable[[int, int, str], None]] = None,
+    modified_since: Optional[datetime] = None,
+) -> Dict[str, Path]:
+    """
+    Run gap detection for several kernels in one pass and save one report each.
+    
+    Args:
+        targets: Kernel series -> current Photon kernel version
+        cve_ids: List of CVE IDs to analyze (None = all kernel.org CVEs)
+        report_dir: Directory for output reports
+        config: Optional configuration
+        progress_callback: Optional callback(processed, total, cve_id)
+        modified_since: Only analyze kernel.org CVEs modified after this time
+    
+    Returns:
+        Kernel series -> path to JSON report file
+    """
+    detector = GapDetector(config)
+    reports = detector.run_detection_multi(targets, cve_ids, progress_callback, modified_since)
     
     # Generate report paths
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    json_path = report_dir / f"gap_report_{kernel_version}_{timestamp}.json"
-    text_path = report_dir / f"gap_report_{kernel_version}_{timestamp}.txt"
-    
-    # Save reports
     report_dir.mkdir(parents=True, exist_ok=True)
-    report.save_json(json_path)
-    report.save_text(text_path)
     
-    return json_path
+    paths = {}
+    for kernel_version, report in reports.items():
+        json_path = report_dir / f"gap_report_{kernel_version}_{timestamp}.json"
+        text_path = report_dir / f"gap_report_{kernel_version}_{timestamp}.txt"
+        
+        # Save reports
+        report.save_json(json_path)
+        report.save_text(text_path)
+        paths[kernel_version] = json_path
+    
+    return paths
 
 
 def quick_gap_check(
@@ -693,8 +633,7 @@ def quick_gap_check(
         "gap" if no backport, "ok" if backport exists, "na" if not affected, "unknown" otherwise
     """
     detector = GapDetector(config)
-    detector.feed_cache.update_feeds()
-    detector.feed_cache.load_index()
+    detector.feed_cache.refresh()
     
     result = detector.analyze_cve(cve_id, target_kernel, current_version)
     
@@ -17,7 +17,9 @@ CVE States per stable patch per kernel version:
 """
 
 import csv
+import hashlib
 import json
+import os
 import re
 from dataclasses import dataclass, field
 from datetime import datetime
@@ -30,7 +32,7 @@ from rich.table import Table
 
 from scripts.common import extract_cve_ids, logger
 from scripts.config import DEFAULT_CONFIG, KERNEL_MAPPINGS, KernelConfig, SUPPORTED_KERNELS
-from scripts.models import CVE, CVESource, Severity
+from scripts.models import CVE, CVESource, Severity, version_tuple
 from scripts.spec_file import SpecFile
 
 
@@ -126,6 +128,20 @@ class StablePatchCVECoverage:
             "release_date": self.release_date,
         }
     
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "StablePatchCVECoverage":
+        """Create from the ``to_dict`` representation."""
+        return cls(
+            patch_version=data["stable_patch_version"],
+            kernel_series=data["kernel_series"],
+            not_applicable=list(data.get("cve_not_applicable", [])),
+            included=list(data.get("cve_included", [])),
+            cve_in_newer_stable=list(data.get("cve_in_newer_stable", [])),
+            cve_patch_available=list(data.get("cve_patch_available", [])),
+            cve_patch_missing=list(data.get("cve_patch_missing", [])),
+            release_date=data.get("release_date"),
+        )
+    
     @property
     def total_applicable(self) -> int:
         """Total CVEs that apply to this kernel (excludes not_applicable)."""
@@ -209,6 +225,24 @@ class KernelVersionCoverage:
             },
         }
     
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "KernelVersionCoverage":
+        """Create from the ``to_dict`` representation."""
+        summary = data.get("summary", {})
+        return cls(
+            kernel_version=data["kernel_version"],
+            photon_version=data["photon_version"],
+            latest_stable=data["latest_stable"],
+            stable_patches=[
+                StablePatchCVECoverage.from_dict(sp) for sp in data.get("stable_patches", [])
+            ],
+            total_not_applicable=summary.get("cve_not_applicable", 0),
+            total_included=summary.get("cve_included", 0),
+            total_cve_in_newer_stable=summary.get("cve_in_newer_stable", 0),
+            total_cve_patch_available=summary.get("cve_patch_available", 0),
+            total_cve_patch_missing=summary.get("cve_patch_missing", 0),
+        )
+    
     @property
     def total_applicable(self) -> int:
         """Total CVEs that apply to this kernel."""
@@ -258,6 +292,16 @@ class KernelCVEStatus:
             "fix_commit": self.fix_commit,
         }
     
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "KernelCVEStatus":
+        """Create from the ``to_dict`` representation."""
+        return cls(
+            state=CVEPatchState(data["state"]),
+            stable_patch=data.get("stable_patch"),
+            spec_patch=data.get("spec_patch"),
+            fix_commit=data.get("fix_commit"),
+        )
+    
     @property
     def has_patch(self) -> bool:
         """Returns True if this CVE has a patch."""
@@ -296,6 +340,23 @@ class MatrixEntry:
             "published_date": self.published_date,
         }
     
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "MatrixEntry":
+        """Create from the ``to_dict`` representation."""
+        return cls(
+            cve_id=data["cve_id"],
+            cvss_score=data["cvss_score"],
+            severity=data["severity"],
+            description=data.get("description", ""),
+            references=list(data.get("references", [])),
+            kernel_status={
+                kv: KernelCVEStatus.from_dict(status)
+                for kv, status in data.get("kernel_status", {}).items()
+            },
+            fix_commits=list(data.get("fix_commits", [])),
+            published_date=data.get("published_date"),
+        )
+    
     def get_state(self, kernel_version: str) -> CVEPatchState:
         """Get patch state for a kernel version."""
         if kernel_version in self.kernel_status:
@@ -517,6 +578,34 @@ class CVECoverageMatrix:
             json.dump(self.to_dict(), f, indent=2)
         logger.info(f"Saved JSON matrix: {output_path}")
     
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CVECoverageMatrix":
+        """Create from the ``to_dict`` representation (derived summaries are recomputed)."""
+        return cls(
+            kernel_versions=list(data["kernel_versions"]),
+            entries=[MatrixEntry.from_dict(e) for e in data.get("entries", [])],
+            kernel_coverage={
+                kv: KernelVersionCoverage.from_dict(cov)
+                for kv, cov in data.get("kernel_coverage", {}).items()
+            },
+            generated=datetime.fromisoformat(data["generated"]),
+            source=data.get("source", "nvd"),
+        )
+    
+    @classmethod
+    def load_json(cls, input_path: Path) -> Optional["CVECoverageMatrix"]:
+        """Load a matrix written by ``save_json``.
+        
+        Returns:
+            The matrix, or None if the file is missing or malformed
+        """
+        try:
+            with open(input_path) as f:
+                return cls.from_dict(json.load(f))
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Could not load JSON matrix {input_path}: {e}")
+            return None
+    
     def save_csv(self, output_path: Path) -> None:
         """Save matrix as CSV."""
         output_path.parent.mkdir(parents=True, exist_ok=True)
@@ -837,6 +926,102 @@ class CVECoverageMatrix:
         console.print("  [grey50]—[/grey50] N/A  [green]✓[/green] Included  [cyan]⬆[/cyan] In Newer Stable  [yellow]○[/yellow] Patch Available  [red]✗[/red] Missing (Gap)")
 
 
+# Bump when CVE extraction from stable patches changes to invalidate cached results
+STABLE_CVE_EXTRACTOR_VERSION = 1
+
+
+class StablePatchCVECache:
+    """Persistent CVE IDs extracted from the stable patches of one kernel series.
+    
+    Extraction results are keyed by the SHA-256 of the patch content. A
+    per-file size/mtime index lets unchanged files skip hashing, so re-runs
+    neither re-read nor re-scan patches that were seen before.
+    """
+    
+    def __init__(self, config: KernelConfig, kernel_version: str):
+        self.cache_dir = config.cache_dir / "stable_patch_cves"
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.path = self.cache_dir / f"linux-{kernel_version}.json"
+        self.hits = 0
+        self.misses = 0
+        self._cves: Dict[str, List[str]] = {}  # sha256 -> CVE IDs
+        self._files: Dict[str, List[Any]] = {}  # file name -> [size, mtime_ns, sha256]
+        self._seen: Set[str] = set()
+        self._dirty = False
+        self._load()
+    
+    def _load(self) -> None:
+        """Load cached results, discarding them if the extractor changed."""
+        if not self.path.exists():
+            return
+        try:
+            data = json.loads(self.path.read_text())
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable stable patch CVE cache {self.path}: {e}")
+            return
+        if data.get("extractor_version") != STABLE_CVE_EXTRACTOR_VERSION:
+            return
+        self._cves = data.get("cves", {})
+        self._files = data.get("files", {})
+    
+    def get_cves(self, patch_path: Path) -> List[str]:
+        """
+        Get the CVE IDs mentioned in a patch file, extracting them only once.
+        
+        Args:
+            patch_path: Stable patch file
+        
+        Returns:
+            CVE IDs in the patch (empty if the file is unreadable)
+        """
+        try:
+            stat = patch_path.stat()
+        except OSError:
+            return []
+        
+        self._seen.add(patch_path.name)
+        entry = self._files.get(patch_path.name)
+        if entry and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns and entry[2] in self._cves:
+            self.hits += 1
+            return self._cves[entry[2]]
+        
+        try:
+            content = patch_path.read_bytes()
+        except OSError:
+            return []
+        sha = hashlib.sha256(content).hexdigest()
+        cves = self._cves.get(sha)
+        if cves is None:
+            self.misses += 1
+            cves = extract_cve_ids(content.decode("utf-8", errors="ignore"))
+            self._cves[sha] = cves
+        else:
+            self.hits += 1
+        self._files[patch_path.name] = [stat.st_size, stat.st_mtime_ns, sha]
+        self._dirty = True
+        return cves
+    
+    def save(self) -> None:
+        """Write results back to disk, dropping patches no longer present."""
+        stale = set(self._files) - self._seen
+        if not self._dirty and not stale:
+            return
+        files = {name: entry for name, entry in self._files.items() if name in self._seen}
+        data = {
+            "extractor_version": STABLE_CVE_EXTRACTOR_VERSION,
+            "files": files,
+            "cves": {entry[2]: self._cves[entry[2]] for entry in files.values()},
+        }
+        try:
+            tmp_path = self.path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps(data))
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Could not save stable patch CVE cache {self.path}: {e}")
+            return
+        self._dirty = False
+
+
 class StablePatchCVEMapper:
     """Maps stable patches to CVEs with five-state tracking including Photon version awareness."""
     
@@ -870,6 +1055,48 @@ class StablePatchCVEMapper:
                 pass
         return (0, 0, 0)
     
+    def first_fix_patches(
+        self, kernel_version: str, patch_dir: Optional[Path]
+    ) -> Tuple[Dict[str, str], str]:
+        """
+        Record the first stable patch fixing each CVE.
+        
+        A CVE is included in stable version V exactly when its first fix is
+        <= V, so this map is all the stable patch data coverage needs.
+        
+        Args:
+            kernel_version: Kernel series (e.g., "6.12")
+            patch_dir: Directory containing stable patch files
+        
+        Returns:
+            Tuple of (cve_to_first_patch_map, latest_stable)
+        """
+        latest_stable = f"{kernel_version}.0"
+        cve_to_first_patch: Dict[str, str] = {}  # CVE ID -> first patch that includes it
+        
+        if patch_dir and patch_dir.exists():
+            patch_files = sorted(
+                [p for p in patch_dir.glob(f"patch-{kernel_version}.*") if p.suffix != ".xz"],
+                key=lambda p: self._parse_version(p.name)
+            )
+            cve_cache = StablePatchCVECache(self.config, kernel_version)
+            
+            for patch_file in patch_files:
+                version = patch_file.name.replace("patch-", "")
+                latest_stable = version
+                
+                for cve_id in cve_cache.get_cves(patch_file):
+                    if cve_id not in cve_to_first_patch:
+                        cve_to_first_patch[cve_id] = version
+            
+            cve_cache.save()
+            logger.debug(
+                f"Stable patch CVE cache for {kernel_version}: "
+                f"{cve_cache.hits} hits, {cve_cache.misses} misses"
+            )
+        
+        return cve_to_first_patch, latest_stable
+    
     def build_patch_coverage(
         self,
         kernel_version: str,
@@ -900,8 +1127,6 @@ class StablePatchCVEMapper:
             Tuple of (coverage_list, latest_stable, cve_to_first_patch_map)
         """
         result = []
-        latest_stable = f"{kernel_version}.0"
-        cve_to_first_patch: Dict[str, str] = {}  # CVE ID -> first patch that includes it
         
         all_cve_ids = set(all_cves.keys())
         applicable_cves = all_cve_ids - not_applicable_cves
@@ -909,42 +1134,21 @@ class StablePatchCVEMapper:
         # Parse Photon version for comparison
         photon_ver_tuple = self._version_to_tuple(photon_version) if photon_version else (0, 0, 0)
         
-        # First pass: build cumulative CVE coverage for all patches
-        cumulative_included: Set[str] = set()
-        patch_cve_map: Dict[str, Set[str]] = {}  # version -> cumulative CVEs at that version
+        # First pass: the first stable patch fixing each CVE, so no
+        # per-version cumulative sets are needed
+        cve_to_first_patch, latest_stable = self.first_fix_patches(kernel_version, patch_dir)
+        first_fix: Dict[str, Tuple[int, int, int]] = {  # CVE ID -> first fixing version
+            cve_id: self._parse_version(f"patch-{version}") for cve_id, version in cve_to_first_patch.items()
+        }
         
-        if patch_dir and patch_dir.exists():
-            patch_files = sorted(
-                [p for p in patch_dir.glob(f"patch-{kernel_version}.*") if p.suffix != ".xz"],
-                key=lambda p: self._parse_version(p.name)
-            )
-            
-            for patch_file in patch_files:
-                version = patch_file.name.replace("patch-", "")
-                latest_stable = version
-                
-                # CVEs newly fixed in THIS patch
-                patch_cves = set(self.extract_cves_from_patch_file(patch_file))
-                newly_included = patch_cves - cumulative_included
-                
-                # Update cumulative
-                cumulative_included.update(newly_included)
-                patch_cve_map[version] = cumulative_included.copy()
-                
-                # Track first patch for each CVE
-                for cve_id in newly_included:
-                    if cve_id not in cve_to_first_patch:
-                        cve_to_first_patch[cve_id] = version
+        cumulative_included: Set[str] = set(first_fix)
         
         # Determine CVEs included in Photon's version
-        if photon_version and photon_version in patch_cve_map:
-            cves_in_photon = patch_cve_map[photon_version]
-        elif photon_version:
-            # Find the closest version <= photon_version
-            cves_in_photon = set()
-            for ver, cves in patch_cve_map.items():
-                if self._version_to_tuple(ver) <= photon_ver_tuple:
-                    cves_in_photon = cves
+        if photon_version:
+            cves_in_photon = {
+                cve_id for cve_id, fixed_in in first_fix.items()
+                if fixed_in <= photon_ver_tuple
+            }
         else:
             cves_in_photon = cumulative_included  # Use all if no Photon version specified
         
@@ -1064,26 +1268,54 @@ class CVEMatrixBuilder:
         Returns:
             True if CVE does NOT affect this kernel version
         """
+        not_applicable = self.determine_not_applicable_batch([cve], {kernel_version: photon_version})
+        return cve.cve_id in not_applicable[kernel_version]
+    
+    def determine_not_applicable_batch(
+        self, cves: List[CVE], photon_versions: Dict[str, Optional[str]]
+    ) -> Dict[str, Set[str]]:
+        """Determine not applicable CVEs for several kernels in one pass.
+        
+        Each kernel's version is parsed once and each CVE's CPE bounds are
+        parsed once (cached on the CPERange), so the per-pair work is plain
+        integer tuple comparisons.
+        
+        Args:
+            cves: CVE objects to evaluate
+            photon_versions: Kernel series -> full Photon version (or None to
+                             check against the series itself)
+        
+        Returns:
+            Kernel series -> set of CVE IDs that do NOT affect it
+        """
         # Use full Photon version for precise CPE range check
-        version_to_check = photon_version or kernel_version
-        
-        # Check CPE ranges first (most accurate)
-        if cve.cpe_ranges:
-            is_affected = cve.is_version_affected(version_to_check)
-            if is_affected is False:
-                # CPE data explicitly says this version is NOT affected
-                return True
-            elif is_affected is True:
-                # CPE data says this version IS affected
-                return False
-            # is_affected is None means no matching range found
-        
-        # Fall back to legacy affected_versions check
-        if cve.affected_versions:
-            return not any(kernel_version in v for v in cve.affected_versions)
-        
-        # If no version info, assume it might apply (not N/A)
-        return False
+        targets = [
+            (kv, version_tuple(photon_ver or kv))
+            for kv, photon_ver in photon_versions.items()
+        ]
+        not_applicable: Dict[str, Set[str]] = {kv: set() for kv in photon_versions}
+        
+        for cve in cves:
+            for kv, ver in targets:
+                # Check CPE ranges first (most accurate)
+                if cve.cpe_ranges:
+                    is_affected = cve.is_version_tuple_affected(ver)
+                    if is_affected is False:
+                        # CPE data explicitly says this version is NOT affected
+                        not_applicable[kv].add(cve.cve_id)
+                        continue
+                    elif is_affected is True:
+                        # CPE data says this version IS affected
+                        continue
+                    # is_affected is None means no matching range found
+                
+                # Fall back to legacy affected_versions check
+                if cve.affected_versions and not any(kv in v for v in cve.affected_versions):
+                    not_applicable[kv].add(cve.cve_id)
+                
+                # If no version info, assume it might apply (not N/A)
+        
+        return not_applicable
     
     def determine_status(
         self,
@@ -1125,6 +1357,150 @@ class CVEMatrixBuilder:
             fix_commit=cve.fix_commits[0] if cve.fix_commits else None,
         )
     
+    def resolve_photon_versions(
+        self,
+        repo_dirs: Dict[str, Path],
+        photon_versions: Dict[str, str],
+    ) -> Dict[str, Optional[str]]:
+        """Get each kernel's Photon version from the given mapping or its spec file."""
+        resolved_versions: Dict[str, Optional[str]] = {}
+        for kv in self.kernel_versions:
+            photon_ver = photon_versions.get(kv)
+            if not photon_ver and kv in repo_dirs:
+                photon_ver = self.get_photon_version(kv, repo_dirs[kv])
+            resolved_versions[kv] = photon_ver
+        return resolved_versions
+    
+    def kernel_inputs(
+        self,
+        repo_dirs: Optional[Dict[str, Path]] = None,
+        patch_dirs: Optional[Dict[str, Path]] = None,
+        photon_versions: Optional[Dict[str, str]] = None,
+    ) -> Dict[str, Dict[str, Any]]:
+        """Collect the per-kernel data every matrix row is evaluated against.
+        
+        A row only depends on its own CVE data and on these inputs, so
+        comparing them between runs tells which rows need re-evaluation.
+        
+        Returns:
+            Kernel series -> {"photon_version", "spec_cves", "stable_patches"}
+            where stable_patches maps CVE ID -> first stable patch fixing it
+        """
+        repo_dirs = repo_dirs or {}
+        patch_dirs = patch_dirs or {}
+        resolved_versions = self.resolve_photon_versions(repo_dirs, photon_versions or {})
+        
+        inputs = {}
+        for kv in self.kernel_versions:
+            spec_cves = self.get_all_spec_cves(kv, repo_dirs[kv]) if kv in repo_dirs else {}
+            stable_patches, _ = self.patch_mapper.first_fix_patches(kv, patch_dirs.get(kv))
+            inputs[kv] = {
+                "photon_version": resolved_versions[kv],
+                "spec_cves": spec_cves,
+                "stable_patches": stable_patches,
+            }
+        return inputs
+    
+    @staticmethod
+    def changed_cve_ids(
+        previous_inputs: Dict[str, Dict[str, Any]],
+        current_inputs: Dict[str, Dict[str, Any]],
+    ) -> Optional[Set[str]]:
+        """Find CVEs whose rows are affected by changed per-kernel inputs.
+        
+        Args:
+            previous_inputs: ``kernel_inputs`` result from the previous run
+            current_inputs: ``kernel_inputs`` result for this run
+        
+        Returns:
+            CVE IDs with a changed spec patch or first stable fix, or None
+            if a kernel was added/removed or its Photon version changed
+            (every row would need re-evaluation)
+        """
+        if set(previous_inputs) != set(current_inputs):
+            return None
+        
+        changed: Set[str] = set()
+        for kv, current in current_inputs.items():
+            previous = previous_inputs[kv]
+            if previous.get("photon_version") != current["photon_version"]:
+                return None
+            for key in ("spec_cves", "stable_patches"):
+                before = previous.get(key, {})
+                after = current[key]
+                changed.update(
+                    cve_id for cve_id in before.keys() | after.keys()
+                    if before.get(cve_id) != after.get(cve_id)
+                )
+        return changed
+    
+    def update_matrix(
+        self,
+        previous: CVECoverageMatrix,
+        cves: List[CVE],
+        repo_dirs: Optional[Dict[str, Path]] = None,
+        patch_dirs: Optional[Dict[str, Path]] = None,
+        photon_versions: Optional[Dict[str, str]] = None,
+    ) -> CVECoverageMatrix:
+        """Re-evaluate only the given CVEs and merge them into a previous matrix.
+        
+        Rows for the given CVEs are rebuilt (or added if new); all other rows
+        and their per-kernel coverage lists are kept. The caller is responsible
+        for passing every CVE whose data or per-kernel inputs changed (see
+        ``changed_cve_ids``) and for falling back to ``build_from_cves`` when
+        a Photon version changed.
+        
+        Args:
+            previous: Matrix from the previous run (e.g. via ``load_json``)
+            cves: CVEs to re-evaluate
+            repo_dirs: Mapping of kernel version to Photon repo directory
+            patch_dirs: Mapping of kernel version to stable patch directory
+            photon_versions: Mapping of kernel version to Photon's current version
+        
+        Returns:
+            New matrix with the same layout as a full rebuild
+        """
+        delta = self.build_from_cves(cves, repo_dirs, patch_dirs, photon_versions)
+        updated = {entry.cve_id: entry for entry in delta.entries}
+        
+        # Keep the previous row order and append new CVEs, then re-sort
+        # (stable, so ties keep their previous relative order)
+        entries = [updated.pop(e.cve_id, e) for e in previous.entries]
+        entries.extend(updated.values())
+        entries.sort(key=lambda e: e.cvss_score, reverse=True)
+        
+        replaced = {entry.cve_id for entry in delta.entries}
+        matrix = CVECoverageMatrix(
+            kernel_versions=self.kernel_versions,
+            entries=entries,
+            kernel_coverage=delta.kernel_coverage,
+        )
+        
+        for kv, kc in matrix.kernel_coverage.items():
+            prev_kc = previous.kernel_coverage.get(kv)
+            if kc.stable_patches:
+                sp = kc.stable_patches[0]
+                prev_sp = prev_kc.stable_patches[0] if prev_kc and prev_kc.stable_patches else None
+                if prev_sp:
+                    for name in ("not_applicable", "included", "cve_in_newer_stable",
+                                 "cve_patch_available", "cve_patch_missing"):
+                        kept = [c for c in getattr(prev_sp, name) if c not in replaced]
+                        setattr(sp, name, kept + getattr(sp, name))
+                kc.total_not_applicable = len(sp.not_applicable)
+                kc.total_included = len(sp.included)
+                kc.total_cve_in_newer_stable = len(sp.cve_in_newer_stable)
+                kc.total_cve_patch_available = len(sp.cve_patch_available)
+                kc.total_cve_patch_missing = len(sp.cve_patch_missing)
+            else:
+                # No stable patch lists to merge, count the merged rows
+                kc.total_not_applicable = len(matrix.get_not_applicable(kv))
+                kc.total_included = len(matrix.get_included(kv))
+                kc.total_cve_in_newer_stable = len(matrix.get_cve_in_newer_stable(kv))
+                kc.total_cve_patch_available = len(matrix.get_cve_patch_available(kv))
+                kc.total_cve_patch_missing = len(matrix.get_cve_patch_missing(kv))
+        
+        return matrix
+    
     def build_from_cves(
         self,
         cves: List[CVE],
@@ -1153,13 +1529,17 @@ class CVEMatrixBuilder:
         kernel_coverage: Dict[str, KernelVersionCoverage] = {}
         kernel_spec_cves: Dict[str, Dict[str, str]] = {}
         kernel_stable_patches: Dict[str, Dict[str, str]] = {}
-        kernel_not_applicable: Dict[str, Set[str]] = {}
+        
+        # Get Photon version from parameter or spec file
+        resolved_versions = self.resolve_photon_versions(repo_dirs, photon_versions)
+        
+        # Determine not applicable CVEs using CPE ranges, all kernels at once
+        kernel_not_applicable = self.determine_not_applicable_batch(
+            [cve for cve in cves if cve.cve_id.startswith("CVE-")], resolved_versions
+        )
         
         for kv in self.kernel_versions:
-            # Get Photon version from parameter or spec file
-            photon_ver = photon_versions.get(kv)
-            if not photon_ver and kv in repo_dirs:
-                photon_ver = self.get_photon_version(kv, repo_dirs[kv])
+            photon_ver = resolved_versions[kv]
             
             # Get spec CVEs
             if kv in repo_dirs:
@@ -1167,12 +1547,7 @@ class CVEMatrixBuilder:
             else:
                 kernel_spec_cves[kv] = {}
             
-            # Determine not applicable CVEs using CPE ranges
-            not_applicable = set()
-            for cve in cves:
-                if cve.cve_id.startswith("CVE-") and self.determine_not_applicable(cve, kv, photon_ver):
-                    not_applicable.add(cve.cve_id)
-            kernel_not_applicable[kv] = not_applicable
+            not_applicable = kernel_not_applicable[kv]
             
             logger.info(f"Kernel {kv} ({photon_ver}): {len(not_applicable)} CVEs marked N/A via CPE ranges")
             
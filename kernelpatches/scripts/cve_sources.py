@@ -3,10 +3,7 @@ CVE source fetching from NVD, GHSA, Atom feeds, and upstream commits.
 """
 
 import asyncio
-import gzip
-import json
 import re
-import time
 from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Set, Tuple
@@ -23,7 +20,8 @@ from scripts.common import (
     version_less_than,
 )
 from scripts.config import DEFAULT_CONFIG, KernelConfig
-from scripts.models import CVE, CVEReference, CVESource, CPERange, KernelVersion, Severity
+from scripts.models import CVE, CVEReference, CVESource, KernelVersion, Severity
+from scripts.nvd_feeds import get_shared_feed_cache
 
 
 class CVEFetcher:
@@ -61,233 +59,40 @@ class CVEFetcher:
 
 
 class NVDFetcher(CVEFetcher):
-    """Fetch CVEs from NIST National Vulnerability Database."""
+    """
+    Fetch CVEs from NIST National Vulnerability Database.
+    
+    Reads from the shared NVD feed store (see ``scripts.nvd_feeds``), so the
+    feeds are downloaded and parsed once and every call sees the full set.
+    """
     
     def __init__(self, config: Optional[KernelConfig] = None):
         super().__init__(config)
-        self.yearly_marker_file = self.config.cache_dir / ".nvd_yearly_last_run"
-    
-    def _should_run_yearly_feeds(self) -> bool:
-        """Check if yearly feeds should be processed (once per 24h)."""
-        if not self.yearly_marker_file.exists():
-            return True
-        
-        try:
-            last_run = float(self.yearly_marker_file.read_text().strip())
-            age = time.time() - last_run
-            if age >= 86400:  # 24 hours
-                return True
-            hours_since = int(age / 3600)
-            logger.debug(f"Yearly feeds last run {hours_since}h ago")
-            return False
-        except Exception:
-            return True
-    
-    def _update_yearly_marker(self) -> None:
-        """Update the yearly feed timestamp marker."""
-        self.yearly_marker_file.parent.mkdir(parents=True, exist_ok=True)
-        self.yearly_marker_file.write_text(str(time.time()))
-    
-    def _parse_nvd_json(self, nvd_data: Dict[str, Any]) -> List[CVE]:
-        """Parse NVD JSON response into CVE objects."""
-        cves = []
-        kernel_cna = self.config.kernel_org_cna
-        
-        vulnerabilities = nvd_data.get("vulnerabilities", [])
-        
-        for vuln in vulnerabilities:
-            cve_data = vuln.get("cve", {})
-            
-            # Filter by kernel.org CNA
-            source_id = cve_data.get("sourceIdentifier", "")
-            if source_id != kernel_cna:
-                continue
-            
-            cve_id = cve_data.get("id", "")
-            if not cve_id.startswith("CVE-"):
-                continue
-            
-            # Extract CVSS score
-            cvss_score = 0.0
-            severity = Severity.UNKNOWN
-            
-            metrics = cve_data.get("metrics", {})
-            for metric_key in ["cvssMetricV31", "cvssMetricV30", "cvssMetricV2"]:
-                metric_list = metrics.get(metric_key, [])
-                if metric_list:
-                    cvss_data = metric_list[0].get("cvssData", {})
-                    cvss_score = cvss_data.get("baseScore", 0.0)
-                    sev_str = cvss_data.get("baseSeverity", "UNKNOWN")
-                    try:
-                        severity = Severity(sev_str.upper())
-                    except ValueError:
-                        severity = Severity.from_cvss(cvss_score)
-                    break
-            
-            # Extract description
-            descriptions = cve_data.get("descriptions", [])
-            description = ""
-            for desc in descriptions:
-                if desc.get("lang") == "en":
-                    description = desc.get("value", "")
-                    break
-            
-            # Extract references and commits
-            references = []
-            fix_commits = []
-            
-            for ref in cve_data.get("references", []):
-                url = ref.get("url", "")
-                ref_obj = CVEReference(
-                    url=url,
-                    source=ref.get("source"),
-                    tags=ref.get("tags", []),
-                )
-                references.append(ref_obj)
-                
-                # Extract commit SHA from URL
-                commit = extract_commit_sha(url)
-                if commit:
-                    fix_commits.append(commit)
-            
-            # Extract dates
-            published = cve_data.get("published")
-            modified = cve_data.get("lastModified")
-            
-            # Extract CPE ranges from configurations
-            cpe_ranges = []
-            configurations = cve_data.get("configurations", [])
-            for config in configurations:
-                for node in config.get("nodes", []):
-                    for cpe_match in node.get("cpeMatch", []):
-                        criteria = cpe_match.get("criteria", "")
-                        # Only interested in Linux kernel CPEs
-                        if "linux_kernel" not in criteria and "linux:linux_kernel" not in criteria:
-                            continue
-                        
-                        cpe_range = CPERange(
-                            criteria=criteria,
-                            version_start_including=cpe_match.get("versionStartIncluding"),
-                            version_start_excluding=cpe_match.get("versionStartExcluding"),
-                            version_end_including=cpe_match.get("versionEndIncluding"),
-                            version_end_excluding=cpe_match.get("versionEndExcluding"),
-                            vulnerable=cpe_match.get("vulnerable", True),
-                        )
-                        cpe_ranges.append(cpe_range)
-            
-            cve = CVE(
-                cve_id=cve_id,
-                cvss_score=cvss_score,
-                severity=severity,
-                description=description,
-                published_date=datetime.fromisoformat(published.replace("Z", "+00:00")) if published else None,
-                modified_date=datetime.fromisoformat(modified.replace("Z", "+00:00")) if modified else None,
-                source=CVESource.NVD,
-                references=references,
-                fix_commits=list(set(fix_commits)),
-                cpe_ranges=cpe_ranges,
-            )
-            cves.append(cve)
-        
-        return cves
-    
-    async def _fetch_feed(
-        self,
-        session: aiohttp.ClientSession,
-        feed_url: str,
-        output_dir: Path,
-        feed_name: str,
-    ) -> List[CVE]:
-        """Fetch and parse a single NVD feed."""
-        logger.debug(f"Fetching {feed_name} feed from {feed_url}")
-        
-        try:
-            async with session.get(feed_url, timeout=aiohttp.ClientTimeout(total=180)) as response:
-                if response.status != 200:
-                    logger.warning(f"Failed to fetch {feed_name} feed: HTTP {response.status}")
-                    return []
-                
-                gz_data = await response.read()
-        except Exception as e:
-            logger.warning(f"Failed to fetch {feed_name} feed: {e}")
-            return []
-        
-        # Decompress
-        try:
-            json_data = gzip.decompress(gz_data)
-            nvd_data = json.loads(json_data)
-        except Exception as e:
-            logger.warning(f"Failed to decompress {feed_name} feed: {e}")
-            return []
-        
-        return self._parse_nvd_json(nvd_data)
+        self.feed_cache = get_shared_feed_cache(self.config)
     
     async def fetch_async(
         self,
         kernel_version: str,
         output_dir: Path,
         current_version: Optional[str] = None,
+        force_yearly: bool = False,
     ) -> List[CVE]:
         """Fetch CVEs from NVD feeds.
         
-        Fetches in order:
-        1. Yearly feeds (2023 to current year) - once per 24 hours
-        2. Modified feed (differential updates from last 8 days)
-        3. Recent feed (new CVEs from last 8 days)
-        
-        This order ensures yearly data is loaded first, then updated with
-        any modifications, and finally new entries are added.
+        Refreshes the shared feed store (recent and modified every run,
+        yearly feeds from 2023 once per 24 hours unless ``force_yearly``) and
+        returns all kernel.org CNA CVEs from its index. Newer feeds override
+        older yearly data inside the store.
         """
         logger.info("Source: NIST National Vulnerability Database (NVD)")
         logger.info(f"Filter: kernel.org CNA ({self.config.kernel_org_cna})")
         logger.info(f"Target kernel: {kernel_version}")
         
-        all_cves: Dict[str, CVE] = {}
         output_dir.mkdir(parents=True, exist_ok=True)
         
-        async with aiohttp.ClientSession() as session:
-            # Step 1: Fetch yearly feeds once per 24 hours
-            if self._should_run_yearly_feeds():
-                current_year = datetime.now().year
-                start_year = 2023
-                
-                logger.info(f"Processing yearly feeds from {start_year} to {current_year}")
-                
-                for year in range(start_year, current_year + 1):
-                    yearly_url = f"{self.config.nvd_feed_base}/nvdcve-2.0-{year}.json.gz"
-                    yearly_cves = await self._fetch_feed(session, yearly_url, output_dir, str(year))
-                    for cve in yearly_cves:
-                        all_cves[cve.cve_id] = cve
-                
-                self._update_yearly_marker()
-                logger.info("Yearly feeds processing complete")
-            
-            # Step 2: Fetch modified feed (differential - CVEs modified in last 8 days)
-            logger.info("Processing modified (differential) feed...")
-            modified_url = f"{self.config.nvd_feed_base}/nvdcve-2.0-modified.json.gz"
-            modified_cves = await self._fetch_feed(session, modified_url, output_dir, "modified")
-            modified_count = 0
-            for cve in modified_cves:
-                if cve.cve_id in all_cves:
-                    # Update existing entry with newer data
-                    all_cves[cve.cve_id] = cve
-                    modified_count += 1
-                else:
-                    all_cves[cve.cve_id] = cve
-            logger.info(f"Modified feed: {len(modified_cves)} CVEs ({modified_count} updates)")
-            
-            # Step 3: Fetch recent feed (new CVEs from last 8 days)
-            logger.info("Processing recent feed...")
-            recent_url = f"{self.config.nvd_feed_base}/nvdcve-2.0-recent.json.gz"
-            recent_cves = await self._fetch_feed(session, recent_url, output_dir, "recent")
-            new_count = 0
-            for cve in recent_cves:
-                if cve.cve_id not in all_cves:
-                    new_count += 1
-                all_cves[cve.cve_id] = cve
-            logger.info(f"Recent feed: {len(recent_cves)} CVEs ({new_count} new)")
+        await asyncio.to_thread(self.feed_cache.refresh, force_yearly)
+        cves = await asyncio.to_thread(self.feed_cache.get_cves, self.config.kernel_org_cna)
         
-        cves = list(all_cves.values())
         logger.info(f"Found {len(cves)} kernel.org CVE entries from NVD")
         
         return cves
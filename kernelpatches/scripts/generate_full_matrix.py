@@ -12,15 +12,18 @@ This script:
 Usage:
     python scripts/generate_full_matrix.py --output /tmp/full_matrix
     python scripts/generate_full_matrix.py --output /tmp/full_matrix --download-patches
+    python scripts/generate_full_matrix.py --output /tmp/full_matrix --since-last-run
 """
 
 import argparse
 import asyncio
+import hashlib
+import json
 import lzma
 import os
 import subprocess
 import sys
-import tarfile
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Set, Tuple
@@ -30,9 +33,14 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from scripts.config import DEFAULT_CONFIG, SUPPORTED_KERNELS, KernelConfig, get_kernel_org_url
 from scripts.cve_sources import NVDFetcher, GHSAFetcher, AtomFetcher
-from scripts.cve_matrix import CVEMatrixBuilder, CVECoverageMatrix, CVEPatchState, KernelCVEStatus
+from scripts.cve_matrix import CVEMatrixBuilder, CVECoverageMatrix, CVEPatchState, KernelCVEStatus, MatrixEntry
 from scripts.stable_patches import StablePatchManager
 from scripts.common import logger, extract_cve_ids
+from scripts.commit_patches import CommitPatchDownloader, commit_sha, get_shared_patch_store
+from scripts.kernel_source import get_shared_source_cache, kernel_tarball_urls, patch_touched_paths
+from scripts.models import version_tuple
+from scripts.nvd_feeds import get_shared_feed_cache
+from scripts.patch_matcher import PatchMatcher
 
 from rich.console import Console
 from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TaskProgressColumn
@@ -50,10 +58,8 @@ async def fetch_all_cves(output_dir: Path, config: KernelConfig, kernel_version:
     console.print("  Fetching from NVD (with yearly feeds)...")
     nvd_fetcher = NVDFetcher(config)
     
-    # Force yearly feeds refresh for comprehensive data
-    nvd_fetcher.yearly_marker_file.unlink(missing_ok=True)
-    
-    nvd_cves = await nvd_fetcher.fetch_async(kernel_version, output_dir)
+    # Re-check yearly feeds for comprehensive data (unchanged feeds are skipped)
+    nvd_cves = await nvd_fetcher.fetch_async(kernel_version, output_dir, force_yearly=True)
     for cve in nvd_cves:
         all_cves[cve.cve_id] = cve
     console.print(f"    NVD: {len(nvd_cves)} CVEs")
@@ -98,6 +104,33 @@ async def fetch_all_cves(output_dir: Path, config: KernelConfig, kernel_version:
     return list(all_cves.values())
 
 
+async def fetch_changed_cves(config: KernelConfig, modified_since: str, step_num: int = 3) -> list:
+    """Fetch kernel CVEs changed in NVD since the previous run.
+    
+    Only the recent/modified feeds are refreshed (yearly feeds keep their
+    24h window) and only CVEs with a newer lastModified are parsed. GHSA
+    and Atom are not queried; their rows are carried over from the
+    previous matrix.
+    
+    Args:
+        config: Kernel configuration
+        modified_since: NVD lastModified watermark of the previous run
+        step_num: Step number for display
+    
+    Returns:
+        List of CVE objects modified after the watermark
+    """
+    console.print(f"\n[bold blue]Step {step_num}: Fetching CVEs changed since last run[/bold blue]")
+    console.print(f"  NVD lastModified after: {modified_since}")
+    
+    feed_cache = get_shared_feed_cache(config)
+    await asyncio.to_thread(feed_cache.refresh)
+    cves = await asyncio.to_thread(feed_cache.get_cves, config.kernel_org_cna, modified_since)
+    
+    console.print(f"  [green]Changed CVEs: {len(cves)}[/green]")
+    return cves
+
+
 async def download_stable_patches_async(
     kernel_versions: list,
     output_base: Path,
@@ -221,7 +254,10 @@ async def download_cve_patches(
     """Download CVE patches for CVEs that have fix commits.
     
     Downloads patches from git.kernel.org for each CVE that has fix_commits
-    but is not yet included in the kernel.
+    but is not yet included in the kernel. All kernels share one
+    concurrent downloader and the content-addressed commit patch store,
+    so a fix commit needed by several kernels is downloaded once and
+    hard-linked into each ``cve_patches/<kv>`` directory.
     
     Args:
         matrix: The CVE coverage matrix (already built)
@@ -232,12 +268,10 @@ async def download_cve_patches(
     Returns:
         Dictionary mapping kernel version to list of downloaded patch files
     """
-    import re
-    import aiohttp
-    
     console.print(f"\n[bold blue]Step {step_num}: Downloading CVE patches[/bold blue]")
     
     downloaded_patches: Dict[str, List[Path]] = {}
+    work: List[Tuple[str, Path, MatrixEntry]] = []
     
     for kv in matrix.kernel_versions:
         patch_dir = output_base / "cve_patches" / kv
@@ -257,41 +291,43 @@ async def download_cve_patches(
             continue
         
         console.print(f"  {kv}: Downloading patches for {len(cves_to_download)} CVEs...")
+        work.extend((kv, patch_dir, entry) for entry in cves_to_download)
         
-        downloaded_count = 0
-        async with aiohttp.ClientSession() as session:
-            for entry in cves_to_download:
-                for commit in entry.fix_commits[:3]:  # Limit to first 3 commits per CVE
-                    # Extract commit SHA from URL or use directly
-                    if "/" in commit:
-                        match = re.search(r"/([a-f0-9]{40})", commit)
-                        if match:
-                            commit_sha = match.group(1)
-                        else:
-                            continue
-                    else:
-                        commit_sha = commit
-                    
-                    patch_file = patch_dir / f"{commit_sha[:12]}-{entry.cve_id}.patch"
-                    
-                    if patch_file.exists():
-                        downloaded_patches[kv].append(patch_file)
-                        continue
-                    
-                    patch_url = f"https://git.kernel.org/pub/scm/linux/kernel/git/stable/linux.git/patch/?id={commit_sha}"
-                    
-                    try:
-                        async with session.get(patch_url, timeout=aiohttp.ClientTimeout(total=30)) as response:
-                            if response.status == 200:
-                                content = await response.text()
-                                patch_file.write_text(content)
-                                downloaded_patches[kv].append(patch_file)
-                                downloaded_count += 1
-                                break  # Got patch for this CVE
-                    except Exception:
-                        continue
-        
-        console.print(f"    Downloaded {downloaded_count} new patches")
+    store = get_shared_patch_store(config)
+    
+    async def fetch_entry(
+        downloader: CommitPatchDownloader, patch_dir: Path, entry: MatrixEntry
+    ) -> Tuple[List[Path], int]:
+        """Get existing patches for a CVE, downloading the first available commit if needed."""
+        found: List[Path] = []
+        for commit in entry.fix_commits[:3]:  # Limit to first 3 commits per CVE
+            sha = commit_sha(commit)
+            if not sha:
+                continue
+            
+            patch_file = patch_dir / f"{sha[:12]}-{entry.cve_id}.patch"
+            if patch_file.exists():
+                found.append(patch_file)
+                continue
+            
+            if await downloader.fetch(sha):
+                found.append(store.link(sha, patch_file))
+                return found, 1  # Got patch for this CVE
+        return found, 0
+    
+    async with store.downloader() as downloader:
+        results = await asyncio.gather(*[
+            fetch_entry(downloader, patch_dir, entry) for _, patch_dir, entry in work
+        ])
+    
+    new_counts: Dict[str, int] = dict.fromkeys(matrix.kernel_versions, 0)
+    for (kv, _, _), (found, new) in zip(work, results):
+        downloaded_patches[kv].extend(found)
+        new_counts[kv] += new
+    
+    for kv in dict.fromkeys(kv for kv, _, _ in work):
+        patch_dir = output_base / "cve_patches" / kv
+        console.print(f"  {kv}: Downloaded {new_counts[kv]} new patches")
         
         # Also collect existing patches
         existing = list(patch_dir.glob("*.patch"))
@@ -299,235 +335,52 @@ async def download_cve_patches(
             if p not in downloaded_patches[kv]:
                 downloaded_patches[kv].append(p)
         
-        console.print(f"    Total: {len(downloaded_patches[kv])} patches available")
+        console.print(f"  {kv}: Total: {len(downloaded_patches[kv])} patches available")
     
-    return downloaded_patches
-
-
-def _get_expected_tarball_size(tarball_url: str) -> Optional[int]:
-    """Get expected file size from HTTP headers."""
-    try:
-        result = subprocess.run(
-            ["curl", "-sI", tarball_url],
-            capture_output=True,
-            text=True,
-            timeout=30,
-        )
-        if result.returncode == 0:
-            for line in result.stdout.split("\n"):
-                if line.lower().startswith("content-length:"):
-                    return int(line.split(":")[1].strip())
-    except Exception:
-        pass
-    return None
-
-
-def _verify_tarball_integrity(tarball_path: Path, expected_size: Optional[int] = None) -> Tuple[bool, str]:
-    """Verify tarball integrity using xz test and optionally size check.
-    
-    Returns:
-        Tuple of (is_valid, error_message)
-    """
-    if not tarball_path.exists():
-        return False, "File does not exist"
-    
-    actual_size = tarball_path.stat().st_size
-    
-    # Check file size if expected size is known
-    if expected_size and actual_size != expected_size:
-        return False, f"Size mismatch: {actual_size} bytes vs expected {expected_size} bytes (download truncated)"
-    
-    # Verify xz integrity
-    try:
-        result = subprocess.run(
-            ["xz", "-t", str(tarball_path)],
-            capture_output=True,
-            text=True,
-            timeout=120,
-        )
-        if result.returncode != 0:
-            return False, f"xz integrity check failed: {result.stderr.strip()}"
-    except subprocess.TimeoutExpired:
-        return False, "xz integrity check timed out"
-    except FileNotFoundError:
-        # xz not available, skip integrity check
-        pass
-    except Exception as e:
-        return False, f"xz integrity check error: {e}"
+    console.print(f"  Commit patches: {downloader.stats.summary()}")
     
-    return True, ""
+    return downloaded_patches
 
 
 async def download_kernel_tarball(
     kernel_version: str,
     photon_version: str,
-    output_base: Path,
     config: KernelConfig,
 ) -> Optional[Path]:
-    """Download kernel tarball from kernel.org.
+    """Get the extracted kernel source from the shared kernel source cache.
     
-    Downloads the tarball for the Photon kernel version (e.g., linux-5.10.247.tar.xz).
-    Verifies download integrity and retries on failure.
+    Downloads the tarball for the Photon kernel version (e.g., linux-5.10.247.tar.xz)
+    from kernel.org once into ``config.cache_dir/kernel_sources`` and extracts it
+    in a single streaming pass that also validates the xz stream. The tree is
+    shared with other output directories and workflows and must not be modified.
     
     Args:
         kernel_version: Kernel series (e.g., "5.10")
         photon_version: Full Photon kernel version (e.g., "5.10.247")
-        output_base: Base output directory
         config: Kernel configuration
     
     Returns:
         Path to extracted kernel source directory, or None if failed
     """
-    import aiohttp
-    
     kernel_url = get_kernel_org_url(kernel_version)
     if not kernel_url:
         return None
     
+    cache = get_shared_source_cache(config)
     tarball_name = f"linux-{photon_version}.tar.xz"
-    tarball_url = f"{kernel_url}{tarball_name}"
-    tarball_dir = output_base / "tarballs"
-    tarball_dir.mkdir(parents=True, exist_ok=True)
-    tarball_path = tarball_dir / tarball_name
-    extract_dir = output_base / "kernel_source"
-    extract_dir.mkdir(parents=True, exist_ok=True)
-    source_dir = extract_dir / f"linux-{photon_version}"
-    
-    # Check if already extracted
-    if source_dir.exists() and (source_dir / "Makefile").exists():
-        console.print(f"    Kernel source already extracted: {source_dir}")
-        return source_dir
-    
-    # Get expected file size for verification
-    expected_size = _get_expected_tarball_size(tarball_url)
-    
-    # Check if cached tarball is valid
-    if tarball_path.exists():
-        is_valid, error_msg = _verify_tarball_integrity(tarball_path, expected_size)
-        if is_valid:
-            console.print(f"    Tarball cached: {tarball_path}")
-        else:
-            console.print(f"    [yellow]Cached tarball is corrupted: {error_msg}[/yellow]")
-            console.print(f"    [yellow]Removing and re-downloading...[/yellow]")
-            tarball_path.unlink()
-    
-    # Download tarball if not cached or was corrupted
-    max_retries = 3
-    for attempt in range(max_retries):
-        if tarball_path.exists():
-            break
-            
-        if attempt > 0:
-            console.print(f"    [yellow]Retry {attempt + 1}/{max_retries}...[/yellow]")
-        
-        console.print(f"    Downloading {tarball_name}...")
-        
-        # Use wget/curl for faster downloads of large files with resume support
-        try:
-            # Try wget first with continue flag for resume capability
-            result = subprocess.run(
-                ["wget", "-c", "--progress=dot:giga", "-O", str(tarball_path), tarball_url],
-                timeout=900,  # 15 min timeout for large files
-                capture_output=False,
-            )
-            if result.returncode == 0:
-                # Verify download integrity
-                is_valid, error_msg = _verify_tarball_integrity(tarball_path, expected_size)
-                if is_valid:
-                    console.print(f"    Downloaded {tarball_name}")
-                else:
-                    console.print(f"    [red]Download verification failed: {error_msg}[/red]")
-                    tarball_path.unlink()
-                    continue
-            else:
-                raise Exception(f"wget failed with code {result.returncode}")
-        except (subprocess.TimeoutExpired, FileNotFoundError, Exception) as wget_err:
-            # Fallback to curl with resume support
-            try:
-                result = subprocess.run(
-                    ["curl", "-C", "-", "-#", "-L", "-o", str(tarball_path), tarball_url],
-                    timeout=900,
-                    capture_output=False,
-                )
-                if result.returncode == 0:
-                    # Verify download integrity
-                    is_valid, error_msg = _verify_tarball_integrity(tarball_path, expected_size)
-                    if is_valid:
-                        console.print(f"    Downloaded {tarball_name}")
-                    else:
-                        console.print(f"    [red]Download verification failed: {error_msg}[/red]")
-                        if tarball_path.exists():
-                            tarball_path.unlink()
-                        continue
-                else:
-                    raise Exception(f"curl failed with code {result.returncode}")
-            except (subprocess.TimeoutExpired, FileNotFoundError, Exception) as curl_err:
-                # Final fallback to aiohttp with optimized settings
-                if tarball_path.exists():
-                    tarball_path.unlink()
-                console.print(f"    [yellow]wget/curl unavailable, using slower Python download[/yellow]")
-                try:
-                    async with aiohttp.ClientSession() as session:
-                        async with session.get(
-                            tarball_url,
-                            timeout=aiohttp.ClientTimeout(total=900),
-                            headers={"User-Agent": "kernel-backport-tool/1.0"},
-                        ) as response:
-                            if response.status != 200:
-                                console.print(f"    [red]Failed to download tarball: HTTP {response.status}[/red]")
-                                continue
-                            
-                            total_size = int(response.headers.get("content-length", 0))
-                            downloaded = 0
-                            last_pct = -5
-                            
-                            with open(tarball_path, "wb") as f:
-                                # Use 1MB chunks for faster download
-                                async for chunk in response.content.iter_chunked(1024 * 1024):
-                                    f.write(chunk)
-                                    downloaded += len(chunk)
-                                    if total_size > 0:
-                                        pct = downloaded * 100 // total_size
-                                        # Only update every 5%
-                                        if pct >= last_pct + 5:
-                                            console.print(f"\r    Downloading: {pct}%", end="")
-                                            last_pct = pct
-                            console.print(f"\r    Downloaded {tarball_name} ({downloaded // (1024*1024)} MB)")
-                            
-                            # Verify download integrity
-                            is_valid, error_msg = _verify_tarball_integrity(tarball_path, expected_size)
-                            if not is_valid:
-                                console.print(f"    [red]Download verification failed: {error_msg}[/red]")
-                                tarball_path.unlink()
-                                continue
-                except Exception as e:
-                    console.print(f"    [red]Failed to download tarball: {e}[/red]")
-                    if tarball_path.exists():
-                        tarball_path.unlink()
-                    continue
+    console.print(f"    Fetching {tarball_name}...")
     
-    # Final check - did we get a valid tarball?
-    if not tarball_path.exists():
-        console.print(f"    [red]Failed to download tarball after {max_retries} attempts[/red]")
+    source_dir = await asyncio.to_thread(
+        cache.get_source,
+        photon_version,
+        kernel_tarball_urls(photon_version, config),
+    )
+    if not source_dir:
+        console.print(f"    [red]Failed to download or extract {tarball_name}[/red]")
         return None
     
-    # Extract tarball with TarSlip protection: validate every member's
-    # resolved path stays under extract_dir before calling extractall.
-    console.print(f"    Extracting {tarball_name}...")
-    try:
-        extract_root = os.path.realpath(str(extract_dir))
-        with tarfile.open(tarball_path, "r:xz") as tar:
-            for m in tar.getmembers():
-                dest = os.path.realpath(os.path.join(extract_root, m.name))
-                if not (dest == extract_root or
-                        dest.startswith(extract_root + os.sep)):
-                    raise RuntimeError(f"tar slip detected: {m.name}")
-            tar.extractall(path=extract_dir)
-        console.print(f"    Extracted to: {source_dir}")
-        return source_dir
-    except Exception as e:
-        console.print(f"    [red]Failed to extract tarball: {e}[/red]")
-        return None
+    console.print(f"    Extracted to: {source_dir}")
+    return source_dir
 
 
 def _try_patch_in_dir(patch_path: Path, work_dir: Path) -> Tuple[Optional[bool], str]:
@@ -540,6 +393,11 @@ def _try_patch_in_dir(patch_path: Path, work_dir: Path) -> Tuple[Optional[bool],
     Returns:
         Tuple of (is_included, reason) or (None, reason) if inconclusive
     """
+    # Run git apply in its no-repository mode so the kernel tree never needs
+    # git init/add/commit: stop repository discovery at work_dir so paths are
+    # resolved against work_dir itself, not an enclosing checkout.
+    env = dict(os.environ, GIT_CEILING_DIRECTORIES=str(work_dir.resolve().parent))
+    
     try:
         # Try reverse-apply first (if it succeeds, patch is already applied)
         result = subprocess.run(
@@ -548,6 +406,7 @@ def _try_patch_in_dir(patch_path: Path, work_dir: Path) -> Tuple[Optional[bool],
             capture_output=True,
             text=True,
             timeout=30,
+            env=env,
         )
         if result.returncode == 0:
             return True, "patch_already_applied"
@@ -559,6 +418,7 @@ def _try_patch_in_dir(patch_path: Path, work_dir: Path) -> Tuple[Optional[bool],
             capture_output=True,
             text=True,
             timeout=30,
+            env=env,
         )
         if result.returncode == 0:
             return False, "patch_applicable"
@@ -572,25 +432,106 @@ def _try_patch_in_dir(patch_path: Path, work_dir: Path) -> Tuple[Optional[bool],
         return None, f"error: {e}"
 
 
+# Bump when patch analysis semantics change to invalidate cached results
+PATCH_ANALYZER_VERSION = 2
+
+
+class PatchAnalysisCache:
+    """Persistent patch analysis results for one Photon kernel version.
+    
+    Results are keyed by the SHA-256 of the patch content and stored per
+    Photon kernel version (the extracted source tree they were checked
+    against) together with the analyzer version, so re-runs only analyze
+    new patches or new source versions.
+    """
+    
+    def __init__(self, config: KernelConfig, photon_version: str):
+        self.cache_dir = config.cache_dir / "patch_analysis"
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.path = self.cache_dir / f"linux-{photon_version}.json"
+        self.hits = 0
+        self.misses = 0
+        self._results: Dict[str, Tuple[bool, str]] = {}
+        self._dirty = False
+        self._load()
+    
+    def _load(self) -> None:
+        """Load cached results, discarding them if the analyzer changed."""
+        if not self.path.exists():
+            return
+        try:
+            data = json.loads(self.path.read_text())
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable patch analysis cache {self.path}: {e}")
+            return
+        if data.get("analyzer_version") != PATCH_ANALYZER_VERSION:
+            return
+        self._results = {
+            sha: (bool(result[0]), str(result[1]))
+            for sha, result in data.get("results", {}).items()
+        }
+    
+    @staticmethod
+    def patch_key(patch_path: Path) -> str:
+        """Content hash identifying a patch."""
+        return hashlib.sha256(patch_path.read_bytes()).hexdigest()
+    
+    def get(self, key: str) -> Optional[Tuple[bool, str]]:
+        """Look up a result, counting hits and misses."""
+        result = self._results.get(key)
+        if result is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return result
+    
+    def put(self, key: str, result: Tuple[bool, str]) -> None:
+        """Record a result."""
+        self._results[key] = result
+        self._dirty = True
+    
+    def save(self) -> None:
+        """Write results back to disk if anything changed."""
+        if not self._dirty:
+            return
+        data = {
+            "analyzer_version": PATCH_ANALYZER_VERSION,
+            "results": {sha: list(result) for sha, result in self._results.items()},
+        }
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(data))
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+
+
 def analyze_patch_against_source(
     patch_path: Path,
     source_dir: Path,
+    matcher: Optional[PatchMatcher] = None,
 ) -> Tuple[bool, str]:
     """Check if a patch is already included in the kernel source.
     
-    Tries applying patch in order: drivers/, crypto/, then root source dir.
-    Uses git apply --check --reverse first (already applied), then
+    Uses the in-process PatchMatcher when given one. Patches it cannot
+    decide (binary, renames, context-free hunks, ...) fall back to git:
+    tries applying patch in order: drivers/, crypto/, then root source dir,
+    using git apply --check --reverse first (already applied), then
     git apply --check (applicable).
     
     Args:
         patch_path: Path to the patch file
         source_dir: Path to the kernel source directory (e.g. linux-5.10.247)
+        matcher: Optional in-process matcher for ``source_dir``
     
     Returns:
         Tuple of (is_included, reason)
         - is_included: True if patch appears to be already in source
         - reason: Description of the result
     """
+    if matcher is not None:
+        result = matcher.check(patch_path)
+        if result is not None:
+            return result
+    
     # Try subdirectories first, then root
     dirs_to_try = [
         source_dir / "drivers",
@@ -610,19 +551,38 @@ def analyze_patch_against_source(
     return False, "patch_conflicts_or_missing_context"
 
 
+def _analysis_patch_files(kv: str, output_base: Path, cve_patch_dirs: Dict[str, List[Path]]) -> List[Path]:
+    """Get the CVE patch files analyzed for a kernel version.
+    
+    Scans ALL .patch files in the CVE patches directory, falling back to
+    ``cve_patch_dirs`` when the directory does not exist.
+    """
+    patch_dir = output_base / "cve_patches" / kv
+    if patch_dir.exists():
+        return list(patch_dir.glob("*.patch"))
+    return cve_patch_dirs.get(kv, [])
+
+
 async def download_kernel_tarballs_for_analysis(
     kernel_versions: List[str],
     photon_versions: Dict[str, str],
     output_base: Path,
     config: KernelConfig,
+    cve_patch_dirs: Optional[Dict[str, List[Path]]] = None,
 ) -> Dict[str, Optional[Path]]:
     """Download kernel tarballs for all versions that need analysis.
     
+    When ``cve_patch_dirs`` is given, the patch set for each version is scanned
+    first and only the files it touches are extracted (partial source), unless
+    a full tree is already cached.
+    
     Args:
         kernel_versions: List of kernel versions to process
         photon_versions: Mapping of kernel version to Photon version
         output_base: Base output directory
         config: Kernel configuration
+        cve_patch_dirs: Optional CVE patch files per kernel version; enables
+            partial extraction
     
     Returns:
         Dictionary mapping kernel version to source directory path (or None if failed)
@@ -636,18 +596,34 @@ async def download_kernel_tarballs_for_analysis(
             source_dirs[kv] = None
             continue
         
+        if cve_patch_dirs is not None:
+            patches = _analysis_patch_files(kv, output_base, cve_patch_dirs)
+            paths = patch_touched_paths(patches, PatchMatcher.FALLBACK_DIRS)
+            console.print(f"  {kv}: Materializing {len(paths)} paths touched by {len(patches)} patches...")
+            result = await asyncio.to_thread(
+                get_shared_source_cache(config).get_source,
+                photon_ver,
+                kernel_tarball_urls(photon_ver, config),
+                paths,
+            )
+            source_dirs[kv] = result
+            if result:
+                console.print(f"  {kv}: [green]Kernel source ready: {result}[/green]")
+            else:
+                console.print(f"  {kv}: [red]Failed to download kernel tarball[/red]")
+            continue
+        
         # Check if already extracted
-        kernel_source_base = output_base / "kernel_source"
-        source_dir = kernel_source_base / f"linux-{photon_ver}"
+        source_dir = get_shared_source_cache(config).cached_source(photon_ver)
         
-        if source_dir.exists() and (source_dir / "Makefile").exists():
+        if source_dir and (source_dir / "Makefile").exists():
             console.print(f"  {kv}: Kernel source already extracted: {source_dir}")
             source_dirs[kv] = source_dir
             continue
         
         # Download and extract tarball
         console.print(f"  {kv}: Downloading kernel tarball for {photon_ver}...")
-        result = await download_kernel_tarball(kv, photon_ver, output_base, config)
+        result = await download_kernel_tarball(kv, photon_ver, config)
         source_dirs[kv] = result
         
         if result:
@@ -667,11 +643,14 @@ def analyze_cve_patches_against_source(
     step_num: int = 7,
     source_dirs: Optional[Dict[str, Optional[Path]]] = None,
     cve_map: Optional[Dict[str, Any]] = None,
+    jobs: Optional[int] = None,
 ) -> Dict[str, Dict[str, Tuple[bool, str]]]:
     """Analyze CVE patches against kernel source to detect already-included fixes.
     
     Uses CPE data from cve_map (if provided) to skip unnecessary patch checks.
-    Falls back to git apply check when CPE data is unavailable.
+    Falls back to git apply check when CPE data is unavailable. The git apply
+    checks for all kernel versions run on a shared worker pool; results are
+    returned in patch filename order regardless of completion order.
     
     Args:
         kernel_versions: List of kernel versions to analyze
@@ -682,6 +661,7 @@ def analyze_cve_patches_against_source(
         step_num: Step number for display
         source_dirs: Optional pre-downloaded source directories
         cve_map: Optional mapping of CVE ID to CVE object (with cpe_ranges)
+        jobs: Number of parallel workers (default: CPU count)
     
     Returns:
         Dictionary mapping kernel version to dict of {cve_id: (is_included, reason)}
@@ -697,11 +677,7 @@ def analyze_cve_patches_against_source(
         photon_ver = photon_versions.get(kv)
         
         # Scan ALL .patch files in the CVE patches directory (not just from cve_patch_dirs)
-        patch_dir = output_base / "cve_patches" / kv
-        if patch_dir.exists():
-            all_patches = list(patch_dir.glob("*.patch"))
-        else:
-            all_patches = cve_patch_dirs.get(kv, [])
+        all_patches = _analysis_patch_files(kv, output_base, cve_patch_dirs)
         
         if not photon_ver:
             console.print(f"  {kv}: [yellow]No Photon version available, skipping[/yellow]")
@@ -719,107 +695,127 @@ def analyze_cve_patches_against_source(
     # Use provided source_dirs or check for existing ones
     if source_dirs is None:
         source_dirs = {}
-        kernel_source_base = output_base / "kernel_source"
+        source_cache = get_shared_source_cache(config)
         for kv, photon_ver, _ in versions_to_analyze:
-            source_dir = kernel_source_base / f"linux-{photon_ver}"
-            if source_dir.exists():
+            source_dir = source_cache.cached_source(photon_ver)
+            if source_dir:
                 source_dirs[kv] = source_dir
                 console.print(f"    Kernel source found: {source_dir}")
             else:
                 source_dirs[kv] = None
-                console.print(f"  {kv}: [red]No kernel source at {source_dir} - run with tarball download enabled[/red]")
+                console.print(f"  {kv}: [red]No cached kernel source for linux-{photon_ver} - run with tarball download enabled[/red]")
+    
+    jobs = max(1, jobs or os.cpu_count() or 1)
     
-    # Now analyze patches for each kernel version
+    ready = []
     for kv, photon_ver, patches in versions_to_analyze:
         source_dir = source_dirs.get(kv)
         if not source_dir:
             console.print(f"  {kv}: [red]Could not get kernel source, skipping analysis[/red]")
             continue
-        
-        console.print(f"  {kv} ({photon_ver}): Analyzing {len(patches)} CVE patches...")
-        
-        # Initialize git repo in source dir for patch analysis
-        if not (source_dir / ".git").exists():
-            console.print(f"    Initializing git repo for patch analysis...")
-            subprocess.run(
-                ["git", "init"],
-                cwd=source_dir,
-                capture_output=True,
-                timeout=60,
-            )
-            subprocess.run(
-                ["git", "add", "-A"],
-                cwd=source_dir,
-                capture_output=True,
-                timeout=120,
-            )
-            subprocess.run(
-                ["git", "commit", "-m", "Initial kernel source"],
-                cwd=source_dir,
-                capture_output=True,
-                timeout=120,
-            )
-        
-        # Analyze each patch - first try CPE check, then fall back to git apply
-        included_count = 0
-        applicable_count = 0
-        conflict_count = 0
-        cpe_skipped_count = 0  # CVEs skipped due to CPE showing not vulnerable
-        cpe_checked_count = 0
-        
-        for patch_path in patches:
-            # Extract CVE ID from filename
-            cve_ids = extract_cve_ids(patch_path.name)
-            if not cve_ids:
-                continue
-            cve_id = cve_ids[0]
+        ready.append((kv, photon_ver, sorted(patches, key=lambda p: p.name), source_dir))
+    
+    console.print(f"  Using {jobs} parallel workers")
+    
+    # One pool for all kernels so 5.10/6.1/6.12 are analyzed concurrently.
+    # Results are collected in submission order to keep output deterministic.
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        submitted = []
+        for kv, photon_ver, patches, source_dir in ready:
+            console.print(f"  {kv} ({photon_ver}): Analyzing {len(patches)} CVE patches...")
+            matcher = PatchMatcher(source_dir)
+            result_cache = PatchAnalysisCache(config, photon_ver)
             
-            # Step 1: Try CPE range check first using cached CVE data (no API calls!)
-            cpe_affects = None
-            cpe_reason = "no_cpe_data"
+            entries: List[Tuple[str, Any, Optional[str]]] = []
+            cpe_skipped_count = 0  # CVEs skipped due to CPE showing not vulnerable
+            cpe_checked_count = 0
+            photon_ver_tuple = version_tuple(photon_ver)
             
-            if cve_map and cve_id in cve_map:
-                cve_obj = cve_map[cve_id]
-                # Use the is_version_affected method from the CVE model
-                cpe_affects = cve_obj.is_version_affected(photon_ver)
+            for patch_path in patches:
+                # Extract CVE ID from filename
+                cve_ids = extract_cve_ids(patch_path.name)
+                if not cve_ids:
+                    continue
+                cve_id = cve_ids[0]
+                
+                # Step 1: Try CPE range check first using cached CVE data (no API calls!)
+                cpe_affects = None
+                cpe_reason = "no_cpe_data"
+                
+                if cve_map and cve_id in cve_map:
+                    cve_obj = cve_map[cve_id]
+                    # CPE bounds are parsed once per range and cached on the model
+                    cpe_affects = cve_obj.is_version_tuple_affected(photon_ver_tuple)
+                    if cpe_affects is False:
+                        cpe_reason = "cpe_not_in_range"
+                    elif cpe_affects is True:
+                        cpe_reason = "cpe_vulnerable"
+                
                 if cpe_affects is False:
-                    cpe_reason = "cpe_not_in_range"
-                elif cpe_affects is True:
-                    cpe_reason = "cpe_vulnerable"
-            
-            if cpe_affects is False:
-                # CPE data shows this kernel version is NOT vulnerable
-                # (either patched or not in affected range)
-                analysis_results[kv][cve_id] = (True, f"cpe_not_affected:{cpe_reason}")
-                included_count += 1
-                cpe_skipped_count += 1
-                cpe_checked_count += 1
-                continue
+                    # CPE data shows this kernel version is NOT vulnerable
+                    # (either patched or not in affected range)
+                    entries.append((cve_id, (True, f"cpe_not_affected:{cpe_reason}"), None))
+                    cpe_skipped_count += 1
+                    cpe_checked_count += 1
+                    continue
+                
+                if cpe_affects is True:
+                    cpe_checked_count += 1
+                    # CPE shows vulnerable - still need to verify with patch analysis
+                    # because the patch might have been applied manually
+                
+                # Step 2: Reuse a cached result for this patch and source version
+                try:
+                    cache_key = PatchAnalysisCache.patch_key(patch_path)
+                except OSError:
+                    cache_key = None
+                cached = result_cache.get(cache_key) if cache_key else None
+                if cached is not None:
+                    entries.append((cve_id, cached, None))
+                    continue
+                
+                # Step 3: Fall back to patch apply check (slow but accurate)
+                future = executor.submit(analyze_patch_against_source, patch_path, source_dir, matcher)
+                entries.append((cve_id, future, cache_key))
             
-            if cpe_affects is True:
-                cpe_checked_count += 1
-                # CPE shows vulnerable - still need to verify with patch analysis
-                # because the patch might have been applied manually
+            submitted.append((kv, entries, cpe_skipped_count, cpe_checked_count, result_cache))
+        
+        for kv, entries, cpe_skipped_count, cpe_checked_count, result_cache in submitted:
+            included_count = 0
+            applicable_count = 0
+            conflict_count = 0
             
-            # Step 2: Fall back to git apply check (slow but accurate)
-            is_included, reason = analyze_patch_against_source(patch_path, source_dir)
-            analysis_results[kv][cve_id] = (is_included, reason)
+            for cve_id, outcome, cache_key in entries:
+                if isinstance(outcome, Future):
+                    try:
+                        outcome = outcome.result()
+                    except Exception as e:
+                        outcome = (False, f"error: {e}")
+                    # Timeouts and errors are transient, don't cache them
+                    if cache_key and not outcome[1].startswith(("error", "timeout")):
+                        result_cache.put(cache_key, outcome)
+                is_included, reason = outcome
+                analysis_results[kv][cve_id] = (is_included, reason)
+                
+                if is_included:
+                    included_count += 1
+                elif reason == "patch_applicable":
+                    applicable_count += 1
+                else:
+                    conflict_count += 1
             
-            if is_included:
-                included_count += 1
-            elif reason == "patch_applicable":
-                applicable_count += 1
-            else:
-                conflict_count += 1
-        
-        console.print(
-            f"    Results: {included_count} already included, "
-            f"{applicable_count} applicable, {conflict_count} conflicts/other"
-        )
-        if cpe_skipped_count > 0:
             console.print(
-                f"    CPE optimization: {cpe_skipped_count}/{cpe_checked_count} CVEs skipped via CPE range check"
+                f"  {kv} results: {included_count} already included, "
+                f"{applicable_count} applicable, {conflict_count} conflicts/other"
+            )
+            if cpe_skipped_count > 0:
+                console.print(
+                    f"    CPE optimization: {cpe_skipped_count}/{cpe_checked_count} CVEs skipped via CPE range check"
+                )
+            console.print(
+                f"    Analysis cache: {result_cache.hits} hits, {result_cache.misses} misses"
             )
+            result_cache.save()
     
     return analysis_results
 
@@ -959,6 +955,156 @@ def save_matrix(matrix: CVECoverageMatrix, output_dir: Path, step_num: int = 7):
     md_path = output_dir / f"{base_name}.md"
     matrix.save_markdown(md_path)
     console.print(f"  Markdown: {md_path}")
+    
+    return json_path
+
+
+# State kept next to the matrix files for --since-last-run
+MATRIX_STATE_FILE = "full_cve_matrix_state.json"
+MATRIX_STATE_VERSION = 1
+
+
+def save_matrix_state(
+    output_dir: Path,
+    json_path: Path,
+    kernel_versions: List[str],
+    repo_dirs: dict,
+    patch_dirs: dict,
+    config: KernelConfig,
+    photon_versions: Optional[Dict[str, str]] = None,
+) -> Path:
+    """Record what the saved matrix was built from, for the next delta run.
+    
+    Stores the matrix JSON name, the NVD lastModified watermark and each
+    kernel's Photon version, spec CVEs and first stable fix per CVE.
+    
+    Returns:
+        Path of the state file
+    """
+    builder = CVEMatrixBuilder(kernel_versions, config)
+    state = {
+        "version": MATRIX_STATE_VERSION,
+        "matrix_json": json_path.name,
+        "nvd_last_modified": get_shared_feed_cache(config).latest_modified(config.kernel_org_cna),
+        "kernel_versions": kernel_versions,
+        "kernels": builder.kernel_inputs(repo_dirs, patch_dirs, photon_versions),
+    }
+    
+    state_path = output_dir / MATRIX_STATE_FILE
+    tmp_path = state_path.with_suffix(".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, state_path)
+    return state_path
+
+
+def load_matrix_state(
+    output_dir: Path, kernel_versions: List[str]
+) -> Optional[Tuple[CVECoverageMatrix, Dict[str, Any]]]:
+    """Load the previous matrix and its state for a delta run.
+    
+    Returns:
+        Tuple of (previous_matrix, state), or None if there is no usable
+        previous run for these kernel versions
+    """
+    state_path = output_dir / MATRIX_STATE_FILE
+    try:
+        with open(state_path) as f:
+            state = json.load(f)
+    except (OSError, ValueError) as e:
+        console.print(f"  [yellow]No previous matrix state ({e}), running full build[/yellow]")
+        return None
+    
+    if state.get("version") != MATRIX_STATE_VERSION or not state.get("nvd_last_modified"):
+        console.print("  [yellow]Previous matrix state is incompatible, running full build[/yellow]")
+        return None
+    if state.get("kernel_versions") != kernel_versions:
+        console.print("  [yellow]Kernel versions differ from previous run, running full build[/yellow]")
+        return None
+    
+    previous = CVECoverageMatrix.load_json(output_dir / state.get("matrix_json", ""))
+    if previous is None or previous.kernel_versions != kernel_versions:
+        console.print("  [yellow]Previous matrix JSON unavailable, running full build[/yellow]")
+        return None
+    
+    console.print(
+        f"  Previous matrix: {state['matrix_json']} ({previous.total_cves} CVEs, "
+        f"NVD watermark {state['nvd_last_modified']})"
+    )
+    return previous, state
+
+
+def build_matrix_delta(
+    previous: CVECoverageMatrix,
+    state: Dict[str, Any],
+    changed_cves: list,
+    kernel_versions: list,
+    repo_dirs: dict,
+    patch_dirs: dict,
+    config: KernelConfig,
+    photon_versions: Optional[Dict[str, str]] = None,
+    step_num: int = 5,
+) -> Optional[CVECoverageMatrix]:
+    """Update the previous matrix, re-evaluating only affected rows.
+    
+    Rows are re-evaluated for CVEs changed in NVD and for CVEs whose spec
+    patch or first stable fix changed for any kernel (new stable patches,
+    spec edits). All other rows are carried over unchanged.
+    
+    Returns:
+        Updated matrix, or None if a Photon version changed and a full
+        build is required
+    """
+    console.print(f"\n[bold blue]Step {step_num}: Updating CVE coverage matrix since last run[/bold blue]")
+    
+    builder = CVEMatrixBuilder(kernel_versions, config)
+    current_inputs = builder.kernel_inputs(repo_dirs, patch_dirs, photon_versions)
+    input_changes = builder.changed_cve_ids(state.get("kernels", {}), current_inputs)
+    if input_changes is None:
+        console.print("  [yellow]Photon kernel version changed since last run, running full build[/yellow]")
+        return None
+    
+    cves = {cve.cve_id: cve for cve in changed_cves}
+    lookup = sorted(input_changes - cves.keys())
+    feed_cves = get_shared_feed_cache(config).get_cves_by_id(lookup)
+    for cve in feed_cves:
+        cves[cve.cve_id] = cve
+    
+    console.print(f"  Changed in NVD: {len(changed_cves)}")
+    console.print(f"  Affected by spec/stable patch changes: {len(input_changes)}")
+    if len(feed_cves) < len(lookup):
+        console.print(f"  Not in NVD feeds (kept from previous run): {len(lookup) - len(feed_cves)}")
+    
+    matrix = builder.update_matrix(previous, list(cves.values()), repo_dirs, patch_dirs, photon_versions)
+    
+    console.print(
+        f"  [green]Matrix updated: {len(cves)} of {matrix.total_cves} entries re-evaluated[/green]"
+    )
+    return matrix
+
+
+def complete_cve_map(
+    cve_map: Dict[str, Any],
+    kernel_versions: List[str],
+    cve_patch_dirs: Dict[str, List[Path]],
+    output_base: Path,
+    config: KernelConfig,
+) -> Dict[str, Any]:
+    """Add NVD CVE data for every CVE patch file not already in ``cve_map``.
+    
+    A delta run only parses changed CVEs; source analysis still needs the
+    CPE data of every CVE it has a patch for.
+    """
+    missing = set()
+    for kv in kernel_versions:
+        for patch_path in _analysis_patch_files(kv, output_base, cve_patch_dirs):
+            cve_ids = extract_cve_ids(patch_path.name)
+            if cve_ids and cve_ids[0] not in cve_map:
+                missing.add(cve_ids[0])
+    
+    for cve in get_shared_feed_cache(config).get_cves_by_id(sorted(missing)):
+        cve_map[cve.cve_id] = cve
+    return cve_map
 
 
 def print_summary(
@@ -1095,6 +1241,22 @@ async def main():
         default=None,
         help="Base directory containing Photon repo clones (e.g., ./4.0, ./5.0)"
     )
+    parser.add_argument(
+        "--jobs", "-j",
+        type=int,
+        default=None,
+        help="Parallel workers for patch analysis (default: CPU count)"
+    )
+    parser.add_argument(
+        "--partial-source",
+        action="store_true",
+        help="Extract only the kernel source files touched by CVE patches"
+    )
+    parser.add_argument(
+        "--since-last-run",
+        action="store_true",
+        help="Only re-evaluate CVEs changed since the previous matrix in the output directory"
+    )
     
     args = parser.parse_args()
     
@@ -1105,8 +1267,12 @@ async def main():
     console.print(f"Kernels: {', '.join(kernel_versions)}")
     console.print(f"Output: {args.output}")
     
-    # Step 1: Fetch CVEs
-    cves = await fetch_all_cves(args.output, config, kernel_versions[0])
+    # Step 1: Fetch CVEs (only those changed since the previous matrix in delta mode)
+    previous = load_matrix_state(args.output, kernel_versions) if args.since_last_run else None
+    if previous:
+        cves = await fetch_changed_cves(config, previous[1]["nvd_last_modified"], step_num=3)
+    else:
+        cves = await fetch_all_cves(args.output, config, kernel_versions[0])
     
     # Step 2: Download stable patches (required for accurate CVE detection)
     patch_dirs = {}
@@ -1141,8 +1307,18 @@ async def main():
     # Steps: 1=repos, 2=status, 3=CVEs, 4=stable patches, 5=matrix, 6=CVE patches, 7=analyze, 8=update, 9=save
     current_step = 5
     
-    # Step 5: Build initial matrix
-    matrix = build_matrix(cves, kernel_versions, repo_dirs, patch_dirs, config, photon_versions, step_num=current_step)
+    # Step 5: Build initial matrix (or update the previous one)
+    matrix = None
+    if previous:
+        matrix = build_matrix_delta(
+            *previous, cves, kernel_versions, repo_dirs, patch_dirs, config, photon_versions,
+            step_num=current_step,
+        )
+        if matrix is None:
+            previous = None
+            cves = await fetch_all_cves(args.output, config, kernel_versions[0])
+    if matrix is None:
+        matrix = build_matrix(cves, kernel_versions, repo_dirs, patch_dirs, config, photon_versions, step_num=current_step)
     current_step += 1
     
     # Step 6: Collect existing CVE patches
@@ -1156,11 +1332,14 @@ async def main():
         photon_versions,
         args.output,
         config,
+        cve_patch_dirs=cve_patch_dirs if args.partial_source else None,
     )
     current_step += 1
     
     # Build CVE map for CPE lookup (no API calls needed - data from NVD feeds)
     cve_map = {cve.cve_id: cve for cve in cves}
+    if previous:
+        complete_cve_map(cve_map, kernel_versions, cve_patch_dirs, args.output, config)
     
     # Step 8: Analyze CVE patches against kernel source
     analysis_results = analyze_cve_patches_against_source(
@@ -1172,6 +1351,7 @@ async def main():
         step_num=current_step,
         source_dirs=source_dirs,
         cve_map=cve_map,
+        jobs=args.jobs,
     )
     current_step += 1
     
@@ -1180,7 +1360,8 @@ async def main():
     current_step += 1
     
     # Save files
-    save_matrix(matrix, args.output, step_num=current_step)
+    json_path = save_matrix(matrix, args.output, step_num=current_step)
+    save_matrix_state(args.output, json_path, kernel_versions, repo_dirs, patch_dirs, config, photon_versions)
     
     # Print summary
     print_summary(matrix, analysis_results, cve_patch_dirs)
@@ -0,0 +1,496 @@
+"""
+Shared cache of kernel source tarballs and extracted trees.
+
+The CVE matrix, source verification and RPM builds all need
+``linux-X.Y.Z.tar.xz`` and, except for builds, its extracted tree. This
+module downloads each tarball once into ``config.cache_dir/kernel_sources``
+and extracts it once, in a single streaming pass that also validates the
+xz stream. Extracted trees are keyed by the tarball's SHA-256, so the same
+tarball fetched from different mirrors is only extracted once.
+"""
+
+import hashlib
+import json
+import lzma
+import os
+import shutil
+import tarfile
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import requests
+
+from scripts.common import logger
+from scripts.config import DEFAULT_CONFIG, KernelConfig, get_kernel_org_url
+
+
+# Download chunk size (1MB)
+CHUNK_SIZE = 1024 * 1024
+
+# Tarballs smaller than this are treated as broken downloads
+MIN_TARBALL_SIZE = 1024 * 1024
+
+
+class SourceExtractionError(Exception):
+    """Raised when a tarball is corrupt or unsafe to extract."""
+
+
+def kernel_tarball_urls(full_version: str, config: Optional[KernelConfig] = None) -> List[str]:
+    """
+    Get download URLs for a kernel tarball, kernel.org first.
+    
+    Args:
+        full_version: Full kernel version (e.g., "6.1.160")
+        config: Kernel configuration
+    
+    Returns:
+        Candidate tarball URLs in preference order
+    """
+    config = config or DEFAULT_CONFIG
+    tarball_name = f"linux-{full_version}.tar.xz"
+    urls = []
+    kernel_url = get_kernel_org_url(".".join(full_version.split(".")[:2]))
+    if kernel_url:
+        urls.append(f"{kernel_url}{tarball_name}")
+    urls.append(f"{config.photon_sources_url}{tarball_name}")
+    return urls
+
+
+def _member_path(name: str) -> str:
+    """Strip the top-level directory from a tar member name."""
+    if name.startswith("./"):
+        name = name[2:]
+    parts = name.split("/", 1)
+    return parts[1] if len(parts) == 2 else ""
+
+
+def extract_tarball(
+    tarball_path: Path,
+    dest_dir: Path,
+    paths: Optional[Iterable[str]] = None,
+) -> int:
+    """
+    Extract a ``.tar.xz`` in one streaming pass.
+    
+    Members are validated (TarSlip) and written as the xz stream is
+    decoded, so the tarball is decompressed exactly once and a corrupt or
+    truncated file fails during extraction.
+    
+    Args:
+        tarball_path: Path to the tarball
+        dest_dir: Directory to extract into
+        paths: Optional tree-relative paths (without the ``linux-X.Y.Z/``
+            prefix) to extract; all members are extracted if None
+    
+    Returns:
+        Number of members extracted
+    
+    Raises:
+        SourceExtractionError: If the tarball is corrupt or unsafe
+    """
+    wanted: Optional[Set[str]] = set(paths) if paths is not None else None
+    extract_root = os.path.realpath(str(dest_dir))
+    # Extraction filters exist on 3.12+ and security releases of older Pythons
+    use_filter = hasattr(tarfile, "data_filter")
+    count = 0
+    
+    try:
+        with lzma.open(tarball_path) as xz_file, tarfile.open(fileobj=xz_file, mode="r|") as tar:
+            for member in tar:
+                if wanted is not None and _member_path(member.name) not in wanted:
+                    continue
+                dest = os.path.realpath(os.path.join(extract_root, member.name))
+                if not (dest == extract_root or dest.startswith(extract_root + os.sep)):
+                    raise SourceExtractionError(f"tar slip detected: {member.name}")
+                if use_filter:
+                    tar.extract(member, dest_dir, filter="data")
+                else:
+                    tar.extract(member, dest_dir)
+                count += 1
+                if count % 10000 == 0:
+                    logger.debug(f"  Extracted {count} files")
+            # Drain the rest of the stream so the xz index and checks are verified
+            while xz_file.read(CHUNK_SIZE):
+                pass
+    except (lzma.LZMAError, EOFError, tarfile.TarError) as e:
+        raise SourceExtractionError(f"corrupt tarball {tarball_path.name}: {e}") from e
+    
+    return count
+
+
+class KernelSourceCache:
+    """
+    Content-addressed store of kernel source tarballs and extracted trees.
+    
+    Layout under ``config.cache_dir/kernel_sources``:
+    - ``tarballs/linux-<version>.tar.xz`` and a ``.json`` manifest
+      recording its URL, size and SHA-256
+    - ``trees/<sha256>/linux-<version>/`` full tree of that tarball
+    - ``partial/<sha256>/linux-<version>/`` files touched by patch sets,
+      with a ``partial/<sha256>.json`` manifest of the paths requested
+    
+    Trees are extracted into a temporary directory and renamed into place,
+    so concurrent runs never see a half-extracted tree. Extracted trees
+    are shared and must be treated as read-only.
+    """
+    
+    def __init__(self, config: Optional[KernelConfig] = None):
+        self.config = config or DEFAULT_CONFIG
+        self.root = self.config.cache_dir / "kernel_sources"
+        self.tarball_dir = self.root / "tarballs"
+        self.tree_dir = self.root / "trees"
+        self.partial_dir = self.root / "partial"
+        for directory in (self.tarball_dir, self.tree_dir, self.partial_dir):
+            directory.mkdir(parents=True, exist_ok=True)
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+    
+    def _version_lock(self, version: str) -> threading.Lock:
+        """Get the lock serializing work on one kernel version."""
+        with self._locks_guard:
+            return self._locks.setdefault(version, threading.Lock())
+    
+    def tarball_path(self, version: str) -> Path:
+        """Get the cached tarball path for a version."""
+        return self.tarball_dir / f"linux-{version}.tar.xz"
+    
+    def _manifest_path(self, version: str) -> Path:
+        return self.tarball_dir / f"linux-{version}.json"
+    
+    def _read_manifest(self, version: str) -> Optional[Dict]:
+        try:
+            manifest = json.loads(self._manifest_path(version).read_text())
+        except (OSError, ValueError):
+            return None
+        return manifest if isinstance(manifest, dict) else None
+    
+    def _write_manifest(self, version: str, url: str, size: int, sha256: str) -> None:
+        manifest = {
+            "url": url,
+            "size": size,
+            "sha256": sha256,
+            "downloaded": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        self._manifest_path(version).write_text(json.dumps(manifest, indent=2))
+    
+    def discard_tarball(self, version: str) -> None:
+        """Remove a cached tarball and its manifest."""
+        for path in (self.tarball_path(version), self._manifest_path(version)):
+            if path.exists():
+                path.unlink()
+    
+    def digest(self, version: str) -> Optional[str]:
+        """
+        Get the SHA-256 of the cached tarball.
+        
+        Tarballs placed in the cache without a manifest are hashed once and
+        a manifest is written for them.
+        """
+        tarball = self.tarball_path(version)
+        if not tarball.exists():
+            return None
+        size = tarball.stat().st_size
+        manifest = self._read_manifest(version)
+        if manifest and manifest.get("size") == size and manifest.get("sha256"):
+            return str(manifest["sha256"])
+        
+        sha = hashlib.sha256()
+        with open(tarball, "rb") as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                sha.update(chunk)
+        self._write_manifest(version, "", size, sha.hexdigest())
+        return sha.hexdigest()
+    
+    def _download(self, url: str, dest: Path) -> Tuple[Optional[Tuple[int, str]], bool]:
+        """
+        Download ``url`` to ``dest``, hashing while writing.
+        
+        Returns:
+            ((size, sha256) or None, retryable)
+        """
+        part = dest.with_name(dest.name + ".part")
+        try:
+            with requests.get(url, stream=True, timeout=self.config.network_timeout) as response:
+                if response.status_code == 404:
+                    logger.debug(f"Not found: {url}")
+                    return None, False
+                response.raise_for_status()
+                expected = int(response.headers.get("content-length", 0))
+                sha = hashlib.sha256()
+                size = 0
+                with open(part, "wb") as f:
+                    for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                        f.write(chunk)
+                        sha.update(chunk)
+                        size += len(chunk)
+            if expected and size != expected:
+                raise OSError(f"truncated download ({size} of {expected} bytes)")
+            if size < MIN_TARBALL_SIZE:
+                raise OSError(f"download too small ({size} bytes)")
+            os.replace(part, dest)
+            return (size, sha.hexdigest()), True
+        except (requests.exceptions.RequestException, OSError) as e:
+            logger.warning(f"Download failed: {url}: {e}")
+            if part.exists():
+                part.unlink()
+            return None, True
+    
+    def get_tarball(self, version: str, urls: Optional[Sequence[str]] = None) -> Optional[Path]:
+        """
+        Get a kernel tarball, downloading it once into the cache.
+        
+        Args:
+            version: Full kernel version (e.g., "5.10.247")
+            urls: Candidate URLs in preference order
+                (default: ``kernel_tarball_urls``)
+        
+        Returns:
+            Path to the cached tarball or None on failure
+        """
+        tarball = self.tarball_path(version)
+        with self._version_lock(version):
+            if tarball.exists():
+                if tarball.stat().st_size >= MIN_TARBALL_SIZE:
+                    return tarball
+                logger.warning(f"Cached tarball too small, re-downloading: {tarball}")
+                self.discard_tarball(version)
+            
+            retries = max(1, self.config.network_retries)
+            for url in urls or kernel_tarball_urls(version, self.config):
+                for attempt in range(1, retries + 1):
+                    logger.info(f"Downloading {tarball.name} (attempt {attempt}/{retries}): {url}")
+                    result, retryable = self._download(url, tarball)
+                    if result:
+                        size, sha256 = result
+                        self._write_manifest(version, url, size, sha256)
+                        logger.info(f"Downloaded {tarball.name} ({size // (1024 * 1024)}MB)")
+                        return tarball
+                    if not retryable:
+                        break
+                    if attempt < retries:
+                        time.sleep(2 ** attempt)
+            
+            logger.error(f"Failed to download {tarball.name}")
+            return None
+    
+    def copy_tarball(
+        self,
+        version: str,
+        dest_dir: Path,
+        urls: Optional[Sequence[str]] = None,
+    ) -> Optional[Path]:
+        """
+        Place the cached tarball in ``dest_dir`` (e.g. rpmbuild SOURCES).
+        
+        Hard-links when possible so the tarball is stored once on disk.
+        
+        Returns:
+            Path to the tarball in ``dest_dir`` or None on failure
+        """
+        tarball = self.get_tarball(version, urls)
+        if not tarball:
+            return None
+        dest = Path(dest_dir) / tarball.name
+        if dest.exists():
+            return dest
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.link(tarball, dest)
+        except OSError:
+            shutil.copy2(tarball, dest)
+        return dest
+    
+    @staticmethod
+    def _tree_root(extract_dir: Path) -> Path:
+        """Get the source root inside an extraction (usually linux-X.Y.Z)."""
+        subdirs = [d for d in extract_dir.iterdir() if d.is_dir()]
+        return subdirs[0] if len(subdirs) == 1 else extract_dir
+    
+    def _extract_to_staging(
+        self,
+        version: str,
+        parent: Path,
+        paths: Optional[Iterable[str]],
+    ) -> Optional[Tuple[Path, int]]:
+        """Extract the cached tarball into a new staging directory under ``parent``."""
+        tarball = self.tarball_path(version)
+        staging = Path(tempfile.mkdtemp(prefix=f".linux-{version}-", dir=parent))
+        try:
+            return staging, extract_tarball(tarball, staging, paths)
+        except SourceExtractionError as e:
+            logger.error(f"Failed to extract {tarball.name}: {e}")
+            shutil.rmtree(staging, ignore_errors=True)
+            self.discard_tarball(version)
+            return None
+        except OSError as e:
+            logger.error(f"Failed to extract {tarball.name}: {e}")
+            shutil.rmtree(staging, ignore_errors=True)
+            return None
+    
+    def _materialize_full(self, version: str, digest: str) -> Optional[Path]:
+        """Extract the whole tarball once into ``trees/<digest>``."""
+        target = self.tree_dir / digest
+        if target.exists():
+            return self._tree_root(target)
+        
+        logger.info(f"Extracting linux-{version}.tar.xz to {target}")
+        staged = self._extract_to_staging(version, self.tree_dir, None)
+        if not staged:
+            return None
+        staging, count = staged
+        
+        try:
+            os.rename(staging, target)
+        except OSError:
+            # Another process finished the same extraction first
+            shutil.rmtree(staging, ignore_errors=True)
+        logger.info(f"Extracted {count} files from linux-{version}.tar.xz")
+        return self._tree_root(target)
+    
+    def _materialize_partial(self, version: str, digest: str, paths: Set[str]) -> Optional[Path]:
+        """
+        Extract only ``paths`` into ``partial/<digest>``.
+        
+        The partial tree grows across calls: a manifest records every path
+        already requested (present in the tarball or not), so only new paths
+        cost another pass over the tarball.
+        """
+        target = self.partial_dir / digest
+        manifest_path = self.partial_dir / f"{digest}.json"
+        try:
+            manifest = json.loads(manifest_path.read_text())
+        except (OSError, ValueError):
+            manifest = {"root": None, "paths": []}
+        
+        known = set(manifest["paths"])
+        missing = paths - known
+        if missing:
+            logger.info(f"Extracting {len(missing)} paths from linux-{version}.tar.xz to {target}")
+            staged = self._extract_to_staging(version, self.partial_dir, missing)
+            if not staged:
+                return None
+            staging, count = staged
+            
+            for root_dir in [d for d in staging.iterdir() if d.is_dir()]:
+                manifest["root"] = manifest["root"] or root_dir.name
+                for src in sorted(root_dir.rglob("*")):
+                    if src.is_dir() and not src.is_symlink():
+                        continue
+                    dest = target / root_dir.name / src.relative_to(root_dir)
+                    dest.parent.mkdir(parents=True, exist_ok=True)
+                    os.replace(src, dest)
+            shutil.rmtree(staging, ignore_errors=True)
+            
+            manifest["paths"] = sorted(known | missing)
+            tmp_manifest = manifest_path.with_name(manifest_path.name + ".tmp")
+            tmp_manifest.write_text(json.dumps(manifest))
+            os.replace(tmp_manifest, manifest_path)
+            logger.info(f"Extracted {count} of {len(missing)} requested paths")
+        
+        source_root = target / (manifest["root"] or f"linux-{version}")
+        source_root.mkdir(parents=True, exist_ok=True)
+        return source_root
+    
+    def cached_source(self, version: str) -> Optional[Path]:
+        """Get an already extracted full tree without downloading anything."""
+        digest = self.digest(version)
+        if not digest:
+            return None
+        target = self.tree_dir / digest
+        return self._tree_root(target) if target.exists() else None
+    
+    def get_source(
+        self,
+        version: str,
+        urls: Optional[Sequence[str]] = None,
+        paths: Optional[Iterable[str]] = None,
+    ) -> Optional[Path]:
+        """
+        Get an extracted kernel source tree, downloading and extracting once.
+        
+        Args:
+            version: Full kernel version (e.g., "5.10.247")
+            urls: Candidate tarball URLs (default: ``kernel_tarball_urls``)
+            paths: Optional tree-relative paths; when given only those files
+                are extracted, into a partial tree shared by all partial
+                requests for the same tarball. A full tree already in the
+                cache is returned instead.
+        
+        Returns:
+            Path to the source root (e.g. ``.../linux-5.10.247``) or None
+        """
+        if not self.get_tarball(version, urls):
+            return None
+        
+        with self._version_lock(version):
+            digest = self.digest(version)
+            if digest is None:
+                return None
+            if paths is None:
+                return self._materialize_full(version, digest)
+            
+            full_tree = self.tree_dir / digest
+            if full_tree.exists():
+                return self._tree_root(full_tree)
+            return self._materialize_partial(version, digest, set(paths))
+
+
+def patch_touched_paths(
+    patch_files: Iterable[Path],
+    fallback_dirs: Sequence[str] = (),
+) -> Set[str]:
+    """
+    Collect the tree-relative paths a patch set reads or writes.
+    
+    Args:
+        patch_files: Patch files to scan
+        fallback_dirs: Directories a consumer also tries a path under
+            (e.g. ``PatchMatcher.FALLBACK_DIRS``); those variants are included
+    
+    Returns:
+        Set of paths for ``KernelSourceCache.get_source(paths=...)``
+    """
+    paths: Set[str] = set()
+    for patch_file in patch_files:
+        try:
+            content = Path(patch_file).read_bytes()
+        except OSError:
+            continue
+        for line in content.split(b"\n"):
+            if not line.startswith((b"--- ", b"+++ ")):
+                continue
+            raw = line[4:].split(b"\t", 1)[0].strip()
+            if raw == b"/dev/null" or raw.startswith(b'"'):
+                continue
+            parts = raw.split(b"/", 1)
+            path = (parts[1] if len(parts) == 2 else parts[0]).decode("utf-8", "surrogateescape")
+            paths.add(path)
+            paths.update(f"{sub}/{path}" for sub in fallback_dirs)
+    return paths
+
+
+# Shared store instances, one per cache directory
+_shared_caches: Dict[Path, KernelSourceCache] = {}
+_shared_lock = threading.Lock()
+
+
+def get_shared_source_cache(config: Optional[KernelConfig] = None) -> KernelSourceCache:
+    """
+    Get the process-wide kernel source cache for a configuration.
+    
+    Args:
+        config: Kernel configuration
+    
+    Returns:
+        Shared KernelSourceCache for ``config.cache_dir``
+    """
+    config = config or DEFAULT_CONFIG
+    with _shared_lock:
+        cache = _shared_caches.get(config.cache_dir)
+        if cache is None:
+            cache = KernelSourceCache(config)
+            _shared_caches[config.cache_dir] = cache
+        return cache
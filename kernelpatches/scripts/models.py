@@ -5,11 +5,34 @@ Data models for the kernelpatches solution using Pydantic for validation.
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
-from typing import Dict, List, Optional, Set
-from pydantic import BaseModel, Field, field_validator
+from functools import lru_cache
+from typing import Dict, List, Optional, Set, Tuple
+from pydantic import BaseModel, Field, PrivateAttr, field_validator
 import re
 
 
+VersionTuple = Tuple[int, int, int]
+
+# Distinct version strings seen in a matrix run (CPE bounds, stable releases)
+VERSION_CACHE_SIZE = 8192
+
+
+@lru_cache(maxsize=VERSION_CACHE_SIZE)
+def version_tuple(version_str: str) -> VersionTuple:
+    """
+    Parse a version string like '6.1.159' into a comparable (major, minor, patch) tuple.
+    
+    Results are memoized, so repeated comparisons of the same strings cost
+    a dict lookup instead of a split and three int conversions.
+    """
+    parts = version_str.split(".")
+    return (
+        int(parts[0]) if len(parts) > 0 else 0,
+        int(parts[1]) if len(parts) > 1 else 0,
+        int(parts[2]) if len(parts) > 2 else 0,
+    )
+
+
 class CVESource(str, Enum):
     """Sources for CVE information."""
     NVD = "nvd"
@@ -66,35 +89,37 @@ class KernelVersion(BaseModel):
     @classmethod
     def parse(cls, version_str: str) -> "KernelVersion":
         """Parse a version string like '6.1.159' into a KernelVersion."""
-        parts = version_str.split(".")
-        return cls(
-            major=int(parts[0]) if len(parts) > 0 else 0,
-            minor=int(parts[1]) if len(parts) > 1 else 0,
-            patch=int(parts[2]) if len(parts) > 2 else 0,
-        )
+        major, minor, patch = version_tuple(version_str)
+        # Fields come from the memoized int parse, so validation can be skipped
+        return cls.model_construct(major=major, minor=minor, patch=patch)
+    
+    @property
+    def key(self) -> VersionTuple:
+        """Sortable (major, minor, patch) tuple."""
+        return (self.major, self.minor, self.patch)
     
     def __str__(self) -> str:
         return f"{self.major}.{self.minor}.{self.patch}"
     
     def __lt__(self, other: "KernelVersion") -> bool:
-        return (self.major, self.minor, self.patch) < (other.major, other.minor, other.patch)
+        return self.key < other.key
     
     def __le__(self, other: "KernelVersion") -> bool:
-        return (self.major, self.minor, self.patch) <= (other.major, other.minor, other.patch)
+        return self.key <= other.key
     
     def __gt__(self, other: "KernelVersion") -> bool:
-        return (self.major, self.minor, self.patch) > (other.major, other.minor, other.patch)
+        return self.key > other.key
     
     def __ge__(self, other: "KernelVersion") -> bool:
-        return (self.major, self.minor, self.patch) >= (other.major, other.minor, other.patch)
+        return self.key >= other.key
     
     def __eq__(self, other: object) -> bool:
         if not isinstance(other, KernelVersion):
             return False
-        return (self.major, self.minor, self.patch) == (other.major, other.minor, other.patch)
+        return self.key == other.key
     
     def __hash__(self) -> int:
-        return hash((self.major, self.minor, self.patch))
+        return hash(self.key)
     
     @property
     def series(self) -> str:
@@ -123,31 +148,45 @@ class CPERange(BaseModel):
     version_end_excluding: Optional[str] = None
     vulnerable: bool = True
     
-    def contains_version(self, version: str) -> bool:
-        """Check if a kernel version falls within this range."""
-        ver = KernelVersion.parse(version)
+    # Bounds parsed once: (start_incl, start_excl, end_incl, end_excl)
+    _bounds: Optional[Tuple[Optional[VersionTuple], ...]] = PrivateAttr(default=None)
+    
+    @property
+    def bounds(self) -> Tuple[Optional[VersionTuple], ...]:
+        """Range boundaries as version tuples, parsed on first use."""
+        if self._bounds is None:
+            self._bounds = tuple(
+                version_tuple(v) if v else None
+                for v in (
+                    self.version_start_including,
+                    self.version_start_excluding,
+                    self.version_end_including,
+                    self.version_end_excluding,
+                )
+            )
+        return self._bounds
+    
+    def contains_version_tuple(self, ver: VersionTuple) -> bool:
+        """Check if an already parsed kernel version falls within this range."""
+        start_incl, start_excl, end_incl, end_excl = self.bounds
         
         # Check start boundary
-        if self.version_start_including:
-            start = KernelVersion.parse(self.version_start_including)
-            if ver < start:
-                return False
-        if self.version_start_excluding:
-            start = KernelVersion.parse(self.version_start_excluding)
-            if ver <= start:
-                return False
+        if start_incl is not None and ver < start_incl:
+            return False
+        if start_excl is not None and ver <= start_excl:
+            return False
         
         # Check end boundary
-        if self.version_end_including:
-            end = KernelVersion.parse(self.version_end_including)
-            if ver > end:
-                return False
-        if self.version_end_excluding:
-            end = KernelVersion.parse(self.version_end_excluding)
-            if ver >= end:
-                return False
+        if end_incl is not None and ver > end_incl:
+            return False
+        if end_excl is not None and ver >= end_excl:
+            return False
         
         return True
+    
+    def contains_version(self, version: str) -> bool:
+        """Check if a kernel version falls within this range."""
+        return self.contains_version_tuple(version_tuple(version))
 
 
 class CVE(BaseModel):
@@ -176,11 +215,17 @@ class CVE(BaseModel):
             False: Version is NOT vulnerable (patched or not in affected range)
             None: No CPE data available to make determination
         """
+        if not self.cpe_ranges:
+            return None
+        return self.is_version_tuple_affected(version_tuple(kernel_version))
+    
+    def is_version_tuple_affected(self, ver: VersionTuple) -> Optional[bool]:
+        """Same as ``is_version_affected`` for an already parsed version."""
         if not self.cpe_ranges:
             return None
         
         for cpe_range in self.cpe_ranges:
-            if cpe_range.contains_version(kernel_version):
+            if cpe_range.contains_version_tuple(ver):
                 return cpe_range.vulnerable
         
         # Version not in any range - not affected
@@ -372,6 +417,11 @@ class BuildResult:
     error_message: Optional[str] = None
     canister_build: int = 0
     acvp_build: int = 0
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    rpm_dir: Optional[str] = None
+    phase_durations: Dict[str, float] = field(default_factory=dict)  # rpmbuild phase -> seconds
+    timeline_file: Optional[str] = None
 
 
 @dataclass
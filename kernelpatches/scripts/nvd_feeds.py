@@ -0,0 +1,506 @@
+"""
+Shared local store for NVD JSON 2.0 feeds.
+
+Downloads the recent, modified and yearly NVD feeds into
+``config.cache_dir/nvd_feeds`` and serves CVE data from a persistent
+pre-parsed index. Gap detection, the CVE matrix and the NVD fetcher all
+read from this one store, so feeds are downloaded and parsed once.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+import requests
+
+from scripts.common import logger
+from scripts.config import DEFAULT_CONFIG, KernelConfig
+from scripts.models import CVE
+from scripts.nvd_index import NVDFeedIndex, nvd_record_to_cve
+
+
+# 4xx statuses worth retrying; other client errors (e.g. 404 for a yearly
+# feed not published yet) are permanent
+TRANSIENT_CLIENT_STATUSES = (408, 429)
+
+
+class FeedUnavailableError(Exception):
+    """Raised when a feed download failed permanently and should not be retried."""
+
+
+class NVDFeedCache:
+    """
+    Local cache for NVD feeds.
+    
+    Single feed store shared by gap detection, the CVE matrix and the NVD
+    fetcher. Downloads and caches NVD JSON feeds locally:
+    - Recent feed: updated every run
+    - Modified feed: updated every run
+    - Yearly feeds (2023+): updated once per 24 hours
+    
+    All CVE analysis uses the local cache - NO per-CVE API calls.
+    """
+    
+    def __init__(self, config: Optional[KernelConfig] = None):
+        self.config = config or DEFAULT_CONFIG
+        # NVD 2.0 feed URLs (overridable to point at a mirror)
+        self.feed_base = self.config.nvd_feed_base.rstrip("/")
+        self.cache_dir = self.config.cache_dir / "nvd_feeds"
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        
+        # Persistent pre-parsed CVE index, refreshed per feed on change
+        self._index = NVDFeedIndex(self.cache_dir / "nvd_index.sqlite")
+        self._loaded = False
+        self._refreshed = False
+        self._lock = threading.Lock()
+        
+        # Marker for yearly feed refresh
+        self._yearly_marker = self.cache_dir / ".yearly_last_update"
+    
+    def _get_feed_path(self, feed_name: str) -> Path:
+        """Get local path for a feed."""
+        return self.cache_dir / f"nvdcve-2.0-{feed_name}.json"
+    
+    def _should_update_yearly(self) -> bool:
+        """Check if yearly feeds need refresh (once per 24h)."""
+        if not self._yearly_marker.exists():
+            return True
+        try:
+            last_update = float(self._yearly_marker.read_text().strip())
+            age_hours = (time.time() - last_update) / 3600
+            if age_hours >= 24:
+                return True
+            logger.debug(f"Yearly feeds last updated {age_hours:.1f}h ago, skipping")
+            return False
+        except Exception:
+            return True
+    
+    def _mark_yearly_updated(self) -> None:
+        """Mark yearly feeds as updated."""
+        self._yearly_marker.write_text(str(time.time()))
+    
+    def _get_state_path(self, feed_name: str) -> Path:
+        """Get path of the sidecar file holding a feed's download state."""
+        return self.cache_dir / f"nvdcve-2.0-{feed_name}.state.json"
+    
+    def _read_state(self, feed_name: str) -> Dict[str, str]:
+        """Read saved download state (sha256, ETag, Last-Modified) for a feed."""
+        state_path = self._get_state_path(feed_name)
+        if not state_path.exists():
+            return {}
+        try:
+            state = json.loads(state_path.read_text())
+        except Exception:
+            return {}
+        return state if isinstance(state, dict) else {}
+    
+    def _write_state(self, feed_name: str, state: Dict[str, str]) -> None:
+        """Save download state for a feed. Also records the last check time."""
+        self._get_state_path(feed_name).write_text(json.dumps(state, indent=2))
+    
+    def _fetch_remote_meta(self, feed_name: str) -> Dict[str, str]:
+        """
+        Fetch the NVD ``.meta`` file for a feed.
+        
+        The meta file lists lastModifiedDate, size, gzSize and the sha256 of
+        the uncompressed JSON, which is enough to tell whether a feed changed.
+        
+        Returns:
+            Parsed meta fields, or empty dict if unavailable
+        """
+        meta_url = f"{self.feed_base}/nvdcve-2.0-{feed_name}.meta"
+        try:
+            response = requests.get(meta_url, timeout=30)
+            response.raise_for_status()
+        except Exception as e:
+            logger.debug(f"Could not fetch {feed_name} meta: {e}")
+            return {}
+        
+        meta = {}
+        for line in response.text.splitlines():
+            key, sep, value = line.partition(":")
+            if sep:
+                meta[key.strip()] = value.strip()
+        return meta
+    
+    def _stream_feed(
+        self, response: requests.Response, dest_path: Path
+    ) -> Tuple[int, str]:
+        """
+        Stream a gzip response body to disk through an incremental decompressor.
+        
+        Data is written to a temporary file next to ``dest_path`` and renamed
+        into place only once complete, so readers never see a partial feed.
+        
+        Returns:
+            Tuple of (decompressed size, sha256 hex digest of decompressed data)
+        """
+        tmp_path = dest_path.with_name(dest_path.name + ".part")
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        sha256 = hashlib.sha256()
+        size = 0
+        
+        try:
+            with open(tmp_path, "wb") as f:
+                for chunk in response.iter_content(chunk_size=1024 * 1024):
+                    while chunk:
+                        data = decompressor.decompress(chunk)
+                        f.write(data)
+                        sha256.update(data)
+                        size += len(data)
+                        if not decompressor.eof:
+                            break
+                        # Concatenated gzip members: restart on leftover bytes
+                        chunk = decompressor.unused_data
+                        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+                data = decompressor.flush()
+                f.write(data)
+                sha256.update(data)
+                size += len(data)
+            os.replace(tmp_path, dest_path)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+        
+        return size, sha256.hexdigest()
+    
+    def _download_feed(self, feed_name: str, force: bool = False) -> bool:
+        """
+        Download a single NVD feed.
+        
+        The gzip body is streamed and decompressed straight to disk. A feed
+        is only fetched when its ``.meta`` sha256 differs from the local copy;
+        ETag/Last-Modified conditional headers are sent as a second check.
+        
+        Args:
+            feed_name: Feed identifier (recent, modified, 2024, 2025, etc.)
+            force: Force download even if cached
+        
+        Returns:
+            True if successful, False on a transient failure (network
+            error, 5xx, 408/429)
+        
+        Raises:
+            FeedUnavailableError: On a permanent failure (other 4xx)
+        """
+        feed_path = self._get_feed_path(feed_name)
+        state_path = self._get_state_path(feed_name)
+        gz_url = f"{self.feed_base}/nvdcve-2.0-{feed_name}.json.gz"
+        
+        # Check if cached and not forcing refresh
+        if not force and feed_path.exists():
+            # For recent/modified, check if < 1 hour since last check
+            if feed_name in ("recent", "modified"):
+                checked_path = state_path if state_path.exists() else feed_path
+                age_hours = (time.time() - checked_path.stat().st_mtime) / 3600
+                if age_hours < 1:
+                    logger.debug(f"Using cached {feed_name} feed ({age_hours:.1f}h old)")
+                    return True
+            else:
+                # Yearly feeds - use cached if exists
+                logger.debug(f"Using cached {feed_name} feed")
+                return True
+        
+        state = self._read_state(feed_name) if feed_path.exists() else {}
+        remote_meta = self._fetch_remote_meta(feed_name)
+        remote_sha = remote_meta.get("sha256", "").lower()
+        
+        if remote_sha and remote_sha == state.get("sha256"):
+            logger.debug(f"NVD feed {feed_name} unchanged (sha256 match)")
+            self._write_state(feed_name, state)
+            return True
+        
+        headers = {}
+        if state.get("etag"):
+            headers["If-None-Match"] = state["etag"]
+        if state.get("last_modified"):
+            headers["If-Modified-Since"] = state["last_modified"]
+        
+        logger.info(f"Downloading NVD feed: {feed_name}")
+        
+        try:
+            with requests.get(gz_url, timeout=180, stream=True, headers=headers) as response:
+                if response.status_code == 304:
+                    logger.debug(f"NVD feed {feed_name} not modified")
+                    self._write_state(feed_name, state)
+                    return True
+                status = response.status_code
+                if 400 <= status < 500 and status not in TRANSIENT_CLIENT_STATUSES:
+                    raise FeedUnavailableError(f"{feed_name} feed: HTTP {status}")
+                response.raise_for_status()
+                
+                size, sha = self._stream_feed(response, feed_path)
+                
+                if remote_sha and sha != remote_sha:
+                    logger.warning(f"sha256 mismatch for {feed_name} feed (meta may be stale)")
+                
+                self._write_state(feed_name, {
+                    "sha256": sha,
+                    "etag": response.headers.get("ETag", ""),
+                    "last_modified": response.headers.get("Last-Modified", ""),
+                })
+            
+            logger.info(f"  Saved {feed_name} feed ({size / 1024 / 1024:.1f} MB)")
+            return True
+            
+        except FeedUnavailableError:
+            raise
+        except Exception as e:
+            logger.warning(f"Failed to download {feed_name} feed: {e}")
+            return False
+    
+    def _download_feed_with_retry(self, feed_name: str, force: bool = False) -> bool:
+        """Download a feed, retrying transient failures with exponential backoff."""
+        retries = max(1, self.config.network_retries)
+        for attempt in range(1, retries + 1):
+            try:
+                if self._download_feed(feed_name, force=force):
+                    return True
+            except FeedUnavailableError as e:
+                logger.warning(f"NVD feed not available, not retrying: {e}")
+                return False
+            if attempt < retries:
+                delay = 2 ** attempt
+                logger.info(f"  Retrying {feed_name} feed in {delay}s ({attempt}/{retries})")
+                time.sleep(delay)
+        return False
+    
+    def _download_feeds(self, feeds: List[Tuple[str, bool]]) -> Dict[str, bool]:
+        """
+        Download several feeds with bounded concurrency.
+        
+        Args:
+            feeds: List of (feed_name, force) tuples
+        
+        Returns:
+            Dict mapping feed name to download success
+        """
+        results: Dict[str, bool] = {}
+        workers = max(1, min(self.config.nvd_feed_concurrency, len(feeds)))
+        
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(self._download_feed_with_retry, name, force): name
+                for name, force in feeds
+            }
+            for done, future in enumerate(as_completed(futures), 1):
+                name = futures[future]
+                try:
+                    results[name] = future.result()
+                except Exception as e:
+                    logger.warning(f"Failed to download {name} feed: {e}")
+                    results[name] = False
+                status = "ok" if results[name] else "failed"
+                logger.info(f"  [{done}/{len(feeds)}] {name} feed {status}")
+        
+        return results
+    
+    def update_feeds(self, force_yearly: bool = False) -> None:
+        """
+        Update all NVD feeds.
+        
+        Downloads, with bounded concurrency:
+        - recent feed (always)
+        - modified feed (always)
+        - yearly feeds from 2023 to current year (once per 24h unless forced)
+        """
+        logger.info("Updating NVD feed cache...")
+        
+        # Always update recent and modified feeds
+        feeds = [("recent", True), ("modified", True)]
+        
+        # Update yearly feeds if needed
+        update_yearly = force_yearly or self._should_update_yearly()
+        yearly_names = []
+        if update_yearly:
+            current_year = datetime.now().year
+            yearly_names = [str(year) for year in range(2023, current_year + 1)]
+            feeds.extend((name, force_yearly) for name in yearly_names)
+        
+        start = time.time()
+        results = self._download_feeds(feeds)
+        logger.info(f"NVD feed refresh finished in {time.time() - start:.1f}s")
+        
+        if update_yearly:
+            if all(results.get(name) for name in yearly_names):
+                self._mark_yearly_updated()
+            else:
+                logger.warning("Some yearly feeds failed, will retry on next run")
+        
+        # Force the index to re-check feed files on next access
+        self._loaded = False
+    
+    def _feed_sources(self) -> List[Tuple[str, Path, int]]:
+        """
+        Get feeds in override order as (name, path, priority) tuples.
+        
+        Yearly feeds hold older data; modified and recent override them.
+        """
+        current_year = datetime.now().year
+        feeds = [
+            (str(year), self._get_feed_path(str(year)), 0)
+            for year in range(2023, current_year + 1)
+        ]
+        feeds.append(("modified", self._get_feed_path("modified"), 1))
+        feeds.append(("recent", self._get_feed_path("recent"), 2))
+        return feeds
+    
+    def load_index(self) -> None:
+        """
+        Bring the persistent CVE index up to date with the cached feeds.
+        
+        Only feeds whose file changed since the last run are re-parsed;
+        unchanged feeds are served directly from the index.
+        """
+        if self._loaded:
+            return
+        
+        logger.info("Loading NVD feed index...")
+        
+        if self._index.sync(self._feed_sources()):
+            logger.info("  Re-indexed changed NVD feeds")
+        
+        self._loaded = True
+        logger.info(f"Loaded {self._index.count()} unique CVEs into index")
+    
+    def refresh(self, force_yearly: bool = False) -> None:
+        """
+        Update feeds once per instance and bring the index up to date.
+        
+        Repeated calls (e.g. from several pipeline steps sharing the store)
+        do not hit the network again unless ``force_yearly`` is set.
+        
+        Args:
+            force_yearly: Re-check yearly feeds even within the 24h window
+        """
+        with self._lock:
+            if force_yearly or not self._refreshed:
+                self.update_feeds(force_yearly=force_yearly)
+                self._refreshed = True
+            self.load_index()
+    
+    def get_cve(self, cve_id: str) -> Optional[Dict[str, Any]]:
+        """Get CVE data from cache."""
+        if not self._loaded:
+            self.load_index()
+        return self._index.get(cve_id)
+    
+    def get_all_cve_ids(self) -> List[str]:
+        """Get all CVE IDs in cache."""
+        if not self._loaded:
+            self.load_index()
+        return self._index.cve_ids()
+    
+    def filter_by_source(self, source_identifier: str) -> List[str]:
+        """Filter CVEs by source identifier (e.g., kernel.org CNA)."""
+        if not self._loaded:
+            self.load_index()
+        return self._index.cve_ids_by_source(source_identifier)
+    
+    def query_cve_ids(
+        self,
+        source_identifier: Optional[str] = None,
+        year: Optional[int] = None,
+        modified_since: Optional[Union[datetime, str]] = None,
+    ) -> List[str]:
+        """
+        Get CVE IDs matching all given filters using the index's secondary indexes.
+        
+        Args:
+            source_identifier: Only CVEs from this source (e.g. kernel.org CNA)
+            year: Only CVEs with this year in their ID
+            modified_since: Only CVEs modified after this time (NVD timestamps are UTC)
+        
+        Returns:
+            Matching CVE IDs in ID order
+        """
+        if not self._loaded:
+            self.load_index()
+        return self._index.query_cve_ids(source_identifier, year, modified_since)
+    
+    def latest_modified(self, source_identifier: Optional[str] = None) -> Optional[str]:
+        """Get the newest lastModified timestamp among cached CVEs."""
+        if not self._loaded:
+            self.load_index()
+        return self._index.latest_modified(source_identifier)
+    
+    def get_cves(
+        self,
+        source_identifier: Optional[str] = None,
+        modified_since: Optional[Union[datetime, str]] = None,
+    ) -> List[CVE]:
+        """
+        Get parsed CVE models from the cache.
+        
+        Args:
+            source_identifier: Only return CVEs from this source (e.g. kernel.org CNA)
+            modified_since: Only return CVEs modified after this time
+        
+        Returns:
+            List of CVE objects built from the indexed records
+        """
+        if not self._loaded:
+            self.load_index()
+        
+        cves = []
+        for record in self._index.iter_records(source_identifier, modified_since):
+            try:
+                cves.append(nvd_record_to_cve(record))
+            except Exception as e:
+                logger.debug(f"Skipping {record.get('id')}: {e}")
+        return cves
+    
+    def get_cves_by_id(self, cve_ids: Iterable[str]) -> List[CVE]:
+        """
+        Get parsed CVE models for specific CVE IDs.
+        
+        Args:
+            cve_ids: CVE IDs to look up (IDs not in the cache are skipped)
+        
+        Returns:
+            List of CVE objects in the order of the given IDs
+        """
+        cves = []
+        for cve_id in cve_ids:
+            record = self.get_cve(cve_id)
+            if record is None:
+                continue
+            try:
+                cves.append(nvd_record_to_cve(record))
+            except Exception as e:
+                logger.debug(f"Skipping {cve_id}: {e}")
+        return cves
+
+
+# Shared store instances, one per cache directory
+_shared_caches: Dict[Path, NVDFeedCache] = {}
+_shared_lock = threading.Lock()
+
+
+def get_shared_feed_cache(config: Optional[KernelConfig] = None) -> NVDFeedCache:
+    """
+    Get the process-wide NVD feed cache for a configuration.
+    
+    All consumers in one process share the same instance, so feeds are
+    refreshed at most once per run.
+    
+    Args:
+        config: Kernel configuration
+    
+    Returns:
+        Shared NVDFeedCache for ``config.cache_dir``
+    """
+    config = config or DEFAULT_CONFIG
+    with _shared_lock:
+        cache = _shared_caches.get(config.cache_dir)
+        if cache is None:
+            cache = NVDFeedCache(config)
+            _shared_caches[config.cache_dir] = cache
+        return cache
@@ -0,0 +1,485 @@
+"""
+Persistent pre-parsed index for NVD JSON feeds.
+
+Stores a compact copy of every CVE record (only the fields used by gap
+detection and the coverage matrix) in a local SQLite database keyed by
+CVE ID. Each feed file is re-parsed only when its size or mtime changes,
+so unchanged yearly feeds are never decoded twice.
+"""
+
+import json
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from scripts.common import extract_commit_sha, logger
+from scripts.models import CVE, CVEReference, CVESource, CPERange, Severity
+
+
+# Bump when the compact record layout or table schema changes
+INDEX_SCHEMA_VERSION = 2
+
+# Metric keys consulted for CVSS scores, in order of preference
+CVSS_METRIC_KEYS = ["cvssMetricV31", "cvssMetricV30", "cvssMetricV2"]
+
+
+def compact_cve_record(cve_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Reduce a raw NVD CVE record to the fields the kernelpatches tools use.
+
+    The result keeps the NVD 2.0 layout so callers can read it exactly like
+    the raw feed data (``references``, ``configurations``, ``metrics``, ...).
+
+    Args:
+        cve_data: Raw ``cve`` object from an NVD 2.0 feed
+
+    Returns:
+        Compact dictionary with the same key structure
+    """
+    descriptions = [
+        {"lang": "en", "value": desc.get("value", "")}
+        for desc in cve_data.get("descriptions", [])
+        if desc.get("lang") == "en"
+    ][:1]
+
+    metrics: Dict[str, List[Dict[str, Any]]] = {}
+    raw_metrics = cve_data.get("metrics", {})
+    for metric_key in CVSS_METRIC_KEYS:
+        metric_list = raw_metrics.get(metric_key, [])
+        if metric_list:
+            cvss_data = metric_list[0].get("cvssData", {})
+            metrics[metric_key] = [{
+                "cvssData": {
+                    "baseScore": cvss_data.get("baseScore", 0.0),
+                    "baseSeverity": cvss_data.get("baseSeverity", "UNKNOWN"),
+                }
+            }]
+            break
+
+    references = [
+        {
+            "url": ref.get("url", ""),
+            "source": ref.get("source"),
+            "tags": ref.get("tags", []),
+        }
+        for ref in cve_data.get("references", [])
+    ]
+
+    cpe_keys = (
+        "criteria",
+        "vulnerable",
+        "versionStartIncluding",
+        "versionStartExcluding",
+        "versionEndIncluding",
+        "versionEndExcluding",
+    )
+    cpe_matches = []
+    for config in cve_data.get("configurations", []):
+        for node in config.get("nodes", []):
+            for cpe_match in node.get("cpeMatch", []):
+                if "linux_kernel" not in cpe_match.get("criteria", ""):
+                    continue
+                cpe_matches.append({k: cpe_match[k] for k in cpe_keys if k in cpe_match})
+    configurations = [{"nodes": [{"cpeMatch": cpe_matches}]}] if cpe_matches else []
+
+    return {
+        "id": cve_data.get("id", ""),
+        "sourceIdentifier": cve_data.get("sourceIdentifier", ""),
+        "published": cve_data.get("published"),
+        "lastModified": cve_data.get("lastModified"),
+        "descriptions": descriptions,
+        "metrics": metrics,
+        "references": references,
+        "configurations": configurations,
+    }
+
+
+class NVDFeedIndex:
+    """
+    SQLite-backed index of compact CVE records built from NVD feed files.
+
+    Rows are stored per (feed, CVE) so a single changed feed can be replaced
+    without touching the others. A resolved ``cves`` table holds the winning
+    record for every CVE, where feeds with a higher priority (modified,
+    recent) override older yearly data.
+
+    One connection is shared by all threads (feed refreshes run in a worker,
+    queries arrive via ``asyncio.to_thread``), so every use of it holds
+    ``self._lock``.
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.RLock()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """Open the database lazily and ensure the schema exists."""
+        with self._lock:
+            if self._conn is None:
+                # Shared across threads; all access is serialized by self._lock
+                conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+                self._ensure_schema(conn)
+                self._conn = conn
+            return self._conn
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _fetch(self, sql: str, params: Sequence[Any] = ()) -> List[tuple]:
+        """Run a query under the connection lock and return all rows."""
+        with self._lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def _ensure_schema(self, conn: sqlite3.Connection) -> None:
+        """Create tables, dropping them first if the schema version changed."""
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version != INDEX_SCHEMA_VERSION:
+            if version:
+                logger.info("NVD index schema changed, rebuilding index")
+            conn.executescript(
+                """
+                DROP TABLE IF EXISTS feeds;
+                DROP TABLE IF EXISTS feed_cves;
+                DROP TABLE IF EXISTS cves;
+                """
+            )
+        conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS feeds (
+                name TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                priority INTEGER NOT NULL,
+                cve_count INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS feed_cves (
+                feed TEXT NOT NULL,
+                cve_id TEXT NOT NULL,
+                priority INTEGER NOT NULL,
+                source_identifier TEXT,
+                last_modified TEXT,
+                data TEXT NOT NULL,
+                PRIMARY KEY (feed, cve_id)
+            );
+            CREATE TABLE IF NOT EXISTS cves (
+                cve_id TEXT PRIMARY KEY,
+                source_identifier TEXT,
+                year INTEGER,
+                last_modified TEXT,
+                data TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS cves_by_source
+                ON cves (source_identifier, last_modified);
+            CREATE INDEX IF NOT EXISTS cves_by_year ON cves (year);
+            CREATE INDEX IF NOT EXISTS cves_by_modified ON cves (last_modified);
+            """
+        )
+        conn.execute(f"PRAGMA user_version = {INDEX_SCHEMA_VERSION}")
+        conn.commit()
+
+    def is_feed_current(self, feed_name: str, feed_path: Path) -> bool:
+        """Check whether the stored copy of a feed matches the file on disk."""
+        rows = self._fetch("SELECT size, mtime_ns FROM feeds WHERE name = ?", (feed_name,))
+        row = rows[0] if rows else None
+        if row is None or not feed_path.exists():
+            return False
+        stat = feed_path.stat()
+        return row == (stat.st_size, stat.st_mtime_ns)
+
+    def index_feed(self, feed_name: str, feed_path: Path, priority: int) -> int:
+        """
+        Parse a feed file and replace its rows in the index.
+
+        Args:
+            feed_name: Feed identifier (recent, modified, 2024, ...)
+            feed_path: Path to the decompressed feed JSON
+            priority: Override priority (higher wins on duplicate CVE IDs)
+
+        Returns:
+            Number of CVEs indexed from the feed
+        """
+        stat = feed_path.stat()
+        data = json.loads(feed_path.read_bytes())
+
+        rows = []
+        for vuln in data.get("vulnerabilities", []):
+            cve_data = vuln.get("cve", {})
+            cve_id = cve_data.get("id", "")
+            if not cve_id.startswith("CVE-"):
+                continue
+            record = compact_cve_record(cve_data)
+            rows.append((
+                feed_name,
+                cve_id,
+                priority,
+                record["sourceIdentifier"],
+                record["lastModified"],
+                json.dumps(record, separators=(",", ":")),
+            ))
+        del data
+
+        with self._lock, self.conn as conn:
+            conn.execute("DELETE FROM feed_cves WHERE feed = ?", (feed_name,))
+            conn.executemany(
+                "INSERT OR REPLACE INTO feed_cves "
+                "(feed, cve_id, priority, source_identifier, last_modified, data) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO feeds (name, size, mtime_ns, priority, cve_count) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (feed_name, stat.st_size, stat.st_mtime_ns, priority, len(rows)),
+            )
+        return len(rows)
+
+    def remove_feed(self, feed_name: str) -> None:
+        """Drop all rows belonging to a feed."""
+        with self._lock, self.conn as conn:
+            conn.execute("DELETE FROM feed_cves WHERE feed = ?", (feed_name,))
+            conn.execute("DELETE FROM feeds WHERE name = ?", (feed_name,))
+
+    def indexed_feeds(self) -> List[str]:
+        """Get names of all feeds currently in the index."""
+        return [row[0] for row in self._fetch("SELECT name FROM feeds ORDER BY name")]
+
+    def resolve(self) -> int:
+        """
+        Rebuild the resolved ``cves`` table from per-feed rows.
+
+        Rows are inserted in ascending priority so the newest feed wins.
+
+        Returns:
+            Number of unique CVEs in the index
+        """
+        with self._lock, self.conn as conn:
+            conn.execute("DELETE FROM cves")
+            conn.execute(
+                "INSERT OR REPLACE INTO cves (cve_id, source_identifier, year, last_modified, data) "
+                "SELECT cve_id, source_identifier, CAST(substr(cve_id, 5, 4) AS INTEGER), "
+                "last_modified, data FROM feed_cves "
+                "ORDER BY priority ASC, feed ASC"
+            )
+        return self.count()
+
+    def sync(self, feeds: Sequence[tuple]) -> bool:
+        """
+        Bring the index up to date with a set of feed files.
+
+        Args:
+            feeds: Sequence of (feed_name, feed_path, priority) tuples
+
+        Returns:
+            True if any feed was (re)indexed or removed
+        """
+        changed = False
+        wanted = set()
+
+        for feed_name, feed_path, priority in feeds:
+            if not feed_path.exists():
+                continue
+            wanted.add(feed_name)
+            if self.is_feed_current(feed_name, feed_path):
+                logger.debug(f"  {feed_name}: unchanged, using index")
+                continue
+            try:
+                count = self.index_feed(feed_name, feed_path, priority)
+                logger.debug(f"  {feed_name}: indexed {count} CVEs")
+                changed = True
+            except Exception as e:
+                logger.warning(f"Failed to index {feed_name} feed: {e}")
+
+        for feed_name in self.indexed_feeds():
+            if feed_name not in wanted:
+                self.remove_feed(feed_name)
+                changed = True
+
+        if changed:
+            self.resolve()
+        return changed
+
+    def count(self) -> int:
+        """Number of unique CVEs in the resolved index."""
+        return int(self._fetch("SELECT COUNT(*) FROM cves")[0][0])
+
+    def get(self, cve_id: str) -> Optional[Dict[str, Any]]:
+        """Get the compact record for a CVE."""
+        rows = self._fetch("SELECT data FROM cves WHERE cve_id = ?", (cve_id,))
+        return json.loads(rows[0][0]) if rows else None
+
+    def cve_ids(self) -> List[str]:
+        """Get all CVE IDs in the resolved index."""
+        return [row[0] for row in self._fetch("SELECT cve_id FROM cves")]
+
+    def cve_ids_by_source(self, source_identifier: str) -> List[str]:
+        """Get CVE IDs whose sourceIdentifier matches."""
+        return self.query_cve_ids(source_identifier=source_identifier)
+    
+    @staticmethod
+    def _where(
+        source_identifier: Optional[str] = None,
+        year: Optional[int] = None,
+        modified_since: Optional[Union[datetime, str]] = None,
+    ) -> Tuple[str, List[Any]]:
+        """Build a WHERE clause served by the secondary indexes."""
+        clauses = []
+        params: List[Any] = []
+        if source_identifier is not None:
+            clauses.append("source_identifier = ?")
+            params.append(source_identifier)
+        if year is not None:
+            clauses.append("year = ?")
+            params.append(year)
+        if modified_since is not None:
+            clauses.append("last_modified > ?")
+            params.append(nvd_timestamp(modified_since))
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+    
+    def query_cve_ids(
+        self,
+        source_identifier: Optional[str] = None,
+        year: Optional[int] = None,
+        modified_since: Optional[Union[datetime, str]] = None,
+    ) -> List[str]:
+        """
+        Get CVE IDs matching all given filters.
+        
+        Args:
+            source_identifier: Only CVEs from this source (e.g. kernel.org CNA)
+            year: Only CVEs with this year in their ID
+            modified_since: Only CVEs whose lastModified is later than this
+        
+        Returns:
+            Matching CVE IDs in ID order
+        """
+        where, params = self._where(source_identifier, year, modified_since)
+        return [
+            row[0] for row in self._fetch(
+                f"SELECT cve_id FROM cves{where} ORDER BY cve_id", params
+            )
+        ]
+    
+    def latest_modified(self, source_identifier: Optional[str] = None) -> Optional[str]:
+        """Get the newest lastModified timestamp in the index, e.g. to store as a watermark."""
+        where, params = self._where(source_identifier)
+        latest: Optional[str] = self._fetch(f"SELECT MAX(last_modified) FROM cves{where}", params)[0][0]
+        return latest
+    
+    def iter_records(
+        self,
+        source_identifier: Optional[str] = None,
+        modified_since: Optional[Union[datetime, str]] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """Iterate over compact records, optionally filtered by sourceIdentifier and lastModified."""
+        where, params = self._where(source_identifier, modified_since=modified_since)
+        rows = self._fetch(f"SELECT data FROM cves{where}", params)
+        for (data,) in rows:
+            yield json.loads(data)
+
+
+def nvd_timestamp(value: Union[datetime, str]) -> str:
+    """
+    Format a time the way NVD 2.0 feeds write ``lastModified``.
+    
+    NVD timestamps are UTC without an offset (``2024-05-02T10:15:30.123``),
+    so they order correctly as plain strings. Aware datetimes are converted
+    to UTC; strings are passed through unchanged.
+    """
+    if isinstance(value, str):
+        return value
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.isoformat(timespec="milliseconds")
+
+
+def _parse_nvd_datetime(value: Optional[str]) -> Optional[datetime]:
+    """Parse an NVD timestamp, returning None if missing."""
+    return datetime.fromisoformat(value.replace("Z", "+00:00")) if value else None
+
+
+def nvd_record_to_cve(record: Dict[str, Any]) -> CVE:
+    """
+    Build a CVE model from an NVD 2.0 record (raw or compact).
+    
+    Args:
+        record: NVD ``cve`` object
+    
+    Returns:
+        CVE object with CVSS, references, fix commits and kernel CPE ranges
+    """
+    # Extract CVSS score
+    cvss_score = 0.0
+    severity = Severity.UNKNOWN
+    
+    metrics = record.get("metrics", {})
+    for metric_key in CVSS_METRIC_KEYS:
+        metric_list = metrics.get(metric_key, [])
+        if metric_list:
+            cvss_data = metric_list[0].get("cvssData", {})
+            cvss_score = cvss_data.get("baseScore", 0.0)
+            sev_str = cvss_data.get("baseSeverity", "UNKNOWN")
+            try:
+                severity = Severity(sev_str.upper())
+            except ValueError:
+                severity = Severity.from_cvss(cvss_score)
+            break
+    
+    # Extract description
+    description = ""
+    for desc in record.get("descriptions", []):
+        if desc.get("lang") == "en":
+            description = desc.get("value", "")
+            break
+    
+    # Extract references and commits
+    references = []
+    fix_commits = []
+    for ref in record.get("references", []):
+        url = ref.get("url", "")
+        references.append(CVEReference(
+            url=url,
+            source=ref.get("source"),
+            tags=ref.get("tags", []),
+        ))
+        commit = extract_commit_sha(url)
+        if commit:
+            fix_commits.append(commit)
+    
+    # Extract CPE ranges from configurations (Linux kernel only)
+    cpe_ranges = []
+    for config in record.get("configurations", []):
+        for node in config.get("nodes", []):
+            for cpe_match in node.get("cpeMatch", []):
+                criteria = cpe_match.get("criteria", "")
+                if "linux_kernel" not in criteria:
+                    continue
+                cpe_ranges.append(CPERange(
+                    criteria=criteria,
+                    version_start_including=cpe_match.get("versionStartIncluding"),
+                    version_start_excluding=cpe_match.get("versionStartExcluding"),
+                    version_end_including=cpe_match.get("versionEndIncluding"),
+                    version_end_excluding=cpe_match.get("versionEndExcluding"),
+                    vulnerable=cpe_match.get("vulnerable", True),
+                ))
+    
+    return CVE(
+        cve_id=record.get("id", ""),
+        cvss_score=cvss_score,
+        severity=severity,
+        description=description,
+        published_date=_parse_nvd_datetime(record.get("published")),
+        modified_date=_parse_nvd_datetime(record.get("lastModified")),
+        source=CVESource.NVD,
+        references=references,
+        fix_commits=list(set(fix_commits)),
+        cpe_ranges=cpe_ranges,
+    )
@@ -0,0 +1,345 @@
+"""
+In-process patch applicability checks against an extracted kernel tree.
+
+Answers the same question as ``git apply --check --reverse`` followed by
+``git apply --check`` (already applied / applicable / conflicts) without
+spawning subprocesses. Each patch is parsed once and every touched source
+file is read once and cached across patches. Patches using features the
+matcher does not model (binary data, renames, mode changes, missing
+newline markers, context-free hunks, hunks matching out of file order)
+are reported as undecided so the caller can fall back to git.
+"""
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+
+# Result reasons shared with the git-based analysis in generate_full_matrix
+REASON_ALREADY_APPLIED = "patch_already_applied"
+REASON_APPLICABLE = "patch_applicable"
+REASON_CONFLICT = "patch_conflicts_or_missing_context"
+
+# Header lines that mark diffs the matcher does not model
+UNSUPPORTED_MARKERS = (
+    b"GIT binary patch",
+    b"Binary files ",
+    b"rename from ",
+    b"rename to ",
+    b"copy from ",
+    b"copy to ",
+    b"old mode ",
+    b"new mode ",
+)
+
+DEV_NULL = b"/dev/null"
+
+
+class UnsupportedPatchError(Exception):
+    """Raised when a patch needs git's own logic to be checked."""
+
+
+@dataclass
+class Hunk:
+    """A single hunk of a unified diff."""
+    old_start: int
+    new_start: int
+    old_lines: List[bytes] = field(default_factory=list)
+    new_lines: List[bytes] = field(default_factory=list)
+    trailing_context: int = 0
+
+
+@dataclass
+class FileDiff:
+    """All hunks touching one file."""
+    old_path: Optional[str]
+    new_path: Optional[str]
+    hunks: List[Hunk] = field(default_factory=list)
+    
+    @property
+    def path(self) -> str:
+        """Path of the file in the source tree."""
+        return self.new_path or self.old_path or ""
+    
+    @property
+    def is_creation(self) -> bool:
+        """True if the diff creates a new file."""
+        return self.old_path is None
+    
+    @property
+    def is_deletion(self) -> bool:
+        """True if the diff deletes the file."""
+        return self.new_path is None
+
+
+def _strip_path(raw: bytes) -> Optional[str]:
+    """Convert a ``---``/``+++`` path to a tree-relative path (``-p1``)."""
+    raw = raw.split(b"\t", 1)[0].strip()
+    if raw == DEV_NULL:
+        return None
+    if raw.startswith(b'"'):
+        raise UnsupportedPatchError("quoted path")
+    parts = raw.split(b"/", 1)
+    return (parts[1] if len(parts) == 2 else parts[0]).decode("utf-8", "surrogateescape")
+
+
+def _parse_hunk_header(line: bytes) -> Tuple[int, int, int, int]:
+    """Parse ``@@ -a,b +c,d @@`` into (old_start, old_count, new_start, new_count)."""
+    try:
+        ranges = line.split(b"@@")[1].split()
+        old = ranges[0][1:].split(b",")
+        new = ranges[1][1:].split(b",")
+        return (
+            int(old[0]),
+            int(old[1]) if len(old) > 1 else 1,
+            int(new[0]),
+            int(new[1]) if len(new) > 1 else 1,
+        )
+    except (IndexError, ValueError):
+        raise UnsupportedPatchError(f"bad hunk header: {line[:60]!r}") from None
+
+
+def parse_patch(content: bytes) -> List[FileDiff]:
+    """
+    Parse a unified diff (plain or git format-patch) into file diffs.
+    
+    Args:
+        content: Raw patch bytes
+    
+    Returns:
+        List of FileDiff objects
+    
+    Raises:
+        UnsupportedPatchError: If the patch uses features the matcher does not model
+    """
+    lines = content.split(b"\n")
+    files: List[FileDiff] = []
+    in_git_header = False
+    i = 0
+    
+    while i < len(lines):
+        line = lines[i]
+        
+        if line.startswith(b"diff --git "):
+            in_git_header = True
+            i += 1
+            continue
+        
+        if in_git_header and line.startswith(UNSUPPORTED_MARKERS):
+            raise UnsupportedPatchError(line.decode("utf-8", "replace"))
+        
+        if line.startswith(b"--- ") and i + 1 < len(lines) and lines[i + 1].startswith(b"+++ "):
+            files.append(FileDiff(_strip_path(line[4:]), _strip_path(lines[i + 1][4:])))
+            in_git_header = False
+            i += 2
+            continue
+        
+        if line.startswith(b"@@ ") and files:
+            old_start, old_count, new_start, new_count = _parse_hunk_header(line)
+            hunk = Hunk(old_start=old_start, new_start=new_start)
+            i += 1
+            trailing = 0
+            while (old_count > 0 or new_count > 0) and i < len(lines):
+                body = lines[i]
+                tag, text = body[:1], body[1:]
+                if tag == b" " or body == b"":
+                    hunk.old_lines.append(text)
+                    hunk.new_lines.append(text)
+                    old_count -= 1
+                    new_count -= 1
+                    trailing += 1
+                elif tag == b"-":
+                    hunk.old_lines.append(text)
+                    old_count -= 1
+                    trailing = 0
+                elif tag == b"+":
+                    hunk.new_lines.append(text)
+                    new_count -= 1
+                    trailing = 0
+                elif tag == b"\\":
+                    raise UnsupportedPatchError("no newline at end of file")
+                else:
+                    raise UnsupportedPatchError("truncated hunk")
+                i += 1
+            if old_count > 0 or new_count > 0:
+                raise UnsupportedPatchError("truncated hunk")
+            if i < len(lines) and lines[i].startswith(b"\\"):
+                raise UnsupportedPatchError("no newline at end of file")
+            hunk.trailing_context = trailing
+            files[-1].hunks.append(hunk)
+            continue
+        
+        i += 1
+    
+    if not files:
+        raise UnsupportedPatchError("no file diffs found")
+    if len({f.path for f in files}) != len(files):
+        raise UnsupportedPatchError("file patched more than once")
+    return files
+
+
+class _FileImage:
+    """Lines of a source file with a first-line position index."""
+    
+    def __init__(self, lines: List[bytes]):
+        self.lines = lines
+        self._positions: Optional[Dict[bytes, List[int]]] = None
+    
+    def positions(self, line: bytes) -> List[int]:
+        """Get all line numbers (0-based) holding ``line``."""
+        if self._positions is None:
+            index: Dict[bytes, List[int]] = {}
+            for n, text in enumerate(self.lines):
+                index.setdefault(text, []).append(n)
+            self._positions = index
+        return self._positions.get(line, [])
+
+
+class PatchMatcher:
+    """
+    Check patches against one kernel source tree without running git.
+    
+    Thread-safe; intended to be shared by all workers analyzing the same tree.
+    """
+    
+    # Directories tried (after the tree root) when a patched path is missing
+    FALLBACK_DIRS = ["drivers", "crypto"]
+    
+    def __init__(self, source_dir: Path, max_cached_files: int = 512):
+        self.source_dir = Path(source_dir)
+        self.max_cached_files = max_cached_files
+        self._files: OrderedDict[Path, Optional[_FileImage]] = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def _resolve(self, rel_path: str) -> Path:
+        """Resolve a patched path inside the tree, trying fallback dirs."""
+        candidate = self.source_dir / rel_path
+        if candidate.exists():
+            return candidate
+        for sub in self.FALLBACK_DIRS:
+            alt = self.source_dir / sub / rel_path
+            if alt.exists():
+                return alt
+        return candidate
+    
+    def _load(self, path: Path) -> Optional[_FileImage]:
+        """Read a source file once, caching its lines (None if missing)."""
+        with self._lock:
+            if path in self._files:
+                self._files.move_to_end(path)
+                return self._files[path]
+        
+        if path.is_file():
+            data = path.read_bytes()
+            if data and not data.endswith(b"\n"):
+                raise UnsupportedPatchError(f"{path.name} has no trailing newline")
+            image: Optional[_FileImage] = _FileImage(data.split(b"\n")[:-1] if data else [])
+        else:
+            image = None
+        
+        with self._lock:
+            self._files[path] = image
+            while len(self._files) > self.max_cached_files:
+                self._files.popitem(last=False)
+        return image
+    
+    @staticmethod
+    def _find_block(
+        image: _FileImage,
+        block: List[bytes],
+        start: int,
+        match_beginning: bool,
+        match_end: bool,
+    ) -> int:
+        """Find ``block`` in the file at or after line ``start``. Returns -1 if absent."""
+        lines = image.lines
+        size = len(block)
+        if match_beginning:
+            candidates = [0]
+        elif match_end:
+            candidates = [len(lines) - size]
+        else:
+            candidates = image.positions(block[0])
+        
+        for pos in candidates:
+            if pos < start or pos + size > len(lines):
+                continue
+            if match_end and pos + size != len(lines):
+                continue
+            if lines[pos:pos + size] == block:
+                return pos
+        return -1
+    
+    def _hunks_match(self, image: _FileImage, hunks: List[Hunk], reverse: bool) -> bool:
+        """
+        Check whether all hunks match the file in order.
+        
+        Raises:
+            UnsupportedPatchError: If a hunk only matches before the previous one
+        """
+        position = 0
+        for hunk in hunks:
+            block = hunk.new_lines if reverse else hunk.old_lines
+            start = hunk.new_start if reverse else hunk.old_start
+            if not block:
+                # Pure insertion without context: position is line-number driven
+                raise UnsupportedPatchError("hunk without context")
+            match_beginning = start <= 1
+            match_end = hunk.trailing_context == 0
+            found = self._find_block(image, block, position, match_beginning, match_end)
+            if found < 0:
+                if position and self._find_block(image, block, 0, match_beginning, match_end) >= 0:
+                    # git does not require file order; let it decide
+                    raise UnsupportedPatchError("hunk matches before previous hunk")
+                return False
+            position = found + len(block)
+        return True
+    
+    def _file_applies(self, file_diff: FileDiff, reverse: bool) -> bool:
+        """Check a single file diff in forward or reverse direction."""
+        image = self._load(self._resolve(file_diff.path))
+        
+        # Creation reversed is a deletion and vice versa
+        creates = file_diff.is_deletion if reverse else file_diff.is_creation
+        deletes = file_diff.is_creation if reverse else file_diff.is_deletion
+        
+        if creates:
+            return image is None
+        if image is None:
+            return False
+        if deletes:
+            expected = [line for hunk in file_diff.hunks
+                        for line in (hunk.new_lines if reverse else hunk.old_lines)]
+            return image.lines == expected
+        return self._hunks_match(image, file_diff.hunks, reverse)
+    
+    def check_content(self, content: bytes) -> Optional[Tuple[bool, str]]:
+        """
+        Check patch content against the tree.
+        
+        Args:
+            content: Raw patch bytes
+        
+        Returns:
+            (is_included, reason) with the same meaning as the git-based check,
+            or None if the patch needs git to decide
+        """
+        try:
+            files = parse_patch(content)
+            if all(self._file_applies(f, reverse=True) for f in files):
+                return True, REASON_ALREADY_APPLIED
+            if all(self._file_applies(f, reverse=False) for f in files):
+                return False, REASON_APPLICABLE
+            return False, REASON_CONFLICT
+        except UnsupportedPatchError:
+            return None
+    
+    def check(self, patch_path: Path) -> Optional[Tuple[bool, str]]:
+        """Check a patch file against the tree. See ``check_content``."""
+        try:
+            content = patch_path.read_bytes()
+        except OSError:
+            return None
+        return self.check_content(content)
@@ -1,17 +1,234 @@
 """
 Spec file parsing and manipulation for kernel packages.
+
+Kernel specs run to thousands of lines, so a spec is tokenized once, in a
+single pass, into a ParsedSpec (preamble tags, sha512 defines, patch table,
+%patch applications, sections and changelog). Parsed specs are cached by
+path, size and mtime and shared between SpecFile instances; edits are
+applied to a private copy of the model and serialized back on save.
 """
 
 import re
 import shutil
+import threading
+from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Sequence, Set, Tuple
 
 from scripts.common import logger
 from scripts.models import SpecPatch
 
 
+TAG_PATTERN = re.compile(r"^([A-Za-z][A-Za-z0-9]*):\s*(.*)$")
+PATCH_PATTERN = re.compile(r"^Patch(\d+):\s*(.+)$")
+PATCH_APPLY_PATTERN = re.compile(r"^%patch(\d+)\s")
+SHA512_PATTERN = re.compile(r"^%define\s+sha512\s+([^=\s]+)=([0-9a-f]+)")
+SECTION_PATTERN = re.compile(r"^%(description|package|prep|build|install|check|clean|files|pre|post|preun|postun|posttrans|changelog)\b")
+CVE_PATTERN = re.compile(r"CVE-\d{4}-\d{4,}", re.IGNORECASE)
+PATCH_CVE_PATTERN = re.compile(r"CVE-\d{4}-\d+", re.IGNORECASE)
+
+
+@dataclass
+class ChangelogEntry:
+    """One ``* <date> <author> <version>-<release>`` changelog entry."""
+    line: int
+    header: str
+    items: List[str] = field(default_factory=list)
+    
+    @property
+    def version_release(self) -> str:
+        """Version-release the entry was written for."""
+        return self.header.rsplit(None, 1)[-1] if self.header.strip() != "*" else ""
+
+
+class ParsedSpec:
+    """
+    Structured model of a spec file.
+    
+    Built in one pass over the lines. Indexes hold line numbers into
+    ``lines``; every edit goes through the methods below, which update
+    the lines and re-index.
+    """
+    
+    def __init__(self, lines: Sequence[str], trailing_newline: bool = True):
+        self.lines: List[str] = list(lines)
+        self._trailing_newline = trailing_newline
+        self._text: Optional[str] = None  # Serialized lines, reset by every edit
+        self._index()
+    
+    @property
+    def trailing_newline(self) -> bool:
+        """Whether the serialized text ends with a newline."""
+        return self._trailing_newline
+    
+    @trailing_newline.setter
+    def trailing_newline(self, value: bool) -> None:
+        self._trailing_newline = value
+        self._text = None
+    
+    @classmethod
+    def from_text(cls, text: str) -> "ParsedSpec":
+        """Tokenize spec file text."""
+        return cls(text.splitlines(), trailing_newline=text.endswith("\n") or not text)
+    
+    def _index(self) -> None:
+        """Tokenize all lines into the structured model."""
+        self._text = None
+        self.tags: Dict[str, List[int]] = {}
+        self.sha512: Dict[str, List[int]] = {}
+        self.patches: List[Tuple[int, SpecPatch]] = []  # (line, patch) in file order
+        self.patch_applies: List[Tuple[int, int]] = []  # (line, patch number)
+        self.sections: List[Tuple[int, str]] = []
+        self.changelog_line: Optional[int] = None
+        self.changelog: List[ChangelogEntry] = []
+        self.cve_ids: Set[str] = set()
+        
+        for i, line in enumerate(self.lines):
+            if not line:
+                continue
+            
+            if "cve-" in line.lower():
+                self.cve_ids.update(CVE_PATTERN.findall(line))
+            
+            if self.changelog_line is not None:
+                if line.startswith("* "):
+                    self.changelog.append(ChangelogEntry(line=i, header=line))
+                elif self.changelog and line.strip():
+                    self.changelog[-1].items.append(line)
+                continue
+            
+            first = line[0]
+            if first == "%":
+                match = PATCH_APPLY_PATTERN.match(line)
+                if match:
+                    self.patch_applies.append((i, int(match.group(1))))
+                    continue
+                match = SHA512_PATTERN.match(line)
+                if match:
+                    self.sha512.setdefault(match.group(1), []).append(i)
+                    continue
+                if line.strip() == "%changelog":
+                    self.changelog_line = i
+                match = SECTION_PATTERN.match(line)
+                if match:
+                    self.sections.append((i, match.group(1)))
+            elif first.isalpha():
+                match = PATCH_PATTERN.match(line)
+                if match:
+                    number = int(match.group(1))
+                    name = match.group(2).strip()
+                    cve_ids = PATCH_CVE_PATTERN.findall(name)
+                    self.patches.append((i, SpecPatch(number=number, name=name, cve_ids=cve_ids)))
+                    continue
+                match = TAG_PATTERN.match(line)
+                if match:
+                    self.tags.setdefault(match.group(1), []).append(i)
+    
+    def copy(self) -> "ParsedSpec":
+        """Get an independent copy for editing."""
+        parsed = ParsedSpec(self.lines, self.trailing_newline)
+        parsed._text = self._text
+        return parsed
+    
+    def serialize(self) -> str:
+        """Render the model back to spec file text (cached until the next edit)."""
+        text = self._text
+        if text is None:
+            text = "\n".join(self.lines)
+            if self.trailing_newline and self.lines:
+                text += "\n"
+            self._text = text
+        return text
+    
+    # Lookups
+    
+    def tag(self, name: str) -> Optional[str]:
+        """Get the value of the first occurrence of a preamble tag."""
+        lines = self.tags.get(name)
+        if not lines:
+            return None
+        match = TAG_PATTERN.match(self.lines[lines[0]])
+        return match.group(2) if match else None
+    
+    def get_sha512(self, source_name: str) -> Optional[str]:
+        """Get the first sha512 define for a source."""
+        lines = self.sha512.get(source_name)
+        if not lines:
+            return None
+        match = SHA512_PATTERN.match(self.lines[lines[0]])
+        return match.group(2) if match else None
+    
+    # Edits
+    
+    def replace_lines(self, replacements: Dict[int, str]) -> None:
+        """Replace lines in place."""
+        for i, text in replacements.items():
+            self.lines[i] = text
+        self._index()
+    
+    def insert_lines(self, inserts: Sequence[Tuple[int, str]]) -> None:
+        """
+        Insert lines.
+        
+        Args:
+            inserts: (index, text) pairs; indexes refer to the current lines
+        """
+        for i, text in sorted(inserts, key=lambda item: item[0], reverse=True):
+            self.lines.insert(i, text)
+        self._index()
+    
+    def delete_lines(self, indexes: Sequence[int]) -> None:
+        """Delete lines by index."""
+        for i in sorted(set(indexes), reverse=True):
+            del self.lines[i]
+        self._index()
+
+
+# Parsed specs shared between SpecFile instances: path -> ((size, mtime), model)
+_parsed_specs: Dict[Path, Tuple[Tuple[int, int], ParsedSpec]] = {}
+_parsed_lock = threading.Lock()
+
+
+def _file_stamp(path: Path) -> Tuple[int, int]:
+    """Identify a file version by size and mtime."""
+    stat = path.stat()
+    return stat.st_size, stat.st_mtime_ns
+
+
+def parse_spec_file(path: Path) -> ParsedSpec:
+    """
+    Get the parsed model of a spec file.
+    
+    The model is cached by path, size and mtime and shared; copy it
+    before editing.
+    
+    Args:
+        path: Spec file
+    
+    Returns:
+        Shared ParsedSpec
+    """
+    key = Path(path).resolve()
+    stamp = _file_stamp(key)
+    with _parsed_lock:
+        cached = _parsed_specs.get(key)
+    if cached and cached[0] == stamp:
+        return cached[1]
+    
+    parsed = ParsedSpec.from_text(key.read_text())
+    with _parsed_lock:
+        _parsed_specs[key] = (stamp, parsed)
+    return parsed
+
+
+def _store_parsed_spec(path: Path, parsed: ParsedSpec) -> None:
+    """Cache a model that was just written to disk."""
+    key = Path(path).resolve()
+    with _parsed_lock:
+        _parsed_specs[key] = (_file_stamp(key), parsed.copy())
+
+
 class SpecFile:
     """
     Represents and manipulates a kernel RPM spec file.
@@ -21,6 +238,9 @@ class SpecFile:
     - Patch entry manipulation
     - Changelog updates
     - SHA512 hash management
+    
+    Reads go through the shared ParsedSpec cache; the first edit switches
+    this instance to a private copy of the model.
     """
     
     def __init__(self, path: Path):
@@ -31,39 +251,51 @@ class SpecFile:
             path: Path to the spec file
         """
         self.path = Path(path)
-        self._content: Optional[str] = None
-        self._lines: Optional[List[str]] = None
+        self._model: Optional[ParsedSpec] = None
+        self._shared = True
         
         if not self.path.exists():
             raise FileNotFoundError(f"Spec file not found: {self.path}")
     
+    @property
+    def model(self) -> ParsedSpec:
+        """Get the parsed spec model, loading if necessary."""
+        if self._model is None:
+            self._model = parse_spec_file(self.path)
+            self._shared = True
+        return self._model
+    
+    def _editable(self) -> ParsedSpec:
+        """Get a model this instance may modify."""
+        model = self.model
+        if self._shared:
+            model = model.copy()
+            self._model = model
+            self._shared = False
+        return model
+    
     @property
     def content(self) -> str:
         """Get file content, loading if necessary."""
-        if self._content is None:
-            self._content = self.path.read_text()
-        return self._content
+        return self.model.serialize()
     
     @property
     def lines(self) -> List[str]:
         """Get file lines, loading if necessary."""
-        if self._lines is None:
-            self._lines = self.content.splitlines()
-        return self._lines
+        return list(self.model.lines)
     
     def reload(self) -> None:
         """Reload file content from disk."""
-        self._content = None
-        self._lines = None
+        self._model = None
     
     def save(self) -> None:
         """Save current content to disk."""
-        if self._lines is not None:
-            self._content = "\n".join(self._lines)
-            if not self._content.endswith("\n"):
-                self._content += "\n"
-        if self._content is not None:
-            self.path.write_text(self._content)
+        if self._model is None:
+            return
+        if not self._model.trailing_newline:
+            self._editable().trailing_newline = True
+        self.path.write_text(self._model.serialize())
+        _store_parsed_spec(self.path, self._model)
     
     def backup(self, backup_dir: Path) -> Path:
         """
@@ -87,20 +319,25 @@ class SpecFile:
     @property
     def name(self) -> str:
         """Get package name from spec file."""
-        match = re.search(r"^Name:\s*(.+)$", self.content, re.MULTILINE)
-        return match.group(1).strip() if match else ""
+        value = self.model.tag("Name")
+        return value.strip() if value else ""
     
     @property
     def version(self) -> str:
         """Get Version from spec file."""
-        match = re.search(r"^Version:\s*([0-9.]+)", self.content, re.MULTILINE)
-        return match.group(1).strip() if match else ""
+        match = re.match(r"[0-9.]+", self.model.tag("Version") or "")
+        return match.group(0) if match else ""
     
     @property
     def release(self) -> int:
         """Get Release number from spec file."""
-        match = re.search(r"^Release:\s*(\d+)", self.content, re.MULTILINE)
-        return int(match.group(1)) if match else 0
+        match = re.match(r"\d+", self.model.tag("Release") or "")
+        return int(match.group(0)) if match else 0
+    
+    @property
+    def changelog(self) -> List[ChangelogEntry]:
+        """Get changelog entries, newest first."""
+        return self.model.changelog
     
     def get_sha512(self, source_name: str = "linux") -> Optional[str]:
         """
@@ -112,9 +349,7 @@ class SpecFile:
         Returns:
             SHA512 hash string or None
         """
-        pattern = rf"^%define\s+sha512\s+{re.escape(source_name)}=([0-9a-f]+)"
-        match = re.search(pattern, self.content, re.MULTILINE)
-        return match.group(1) if match else None
+        return self.model.get_sha512(source_name)
     
     def get_patches(self, min_num: int = 0, max_num: int = 999) -> List[SpecPatch]:
         """
@@ -127,18 +362,7 @@ class SpecFile:
         Returns:
             List of SpecPatch objects
         """
-        patches = []
-        pattern = re.compile(r"^Patch(\d+):\s*(.+)$")
-        
-        for line in self.lines:
-            match = pattern.match(line)
-            if match:
-                num = int(match.group(1))
-                if min_num <= num <= max_num:
-                    name = match.group(2).strip()
-                    cve_ids = re.findall(r"CVE-\d{4}-\d+", name, re.IGNORECASE)
-                    patches.append(SpecPatch(number=num, name=name, cve_ids=cve_ids))
-        
+        patches = [patch for _, patch in self.model.patches if min_num <= patch.number <= max_num]
         return sorted(patches, key=lambda p: p.number)
     
     def get_cve_patches(self, cve_min: int = 100, cve_max: int = 499) -> List[SpecPatch]:
@@ -173,6 +397,24 @@ class SpecFile:
     # Modification Methods
     # -------------------------------------------------------------------------
     
+    def _replace_tag_lines(self, tag: str, pattern: str, replacement: str) -> bool:
+        """
+        Apply a substitution to every line of a preamble tag.
+        
+        Returns:
+            True if any line changed
+        """
+        model = self.model
+        replacements = {}
+        for i in model.tags.get(tag, []):
+            new_line = re.sub(pattern, replacement, model.lines[i])
+            if new_line != model.lines[i]:
+                replacements[i] = new_line
+        if not replacements:
+            return False
+        self._editable().replace_lines(replacements)
+        return True
+    
     def set_version(self, new_version: str) -> bool:
         """
         Update the Version field.
@@ -189,14 +431,10 @@ class SpecFile:
             return False
         
         pattern = rf"^(Version:\s*){re.escape(old_version)}"
-        new_content = re.sub(pattern, rf"\g<1>{new_version}", self.content, flags=re.MULTILINE)
-        
-        if new_content == self.content:
+        if not self._replace_tag_lines("Version", pattern, rf"\g<1>{new_version}"):
             logger.warning(f"Version unchanged in {self.path.name}")
             return False
         
-        self._content = new_content
-        self._lines = None
         logger.info(f"Updated Version: {old_version} -> {new_version} in {self.path.name}")
         return True
     
@@ -212,14 +450,10 @@ class SpecFile:
         """
         old_release = self.release
         pattern = rf"^(Release:\s*){old_release}(%.*)"
-        new_content = re.sub(pattern, rf"\g<1>{new_release}\g<2>", self.content, flags=re.MULTILINE)
-        
-        if new_content == self.content:
+        if not self._replace_tag_lines("Release", pattern, rf"\g<1>{new_release}\g<2>"):
             logger.warning(f"Release unchanged in {self.path.name}")
             return False
         
-        self._content = new_content
-        self._lines = None
         logger.info(f"Updated Release: {old_release} -> {new_release} in {self.path.name}")
         return True
     
@@ -264,15 +498,16 @@ class SpecFile:
             logger.info(f"SHA512 unchanged for {source_name}")
             return True
         
+        lines = self.model.sha512.get(source_name, [])
         pattern = rf"^(%define\s+sha512\s+{re.escape(source_name)}=)[0-9a-f]+"
-        new_content = re.sub(pattern, rf"\g<1>{new_sha512}", self.content, flags=re.MULTILINE)
+        replacements = {i: re.sub(pattern, rf"\g<1>{new_sha512}", self.model.lines[i]) for i in lines}
+        replacements = {i: line for i, line in replacements.items() if line != self.model.lines[i]}
         
-        if new_content == self.content:
+        if not replacements:
             logger.warning(f"SHA512 unchanged in {self.path.name}")
             return False
         
-        self._content = new_content
-        self._lines = None
+        self._editable().replace_lines(replacements)
         logger.info(f"Updated SHA512 for {source_name} in {self.path.name}")
         return True
     
@@ -287,34 +522,21 @@ class SpecFile:
         Returns:
             True if added successfully
         """
-        lines = self.lines.copy()
-        
-        # Find the last Patch line
-        last_patch_idx = -1
-        for i, line in enumerate(lines):
-            if re.match(r"^Patch\d+:", line):
-                last_patch_idx = i
-        
-        if last_patch_idx == -1:
+        model = self.model
+        if not model.patches:
             logger.error(f"No existing Patch lines found in {self.path.name}")
             return False
         
-        # Insert new Patch definition after last one
-        patch_line = f"Patch{patch_number}: {patch_name}"
-        lines.insert(last_patch_idx + 1, patch_line)
-        
-        # Find and update %patch application section
-        last_apply_idx = -1
-        for i, line in enumerate(lines):
-            if re.match(r"^%patch\d+\s+-p1", line):
-                last_apply_idx = i
+        # New Patch definition goes after the last one, the %patch
+        # application after the last "-p1" application
+        last_patch_idx = model.patches[-1][0]
+        inserts = [(last_patch_idx + 1, f"Patch{patch_number}: {patch_name}")]
         
-        if last_apply_idx > 0:
-            apply_line = f"%patch{patch_number} -p1"
-            lines.insert(last_apply_idx + 1, apply_line)
+        apply_lines = [i for i, _ in model.patch_applies if re.match(r"^%patch\d+\s+-p1", model.lines[i])]
+        if apply_lines and apply_lines[-1] > 0:
+            inserts.append((apply_lines[-1] + 1, f"%patch{patch_number} -p1"))
         
-        self._lines = lines
-        self._content = None
+        self._editable().insert_lines(inserts)
         logger.info(f"Added Patch{patch_number}: {patch_name} to {self.path.name}")
         return True
     
@@ -328,24 +550,16 @@ class SpecFile:
         Returns:
             True if removed successfully
         """
-        lines = self.lines.copy()
-        removed = False
+        model = self.model
+        indexes = [i for i, patch in model.patches if patch.number == patch_number]
+        indexes += [i for i, number in model.patch_applies if number == patch_number]
         
-        # Remove Patch definition line
-        patch_pattern = re.compile(rf"^Patch{patch_number}:")
-        lines = [l for l in lines if not patch_pattern.match(l)]
-        
-        # Remove %patch application line
-        apply_pattern = re.compile(rf"^%patch{patch_number}\s")
-        lines = [l for l in lines if not apply_pattern.match(l)]
-        
-        if len(lines) < len(self.lines):
-            removed = True
-            self._lines = lines
-            self._content = None
-            logger.info(f"Removed Patch{patch_number} from {self.path.name}")
+        if not indexes:
+            return False
         
-        return removed
+        self._editable().delete_lines(indexes)
+        logger.info(f"Removed Patch{patch_number} from {self.path.name}")
+        return True
     
     def add_changelog_entry(
         self,
@@ -366,16 +580,8 @@ class SpecFile:
         Returns:
             True if added successfully
         """
-        lines = self.lines.copy()
-        
-        # Find %changelog line
-        changelog_idx = -1
-        for i, line in enumerate(lines):
-            if line.strip() == "%changelog":
-                changelog_idx = i
-                break
-        
-        if changelog_idx == -1:
+        changelog_idx = self.model.changelog_line
+        if changelog_idx is None:
             logger.error(f"No %changelog section found in {self.path.name}")
             return False
         
@@ -389,11 +595,7 @@ class SpecFile:
         ]
         
         # Insert after %changelog
-        for i, entry_line in enumerate(entry_lines):
-            lines.insert(changelog_idx + 1 + i, entry_line)
-        
-        self._lines = lines
-        self._content = None
+        self._editable().insert_lines([(changelog_idx + 1, line) for line in reversed(entry_lines)])
         logger.info(f"Added changelog entry to {self.path.name}")
         return True
     
@@ -450,8 +652,7 @@ class SpecFile:
     
     def extract_all_cve_ids(self) -> List[str]:
         """Extract all CVE IDs referenced in the spec file."""
-        pattern = r"CVE-\d{4}-\d{4,}"
-        return list(set(re.findall(pattern, self.content, re.IGNORECASE)))
+        return list(self.model.cve_ids)
     
     def get_patch_count(self, min_num: int = 0, max_num: int = 999) -> int:
         """Get count of patches in a number range."""
@@ -3,6 +3,7 @@ Stable kernel patch downloading and integration.
 """
 
 import asyncio
+import hashlib
 import json
 import lzma
 import shutil
@@ -243,6 +244,101 @@ class StablePatchManager:
         latest_kv = KernelVersion.parse(latest)
         return latest_kv.patch - current_kv.patch
     
+    async def _fetch_checksums(self, session: aiohttp.ClientSession, kernel_url: str) -> Dict[str, str]:
+        """
+        Fetch kernel.org's sha256sums.asc for a release directory.
+        
+        Returns:
+            Dict mapping file name to SHA-256 (empty if unavailable)
+        """
+        try:
+            async with session.get(
+                f"{kernel_url}sha256sums.asc",
+                timeout=aiohttp.ClientTimeout(total=self.config.network_timeout),
+            ) as response:
+                if response.status != 200:
+                    return {}
+                listing = await response.text()
+        except Exception as e:
+            logger.debug(f"Could not fetch sha256sums.asc: {e}")
+            return {}
+        
+        checksums = {}
+        for line in listing.splitlines():
+            parts = line.split()
+            if len(parts) == 2 and len(parts[0]) == 64:
+                checksums[parts[1]] = parts[0].lower()
+        return checksums
+    
+    @staticmethod
+    def _is_valid_patch(xz_path: Path, patch_path: Path, expected_sha256: Optional[str]) -> bool:
+        """Check if a previously downloaded patch can be reused."""
+        if not xz_path.exists() or not patch_path.exists():
+            return False
+        xz_data = xz_path.read_bytes()
+        if expected_sha256:
+            return hashlib.sha256(xz_data).hexdigest() == expected_sha256
+        try:
+            return lzma.decompress(xz_data) == patch_path.read_bytes()
+        except lzma.LZMAError:
+            return False
+    
+    @staticmethod
+    def _store_patch(xz_data: bytes, xz_path: Path, patch_path: Path) -> None:
+        """Save a downloaded patch and its decompressed copy."""
+        patch_data = lzma.decompress(xz_data)
+        xz_path.write_bytes(xz_data)
+        patch_path.write_bytes(patch_data)
+    
+    async def _download_patch(
+        self,
+        session: aiohttp.ClientSession,
+        semaphore: asyncio.Semaphore,
+        kernel_url: str,
+        patch_dir: Path,
+        version: str,
+        checksums: Dict[str, str],
+    ) -> Optional[StablePatchInfo]:
+        """
+        Download one stable patch unless a valid copy is already present.
+        
+        Returns:
+            StablePatchInfo, or None if the patch is missing or failed
+        """
+        xz_filename = f"patch-{version}.xz"
+        xz_path = patch_dir / xz_filename
+        patch_path = patch_dir / f"patch-{version}"
+        expected = checksums.get(xz_filename)
+        info = StablePatchInfo(version=version, patch_file=str(patch_path), downloaded=True)
+        
+        if await asyncio.to_thread(self._is_valid_patch, xz_path, patch_path, expected):
+            logger.debug(f"Already present: {xz_filename}")
+            return info
+        
+        retries = max(1, self.config.network_retries)
+        async with semaphore:
+            for attempt in range(1, retries + 1):
+                try:
+                    async with session.get(
+                        f"{kernel_url}{xz_filename}",
+                        timeout=aiohttp.ClientTimeout(total=60),
+                    ) as response:
+                        if response.status == 404:
+                            return None
+                        response.raise_for_status()
+                        xz_data = await response.read()
+                    
+                    if expected and hashlib.sha256(xz_data).hexdigest() != expected:
+                        raise ValueError("checksum mismatch")
+                    await asyncio.to_thread(self._store_patch, xz_data, xz_path, patch_path)
+                    logger.debug(f"Downloaded: {xz_filename}")
+                    return info
+                except Exception as e:
+                    logger.warning(f"Failed to download {xz_filename} (attempt {attempt}/{retries}): {e}")
+                    if attempt < retries:
+                        await asyncio.sleep(2 ** attempt)
+        return None
+    
     async def download_patches(
         self,
         kernel_version: str,
@@ -253,6 +349,13 @@ class StablePatchManager:
         """
         Download stable patches from kernel.org.
         
+        The latest stable version is looked up first, then the missing range
+        is downloaded concurrently (``config.download_concurrency``). Patches
+        already on disk are kept if they match kernel.org's sha256sums.asc
+        (or decompress to the stored patch when no checksum is published).
+        Since stable patches apply in sequence, results stop at the first
+        version that could not be downloaded.
+        
         Args:
             kernel_version: Kernel series (e.g., "6.1")
             output_dir: Output directory for patches
@@ -269,56 +372,43 @@ class StablePatchManager:
         patch_dir = output_dir / "stable_patches"
         patch_dir.mkdir(parents=True, exist_ok=True)
         
-        logger.info(f"Downloading stable patches for kernel {kernel_version}")
+        latest = await asyncio.to_thread(self.get_latest_stable_version, kernel_version)
+        if latest:
+            latest_subver = KernelVersion.parse(latest).patch
+            end_subver = min(end_subver, latest_subver) if end_subver else latest_subver
+        elif not end_subver:
+            logger.error(f"Could not determine latest stable version for {kernel_version}")
+            return []
+        
+        if end_subver < start_subver:
+            logger.info(f"No stable patches to download for {kernel_version}")
+            return []
         
-        patches = []
-        patch_num = start_subver
+        logger.info(
+            f"Downloading stable patches for kernel {kernel_version} "
+            f"({kernel_version}.{start_subver} to {kernel_version}.{end_subver})"
+        )
         
+        semaphore = asyncio.Semaphore(max(1, self.config.download_concurrency))
         async with aiohttp.ClientSession() as session:
-            while True:
-                if end_subver and patch_num > end_subver:
-                    break
-                
-                version = f"{kernel_version}.{patch_num}"
-                xz_filename = f"patch-{version}.xz"
-                xz_url = f"{kernel_url}{xz_filename}"
-                xz_path = patch_dir / xz_filename
-                patch_path = patch_dir / f"patch-{version}"
-                
-                try:
-                    async with session.get(xz_url, timeout=aiohttp.ClientTimeout(total=60)) as response:
-                        if response.status != 200:
-                            if patch_num == start_subver:
-                                logger.warning(f"No patches found starting from {version}")
-                            else:
-                                logger.info(f"No more patches after {kernel_version}.{patch_num - 1}")
-                            break
-                        
-                        xz_data = await response.read()
-                except Exception as e:
-                    logger.warning(f"Failed to download {xz_filename}: {e}")
-                    break
-                
-                # Save and decompress
-                xz_path.write_bytes(xz_data)
-                
-                try:
-                    with lzma.open(xz_path) as f:
-                        patch_data = f.read()
-                    patch_path.write_bytes(patch_data)
-                    
-                    patches.append(StablePatchInfo(
-                        version=version,
-                        patch_file=str(patch_path),
-                        downloaded=True,
-                    ))
-                    
-                    logger.debug(f"Downloaded: {xz_filename}")
-                    
-                except Exception as e:
-                    logger.warning(f"Failed to decompress {xz_filename}: {e}")
-                
-                patch_num += 1
+            checksums = await self._fetch_checksums(session, kernel_url)
+            results = await asyncio.gather(*[
+                self._download_patch(
+                    session, semaphore, kernel_url, patch_dir,
+                    f"{kernel_version}.{patch_num}", checksums,
+                )
+                for patch_num in range(start_subver, end_subver + 1)
+            ])
+        
+        patches = []
+        for patch_num, info in zip(range(start_subver, end_subver + 1), results):
+            if info is None:
+                if patch_num == start_subver:
+                    logger.warning(f"No patches found starting from {kernel_version}.{patch_num}")
+                else:
+                    logger.info(f"No more patches after {kernel_version}.{patch_num - 1}")
+                break
+            patches.append(info)
         
         logger.info(f"Downloaded {len(patches)} stable patches")
         return patches
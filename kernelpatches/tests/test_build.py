@@ -0,0 +1,397 @@
+"""Tests for kernel RPM builds."""
+
+import json
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from scripts.build import BuildJob, KernelBuilder, plan_build_concurrency
+from scripts.build_cache import CompilerCacheStats
+from scripts.build_telemetry import BuildTelemetry
+from scripts.config import KernelConfig
+
+
+SPEC_FILES = ["linux.spec", "linux-esx.spec", "linux-rt.spec"]
+
+
+RPMBUILD_OUTPUT = [
+    "Executing(%prep): /bin/sh -e /var/tmp/rpm-tmp.1",
+    "+ tar xf linux-6.1.10.tar.xz",
+    "Executing(%build): /bin/sh -e /var/tmp/rpm-tmp.2",
+    "  CC      kernel/fork.o",
+    "  CC [M]  drivers/net/dummy.o",
+    "  LD      vmlinux",
+    "Executing(%install): /bin/sh -e /var/tmp/rpm-tmp.3",
+    "Processing files: linux-6.1.10-2.ph5.x86_64",
+    "Processing files: linux-devel-6.1.10-2.ph5.x86_64",
+    "Wrote: /topdir/RPMS/x86_64/linux-6.1.10-2.ph5.x86_64.rpm",
+    "Executing(%clean): /bin/sh -e /var/tmp/rpm-tmp.4",
+]
+
+
+def wait_for_exit(pid, timeout=10):
+    """Wait until a process is gone or a zombie."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            state = Path(f"/proc/{pid}/stat").read_text().rsplit(")", 1)[1].split()[0]
+        except OSError:
+            return True
+        if state == "Z":
+            return True
+        time.sleep(0.05)
+    return False
+
+class FakeProcess:
+    """Stand-in for a running rpmbuild."""
+    
+    def __init__(self, rpmbuild, returncode):
+        self.rpmbuild = rpmbuild
+        self.returncode = returncode
+        self.pid = 0
+        self.stdout = self._output()
+    
+    def _output(self):
+        with self.rpmbuild.lock:
+            self.rpmbuild.active += 1
+            self.rpmbuild.max_active = max(self.rpmbuild.max_active, self.rpmbuild.active)
+        time.sleep(0.05)
+        with self.rpmbuild.lock:
+            self.rpmbuild.active -= 1
+        for line in RPMBUILD_OUTPUT:
+            yield f"{line}\n"
+    
+    def wait(self):
+        return self.returncode
+
+
+class FakeRpmbuild:
+    """Stand-in for subprocess.Popen that records rpmbuild invocations."""
+    
+    def __init__(self, fail=()):
+        self.fail = set(fail)
+        self.commands = []
+        self.envs = []
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+    
+    def __call__(self, cmd, env=None, **kwargs):
+        with self.lock:
+            self.commands.append(cmd)
+            self.envs.append(env)
+        name = cmd[-1].rsplit("/", 1)[-1]
+        return FakeProcess(self, 1 if name in self.fail else 0)
+
+
+def defines(cmd):
+    """Get rpmbuild --define macros as a dict."""
+    values = [cmd[i + 1] for i, arg in enumerate(cmd) if arg == "--define"]
+    return dict(value.split(" ", 1) for value in values)
+
+
+@pytest.fixture
+def builder(tmp_path, monkeypatch):
+    """Create a builder with 8 CPUs, plenty of memory and a private SOURCES dir."""
+    config = KernelConfig(cache_dir=tmp_path / "cache")
+    monkeypatch.setattr("scripts.build.os.cpu_count", lambda: 8)
+    monkeypatch.setattr("scripts.build._total_memory_mb", lambda: 64 * 1024)
+    monkeypatch.setattr("scripts.build.PHOTON_SOURCES_DIR", tmp_path / "SOURCES")
+    return KernelBuilder(config)
+
+
+@pytest.fixture
+def repo_dir(tmp_path):
+    """Create a repository with the 6.1 kernel specs and their tarball."""
+    repo = tmp_path / "repo"
+    spec_dir = repo / "SPECS" / "linux"
+    spec_dir.mkdir(parents=True)
+    for spec_name in SPEC_FILES:
+        (spec_dir / spec_name).write_text("Name: linux\nVersion: 6.1.10\nRelease: 2%{?dist}\n")
+    sources = tmp_path / "SOURCES"
+    sources.mkdir()
+    (sources / "linux-6.1.10.tar.xz").write_bytes(b"")
+    return repo
+
+
+class TestPlanBuildConcurrency:
+    """Tests for plan_build_concurrency function."""
+    
+    def test_cpu_bound(self):
+        """Test each build keeps at least two CPUs and CPUs are split evenly."""
+        assert plan_build_concurrency(12, cpu_count=16, memory_mb=256 * 1024) == (8, 2)
+        assert plan_build_concurrency(3, cpu_count=16, memory_mb=256 * 1024) == (3, 5)
+    
+    def test_memory_bound(self):
+        """Test memory limits concurrency and frees CPUs for make."""
+        assert plan_build_concurrency(12, memory_per_job_mb=4096, cpu_count=16, memory_mb=8192) == (2, 8)
+    
+    def test_explicit_limit_and_small_hosts(self):
+        """Test an explicit limit wins and there is always one build."""
+        assert plan_build_concurrency(12, max_jobs=3, cpu_count=16, memory_mb=1024) == (3, 5)
+        assert plan_build_concurrency(12, cpu_count=1, memory_mb=None) == (1, 1)
+        assert plan_build_concurrency(0, cpu_count=4, memory_mb=None) == (1, 4)
+
+
+class TestRunBuildJobs:
+    """Tests for KernelBuilder.run_build_jobs."""
+    
+    def test_concurrent_builds_keep_job_order(self, builder, repo_dir, tmp_path, monkeypatch):
+        """Test jobs run concurrently in separate topdirs and results follow job order."""
+        rpmbuild = FakeRpmbuild(fail={"linux-esx.spec"})
+        monkeypatch.setattr("scripts.build.subprocess.Popen", rpmbuild)
+        spec_dir = repo_dir / "SPECS" / "linux"
+        jobs = [
+            BuildJob(spec_dir / name, tmp_path / "logs" / f"{name}.log", topdir=tmp_path / name)
+            for name in SPEC_FILES
+        ]
+        
+        results = builder.run_build_jobs(jobs, sourcedir=tmp_path / "SOURCES")
+        
+        assert [r.spec_file for r in results] == [str(job.spec_path) for job in jobs]
+        assert [r.success for r in results] == [True, False, True]
+        assert rpmbuild.max_active == 3
+        topdirs = {defines(cmd)["_topdir"] for cmd in rpmbuild.commands}
+        assert topdirs == {str(job.topdir) for job in jobs}
+        for cmd in rpmbuild.commands:
+            assert defines(cmd)["_smp_mflags"] == "-j2"
+            assert defines(cmd)["_sourcedir"] == str(tmp_path / "SOURCES")
+        for result in results:
+            assert result.started_at <= result.finished_at
+            assert result.rpm_dir.endswith("RPMS")
+    
+    def test_build_trees_removed_after_job(self, builder, repo_dir, tmp_path, monkeypatch):
+        """Test each job's BUILD and BUILDROOT are removed while RPMS is kept."""
+        rpmbuild = FakeRpmbuild(fail={"linux-esx.spec"})
+        monkeypatch.setattr("scripts.build.subprocess.Popen", rpmbuild)
+        spec_dir = repo_dir / "SPECS" / "linux"
+        jobs = [BuildJob(spec_dir / name, tmp_path / f"{name}.log", topdir=tmp_path / name) for name in SPEC_FILES]
+        for job in jobs:
+            for subdir in ("BUILD/linux-6.1.10", "BUILDROOT", "RPMS/x86_64"):
+                (job.topdir / subdir).mkdir(parents=True)
+        
+        builder.run_build_jobs(jobs)
+        
+        for job in jobs:
+            assert not (job.topdir / "BUILD").exists()
+            assert not (job.topdir / "BUILDROOT").exists()
+            assert (job.topdir / "RPMS" / "x86_64").is_dir()
+    
+    def test_build_jobs_limit(self, builder, repo_dir, tmp_path, monkeypatch):
+        """Test config.build_jobs caps concurrent builds."""
+        rpmbuild = FakeRpmbuild()
+        monkeypatch.setattr("scripts.build.subprocess.Popen", rpmbuild)
+        builder.config.build_jobs = 1
+        spec_dir = repo_dir / "SPECS" / "linux"
+        jobs = [BuildJob(spec_dir / name, tmp_path / f"{name}.log", topdir=tmp_path / name) for name in SPEC_FILES]
+        
+        builder.run_build_jobs(jobs)
+        
+        assert rpmbuild.max_active == 1
+        assert all(defines(cmd)["_smp_mflags"] == "-j8" for cmd in rpmbuild.commands)
+
+
+class TestBuildAllPermutations:
+    """Tests for KernelBuilder.build_all_permutations."""
+    
+    def test_one_batch_for_all_permutations(self, builder, repo_dir, tmp_path, monkeypatch):
+        """Test sources are staged once and all specs of all permutations are built."""
+        rpmbuild = FakeRpmbuild()
+        monkeypatch.setattr("scripts.build.subprocess.Popen", rpmbuild)
+        staged = []
+        monkeypatch.setattr(builder, "_copy_source_files_to_sources", staged.append)
+        output = tmp_path / "out"
+        
+        results = builder.build_all_permutations("6.1", repo_dir, output, install_deps=False)
+        
+        assert len(staged) == 1
+        assert len(results) == 4 * len(SPEC_FILES)
+        assert [(r.canister_build, r.acvp_build) for r in results[::3]] == [(0, 0), (1, 0), (0, 1), (1, 1)]
+        assert rpmbuild.max_active == 4
+        assert len({defines(cmd)["_topdir"] for cmd in rpmbuild.commands}) == 12
+        assert results[4].log_file == str(output / "perm_c1_a0" / "build_linux-esx.log")
+        assert results[4].rpm_dir == str(output / "perm_c1_a0" / "rpmbuild" / "linux-esx" / "RPMS")
+
+
+class TestCompilerCacheBuilds:
+    """Tests for ccache-backed builds."""
+    
+    def test_builds_share_cache_and_report_hits(self, builder, repo_dir, tmp_path, monkeypatch):
+        """Test every job compiles through ccache with a common base dir."""
+        rpmbuild = FakeRpmbuild()
+        monkeypatch.setattr("scripts.build.subprocess.Popen", rpmbuild)
+        monkeypatch.setattr(builder.compiler_cache, "prepare", lambda: True)
+        counters = iter([CompilerCacheStats(hits=100, misses=50), CompilerCacheStats(hits=190, misses=60)])
+        monkeypatch.setattr(builder.compiler_cache, "stats", lambda: next(counters))
+        builder.config.build_ccache = True
+        
+        builder.build_all_permutations("6.1", repo_dir, tmp_path / "out", install_deps=False)
+        
+        for env in rpmbuild.envs:
+            assert env["PATH"].startswith(str(builder.compiler_cache.bin_dir))
+            assert env["CCACHE_BASEDIR"] == str(tmp_path / "out")
+        assert builder.cache_stats == CompilerCacheStats(hits=90, misses=10)
+    
+    def test_disabled_by_default(self, builder, repo_dir, tmp_path, monkeypatch):
+        """Test builds inherit the environment without build_ccache."""
+        rpmbuild = FakeRpmbuild()
+        monkeypatch.setattr("scripts.build.subprocess.Popen", rpmbuild)
+        
+        builder.build_all_specs("6.1", repo_dir, tmp_path / "out", install_deps=False)
+        
+        assert rpmbuild.envs == [None] * len(SPEC_FILES)
+        assert builder.cache_stats is None
+
+
+class FakeRpm:
+    """Stand-in for run_command answering rpm and tdnf calls."""
+    
+    def __init__(self, rpmdb_dir, installed, spec_requires):
+        self.rpmdb_dir = rpmdb_dir
+        self.installed = set(installed)
+        self.spec_requires = spec_requires
+        self.calls = []
+    
+    def __call__(self, cmd, **kwargs):
+        self.calls.append(cmd[:3])
+        if cmd[:3] == ["rpm", "-q", "--buildrequires"]:
+            return 0, "\n".join(self.spec_requires[cmd[-1].rsplit("/", 1)[-1]]) + "\n", ""
+        if cmd[:3] == ["rpm", "-q", "--whatprovides"]:
+            missing = [pkg for pkg in cmd[3:] if pkg not in self.installed]
+            lines = [f"no package provides {pkg}" if pkg in missing else f"{pkg}-1.0-1.ph5.x86_64" for pkg in cmd[3:]]
+            return len(missing), "\n".join(lines), ""
+        if cmd[:3] == ["tdnf", "install", "-y"]:
+            self.installed.update(cmd[3:])
+            (self.rpmdb_dir / "rpmdb.sqlite").write_text("\n".join(sorted(self.installed)))
+            return 0, "", ""
+        raise AssertionError(f"unexpected command {cmd}")
+
+
+@pytest.fixture
+def rpm(tmp_path, monkeypatch):
+    """Fake rpm/tdnf with gcc installed and a private rpm database."""
+    rpmdb_dir = tmp_path / "rpmdb"
+    rpmdb_dir.mkdir()
+    (rpmdb_dir / "rpmdb.sqlite").write_text("gcc")
+    monkeypatch.setattr("scripts.build_deps.RPMDB_DIR", rpmdb_dir)
+    fake = FakeRpm(rpmdb_dir, ["gcc"], {
+        "linux.spec": ["gcc", "bc", "kmod-devel >= 30"],
+        "linux-esx.spec": ["gcc", "bc"],
+        "linux-rt.spec": ["gcc", "bc", "libcap-devel"],
+    })
+    monkeypatch.setattr("scripts.build.run_command", fake)
+    return fake
+
+
+class TestBuildDeps:
+    """Tests for cached build dependency installation."""
+    
+    def test_union_installed_once_then_skipped(self, builder, repo_dir, rpm):
+        """Test missing deps of all specs go into one tdnf call and repeats do nothing."""
+        spec_dir = repo_dir / "SPECS" / "linux"
+        
+        assert builder.install_all_build_deps(spec_dir, SPEC_FILES + ["missing.spec"]) is True
+        
+        assert rpm.calls == [["rpm", "-q", "--buildrequires"]] * 3 + [
+            ["rpm", "-q", "--whatprovides"], ["tdnf", "install", "-y"],
+        ]
+        assert rpm.installed == {"gcc", "bc", "kmod-devel", "libcap-devel"}
+        
+        rpm.calls.clear()
+        assert KernelBuilder(builder.config).install_all_build_deps(spec_dir, SPEC_FILES) is True
+        assert rpm.calls == []
+        
+        # Same rpm-evaluated requirements, so the satisfied state is shared
+        success, installed = builder.install_specs_build_deps([spec_dir / name for name in SPEC_FILES])
+        assert (success, installed) == (True, [])
+        assert rpm.calls == []
+    
+    def test_spec_requires_cached_and_rpmdb_rechecked(self, builder, repo_dir, rpm):
+        """Test rpm evaluates each spec once and an rpmdb change triggers a recheck."""
+        spec_paths = [repo_dir / "SPECS" / "linux" / name for name in SPEC_FILES]
+        
+        success, installed = builder.install_specs_build_deps(spec_paths)
+        
+        assert success is True
+        assert installed == ["bc", "kmod-devel", "libcap-devel"]
+        assert [call[2] for call in rpm.calls].count("--buildrequires") == 3
+        
+        (rpm.rpmdb_dir / "rpmdb.sqlite").write_text("package removed")
+        rpm.calls.clear()
+        success, installed = builder.install_build_deps(spec_paths[1])
+        
+        assert (success, installed) == (True, [])
+        assert rpm.calls == [["rpm", "-q", "--whatprovides"]]
+
+
+class TestBuildTelemetry:
+    """Tests for streamed rpmbuild telemetry in build results."""
+    
+    def test_phases_and_timeline(self, builder, repo_dir, tmp_path, monkeypatch):
+        """Test per-phase durations and the JSON timeline of a build."""
+        monkeypatch.setattr("scripts.build.subprocess.Popen", FakeRpmbuild())
+        spec_path = repo_dir / "SPECS" / "linux" / "linux.spec"
+        build_log = tmp_path / "logs" / "build_linux.log"
+        
+        result = builder.build_rpm(spec_path, build_log, defines={"dist": ".ph5"})
+        
+        assert result.success is True
+        assert build_log.read_text().splitlines() == RPMBUILD_OUTPUT
+        assert list(result.phase_durations) == ["%prep", "%build", "%install", "package", "%clean"]
+        timeline = json.loads(Path(result.timeline_file).read_text())
+        assert result.timeline_file == str(tmp_path / "logs" / "build_linux.timeline.json")
+        assert timeline["compiled_objects"] == 3
+        assert timeline["rpms"] == ["/topdir/RPMS/x86_64/linux-6.1.10-2.ph5.x86_64.rpm"]
+        assert [e["kind"] for e in timeline["events"]] == ["phase"] * 4 + ["rpm", "phase", "end"]
+        assert timeline["events"][-1]["name"] == "exit 0"
+    
+    def test_timeout_stops_build(self, builder, tmp_path):
+        """Test a build past build_timeout is killed with its children."""
+        builder.config.build_timeout = 1
+        telemetry = BuildTelemetry("linux.spec")
+        cmd = ["sh", "-c", "echo 'Executing(%build): /bin/sh'; sleep 30 & wait"]
+        
+        start = time.monotonic()
+        builder._run_rpmbuild(cmd, tmp_path / "build.log", telemetry)
+        
+        assert time.monotonic() - start < 10
+        assert telemetry.timed_out is True
+        assert list(telemetry.phase_durations) == ["%build"]
+    
+    def test_interrupt_kills_build(self, builder, tmp_path):
+        """Test KeyboardInterrupt while streaming kills rpmbuild and its children."""
+        class InterruptingTelemetry(BuildTelemetry):
+            child_pid = None
+            
+            def feed(self, line):
+                InterruptingTelemetry.child_pid = int(line)
+                raise KeyboardInterrupt
+        
+        cmd = ["sh", "-c", "sleep 30 & echo $!; wait"]
+        
+        start = time.monotonic()
+        with pytest.raises(KeyboardInterrupt):
+            builder._run_rpmbuild(cmd, tmp_path / "build.log", InterruptingTelemetry("linux.spec"))
+        
+        assert time.monotonic() - start < 10
+        assert wait_for_exit(InterruptingTelemetry.child_pid)
+        assert builder._processes == set()
+    
+    def test_kill_running_builds(self, builder, tmp_path):
+        """Test an interrupted batch stops builds running in worker threads."""
+        telemetry = BuildTelemetry("linux.spec")
+        cmd = ["sh", "-c", "echo 'Executing(%build): /bin/sh'; sleep 30 & wait"]
+        worker = threading.Thread(
+            target=builder._run_rpmbuild, args=(cmd, tmp_path / "build.log", telemetry)
+        )
+        worker.start()
+        while not builder._processes:
+            time.sleep(0.01)
+        
+        builder.kill_running_builds()
+        worker.join(10)
+        
+        assert not worker.is_alive()
+        assert telemetry.returncode == -9
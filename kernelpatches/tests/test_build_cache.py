@@ -0,0 +1,104 @@
+"""Tests for the kernel build compiler cache."""
+
+import os
+
+import pytest
+
+from scripts.build_cache import CompilerCache, CompilerCacheStats
+from scripts.config import KernelConfig
+
+
+FAKE_CCACHE = """#!/bin/sh
+echo "$@" >> "$CCACHE_DIR/calls"
+if [ "$1" = "--print-stats" ]; then
+    cat "$CCACHE_DIR/stats"
+fi
+"""
+
+
+def write_stats(cache, direct, preprocessed, miss):
+    """Set the counters the fake ccache prints."""
+    cache.cache_dir.mkdir(parents=True, exist_ok=True)
+    (cache.cache_dir / "stats").write_text(
+        f"stats_updated_timestamp\t0\ndirect_cache_hit\t{direct}\n"
+        f"preprocessed_cache_hit\t{preprocessed}\ncache_miss\t{miss}\n"
+    )
+
+
+@pytest.fixture
+def fake_ccache(tmp_path, monkeypatch):
+    """Install a fake ccache executable."""
+    path = tmp_path / "tools" / "ccache"
+    path.parent.mkdir()
+    path.write_text(FAKE_CCACHE)
+    path.chmod(0o755)
+    monkeypatch.setattr("scripts.build_cache.shutil.which", lambda name: str(path))
+    return path
+
+
+@pytest.fixture
+def config(tmp_path):
+    """Create a config with a private cache directory."""
+    return KernelConfig(cache_dir=tmp_path / "cache")
+
+
+class TestCompilerCacheStats:
+    """Tests for CompilerCacheStats class."""
+    
+    def test_hit_rate_and_delta(self):
+        """Test hit rate of a counter delta."""
+        delta = CompilerCacheStats(hits=130, misses=20) - CompilerCacheStats(hits=40, misses=10)
+        
+        assert (delta.hits, delta.misses) == (90, 10)
+        assert delta.hit_rate == 0.9
+        assert delta.summary() == "90 hits, 10 misses (90.0% hit rate)"
+        assert CompilerCacheStats().hit_rate == 0.0
+
+
+class TestCompilerCache:
+    """Tests for CompilerCache class."""
+    
+    def test_prepare_creates_masquerade_links(self, config, fake_ccache):
+        """Test compiler names link to ccache and the cache is sized once."""
+        cache = CompilerCache(config)
+        
+        assert cache.prepare() is True
+        assert cache.prepare() is True
+        
+        for name in ("gcc", "cc"):
+            assert os.readlink(cache.bin_dir / name) == str(fake_ccache)
+        assert (cache.cache_dir / "calls").read_text() == "--max-size 20G\n"
+    
+    def test_build_env(self, config, fake_ccache, tmp_path):
+        """Test the masquerade directory comes first in PATH."""
+        env = CompilerCache(config).build_env(tmp_path / "build")
+        
+        assert env["PATH"].split(os.pathsep)[0] == str(config.cache_dir / "ccache" / "bin")
+        assert env["CCACHE_DIR"] == str(config.cache_dir / "ccache")
+        assert env["CCACHE_BASEDIR"] == str(tmp_path / "build")
+        assert "CCACHE_NOHASHDIR" not in env
+    
+    def test_build_env_share_topdirs(self, config, fake_ccache, tmp_path):
+        """Test working directory hashing is only disabled on request."""
+        config.build_ccache_share_topdirs = True
+        
+        env = CompilerCache(config).build_env(tmp_path / "build")
+        
+        assert env["CCACHE_NOHASHDIR"] == "1"
+    
+    def test_stats(self, config, fake_ccache):
+        """Test direct and preprocessed hits are counted together."""
+        cache = CompilerCache(config)
+        write_stats(cache, direct=70, preprocessed=5, miss=25)
+        
+        stats = cache.stats()
+        
+        assert (stats.hits, stats.misses) == (75, 25)
+    
+    def test_unavailable(self, config, monkeypatch):
+        """Test a missing ccache disables the cache."""
+        monkeypatch.setattr("scripts.build_cache.shutil.which", lambda name: None)
+        cache = CompilerCache(config)
+        
+        assert cache.prepare() is False
+        assert cache.stats() is None
@@ -0,0 +1,84 @@
+"""Tests for the build dependency resolution cache."""
+
+import os
+
+import pytest
+
+from scripts.build_deps import BuildDepsCache, rpmdb_fingerprint
+from scripts.config import KernelConfig
+
+
+@pytest.fixture
+def rpmdb(tmp_path, monkeypatch):
+    """Create a fake rpm database directory."""
+    rpmdb_dir = tmp_path / "rpmdb"
+    rpmdb_dir.mkdir()
+    (rpmdb_dir / "rpmdb.sqlite").write_bytes(b"packages")
+    monkeypatch.setattr("scripts.build_deps.RPMDB_DIR", rpmdb_dir)
+    return rpmdb_dir
+
+
+def change_rpmdb(rpmdb_dir):
+    """Simulate a package install."""
+    db = rpmdb_dir / "rpmdb.sqlite"
+    db.write_bytes(b"packages + one more")
+    os.utime(db, ns=(0, db.stat().st_mtime_ns + 1))
+
+
+@pytest.fixture
+def config(tmp_path):
+    """Create a config with a private cache directory."""
+    return KernelConfig(cache_dir=tmp_path / "cache")
+
+
+class TestRpmdbFingerprint:
+    """Tests for rpmdb_fingerprint function."""
+    
+    def test_changes_with_database(self, rpmdb):
+        """Test the fingerprint follows database writes."""
+        before = rpmdb_fingerprint()
+        
+        change_rpmdb(rpmdb)
+        
+        assert before and rpmdb_fingerprint() != before
+    
+    def test_missing_database(self, tmp_path):
+        """Test no fingerprint without an rpm database."""
+        assert rpmdb_fingerprint(tmp_path / "missing") is None
+
+
+class TestBuildDepsCache:
+    """Tests for BuildDepsCache class."""
+    
+    def test_spec_requires_follow_spec_changes(self, config, tmp_path):
+        """Test cached BuildRequires are dropped when the spec changes."""
+        spec = tmp_path / "linux.spec"
+        spec.write_text("BuildRequires: bc\n")
+        cache = BuildDepsCache(config)
+        
+        assert cache.spec_requires(spec) is None
+        cache.store_spec_requires(spec, ["bc"])
+        assert BuildDepsCache(config).spec_requires(spec) == ["bc"]
+        
+        spec.write_text("BuildRequires: bc\nBuildRequires: kmod-devel\n")
+        assert cache.spec_requires(spec) is None
+    
+    def test_satisfied_until_rpmdb_changes(self, config, rpmdb):
+        """Test satisfied sets are keyed by requirements and rpmdb state."""
+        cache = BuildDepsCache(config)
+        cache.mark_satisfied(["gcc", "bc"])
+        
+        assert BuildDepsCache(config).is_satisfied(["bc", "gcc", "bc"])
+        assert not cache.is_satisfied(["bc"])
+        
+        change_rpmdb(rpmdb)
+        assert not cache.is_satisfied(["gcc", "bc"])
+    
+    def test_corrupt_cache_file_is_ignored(self, config, rpmdb):
+        """Test an unreadable cache starts empty."""
+        (config.cache_dir / "build_deps.json").write_text("{not json")
+        cache = BuildDepsCache(config)
+        
+        assert not cache.is_satisfied(["gcc"])
+        cache.mark_satisfied(["gcc"])
+        assert BuildDepsCache(config).is_satisfied(["gcc"])
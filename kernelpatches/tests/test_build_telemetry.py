@@ -0,0 +1,51 @@
+"""Tests for rpmbuild telemetry parsing."""
+
+from scripts.build_telemetry import PROGRESS_EVERY, BuildTelemetry
+
+
+class TestBuildTelemetry:
+    """Tests for BuildTelemetry class."""
+    
+    def test_phases_accumulate(self):
+        """Test phase markers open phases and repeated phases add up."""
+        telemetry = BuildTelemetry("linux.spec")
+        
+        telemetry.feed("Executing(%prep): /bin/sh -e /var/tmp/rpm-tmp.1\n")
+        assert telemetry.phase == "%prep"
+        telemetry.feed("Executing(%build): /bin/sh -e /var/tmp/rpm-tmp.2\n")
+        telemetry.feed("Processing files: linux-6.1.10-2.ph5.x86_64\n")
+        telemetry.feed("Processing files: linux-docs-6.1.10-2.ph5.noarch\n")
+        telemetry.feed("Executing(%build): /bin/sh -e /var/tmp/rpm-tmp.3\n")
+        telemetry.finish(0)
+        
+        assert list(telemetry.phase_durations) == ["%prep", "%build", "package"]
+        assert all(seconds >= 0 for seconds in telemetry.phase_durations.values())
+        assert [e.name for e in telemetry.events if e.kind == "phase"] == ["%prep", "%build", "package", "%build"]
+        assert telemetry.phase is None
+    
+    def test_compile_progress(self):
+        """Test kbuild lines are counted and reported periodically."""
+        telemetry = BuildTelemetry("linux.spec")
+        telemetry.feed("Executing(%build): /bin/sh -e /var/tmp/rpm-tmp.2\n")
+        
+        for n in range(PROGRESS_EVERY + 1):
+            telemetry.feed(f"  CC [M]  drivers/fixture/file{n}.o\n")
+        telemetry.feed("+ make -j8 modules\n")
+        telemetry.feed("CC is not a kbuild progress line\n")
+        
+        assert telemetry.compiled_objects == PROGRESS_EVERY + 1
+        progress = [e for e in telemetry.events if e.kind == "progress"]
+        assert [(e.name, e.detail) for e in progress] == [("%build", f"{PROGRESS_EVERY} objects")]
+    
+    def test_timeout(self, tmp_path):
+        """Test a killed build is recorded as a timeout."""
+        telemetry = BuildTelemetry("linux.spec")
+        telemetry.feed("Executing(%build): /bin/sh -e /var/tmp/rpm-tmp.2\n")
+        telemetry.finish(None, timed_out=True)
+        
+        timeline = telemetry.to_dict()
+        
+        assert timeline["timed_out"] is True
+        assert timeline["returncode"] is None
+        assert timeline["events"][-1]["name"] == "timeout"
+        assert list(timeline["phase_durations"]) == ["%build"]
@@ -0,0 +1,243 @@
+"""Tests for the shared commit patch store and downloader."""
+
+import asyncio
+
+import pytest
+
+from scripts.commit_patches import (
+    MAX_RETRY_DELAY,
+    CommitPatchStore,
+    commit_sha,
+    get_shared_patch_store,
+)
+from scripts.config import KernelConfig
+from scripts.cve_matrix import CVECoverageMatrix, CVEPatchState, KernelCVEStatus, MatrixEntry
+from scripts.generate_full_matrix import download_cve_patches
+
+
+SHA_A = "a" * 40
+SHA_B = "b" * 40
+SHA_C = "c" * 40
+
+
+class FakeResponse:
+    """Minimal stand-in for an aiohttp response."""
+    
+    def __init__(self, body=b"", status=200, headers=None):
+        self.body = body
+        self.status = status
+        self.headers = headers or {}
+    
+    async def read(self):
+        return self.body
+
+
+class FakeSession:
+    """Serve commit patches by SHA, replaying queued statuses first."""
+    
+    def __init__(self, patches, statuses=None, retry_after="0"):
+        self.patches = patches
+        self.statuses = statuses or {}
+        self.retry_after = retry_after
+        self.requested = []
+        self.active = 0
+        self.max_active = 0
+    
+    def get(self, url, **kwargs):
+        sha = url.rsplit("=", 1)[-1]
+        self.requested.append(sha)
+        session = self
+        
+        class Request:
+            async def __aenter__(self):
+                session.active += 1
+                session.max_active = max(session.max_active, session.active)
+                await asyncio.sleep(0.01)
+                session.active -= 1
+                queued = session.statuses.get(sha)
+                if queued:
+                    return FakeResponse(status=queued.pop(0), headers={"Retry-After": session.retry_after})
+                if sha not in session.patches:
+                    return FakeResponse(status=404)
+                return FakeResponse(session.patches[sha])
+            
+            async def __aexit__(self, *args):
+                return False
+        
+        return Request()
+    
+    async def close(self):
+        pass
+
+
+@pytest.fixture
+def config(tmp_path):
+    """Create a config with a private cache and two download slots."""
+    config = KernelConfig(cache_dir=tmp_path / "cache")
+    config.download_concurrency = 2
+    return config
+
+
+def serve(monkeypatch, patches, statuses=None, retry_after="0"):
+    """Route the downloader's HTTP session to a fake."""
+    session = FakeSession(patches, statuses, retry_after)
+    monkeypatch.setattr("scripts.commit_patches.aiohttp.ClientSession", lambda *a, **k: session)
+    return session
+
+
+class TestCommitSha:
+    """Tests for commit_sha function."""
+    
+    def test_bare_and_url(self):
+        """Test SHAs are taken as-is or extracted from commit URLs."""
+        assert commit_sha(SHA_A) == SHA_A
+        assert commit_sha(f"https://git.kernel.org/stable/c/{SHA_B}") == SHA_B
+        assert commit_sha("https://example.com/no-sha") is None
+
+
+class TestCommitPatchDownloader:
+    """Tests for CommitPatchStore downloads."""
+    
+    async def test_same_commit_downloaded_once(self, config, monkeypatch):
+        """Test concurrent requests share one download and later batches reuse the store."""
+        session = serve(monkeypatch, {SHA_A: b"patch a\n"})
+        store = CommitPatchStore(config)
+        
+        async with store.downloader() as downloader:
+            paths = await asyncio.gather(*[downloader.fetch(SHA_A) for _ in range(3)])
+        
+        assert session.requested == [SHA_A]
+        assert len(set(paths)) == 1 and paths[0].read_bytes() == b"patch a\n"
+        assert (downloader.stats.downloaded, downloader.stats.reused) == (1, 2)
+        assert downloader.stats.bytes == len(b"patch a\n")
+        
+        async with store.downloader() as again:
+            assert await again.fetch(SHA_A) == paths[0]
+        assert session.requested == [SHA_A]
+    
+    async def test_bounded_concurrency(self, config, monkeypatch):
+        """Test no more than download_concurrency requests are in flight."""
+        shas = [f"{n:040x}" for n in range(1, 9)]
+        session = serve(monkeypatch, dict.fromkeys(shas, b"x"))
+        
+        async with CommitPatchStore(config).downloader() as downloader:
+            await asyncio.gather(*[downloader.fetch(sha) for sha in shas])
+        
+        assert session.max_active == 2
+        assert downloader.stats.downloaded == 8
+    
+    async def test_retries_server_errors(self, config, monkeypatch):
+        """Test 429/5xx responses are retried."""
+        session = serve(monkeypatch, {SHA_A: b"patch a\n"}, {SHA_A: [429, 503]})
+        
+        async with CommitPatchStore(config).downloader() as downloader:
+            path = await downloader.fetch(SHA_A)
+        
+        assert path is not None
+        assert session.requested == [SHA_A] * 3
+    
+    async def test_retry_after_is_capped(self, config, monkeypatch):
+        """Test a huge Retry-After header does not stall the download."""
+        serve(monkeypatch, {SHA_A: b"patch a\n"}, {SHA_A: [429]}, retry_after="86400")
+        delays = []
+        real_sleep = asyncio.sleep
+        
+        async def fake_sleep(delay):
+            if delay > 0.01:
+                delays.append(delay)
+            await real_sleep(0)
+        
+        monkeypatch.setattr("scripts.commit_patches.asyncio.sleep", fake_sleep)
+        async with CommitPatchStore(config).downloader() as downloader:
+            assert await downloader.fetch(SHA_A) is not None
+        
+        assert delays == [MAX_RETRY_DELAY]
+    
+    async def test_backoff_releases_download_slot(self, config, monkeypatch):
+        """Test other commits download while one is backing off."""
+        config.download_concurrency = 1
+        session = serve(monkeypatch, {SHA_A: b"patch a\n", SHA_B: b"patch b\n"}, {SHA_A: [429]}, retry_after="1")
+        real_sleep = asyncio.sleep
+        
+        async def fake_sleep(delay):
+            await real_sleep(0.05 if delay >= 1 else delay)
+        
+        monkeypatch.setattr("scripts.commit_patches.asyncio.sleep", fake_sleep)
+        async with CommitPatchStore(config).downloader() as downloader:
+            paths = await asyncio.gather(downloader.fetch(SHA_A), downloader.fetch(SHA_B))
+        
+        assert all(paths)
+        assert session.requested == [SHA_A, SHA_B, SHA_A]
+    
+    async def test_missing_commit_fails_once(self, config, monkeypatch):
+        """Test a 404 is not retried and not requested again in the batch."""
+        session = serve(monkeypatch, {})
+        
+        async with CommitPatchStore(config).downloader() as downloader:
+            assert await downloader.fetch(SHA_A) is None
+            assert await downloader.fetch(SHA_A) is None
+        
+        assert session.requested == [SHA_A]
+        assert downloader.stats.failed == 1
+    
+    def test_shared_instance(self, config):
+        """Test one store instance is shared per cache directory."""
+        assert get_shared_patch_store(config) is get_shared_patch_store(config)
+
+
+def matrix_entry(cve_id, fix_commits, state=CVEPatchState.CVE_PATCH_AVAILABLE):
+    """Build a matrix entry with the same state on 6.1 and 6.12."""
+    return MatrixEntry(
+        cve_id=cve_id,
+        cvss_score=7.0,
+        severity="HIGH",
+        description="",
+        references=[],
+        kernel_status={kv: KernelCVEStatus(state=state) for kv in ("6.1", "6.12")},
+        fix_commits=fix_commits,
+    )
+
+
+class TestDownloadCvePatches:
+    """Tests for generate_full_matrix.download_cve_patches."""
+    
+    async def test_commits_shared_across_kernels(self, config, monkeypatch, tmp_path):
+        """Test each commit is fetched once and hard-linked into every kernel directory."""
+        session = serve(monkeypatch, {SHA_B: b"patch b\n", SHA_C: b"patch c\n"})
+        matrix = CVECoverageMatrix(
+            kernel_versions=["6.1", "6.12"],
+            entries=[
+                # First commit is missing upstream, the second one is used
+                matrix_entry("CVE-2024-0001", [SHA_A, SHA_B, SHA_C]),
+                matrix_entry("CVE-2024-0002", [f"https://git.kernel.org/stable/c/{SHA_C}"]),
+                matrix_entry("CVE-2024-0003", [SHA_C], state=CVEPatchState.CVE_INCLUDED),
+            ],
+        )
+        output = tmp_path / "out"
+        
+        patches = await download_cve_patches(matrix, output, config)
+        
+        assert sorted(session.requested) == [SHA_A, SHA_B, SHA_C]
+        for kv in ("6.1", "6.12"):
+            assert sorted(p.name for p in patches[kv]) == [
+                f"{SHA_B[:12]}-CVE-2024-0001.patch",
+                f"{SHA_C[:12]}-CVE-2024-0002.patch",
+            ]
+        first = output / "cve_patches" / "6.1" / f"{SHA_B[:12]}-CVE-2024-0001.patch"
+        second = output / "cve_patches" / "6.12" / first.name
+        assert first.read_bytes() == b"patch b\n"
+        assert first.stat().st_ino == second.stat().st_ino
+    
+    async def test_existing_patches_are_kept(self, config, monkeypatch, tmp_path):
+        """Test patches already in a kernel directory are not downloaded again."""
+        session = serve(monkeypatch, {SHA_A: b"patch a\n"})
+        matrix = CVECoverageMatrix(kernel_versions=["6.1", "6.12"], entries=[matrix_entry("CVE-2024-0001", [SHA_A])])
+        existing = tmp_path / "out" / "cve_patches" / "6.1" / f"{SHA_A[:12]}-CVE-2024-0001.patch"
+        existing.parent.mkdir(parents=True)
+        existing.write_bytes(b"local copy\n")
+        
+        patches = await download_cve_patches(matrix, tmp_path / "out", config)
+        
+        assert existing.read_bytes() == b"local copy\n"
+        assert patches["6.1"] == [existing]
+        assert session.requested == [SHA_A]  # Only for 6.12
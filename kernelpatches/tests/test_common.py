@@ -12,6 +12,7 @@ from scripts.common import (
     expand_targets_to_specs,
     format_duration,
 )
+from scripts.benchmark import benchmark_version_compare
 from scripts.models import Patch, PatchTarget
 
 
@@ -36,6 +37,14 @@ class TestVersionComparison:
     def test_version_equal(self):
         """Test equal versions."""
         assert version_less_than("6.1.100", "6.1.100") is False
+    
+    def test_benchmark_reports_both_paths(self):
+        """Test the comparison benchmark measures both implementations."""
+        rows = benchmark_version_compare(num_versions=20, num_comparisons=200)
+        
+        assert [row["name"] for row in rows] == ["unmemoized", "memoized"]
+        assert all(row["comparisons"] == 200 for row in rows)
+        assert all(row["comparisons_per_sec"] > 0 for row in rows)
 
 
 class TestCVEExtraction:
@@ -0,0 +1,161 @@
+"""Tests for CVE gap detection."""
+
+import json
+from datetime import datetime
+
+import pytest
+
+from scripts.config import KernelConfig
+from scripts.cve_gap_detection import GapDetector, run_gap_detection_multi
+
+
+def nvd_record(ranges, stable_commits=0, score=7.5, severity="HIGH"):
+    """Build an NVD 2.0 CVE record with kernel CPE ranges and stable references."""
+    matches = []
+    for start, end in ranges:
+        match = {
+            "criteria": "cpe:2.3:o:linux:linux_kernel:*:*:*:*:*:*:*:*",
+            "vulnerable": True,
+            "versionEndExcluding": end,
+        }
+        if start:
+            match["versionStartIncluding"] = start
+        matches.append(match)
+    return {
+        "configurations": [{"nodes": [{"cpeMatch": matches}]}] if matches else [],
+        "references": [
+            {"url": f"https://git.kernel.org/stable/c/{n:040x}"} for n in range(1, stable_commits + 1)
+        ],
+        "metrics": {"cvssMetricV31": [{"cvssData": {"baseScore": score, "baseSeverity": severity}}]},
+        "descriptions": [{"lang": "en", "value": "use-after-free in fixture driver"}],
+    }
+
+
+FEED = {
+    # Fixed in 6.1/6.6/6.11/6.12 stable, affects everything before 6.13
+    "CVE-2024-10001": nvd_record([("4.19", "6.13")], stable_commits=5),
+    # Regression introduced in 6.6, mainline fix only
+    "CVE-2024-10002": nvd_record([("6.6", "6.12.10")], stable_commits=1, score=9.8, severity="CRITICAL"),
+    "CVE-2024-10003": nvd_record([]),
+    # Unparseable bound never matches
+    "CVE-2024-10004": nvd_record([("6.1-rc1", "6.2")]),
+}
+
+TARGETS = {"5.10": "5.10.200", "6.1": "6.1.159", "6.12": "6.12.5"}
+
+
+class FakeFeedCache:
+    """In-memory stand-in for NVDFeedCache."""
+    
+    def __init__(self, records):
+        self.records = records
+        self.lookups = []
+    
+    def refresh(self):
+        pass
+    
+    def get_cve(self, cve_id):
+        self.lookups.append(cve_id)
+        return self.records.get(cve_id)
+    
+    def filter_by_source(self, source_identifier):
+        return sorted(self.records)
+    
+    def query_cve_ids(self, source_identifier=None, year=None, modified_since=None):
+        self.query = (source_identifier, modified_since)
+        return ["CVE-2024-10002"]
+
+
+@pytest.fixture
+def detector(tmp_path):
+    """Create a detector reading from the fixture feed."""
+    detector = GapDetector(KernelConfig(cache_dir=tmp_path / "cache"))
+    detector.feed_cache = FakeFeedCache(FEED)
+    return detector
+
+
+class TestGapDetector:
+    """Tests for GapDetector class."""
+    
+    def test_is_version_in_range(self, detector):
+        """Test inclusive and exclusive range boundaries."""
+        assert detector.is_version_in_range("6.1.50", "6.1", "6.1.100") is True
+        assert detector.is_version_in_range("6.1.100", "6.1", "6.1.100") is False
+        assert detector.is_version_in_range("6.1.100", "6.1", "6.1.100", end_exclusive=False) is True
+        assert detector.is_version_in_range("6.1", "6.1", "6.2", start_inclusive=False) is False
+        assert detector.is_version_in_range("unknown", "6.1", "6.2") is False
+    
+    def test_analyze_cve_statuses(self, detector):
+        """Test each result status for a single kernel."""
+        assert detector.analyze_cve("CVE-2024-10001", "6.1", "6.1.159").status == "has_backport"
+        assert detector.analyze_cve("CVE-2024-10001", "5.10", "5.10.200").status == "gap_detected"
+        assert detector.analyze_cve("CVE-2024-10002", "5.10", "5.10.200").status == "not_affected"
+        assert detector.analyze_cve("CVE-2024-10003", "6.1", "6.1.159").status == "no_version_info"
+        assert detector.analyze_cve("CVE-2024-10004", "6.1", "6.1.159").status == "not_affected"
+        assert detector.analyze_cve("CVE-2024-99999", "6.1", "6.1.159").status == "not_in_cache"
+        assert detector.analyze_cve("CVE-2024-10001", "6.1", "unknown").status == "not_affected"
+    
+    def test_multi_reports_per_kernel_statuses(self, detector):
+        """Test each kernel's report classifies every CVE for that kernel."""
+        reports = detector.run_detection_multi(TARGETS)
+        
+        def statuses(report):
+            return {
+                "gaps": {g.cve_id: g.status for g in report.gaps},
+                "patchable": {p.cve_id: p.status for p in report.patchable},
+                "not_affected": {n.cve_id: n.status for n in report.not_affected},
+                "no_version_info": report.no_version_info,
+            }
+        
+        assert statuses(reports["5.10"]) == {
+            "gaps": {"CVE-2024-10001": "gap_detected"},
+            "patchable": {},
+            "not_affected": {"CVE-2024-10002": "not_affected", "CVE-2024-10004": "not_affected"},
+            "no_version_info": ["CVE-2024-10003"],
+        }
+        assert statuses(reports["6.1"]) == {
+            "gaps": {},
+            "patchable": {"CVE-2024-10001": "has_backport"},
+            "not_affected": {"CVE-2024-10002": "not_affected", "CVE-2024-10004": "not_affected"},
+            "no_version_info": ["CVE-2024-10003"],
+        }
+        assert statuses(reports["6.12"]) == {
+            "gaps": {"CVE-2024-10002": "gap_detected"},
+            "patchable": {"CVE-2024-10001": "has_backport"},
+            "not_affected": {"CVE-2024-10004": "not_affected"},
+            "no_version_info": ["CVE-2024-10003"],
+        }
+        assert detector.run_detection("6.1", "6.1.159").patchable[0].cve_id == "CVE-2024-10001"
+    
+    def test_multi_loads_each_cve_once(self, detector):
+        """Test every CVE is looked up once regardless of kernel count."""
+        reports = detector.run_detection_multi(TARGETS)
+        
+        assert sorted(detector.feed_cache.lookups) == sorted(FEED)
+        assert set(reports) == set(TARGETS)
+        assert [g.cve_id for g in reports["6.12"].gaps] == ["CVE-2024-10002"]
+        assert reports["6.12"].gaps[0].missing_backports == ["6.12"]
+        assert [p.cve_id for p in reports["6.12"].patchable] == ["CVE-2024-10001"]
+        assert reports["6.1"].no_version_info == ["CVE-2024-10003"]
+        assert reports["5.10"].summary.total_cves_analyzed == len(FEED)
+    
+    def test_modified_since_limits_cves(self, detector):
+        """Test only CVEs changed since the given time are analyzed."""
+        since = datetime(2025, 1, 1)
+        reports = detector.run_detection_multi(TARGETS, modified_since=since)
+        
+        assert detector.feed_cache.query == (detector.config.kernel_org_cna, since)
+        assert detector.feed_cache.lookups == ["CVE-2024-10002"]
+        assert reports["6.12"].summary.total_cves_analyzed == 1
+    
+    def test_run_gap_detection_multi_writes_reports(self, detector, tmp_path, monkeypatch):
+        """Test one JSON and text report is written per kernel."""
+        monkeypatch.setattr("scripts.cve_gap_detection.GapDetector", lambda config: detector)
+        
+        paths = run_gap_detection_multi(TARGETS, None, tmp_path / "reports")
+        
+        assert set(paths) == set(TARGETS)
+        for kernel, path in paths.items():
+            assert json.loads(path.read_text())["kernel_version"] == kernel
+            assert path.with_suffix(".txt").exists()
+        assert len(detector.feed_cache.lookups) == len(FEED)
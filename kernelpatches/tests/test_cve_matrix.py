@@ -12,10 +12,12 @@ from scripts.cve_matrix import (
     KernelCVEStatus,
     KernelVersionCoverage,
     MatrixEntry,
+    StablePatchCVECache,
     StablePatchCVECoverage,
     StablePatchCVEMapper,
 )
-from scripts.models import CVE, Severity
+from scripts.config import KernelConfig
+from scripts.models import CPERange, CVE, Severity
 
 
 @pytest.fixture
@@ -463,6 +465,22 @@ class TestCVECoverageMatrix:
         assert "kernel_status" in entry
         assert "state" in entry["kernel_status"]["5.10"]
     
+    def test_load_json_round_trip(self, sample_matrix, tmp_path):
+        """Test a saved matrix loads back to the same content."""
+        json_path = tmp_path / "matrix.json"
+        sample_matrix.save_json(json_path)
+        
+        loaded = CVECoverageMatrix.load_json(json_path)
+        
+        assert loaded.to_dict() == sample_matrix.to_dict()
+        assert loaded.entries[0].kernel_status["5.10"].state == sample_matrix.entries[0].kernel_status["5.10"].state
+    
+    def test_load_json_missing(self, tmp_path):
+        """Test a missing or malformed file loads as None."""
+        assert CVECoverageMatrix.load_json(tmp_path / "missing.json") is None
+        (tmp_path / "bad.json").write_text("{}")
+        assert CVECoverageMatrix.load_json(tmp_path / "bad.json") is None
+    
     def test_save_csv(self, sample_matrix, tmp_path):
         """Test CSV export with state columns."""
         csv_path = tmp_path / "matrix.csv"
@@ -526,6 +544,61 @@ class TestCVEMatrixBuilder:
         
         assert builder.determine_not_applicable(cve, "5.10") is False
     
+    def test_determine_not_applicable_cpe_ranges(self):
+        """Test CPE ranges are checked against the full Photon version."""
+        builder = CVEMatrixBuilder()
+        
+        cve = CVE(
+            cve_id="CVE-2024-12345",
+            affected_versions=["6.1"],
+            cpe_ranges=[CPERange(version_start_including="6.1", version_end_excluding="6.1.100")],
+        )
+        
+        assert builder.determine_not_applicable(cve, "6.1", "6.1.50") is False
+        assert builder.determine_not_applicable(cve, "6.1", "6.1.159") is True
+    
+    def test_determine_not_applicable_batch(self):
+        """Test the batched pass matches per-CVE, per-kernel evaluation."""
+        builder = CVEMatrixBuilder()
+        cves = [
+            CVE(
+                cve_id="CVE-2024-11111",
+                cpe_ranges=[
+                    CPERange(version_start_including="5.10", version_end_excluding="5.10.150"),
+                    CPERange(version_start_including="6.1", version_end_excluding="6.1.100"),
+                ],
+            ),
+            CVE(cve_id="CVE-2024-22222", affected_versions=["6.6", "6.12"]),
+            CVE(cve_id="CVE-2024-33333"),
+        ]
+        photon_versions = {"5.10": "5.10.200", "6.1": "6.1.50", "6.12": None}
+        
+        batch = builder.determine_not_applicable_batch(cves, photon_versions)
+        
+        assert batch == {
+            "5.10": {"CVE-2024-11111", "CVE-2024-22222"},
+            "6.1": set(),
+            "6.12": {"CVE-2024-11111"},
+        }
+        for kv, photon_ver in photon_versions.items():
+            for cve in cves:
+                expected = builder.determine_not_applicable(cve, kv, photon_ver)
+                assert (cve.cve_id in batch[kv]) is expected
+    
+    def test_determine_not_applicable_batch_falls_back_without_cpe_match(self, monkeypatch):
+        """Test an undetermined CPE result falls back to affected_versions."""
+        monkeypatch.setattr(CVE, "is_version_tuple_affected", lambda self, ver: None)
+        builder = CVEMatrixBuilder()
+        cve = CVE(
+            cve_id="CVE-2024-44444",
+            cpe_ranges=[CPERange(version_start_including="6.1", version_end_excluding="6.1.100")],
+            affected_versions=["6.1"],
+        )
+        
+        batch = builder.determine_not_applicable_batch([cve], {"5.10": "5.10.200", "6.1": "6.1.50"})
+        
+        assert batch == {"5.10": {"CVE-2024-44444"}, "6.1": set()}
+    
     def test_determine_status_not_applicable(self):
         """Test status determination for not applicable."""
         builder = CVEMatrixBuilder()
@@ -638,3 +711,144 @@ This fixes a critical vulnerability.
         mapper = StablePatchCVEMapper()
         cves = mapper.extract_cves_from_patch_file(tmp_path / "nonexistent")
         assert cves == []
+    
+    def _write_patches(self, patch_dir):
+        patch_dir.mkdir(parents=True, exist_ok=True)
+        (patch_dir / "patch-6.1.1").write_text("Fix CVE-2024-0001\n")
+        (patch_dir / "patch-6.1.2").write_text("Fix CVE-2024-0002 and again CVE-2024-0001\n")
+        (patch_dir / "patch-6.1.10").write_text("Fix CVE-2024-0003\n")
+        (patch_dir / "patch-6.1.10.xz").write_bytes(b"ignored")
+    
+    def _coverage(self, mapper, patch_dir, photon_version):
+        all_cves = {
+            cve_id: CVE(cve_id=cve_id)
+            for cve_id in ["CVE-2024-0001", "CVE-2024-0002", "CVE-2024-0003", "CVE-2024-0004"]
+        }
+        return mapper.build_patch_coverage("6.1", patch_dir, all_cves, {}, set(), photon_version)
+    
+    def test_build_patch_coverage_by_photon_version(self, tmp_path):
+        """Test CVEs split by first fixing version relative to Photon's version."""
+        patch_dir = tmp_path / "patches"
+        self._write_patches(patch_dir)
+        mapper = StablePatchCVEMapper(KernelConfig(cache_dir=tmp_path / "cache"))
+        
+        coverage, latest, first_patch = self._coverage(mapper, patch_dir, "6.1.5")
+        
+        assert latest == "6.1.10"
+        assert first_patch == {
+            "CVE-2024-0001": "6.1.1",
+            "CVE-2024-0002": "6.1.2",
+            "CVE-2024-0003": "6.1.10",
+        }
+        assert sorted(coverage[0].included) == ["CVE-2024-0001", "CVE-2024-0002"]
+        assert coverage[0].cve_in_newer_stable == ["CVE-2024-0003"]
+        assert coverage[0].cve_patch_missing == ["CVE-2024-0004"]
+    
+    def test_build_patch_coverage_uses_cache(self, tmp_path, monkeypatch):
+        """Test unchanged patches are not scanned again on the next run."""
+        patch_dir = tmp_path / "patches"
+        self._write_patches(patch_dir)
+        config = KernelConfig(cache_dir=tmp_path / "cache")
+        first = self._coverage(StablePatchCVEMapper(config), patch_dir, "6.1.2")
+        
+        scans = []
+        monkeypatch.setattr("scripts.cve_matrix.extract_cve_ids", lambda text: scans.append(text) or [])
+        second = self._coverage(StablePatchCVEMapper(config), patch_dir, "6.1.2")
+        
+        assert scans == []
+        assert second[2] == first[2]
+    
+    def test_cve_cache_rescans_changed_files(self, tmp_path):
+        """Test modified patches are re-extracted and removed ones dropped."""
+        patch_dir = tmp_path / "patches"
+        self._write_patches(patch_dir)
+        config = KernelConfig(cache_dir=tmp_path / "cache")
+        cache = StablePatchCVECache(config, "6.1")
+        for patch in sorted(patch_dir.glob("patch-6.1.?")):
+            cache.get_cves(patch)
+        cache.save()
+        
+        (patch_dir / "patch-6.1.2").write_text("Fix CVE-2024-0009 now\n")
+        cache = StablePatchCVECache(config, "6.1")
+        
+        assert cache.get_cves(patch_dir / "patch-6.1.2") == ["CVE-2024-0009"]
+        assert cache.misses == 1
+        cache.save()
+        
+        data = json.loads(cache.path.read_text())
+        assert list(data["files"]) == ["patch-6.1.2"]
+        assert list(data["cves"].values()) == [["CVE-2024-0009"]]
+
+
+def _normalized(matrix):
+    """Matrix content independent of row and list ordering."""
+    data = matrix.to_dict()
+    data.pop("generated")
+    data["entries"] = sorted(data["entries"], key=lambda e: e["cve_id"])
+    for cov in data["kernel_coverage"].values():
+        for sp in cov["stable_patches"]:
+            for key, value in sp.items():
+                if isinstance(value, list):
+                    sp[key] = sorted(value)
+    return data
+
+
+class TestMatrixDelta:
+    """Tests for re-evaluating only changed rows of a previous matrix."""
+    
+    PHOTON = {"6.1": "6.1.5"}
+    
+    def _cves(self, score_b=7.0):
+        return [
+            CVE(cve_id="CVE-2024-0001", cvss_score=9.0, severity=Severity.CRITICAL,
+                cpe_ranges=[CPERange(version_start_including="6.1", version_end_excluding="6.1.3")]),
+            CVE(cve_id="CVE-2024-0002", cvss_score=score_b, severity=Severity.HIGH,
+                fix_commits=["a" * 40], fix_branches=["6.1"]),
+            CVE(cve_id="CVE-2024-0003", cvss_score=5.0, severity=Severity.MEDIUM,
+                cpe_ranges=[CPERange(version_start_including="6.6", version_end_excluding="6.6.10")]),
+            CVE(cve_id="CVE-2024-0004", cvss_score=4.0, severity=Severity.MEDIUM),
+        ]
+    
+    @pytest.fixture
+    def setup(self, tmp_path):
+        patch_dir = tmp_path / "patches"
+        patch_dir.mkdir()
+        (patch_dir / "patch-6.1.2").write_text("Fix CVE-2024-0001\n")
+        builder = CVEMatrixBuilder(["6.1"], KernelConfig(cache_dir=tmp_path / "cache"))
+        return builder, {"6.1": patch_dir}
+    
+    def test_update_matches_full_rebuild(self, setup, tmp_path):
+        """Test a delta update over changed rows equals building from scratch."""
+        builder, patch_dirs = setup
+        before = builder.kernel_inputs(patch_dirs=patch_dirs, photon_versions=self.PHOTON)
+        builder.build_from_cves(self._cves(), patch_dirs=patch_dirs, photon_versions=self.PHOTON).save_json(
+            tmp_path / "previous.json"
+        )
+        previous = CVECoverageMatrix.load_json(tmp_path / "previous.json")
+        
+        # New stable patch fixes 0004, NVD rescored 0002 and published 0005
+        (patch_dirs["6.1"] / "patch-6.1.7").write_text("Fix CVE-2024-0004\n")
+        cves = self._cves(score_b=9.5) + [CVE(cve_id="CVE-2024-0005", cvss_score=6.0, severity=Severity.MEDIUM)]
+        after = builder.kernel_inputs(patch_dirs=patch_dirs, photon_versions=self.PHOTON)
+        changed = builder.changed_cve_ids(before, after)
+        assert changed == {"CVE-2024-0004"}
+        
+        changed |= {"CVE-2024-0002", "CVE-2024-0005"}
+        updated = builder.update_matrix(
+            previous, [c for c in cves if c.cve_id in changed], patch_dirs=patch_dirs, photon_versions=self.PHOTON
+        )
+        full = builder.build_from_cves(cves, patch_dirs=patch_dirs, photon_versions=self.PHOTON)
+        
+        assert _normalized(updated) == _normalized(full)
+        assert [e.cve_id for e in updated.entries][:2] == ["CVE-2024-0002", "CVE-2024-0001"]
+        assert updated.kernel_coverage["6.1"].latest_stable == "6.1.7"
+    
+    def test_photon_version_change_requires_full_build(self, setup):
+        """Test no row subset is returned when a Photon version changed."""
+        builder, patch_dirs = setup
+        before = builder.kernel_inputs(patch_dirs=patch_dirs, photon_versions=self.PHOTON)
+        after = builder.kernel_inputs(patch_dirs=patch_dirs, photon_versions={"6.1": "6.1.6"})
+        
+        assert builder.changed_cve_ids(before, before) == set()
+        assert builder.changed_cve_ids(before, after) is None
+        assert builder.changed_cve_ids(before, {}) is None
@@ -0,0 +1,58 @@
+"""Tests for CVE source fetchers."""
+
+import json
+
+import pytest
+
+from scripts.config import KernelConfig
+from scripts.cve_sources import NVDFetcher
+
+
+KERNEL_CNA = "416baaa9-dc9f-4396-8d5f-8c081fb06d67"
+
+
+def write_feed(fetcher, feed_name, cve_ids, source=KERNEL_CNA):
+    """Write a minimal feed file into the shared feed store."""
+    path = fetcher.feed_cache._get_feed_path(feed_name)
+    vulns = [{"cve": {"id": cve_id, "sourceIdentifier": source}} for cve_id in cve_ids]
+    path.write_text(json.dumps({"vulnerabilities": vulns}))
+
+
+@pytest.fixture
+def nvd_fetcher(tmp_path, monkeypatch):
+    """Create an NVD fetcher whose feed store never touches the network."""
+    fetcher = NVDFetcher(KernelConfig(cache_dir=tmp_path))
+    updates = []
+    monkeypatch.setattr(
+        fetcher.feed_cache, "update_feeds",
+        lambda force_yearly=False: updates.append(force_yearly),
+    )
+    fetcher.updates = updates
+    return fetcher
+
+
+class TestNVDFetcher:
+    """Tests for NVDFetcher backed by the shared feed store."""
+
+    async def test_returns_full_cve_set(self, nvd_fetcher, tmp_path):
+        """Test yearly, modified and recent CVEs are all returned."""
+        write_feed(nvd_fetcher, "2023", ["CVE-2023-0001"])
+        write_feed(nvd_fetcher, "modified", ["CVE-2024-0001"])
+        write_feed(nvd_fetcher, "recent", ["CVE-2024-0002"])
+        write_feed(nvd_fetcher, "2024", ["CVE-2024-0003"], source="other@example.com")
+
+        cves = await nvd_fetcher.fetch_async("6.1", tmp_path / "out")
+
+        assert sorted(cve.cve_id for cve in cves) == [
+            "CVE-2023-0001", "CVE-2024-0001", "CVE-2024-0002",
+        ]
+
+    async def test_store_refreshed_once_per_run(self, nvd_fetcher, tmp_path):
+        """Test repeated fetches reuse the already refreshed store."""
+        write_feed(nvd_fetcher, "2023", ["CVE-2023-0001"])
+
+        first = await nvd_fetcher.fetch_async("6.1", tmp_path / "out")
+        second = await nvd_fetcher.fetch_async("6.12", tmp_path / "out")
+
+        assert nvd_fetcher.updates == [False]
+        assert [c.cve_id for c in first] == [c.cve_id for c in second]
@@ -0,0 +1,286 @@
+"""Tests for matrix pipeline patch-vs-source analysis."""
+
+import subprocess
+
+import pytest
+
+from scripts.config import KernelConfig
+from scripts import generate_full_matrix
+from scripts.cve_matrix import CVEMatrixBuilder
+from scripts.generate_full_matrix import (
+    MATRIX_STATE_FILE,
+    PatchAnalysisCache,
+    analyze_cve_patches_against_source,
+    analyze_patch_against_source,
+    build_matrix_delta,
+    download_kernel_tarballs_for_analysis,
+    load_matrix_state,
+    save_matrix,
+    save_matrix_state,
+)
+from scripts.models import CVE, Severity
+from scripts.kernel_source import get_shared_source_cache
+from tests.test_kernel_source import make_tarball
+
+
+ORIGINAL = "line one\nline two\nline three\n"
+FIXED = "line one\nline two fixed\nline three\n"
+
+
+def make_patch(path, old, new, filename="mm/file.c"):
+    """Write a unified diff turning ``old`` into ``new`` for one file."""
+    old_lines = old.splitlines()
+    new_lines = new.splitlines()
+    body = [f"diff --git a/{filename} b/{filename}",
+            f"--- a/{filename}",
+            f"+++ b/{filename}",
+            f"@@ -1,{len(old_lines)} +1,{len(new_lines)} @@"]
+    for o, n in zip(old_lines, new_lines):
+        if o == n:
+            body.append(f" {o}")
+        else:
+            body.append(f"-{o}")
+            body.append(f"+{n}")
+    path.write_text("\n".join(body) + "\n")
+    return path
+
+
+@pytest.fixture
+def source_tree(tmp_path):
+    """Create a tiny kernel source tree with one file."""
+    source_dir = tmp_path / "kernel_source" / "linux-6.1.100"
+    (source_dir / "mm").mkdir(parents=True)
+    (source_dir / "mm" / "file.c").write_text(FIXED)
+    (source_dir / "Makefile").write_text("all:\n")
+    return source_dir
+
+
+@pytest.fixture
+def cve_patches(tmp_path):
+    """Create one already-applied and one applicable CVE patch."""
+    patch_dir = tmp_path / "cve_patches" / "6.1"
+    patch_dir.mkdir(parents=True)
+    make_patch(patch_dir / "aaaaaaaaaaaa-CVE-2024-0001.patch", ORIGINAL, FIXED)
+    make_patch(
+        patch_dir / "bbbbbbbbbbbb-CVE-2024-0002.patch",
+        FIXED, FIXED.replace("line three", "line three fixed"),
+    )
+    return patch_dir
+
+
+class TestAnalyzePatchAgainstSource:
+    """Tests for analyze_patch_against_source function."""
+    
+    def test_already_applied(self, source_tree, cve_patches):
+        """Test a patch whose changes are present is reported as included."""
+        result = analyze_patch_against_source(
+            cve_patches / "aaaaaaaaaaaa-CVE-2024-0001.patch", source_tree
+        )
+        assert result == (True, "patch_already_applied")
+    
+    def test_applicable(self, source_tree, cve_patches):
+        """Test a patch that applies cleanly is reported as applicable."""
+        result = analyze_patch_against_source(
+            cve_patches / "bbbbbbbbbbbb-CVE-2024-0002.patch", source_tree
+        )
+        assert result == (False, "patch_applicable")
+    
+    def test_conflict(self, source_tree, tmp_path):
+        """Test a patch for a missing file is reported as conflicting."""
+        patch = make_patch(tmp_path / "x.patch", ORIGINAL, FIXED, filename="fs/missing.c")
+        result = analyze_patch_against_source(patch, source_tree)
+        assert result == (False, "patch_conflicts_or_missing_context")
+    
+    def test_enclosing_repo_is_ignored(self, source_tree, tmp_path):
+        """Test git fallback is not fooled by a repository above the tree."""
+        subprocess.run(["git", "init", "-q"], cwd=tmp_path, check=True)
+        (source_tree / "drivers").mkdir()
+        patch = make_patch(tmp_path / "x.patch", ORIGINAL, FIXED, filename="fs/missing.c")
+        result = analyze_patch_against_source(patch, source_tree)
+        assert result == (False, "patch_conflicts_or_missing_context")
+
+
+class TestAnalyzeCvePatchesAgainstSource:
+    """Tests for analyze_cve_patches_against_source function."""
+    
+    @pytest.mark.parametrize("jobs", [1, 4])
+    def test_parallel_results_are_deterministic(self, tmp_path, source_tree, cve_patches, jobs):
+        """Test results match and keep filename order for any worker count."""
+        results = analyze_cve_patches_against_source(
+            ["6.1"],
+            {"6.1": "6.1.100"},
+            {},
+            tmp_path,
+            KernelConfig(cache_dir=tmp_path / "cache"),
+            source_dirs={"6.1": source_tree},
+            jobs=jobs,
+        )
+        
+        assert list(results["6.1"].items()) == [
+            ("CVE-2024-0001", (True, "patch_already_applied")),
+            ("CVE-2024-0002", (False, "patch_applicable")),
+        ]
+        assert not (source_tree / ".git").exists()
+    
+    def test_missing_source_is_skipped(self, tmp_path, cve_patches):
+        """Test kernels without a source tree produce no results."""
+        results = analyze_cve_patches_against_source(
+            ["6.1"],
+            {"6.1": "6.1.100"},
+            {},
+            tmp_path,
+            KernelConfig(cache_dir=tmp_path / "cache"),
+            source_dirs={"6.1": None},
+            jobs=2,
+        )
+        assert results == {"6.1": {}}
+    
+    async def test_partial_source_matches_full(self, tmp_path, cve_patches, monkeypatch):
+        """Test analysis on a partial source tree matches the full tree."""
+        monkeypatch.setattr("scripts.kernel_source.MIN_TARBALL_SIZE", 0)
+        config = KernelConfig(cache_dir=tmp_path / "cache")
+        files = {"Makefile": b"all:\n", "mm/file.c": FIXED.encode(), "fs/other.c": b"x\n"}
+        make_tarball(get_shared_source_cache(config).tarball_path("6.1.100"), files)
+        
+        source_dirs = await download_kernel_tarballs_for_analysis(
+            ["6.1"], {"6.1": "6.1.100"}, tmp_path, config, cve_patch_dirs={},
+        )
+        partial = source_dirs["6.1"]
+        
+        assert (partial / "mm" / "file.c").exists()
+        assert not (partial / "fs" / "other.c").exists()
+        
+        results = analyze_cve_patches_against_source(
+            ["6.1"], {"6.1": "6.1.100"}, {}, tmp_path, config,
+            source_dirs=source_dirs, jobs=1,
+        )
+        assert list(results["6.1"].items()) == [
+            ("CVE-2024-0001", (True, "patch_already_applied")),
+            ("CVE-2024-0002", (False, "patch_applicable")),
+        ]
+
+
+class TestPatchAnalysisCache:
+    """Tests for PatchAnalysisCache persistence."""
+    
+    def run_analysis(self, tmp_path, source_tree):
+        """Run the analysis step against the fixture tree."""
+        return analyze_cve_patches_against_source(
+            ["6.1"],
+            {"6.1": "6.1.100"},
+            {},
+            tmp_path,
+            KernelConfig(cache_dir=tmp_path / "cache"),
+            source_dirs={"6.1": source_tree},
+            jobs=2,
+        )
+    
+    def test_rerun_uses_cache(self, tmp_path, source_tree, cve_patches, monkeypatch):
+        """Test a second run answers every patch from the cache."""
+        first = self.run_analysis(tmp_path, source_tree)
+        
+        def fail(*args, **kwargs):
+            raise AssertionError("patch should not be re-analyzed")
+        
+        monkeypatch.setattr(generate_full_matrix, "analyze_patch_against_source", fail)
+        assert self.run_analysis(tmp_path, source_tree) == first
+        
+        cache = PatchAnalysisCache(KernelConfig(cache_dir=tmp_path / "cache"), "6.1.100")
+        key = PatchAnalysisCache.patch_key(cve_patches / "aaaaaaaaaaaa-CVE-2024-0001.patch")
+        assert cache.get(key) == (True, "patch_already_applied")
+        assert cache.hits == 1
+    
+    def test_changed_patch_is_reanalyzed(self, tmp_path, source_tree, cve_patches):
+        """Test the cache key follows patch content, not file name."""
+        config = KernelConfig(cache_dir=tmp_path / "cache")
+        self.run_analysis(tmp_path, source_tree)
+        
+        patch = cve_patches / "bbbbbbbbbbbb-CVE-2024-0002.patch"
+        patch.write_text(patch.read_text() + "\n")
+        cache = PatchAnalysisCache(config, "6.1.100")
+        assert cache.get(PatchAnalysisCache.patch_key(patch)) is None
+        assert cache.misses == 1
+    
+    def test_analyzer_version_invalidates(self, tmp_path, monkeypatch):
+        """Test results from another analyzer version are discarded."""
+        config = KernelConfig(cache_dir=tmp_path / "cache")
+        cache = PatchAnalysisCache(config, "6.1.100")
+        cache.put("abc", (False, "patch_applicable"))
+        cache.save()
+        
+        assert PatchAnalysisCache(config, "6.1.100").get("abc") == (False, "patch_applicable")
+        monkeypatch.setattr(generate_full_matrix, "PATCH_ANALYZER_VERSION", 999)
+        assert PatchAnalysisCache(config, "6.1.100").get("abc") is None
+        assert PatchAnalysisCache(config, "6.1.101").get("abc") is None
+
+
+class FakeFeedCache:
+    """Feed cache stand-in serving fixed CVEs and a watermark."""
+    
+    def __init__(self, cves):
+        self.cves = {cve.cve_id: cve for cve in cves}
+        self.lookups = []
+    
+    def latest_modified(self, source_identifier=None):
+        return "2025-01-01T00:00:00.000"
+    
+    def get_cves_by_id(self, cve_ids):
+        self.lookups.extend(cve_ids)
+        return [self.cves[c] for c in cve_ids if c in self.cves]
+
+
+class TestSinceLastRun:
+    """Tests for the --since-last-run matrix state."""
+    
+    @pytest.fixture
+    def previous_run(self, tmp_path, monkeypatch):
+        """Save a full matrix and its state for 6.1 at Photon 6.1.5."""
+        cves = [
+            CVE(cve_id="CVE-2024-0001", cvss_score=9.0, severity=Severity.CRITICAL),
+            CVE(cve_id="CVE-2024-0002", cvss_score=5.0, severity=Severity.MEDIUM),
+        ]
+        feed_cache = FakeFeedCache(cves)
+        monkeypatch.setattr(generate_full_matrix, "get_shared_feed_cache", lambda config: feed_cache)
+        config = KernelConfig(cache_dir=tmp_path / "cache")
+        patch_dir = tmp_path / "patches"
+        patch_dir.mkdir()
+        output = tmp_path / "out"
+        
+        matrix = CVEMatrixBuilder(["6.1"], config).build_from_cves(
+            cves, patch_dirs={"6.1": patch_dir}, photon_versions={"6.1": "6.1.5"}
+        )
+        json_path = save_matrix(matrix, output)
+        save_matrix_state(output, json_path, ["6.1"], {}, {"6.1": patch_dir}, config, {"6.1": "6.1.5"})
+        return config, output, {"6.1": patch_dir}, feed_cache
+    
+    def test_state_round_trip(self, previous_run):
+        """Test the previous matrix and watermark are loaded back."""
+        config, output, patch_dirs, _ = previous_run
+        
+        previous, state = load_matrix_state(output, ["6.1"])
+        
+        assert previous.total_cves == 2
+        assert state["nvd_last_modified"] == "2025-01-01T00:00:00.000"
+        assert state["kernels"]["6.1"]["photon_version"] == "6.1.5"
+        assert load_matrix_state(output, ["6.1", "6.12"]) is None
+        assert load_matrix_state(output.parent / "elsewhere", ["6.1"]) is None
+    
+    def test_delta_reevaluates_affected_rows(self, previous_run):
+        """Test rows hit by a new stable patch are looked up and re-evaluated."""
+        config, output, patch_dirs, feed_cache = previous_run
+        previous, state = load_matrix_state(output, ["6.1"])
+        (patch_dirs["6.1"] / "patch-6.1.3").write_text("Fix CVE-2024-0002\n")
+        
+        matrix = build_matrix_delta(previous, state, [], ["6.1"], {}, patch_dirs, config, {"6.1": "6.1.5"})
+        
+        assert feed_cache.lookups == ["CVE-2024-0002"]
+        assert matrix.entries[1].kernel_status["6.1"].stable_patch == "6.1.3"
+        assert matrix.kernel_coverage["6.1"].total_included == 1
+    
+    def test_photon_version_change_falls_back(self, previous_run):
+        """Test a changed Photon version asks for a full build."""
+        config, output, patch_dirs, _ = previous_run
+        previous, state = load_matrix_state(output, ["6.1"])
+        
+        assert build_matrix_delta(previous, state, [], ["6.1"], {}, patch_dirs, config, {"6.1": "6.1.6"}) is None
+        assert (output / MATRIX_STATE_FILE).exists()
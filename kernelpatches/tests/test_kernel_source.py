@@ -0,0 +1,255 @@
+"""Tests for the shared kernel source cache."""
+
+import hashlib
+import io
+import lzma
+import tarfile
+
+import pytest
+import requests
+
+from scripts import kernel_source
+from scripts.config import KernelConfig
+from scripts.kernel_source import (
+    KernelSourceCache,
+    SourceExtractionError,
+    extract_tarball,
+    get_shared_source_cache,
+    patch_touched_paths,
+)
+
+
+VERSION = "6.1.100"
+
+FILES = {
+    "Makefile": b"VERSION = 6\n",
+    "net/core/sock.c": b"int sock_init(void) { return 0; }\n",
+    "drivers/net/tun.c": b"int tun_init(void) { return 0; }\n",
+}
+
+
+def make_tarball(path, files=FILES, top=f"linux-{VERSION}"):
+    """Write a .tar.xz with the given files under a top-level directory."""
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w") as tar:
+        for name, data in files.items():
+            info = tarfile.TarInfo(f"{top}/{name}" if top else name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+    path.write_bytes(lzma.compress(buffer.getvalue()))
+    return path
+
+
+class FakeResponse:
+    """Minimal stand-in for a streamed requests.Response."""
+    
+    def __init__(self, body=b"", status_code=200):
+        self.body = body
+        self.status_code = status_code
+        self.headers = {"content-length": str(len(body))}
+    
+    def iter_content(self, chunk_size=1):
+        for i in range(0, len(self.body), chunk_size):
+            yield self.body[i:i + chunk_size]
+    
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"HTTP {self.status_code}")
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *args):
+        return False
+
+
+@pytest.fixture
+def source_cache(tmp_path, monkeypatch):
+    """Create a source cache accepting small fixture tarballs."""
+    monkeypatch.setattr(kernel_source, "MIN_TARBALL_SIZE", 0)
+    monkeypatch.setattr(kernel_source.time, "sleep", lambda s: None)
+    return KernelSourceCache(KernelConfig(cache_dir=tmp_path / "cache"))
+
+
+class TestExtractTarball:
+    """Tests for extract_tarball function."""
+    
+    def test_full_extraction(self, tmp_path):
+        """Test all members are extracted in one pass."""
+        tarball = make_tarball(tmp_path / "linux.tar.xz")
+        count = extract_tarball(tarball, tmp_path / "out")
+        
+        assert count == len(FILES)
+        assert (tmp_path / "out" / f"linux-{VERSION}" / "net/core/sock.c").read_bytes() == FILES["net/core/sock.c"]
+    
+    def test_partial_extraction(self, tmp_path):
+        """Test only requested tree-relative paths are extracted."""
+        tarball = make_tarball(tmp_path / "linux.tar.xz")
+        count = extract_tarball(tarball, tmp_path / "out", paths=["net/core/sock.c"])
+        
+        root = tmp_path / "out" / f"linux-{VERSION}"
+        assert count == 1
+        assert (root / "net/core/sock.c").exists()
+        assert not (root / "Makefile").exists()
+    
+    def test_tar_slip_rejected(self, tmp_path):
+        """Test members escaping the destination are refused."""
+        tarball = make_tarball(tmp_path / "evil.tar.xz", {"../../evil": b"x"}, top=None)
+        with pytest.raises(SourceExtractionError):
+            extract_tarball(tarball, tmp_path / "out")
+        assert not (tmp_path / "evil").exists()
+    
+    def test_truncated_tarball(self, tmp_path):
+        """Test a truncated download fails during extraction."""
+        tarball = make_tarball(tmp_path / "linux.tar.xz")
+        tarball.write_bytes(tarball.read_bytes()[:-40])
+        with pytest.raises(SourceExtractionError):
+            extract_tarball(tarball, tmp_path / "out")
+
+
+class TestKernelSourceCache:
+    """Tests for KernelSourceCache class."""
+    
+    def test_download_once(self, source_cache, tmp_path, monkeypatch):
+        """Test the tarball is downloaded once, falling through 404 mirrors."""
+        body = make_tarball(tmp_path / "linux.tar.xz").read_bytes()
+        requested = []
+        
+        def fake_get(url, **kwargs):
+            requested.append(url)
+            return FakeResponse(status_code=404) if "missing" in url else FakeResponse(body)
+        
+        monkeypatch.setattr("scripts.kernel_source.requests.get", fake_get)
+        urls = ["https://missing/linux.tar.xz", "https://mirror/linux.tar.xz"]
+        
+        first = source_cache.get_tarball(VERSION, urls)
+        second = source_cache.get_tarball(VERSION, urls)
+        
+        assert first == second == source_cache.tarball_path(VERSION)
+        assert requested == urls
+        assert source_cache.digest(VERSION) == hashlib.sha256(body).hexdigest()
+    
+    def test_failed_download_leaves_nothing(self, source_cache, monkeypatch):
+        """Test failed downloads leave no tarball or partial file behind."""
+        monkeypatch.setattr(
+            "scripts.kernel_source.requests.get",
+            lambda url, **kwargs: FakeResponse(status_code=500),
+        )
+        assert source_cache.get_tarball(VERSION, ["https://mirror/linux.tar.xz"]) is None
+        assert list(source_cache.tarball_dir.iterdir()) == []
+    
+    def test_extracted_once(self, source_cache, monkeypatch):
+        """Test the tree is extracted once and shared across calls."""
+        make_tarball(source_cache.tarball_path(VERSION))
+        calls = []
+        original = kernel_source.extract_tarball
+        
+        def counting_extract(*args):
+            calls.append(args)
+            return original(*args)
+        
+        monkeypatch.setattr(kernel_source, "extract_tarball", counting_extract)
+        
+        first = source_cache.get_source(VERSION)
+        second = source_cache.get_source(VERSION)
+        
+        assert first == second
+        assert first.name == f"linux-{VERSION}"
+        assert first.parent.name == source_cache.digest(VERSION)
+        assert (first / "Makefile").exists()
+        assert len(calls) == 1
+        assert source_cache.cached_source(VERSION) == first
+    
+    def test_partial_tree(self, source_cache):
+        """Test partial trees are kept apart from the full tree."""
+        make_tarball(source_cache.tarball_path(VERSION))
+        
+        partial = source_cache.get_source(VERSION, paths=["drivers/net/tun.c"])
+        
+        assert (partial / "drivers/net/tun.c").exists()
+        assert not (partial / "Makefile").exists()
+        assert source_cache.cached_source(VERSION) is None
+    
+    def test_partial_tree_grows_incrementally(self, source_cache, monkeypatch):
+        """Test only paths not seen before trigger another extraction."""
+        make_tarball(source_cache.tarball_path(VERSION))
+        calls = []
+        original = kernel_source.extract_tarball
+        
+        def counting_extract(tarball, dest, paths=None):
+            calls.append(sorted(paths))
+            return original(tarball, dest, paths)
+        
+        monkeypatch.setattr(kernel_source, "extract_tarball", counting_extract)
+        
+        first = source_cache.get_source(VERSION, paths=["net/core/sock.c", "fs/absent.c"])
+        again = source_cache.get_source(VERSION, paths=["fs/absent.c"])
+        grown = source_cache.get_source(VERSION, paths=["net/core/sock.c", "drivers/net/tun.c"])
+        
+        assert first == again == grown
+        assert calls == [["fs/absent.c", "net/core/sock.c"], ["drivers/net/tun.c"]]
+        assert (grown / "net/core/sock.c").exists()
+        assert (grown / "drivers/net/tun.c").exists()
+        assert not (grown / "Makefile").exists()
+    
+    def test_partial_served_from_full_tree(self, source_cache):
+        """Test partial requests reuse an existing full tree."""
+        make_tarball(source_cache.tarball_path(VERSION))
+        full = source_cache.get_source(VERSION)
+        
+        assert source_cache.get_source(VERSION, paths=["Makefile"]) == full
+        assert list(source_cache.partial_dir.iterdir()) == []
+    
+    def test_corrupt_tarball_discarded(self, source_cache, monkeypatch):
+        """Test a corrupt cached tarball is removed so it is fetched again."""
+        tarball = make_tarball(source_cache.tarball_path(VERSION))
+        tarball.write_bytes(tarball.read_bytes()[:-40])
+        monkeypatch.setattr(
+            "scripts.kernel_source.requests.get",
+            lambda url, **kwargs: FakeResponse(status_code=404),
+        )
+        
+        assert source_cache.get_source(VERSION) is None
+        assert not tarball.exists()
+        assert [p.name for p in source_cache.tree_dir.iterdir()] == []
+    
+    def test_copy_tarball_hardlinks(self, source_cache, tmp_path):
+        """Test tarballs placed for rpmbuild share the cached file."""
+        cached = make_tarball(source_cache.tarball_path(VERSION))
+        placed = source_cache.copy_tarball(VERSION, tmp_path / "SOURCES")
+        
+        assert placed.read_bytes() == cached.read_bytes()
+        assert placed.stat().st_ino == cached.stat().st_ino
+    
+    def test_shared_instance(self, tmp_path):
+        """Test one cache instance is shared per cache directory."""
+        config = KernelConfig(cache_dir=tmp_path / "cache")
+        assert get_shared_source_cache(config) is get_shared_source_cache(config)
+
+
+class TestPatchTouchedPaths:
+    """Tests for patch_touched_paths function."""
+    
+    def test_collects_paths(self, tmp_path):
+        """Test old and new paths are collected and /dev/null skipped."""
+        patch = tmp_path / "a.patch"
+        patch.write_text(
+            "diff --git a/net/core/sock.c b/net/core/sock.c\n"
+            "--- a/net/core/sock.c\n"
+            "+++ b/net/core/sock.c\n"
+            "@@ -1 +1 @@\n"
+            "-old\n"
+            "+new\n"
+            "diff --git a/fs/new.c b/fs/new.c\n"
+            "--- /dev/null\n"
+            "+++ b/fs/new.c\t2024-01-01\n"
+        )
+        
+        assert patch_touched_paths([patch]) == {"net/core/sock.c", "fs/new.c"}
+    
+    def test_fallback_dirs(self, tmp_path):
+        """Test paths are also requested under fallback directories."""
+        patch = tmp_path / "a.patch"
+        patch.write_text("--- a/net/tun.c\n+++ b/net/tun.c\n")
+        
+        assert patch_touched_paths([patch], ["drivers"]) == {"net/tun.c", "drivers/net/tun.c"}
@@ -4,6 +4,7 @@ import pytest
 from datetime import datetime
 
 from scripts.models import (
+    CPERange,
     CVE,
     CVEReference,
     CVESource,
@@ -15,6 +16,7 @@ from scripts.models import (
     Severity,
     SpecPatch,
     CVEMatrixEntry,
+    version_tuple,
 )
 
 
@@ -69,6 +71,22 @@ class TestKernelVersion:
         
         versions = {v1, v2}
         assert len(versions) == 1
+    
+    def test_parse_is_memoized(self):
+        """Test repeated parses reuse the cached tuple and stay independent."""
+        version_tuple.cache_clear()
+        v1 = KernelVersion.parse("6.12.60")
+        v2 = KernelVersion.parse("6.12.60")
+        
+        assert version_tuple.cache_info().hits == 1
+        assert v1 == v2 == KernelVersion(major=6, minor=12, patch=60)
+        assert v1 is not v2
+        assert v1.key == (6, 12, 60)
+    
+    def test_parse_invalid_version(self):
+        """Test non-numeric versions still raise."""
+        with pytest.raises(ValueError):
+            KernelVersion.parse("6.1.rc1")
 
 
 class TestSeverity:
@@ -147,6 +165,50 @@ class TestCVE:
         
         shas = cve.extract_commit_shas()
         assert sha in shas
+    
+    
+    def test_is_version_affected_cpe_ranges(self):
+        """Test CPE ranges decide affectedness and first match wins."""
+        cve = CVE(
+            cve_id="CVE-2024-12345",
+            cpe_ranges=[
+                CPERange(version_start_including="6.1", version_end_excluding="6.1.100"),
+                CPERange(version_start_including="6.1.100", version_end_including="6.1.120", vulnerable=False),
+            ],
+        )
+        
+        assert cve.is_version_affected("6.1.50") is True
+        assert cve.is_version_affected("6.1.110") is False
+        assert cve.is_version_affected("6.12.5") is False
+        assert cve.is_version_tuple_affected((6, 1, 50)) is True
+        assert CVE(cve_id="CVE-2024-12345").is_version_affected("6.1.50") is None
+
+
+class TestCPERange:
+    """Tests for CPERange class."""
+    
+    def test_version_tuple(self):
+        """Test version strings parse like KernelVersion.parse."""
+        assert version_tuple("6.1.159") == (6, 1, 159)
+        assert version_tuple("6.1") == (6, 1, 0)
+        assert version_tuple("2.6.12.1") == (2, 6, 12)
+    
+    def test_bounds_parsed_once(self):
+        """Test range boundaries are parsed into cached tuples."""
+        cpe = CPERange(version_start_excluding="5.10", version_end_including="5.10.200")
+        
+        assert cpe.bounds == (None, (5, 10, 0), (5, 10, 200), None)
+        assert cpe.bounds is cpe.bounds
+    
+    def test_contains_version_boundaries(self):
+        """Test inclusive and exclusive boundaries."""
+        cpe = CPERange(version_start_excluding="5.10", version_end_including="5.10.200")
+        
+        assert cpe.contains_version("5.10") is False
+        assert cpe.contains_version("5.10.1") is True
+        assert cpe.contains_version("5.10.200") is True
+        assert cpe.contains_version("5.10.201") is False
+        assert CPERange().contains_version("6.12.1") is True
 
 
 class TestPatch:
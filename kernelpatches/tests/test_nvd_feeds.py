@@ -0,0 +1,475 @@
+"""Tests for NVD feed cache and persistent CVE index."""
+
+import gzip
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from scripts.config import KernelConfig
+from scripts.models import Severity
+from scripts.nvd_feeds import NVDFeedCache, get_shared_feed_cache
+from scripts.nvd_index import compact_cve_record, nvd_record_to_cve, nvd_timestamp
+
+
+KERNEL_CNA = "416baaa9-dc9f-4396-8d5f-8c081fb06d67"
+
+
+def make_cve(cve_id, source=KERNEL_CNA, description="desc", score=7.8,
+             modified="2024-05-02T00:00:00.000"):
+    """Build a minimal NVD 2.0 CVE record."""
+    return {
+        "id": cve_id,
+        "sourceIdentifier": source,
+        "published": "2024-05-01T00:00:00.000",
+        "lastModified": modified,
+        "descriptions": [
+            {"lang": "en", "value": description},
+            {"lang": "es", "value": "descripcion"},
+        ],
+        "metrics": {
+            "cvssMetricV31": [{
+                "source": "nvd@nist.gov",
+                "cvssData": {"baseScore": score, "baseSeverity": "HIGH", "vectorString": "x"},
+                "exploitabilityScore": 1.8,
+            }],
+        },
+        "weaknesses": [{"description": [{"lang": "en", "value": "CWE-416"}]}],
+        "references": [
+            {"url": "https://git.kernel.org/stable/c/" + "a" * 40, "source": KERNEL_CNA},
+        ],
+        "configurations": [{
+            "nodes": [{
+                "cpeMatch": [
+                    {
+                        "criteria": "cpe:2.3:o:linux:linux_kernel:*:*:*:*:*:*:*:*",
+                        "vulnerable": True,
+                        "versionStartIncluding": "6.1",
+                        "versionEndExcluding": "6.1.90",
+                        "matchCriteriaId": "ABC",
+                    },
+                    {
+                        "criteria": "cpe:2.3:o:debian:debian_linux:11.0:*:*:*:*:*:*:*",
+                        "vulnerable": True,
+                    },
+                ],
+            }],
+        }],
+    }
+
+
+def write_feed(cache, feed_name, cves):
+    """Write a decompressed feed file into the cache directory."""
+    path = cache._get_feed_path(feed_name)
+    path.write_text(json.dumps({"vulnerabilities": [{"cve": c} for c in cves]}))
+    return path
+
+
+@pytest.fixture
+def feed_cache(tmp_path):
+    """Create an NVD feed cache rooted in a temporary directory."""
+    return NVDFeedCache(KernelConfig(cache_dir=tmp_path))
+
+
+class TestCompactCveRecord:
+    """Tests for compact_cve_record function."""
+    
+    def test_keeps_used_fields(self):
+        """Test that fields used by gap detection survive compaction."""
+        record = compact_cve_record(make_cve("CVE-2024-0001"))
+        assert record["id"] == "CVE-2024-0001"
+        assert record["sourceIdentifier"] == KERNEL_CNA
+        assert record["descriptions"] == [{"lang": "en", "value": "desc"}]
+        cvss = record["metrics"]["cvssMetricV31"][0]["cvssData"]
+        assert cvss == {"baseScore": 7.8, "baseSeverity": "HIGH"}
+        assert record["references"][0]["url"].startswith("https://git.kernel.org")
+    
+    def test_drops_unused_fields(self):
+        """Test that unused fields and non-kernel CPEs are dropped."""
+        record = compact_cve_record(make_cve("CVE-2024-0001"))
+        assert "weaknesses" not in record
+        cpe_matches = record["configurations"][0]["nodes"][0]["cpeMatch"]
+        assert len(cpe_matches) == 1
+        assert "matchCriteriaId" not in cpe_matches[0]
+        assert cpe_matches[0]["versionEndExcluding"] == "6.1.90"
+    
+    def test_no_kernel_configurations(self):
+        """Test record without kernel CPE data has empty configurations."""
+        cve = make_cve("CVE-2024-0001")
+        cve["configurations"] = []
+        assert compact_cve_record(cve)["configurations"] == []
+
+
+class TestNVDFeedCacheIndex:
+    """Tests for NVDFeedCache persistent index."""
+    
+    def test_load_and_query(self, feed_cache):
+        """Test loading feeds and querying the index."""
+        write_feed(feed_cache, "2024", [
+            make_cve("CVE-2024-0001"),
+            make_cve("CVE-2024-0002", source="other@example.com"),
+        ])
+        feed_cache.load_index()
+        
+        assert sorted(feed_cache.get_all_cve_ids()) == ["CVE-2024-0001", "CVE-2024-0002"]
+        assert feed_cache.filter_by_source(KERNEL_CNA) == ["CVE-2024-0001"]
+        assert feed_cache.get_cve("CVE-2024-0001")["id"] == "CVE-2024-0001"
+        assert feed_cache.get_cve("CVE-2024-9999") is None
+    
+    def test_newer_feeds_override_yearly(self, feed_cache):
+        """Test that modified and recent feeds take precedence."""
+        write_feed(feed_cache, "2024", [make_cve("CVE-2024-0001", description="yearly")])
+        write_feed(feed_cache, "modified", [make_cve("CVE-2024-0001", description="modified")])
+        write_feed(feed_cache, "recent", [make_cve("CVE-2024-0001", description="recent")])
+        
+        cve = feed_cache.get_cve("CVE-2024-0001")
+        assert cve["descriptions"][0]["value"] == "recent"
+    
+    def test_index_persists_across_instances(self, tmp_path, feed_cache):
+        """Test that a new cache instance reuses the index without re-parsing."""
+        write_feed(feed_cache, "2024", [make_cve("CVE-2024-0001")])
+        feed_cache.load_index()
+        
+        other = NVDFeedCache(KernelConfig(cache_dir=tmp_path))
+        assert other._index.sync(other._feed_sources()) is False
+        assert other.get_cve("CVE-2024-0001") is not None
+    
+    def test_changed_feed_is_reindexed(self, feed_cache):
+        """Test that only a changed feed file triggers re-indexing."""
+        write_feed(feed_cache, "2024", [make_cve("CVE-2024-0001")])
+        path = write_feed(feed_cache, "recent", [make_cve("CVE-2024-0001", description="old")])
+        feed_cache.load_index()
+        
+        write_feed(feed_cache, "recent", [make_cve("CVE-2024-0001", description="newer")])
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        feed_cache._loaded = False
+        
+        assert feed_cache.get_cve("CVE-2024-0001")["descriptions"][0]["value"] == "newer"
+    
+    def test_removed_feed_drops_cves(self, feed_cache):
+        """Test that CVEs from a deleted feed disappear from the index."""
+        write_feed(feed_cache, "2024", [make_cve("CVE-2024-0001")])
+        path = write_feed(feed_cache, "recent", [make_cve("CVE-2025-0001")])
+        feed_cache.load_index()
+        assert feed_cache.get_cve("CVE-2025-0001") is not None
+        
+        path.unlink()
+        feed_cache._loaded = False
+        assert feed_cache.get_cve("CVE-2025-0001") is None
+        assert feed_cache.get_cve("CVE-2024-0001") is not None
+    
+    def test_secondary_index_queries(self, feed_cache):
+        """Test filtering by source, year and lastModified."""
+        write_feed(feed_cache, "2024", [
+            make_cve("CVE-2023-0001", modified="2024-01-10T08:00:00.000"),
+            make_cve("CVE-2024-0001", modified="2024-06-01T12:00:00.000"),
+            make_cve("CVE-2024-0002", source="other@example.com", modified="2024-07-01T00:00:00.000"),
+        ])
+        write_feed(feed_cache, "recent", [make_cve("CVE-2023-0001", modified="2024-08-01T09:30:00.500")])
+        
+        assert feed_cache.query_cve_ids(year=2024) == ["CVE-2024-0001", "CVE-2024-0002"]
+        assert feed_cache.query_cve_ids(KERNEL_CNA, year=2023) == ["CVE-2023-0001"]
+        assert feed_cache.query_cve_ids(KERNEL_CNA, modified_since=datetime(2024, 5, 1)) == [
+            "CVE-2023-0001", "CVE-2024-0001",
+        ]
+        assert feed_cache.query_cve_ids(KERNEL_CNA, modified_since="2024-06-01T12:00:00.000") == [
+            "CVE-2023-0001",
+        ]
+        assert feed_cache.latest_modified(KERNEL_CNA) == "2024-08-01T09:30:00.500"
+        assert [c.cve_id for c in feed_cache.get_cves(KERNEL_CNA, datetime(2024, 7, 1))] == ["CVE-2023-0001"]
+    
+    def test_index_uses_secondary_indexes(self, feed_cache):
+        """Test the source and lastModified filters are served by an index."""
+        write_feed(feed_cache, "2024", [make_cve("CVE-2024-0001")])
+        feed_cache.load_index()
+        
+        where, params = feed_cache._index._where(KERNEL_CNA, modified_since="2024-01-01")
+        plan = feed_cache._index.conn.execute(
+            f"EXPLAIN QUERY PLAN SELECT cve_id FROM cves{where}", params
+        ).fetchall()
+        assert "cves_by_source" in " ".join(row[-1] for row in plan)
+    
+    def test_nvd_timestamp(self):
+        """Test times are formatted like NVD lastModified values in UTC."""
+        assert nvd_timestamp(datetime(2024, 5, 2, 10, 15, 30)) == "2024-05-02T10:15:30.000"
+        aware = datetime(2024, 5, 2, 12, 15, tzinfo=timezone(timedelta(hours=2)))
+        assert nvd_timestamp(aware) == "2024-05-02T10:15:00.000"
+        assert nvd_timestamp("2024-05-02") == "2024-05-02"
+
+
+class FakeResponse:
+    """Minimal stand-in for a streamed requests.Response."""
+    
+    def __init__(self, body=b"", status_code=200, headers=None):
+        self.body = body
+        self.status_code = status_code
+        self.headers = headers or {}
+    
+    def iter_content(self, chunk_size=1):
+        for i in range(0, len(self.body), chunk_size):
+            yield self.body[i:i + chunk_size]
+    
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *args):
+        return False
+
+
+class TestNVDFeedDownload:
+    """Tests for streaming NVD feed download."""
+    
+    def test_stream_feed_decompresses_to_disk(self, feed_cache):
+        """Test streamed gzip body is decompressed and atomically renamed."""
+        payload = json.dumps({"vulnerabilities": []}).encode() * 50
+        dest = feed_cache._get_feed_path("2024")
+        
+        size, sha = feed_cache._stream_feed(FakeResponse(gzip.compress(payload)), dest)
+        
+        assert dest.read_bytes() == payload
+        assert size == len(payload)
+        assert sha == hashlib.sha256(payload).hexdigest()
+        assert not dest.with_name(dest.name + ".part").exists()
+    
+    def test_stream_feed_handles_multiple_members(self, feed_cache):
+        """Test concatenated gzip members are all decompressed."""
+        body = gzip.compress(b"first-") + gzip.compress(b"second")
+        dest = feed_cache._get_feed_path("2024")
+        
+        feed_cache._stream_feed(FakeResponse(body), dest)
+        
+        assert dest.read_bytes() == b"first-second"
+    
+    def test_unchanged_meta_skips_download(self, feed_cache, monkeypatch):
+        """Test that a matching .meta sha256 avoids re-downloading the feed."""
+        payload = b'{"vulnerabilities": []}'
+        sha = hashlib.sha256(payload).hexdigest()
+        feed_cache._get_feed_path("recent").write_bytes(payload)
+        feed_cache._write_state("recent", {"sha256": sha})
+        
+        monkeypatch.setattr(feed_cache, "_fetch_remote_meta", lambda name: {"sha256": sha.upper()})
+        
+        def fail_get(*args, **kwargs):
+            raise AssertionError("feed should not be downloaded")
+        
+        monkeypatch.setattr("scripts.nvd_feeds.requests.get", fail_get)
+        
+        assert feed_cache._download_feed("recent", force=True) is True
+    
+    def test_not_modified_keeps_existing_feed(self, feed_cache, monkeypatch):
+        """Test that a 304 response keeps the cached feed untouched."""
+        feed_path = feed_cache._get_feed_path("modified")
+        feed_path.write_bytes(b"cached")
+        feed_cache._write_state("modified", {"sha256": "old", "etag": '"abc"'})
+        sent_headers = {}
+        
+        def fake_get(url, timeout, stream, headers):
+            sent_headers.update(headers)
+            return FakeResponse(status_code=304)
+        
+        monkeypatch.setattr(feed_cache, "_fetch_remote_meta", lambda name: {})
+        monkeypatch.setattr("scripts.nvd_feeds.requests.get", fake_get)
+        
+        assert feed_cache._download_feed("modified", force=True) is True
+        assert sent_headers["If-None-Match"] == '"abc"'
+        assert feed_path.read_bytes() == b"cached"
+    
+    def test_download_writes_feed_and_state(self, feed_cache, monkeypatch):
+        """Test a changed feed is downloaded and its state recorded."""
+        payload = b'{"vulnerabilities": []}'
+        monkeypatch.setattr(
+            feed_cache, "_fetch_remote_meta",
+            lambda name: {"sha256": hashlib.sha256(payload).hexdigest()},
+        )
+        monkeypatch.setattr(
+            "scripts.nvd_feeds.requests.get",
+            lambda url, timeout, stream, headers: FakeResponse(
+                gzip.compress(payload), headers={"ETag": '"v2"'}
+            ),
+        )
+        
+        assert feed_cache._download_feed("2024", force=True) is True
+        assert feed_cache._get_feed_path("2024").read_bytes() == payload
+        assert feed_cache._read_state("2024")["etag"] == '"v2"'
+
+    
+    def test_custom_feed_base_used_for_urls(self, tmp_path, monkeypatch):
+        """Test a configured nvd_feed_base mirror is used for .meta and .json.gz URLs."""
+        cache = NVDFeedCache(KernelConfig(
+            cache_dir=tmp_path, nvd_feed_base="https://mirror.example.com/nvd/",
+        ))
+        payload = b'{"vulnerabilities": []}'
+        urls = []
+        
+        def fake_get(url, timeout, stream=False, headers=None):
+            urls.append(url)
+            if url.endswith(".meta"):
+                return FakeResponse(status_code=404)
+            return FakeResponse(gzip.compress(payload))
+        
+        monkeypatch.setattr("scripts.nvd_feeds.requests.get", fake_get)
+        
+        assert cache._download_feed("2024", force=True) is True
+        assert urls == [
+            "https://mirror.example.com/nvd/nvdcve-2.0-2024.meta",
+            "https://mirror.example.com/nvd/nvdcve-2.0-2024.json.gz",
+        ]
+
+
+class TestNVDFeedRefresh:
+    """Tests for concurrent NVD feed refresh."""
+    
+    def test_retry_with_backoff(self, feed_cache, monkeypatch):
+        """Test a failing feed download is retried."""
+        attempts = []
+        sleeps = []
+        
+        def flaky(name, force=False):
+            attempts.append(name)
+            return len(attempts) >= 2
+        
+        monkeypatch.setattr(feed_cache, "_download_feed", flaky)
+        monkeypatch.setattr("scripts.nvd_feeds.time.sleep", sleeps.append)
+        
+        assert feed_cache._download_feed_with_retry("2024") is True
+        assert len(attempts) == 2
+        assert sleeps == [2]
+    
+    def test_permanent_failure_not_retried(self, feed_cache, monkeypatch):
+        """Test a 404 (feed not published yet) fails at once without backoff."""
+        attempts = []
+        sleeps = []
+        
+        def fake_get(url, timeout, stream, headers):
+            attempts.append(url)
+            return FakeResponse(status_code=404)
+        
+        monkeypatch.setattr(feed_cache, "_fetch_remote_meta", lambda name: {})
+        monkeypatch.setattr("scripts.nvd_feeds.requests.get", fake_get)
+        monkeypatch.setattr("scripts.nvd_feeds.time.sleep", sleeps.append)
+        
+        assert feed_cache._download_feed_with_retry("2099", force=True) is False
+        assert len(attempts) == 1
+        assert sleeps == []
+    
+    def test_transient_failures_retried(self, feed_cache, monkeypatch):
+        """Test 5xx and 429 responses are retried with backoff."""
+        payload = b'{"vulnerabilities": []}'
+        responses = [FakeResponse(status_code=503), FakeResponse(status_code=429), FakeResponse(gzip.compress(payload))]
+        sleeps = []
+        
+        monkeypatch.setattr(feed_cache, "_fetch_remote_meta", lambda name: {})
+        monkeypatch.setattr(
+            "scripts.nvd_feeds.requests.get",
+            lambda url, timeout, stream, headers: responses.pop(0),
+        )
+        monkeypatch.setattr("scripts.nvd_feeds.time.sleep", sleeps.append)
+        
+        assert feed_cache._download_feed_with_retry("2024", force=True) is True
+        assert sleeps == [2, 4]
+        assert feed_cache._get_feed_path("2024").read_bytes() == payload
+    
+    def test_update_feeds_downloads_all(self, feed_cache, monkeypatch):
+        """Test update_feeds fetches recent, modified and yearly feeds."""
+        seen = {}
+        monkeypatch.setattr(
+            feed_cache, "_download_feed",
+            lambda name, force=False: seen.setdefault(name, force) is not None,
+        )
+        
+        feed_cache.update_feeds()
+        
+        assert seen["recent"] is True and seen["modified"] is True
+        assert "2023" in seen and seen["2023"] is False
+        assert feed_cache._yearly_marker.exists()
+    
+    def test_failed_yearly_feed_keeps_marker_unset(self, feed_cache, monkeypatch):
+        """Test the yearly marker is not written when a yearly feed fails."""
+        monkeypatch.setattr(feed_cache, "_download_feed", lambda name, force=False: name != "2023")
+        monkeypatch.setattr("scripts.nvd_feeds.time.sleep", lambda s: None)
+        
+        feed_cache.update_feeds()
+        
+        assert not feed_cache._yearly_marker.exists()
+
+
+class TestSharedFeedStore:
+    """Tests for the shared NVD feed store."""
+    
+    def test_record_to_cve(self):
+        """Test compact records convert to CVE models."""
+        cve = nvd_record_to_cve(compact_cve_record(make_cve("CVE-2024-0001")))
+        assert cve.cve_id == "CVE-2024-0001"
+        assert cve.severity == Severity.HIGH
+        assert cve.cvss_score == 7.8
+        assert cve.fix_commits == ["a" * 40]
+        assert len(cve.cpe_ranges) == 1
+        assert cve.cpe_ranges[0].version_end_excluding == "6.1.90"
+    
+    def test_get_cves_filters_by_source(self, feed_cache):
+        """Test get_cves returns parsed models for one source."""
+        write_feed(feed_cache, "2024", [
+            make_cve("CVE-2024-0001"),
+            make_cve("CVE-2024-0002", source="other@example.com"),
+        ])
+        
+        cves = feed_cache.get_cves(KERNEL_CNA)
+        
+        assert [cve.cve_id for cve in cves] == ["CVE-2024-0001"]
+        assert len(feed_cache.get_cves()) == 2
+    
+    def test_get_cves_by_id(self, feed_cache):
+        """Test models are built for the requested IDs only, skipping unknown ones."""
+        write_feed(feed_cache, "2024", [make_cve("CVE-2024-0001"), make_cve("CVE-2024-0002")])
+        
+        cves = feed_cache.get_cves_by_id(["CVE-2024-0002", "CVE-2024-9999"])
+        
+        assert [cve.cve_id for cve in cves] == ["CVE-2024-0002"]
+    
+    def test_concurrent_queries(self, feed_cache):
+        """Test the shared index can be queried from many threads while it is rewritten."""
+        feed_path = write_feed(feed_cache, "2024", [make_cve(f"CVE-2024-{i:04d}") for i in range(50)])
+        feed_cache.get_cves()
+        index = feed_cache._index
+        
+        def work(i):
+            if i % 10 == 0:
+                index.index_feed("2024", feed_path, 0)
+                index.resolve()
+                return 50
+            if i % 2:
+                return len(feed_cache.get_cves_by_id([f"CVE-2024-{i % 50:04d}"])) * 50
+            return len(feed_cache.query_cve_ids(source_identifier=KERNEL_CNA))
+        
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(work, range(200)))
+        
+        assert results == [50] * 200
+    
+    def test_refresh_updates_once(self, feed_cache, monkeypatch):
+        """Test repeated refresh calls only update feeds once."""
+        calls = []
+        monkeypatch.setattr(feed_cache, "update_feeds", lambda force_yearly=False: calls.append(force_yearly))
+        
+        feed_cache.refresh()
+        feed_cache.refresh()
+        assert calls == [False]
+        
+        feed_cache.refresh(force_yearly=True)
+        assert calls == [False, True]
+    
+    def test_shared_instance_per_cache_dir(self, tmp_path):
+        """Test consumers with the same cache directory share one store."""
+        config = KernelConfig(cache_dir=tmp_path)
+        assert get_shared_feed_cache(config) is get_shared_feed_cache(config)
+        other = KernelConfig(cache_dir=tmp_path / "other")
+        assert get_shared_feed_cache(other) is not get_shared_feed_cache(config)
+
@@ -0,0 +1,152 @@
+"""Tests for in-process patch applicability matcher."""
+
+import pytest
+
+from scripts.patch_matcher import (
+    REASON_ALREADY_APPLIED,
+    REASON_APPLICABLE,
+    REASON_CONFLICT,
+    PatchMatcher,
+    UnsupportedPatchError,
+    parse_patch,
+)
+
+
+FORMAT_PATCH = b"""From 0123456789abcdef0123456789abcdef01234567 Mon Sep 17 00:00:00 2001
+From: Kernel Dev <dev@example.com>
+Subject: [PATCH] mm: fix use-after-free
+
+Fix it.
+
+---
+ mm/file.c | 2 +-
+ 1 file changed, 1 insertion(+), 1 deletion(-)
+
+diff --git a/mm/file.c b/mm/file.c
+index 1111111..2222222 100644
+--- a/mm/file.c
++++ b/mm/file.c
+@@ -2,3 +2,3 @@ static int foo(void)
+ {
+-\treturn 0;
++\treturn 1;
+ }
+-- 
+2.43.0
+"""
+
+SOURCE_OLD = b"static int foo(void)\n{\n\treturn 0;\n}\nint bar;\n"
+SOURCE_NEW = b"static int foo(void)\n{\n\treturn 1;\n}\nint bar;\n"
+
+
+@pytest.fixture
+def tree(tmp_path):
+    """Create a kernel source tree with mm/file.c."""
+    (tmp_path / "mm").mkdir()
+    return tmp_path
+
+
+class TestParsePatch:
+    """Tests for parse_patch function."""
+    
+    def test_format_patch(self):
+        """Test git format-patch output is parsed into hunks."""
+        files = parse_patch(FORMAT_PATCH)
+        assert len(files) == 1
+        assert files[0].path == "mm/file.c"
+        hunk = files[0].hunks[0]
+        assert hunk.old_lines == [b"{", b"\treturn 0;", b"}"]
+        assert hunk.new_lines == [b"{", b"\treturn 1;", b"}"]
+        assert hunk.trailing_context == 1
+    
+    def test_new_file(self):
+        """Test /dev/null marks file creation."""
+        patch = b"--- /dev/null\n+++ b/mm/new.c\n@@ -0,0 +1,2 @@\n+a\n+b\n"
+        files = parse_patch(patch)
+        assert files[0].is_creation
+        assert files[0].path == "mm/new.c"
+    
+    def test_binary_unsupported(self):
+        """Test binary diffs are left to git."""
+        patch = b"diff --git a/fw.bin b/fw.bin\nGIT binary patch\nliteral 1\n"
+        with pytest.raises(UnsupportedPatchError):
+            parse_patch(patch)
+    
+    def test_no_newline_marker_unsupported(self):
+        """Test missing-newline markers are left to git."""
+        patch = b"--- a/x\n+++ b/x\n@@ -1 +1 @@\n-a\n+b\n\\ No newline at end of file\n"
+        with pytest.raises(UnsupportedPatchError):
+            parse_patch(patch)
+
+
+class TestPatchMatcher:
+    """Tests for PatchMatcher class."""
+    
+    def test_already_applied(self, tree):
+        """Test patch present in source is reported as included."""
+        (tree / "mm" / "file.c").write_bytes(SOURCE_NEW)
+        assert PatchMatcher(tree).check_content(FORMAT_PATCH) == (True, REASON_ALREADY_APPLIED)
+    
+    def test_applicable(self, tree):
+        """Test patch that applies cleanly is reported as applicable."""
+        (tree / "mm" / "file.c").write_bytes(SOURCE_OLD)
+        assert PatchMatcher(tree).check_content(FORMAT_PATCH) == (False, REASON_APPLICABLE)
+    
+    def test_applicable_with_offset(self, tree):
+        """Test hunks still match when shifted from their stated line."""
+        (tree / "mm" / "file.c").write_bytes(b"/* header */\n\n" + SOURCE_OLD)
+        assert PatchMatcher(tree).check_content(FORMAT_PATCH) == (False, REASON_APPLICABLE)
+    
+    def test_conflict(self, tree):
+        """Test patch whose context is missing is reported as conflicting."""
+        (tree / "mm" / "file.c").write_bytes(b"static int foo(void)\n{\n\treturn 2;\n}\n")
+        assert PatchMatcher(tree).check_content(FORMAT_PATCH) == (False, REASON_CONFLICT)
+    
+    def test_missing_file_conflicts(self, tree):
+        """Test patch for a file absent from the tree conflicts."""
+        assert PatchMatcher(tree).check_content(FORMAT_PATCH) == (False, REASON_CONFLICT)
+    
+    def test_match_beginning(self, tree):
+        """Test hunks starting at line 1 must match at the top of the file."""
+        (tree / "mm" / "file.c").write_bytes(b"x\na\nb\n")
+        patch = b"--- a/mm/file.c\n+++ b/mm/file.c\n@@ -1,2 +1,2 @@\n-a\n+c\n b\n"
+        assert PatchMatcher(tree).check_content(patch) == (False, REASON_CONFLICT)
+    
+    def test_hunks_out_of_file_order_left_to_git(self, tree):
+        """Test hunks matching in reverse file order are left to git, not reported as conflicts."""
+        (tree / "mm" / "file.c").write_bytes(b"l1\nc1\nd\nc2\nl5\na1\nb\na2\nl9\n")
+        patch = (
+            b"--- a/mm/file.c\n+++ b/mm/file.c\n"
+            b"@@ -2,3 +2,3 @@\n a1\n-b\n+B\n a2\n"
+            b"@@ -6,3 +6,3 @@\n c1\n-d\n+D\n c2\n"
+        )
+        assert PatchMatcher(tree).check_content(patch) is None
+    
+    def test_file_creation(self, tree):
+        """Test new-file patches depend on whether the file exists."""
+        patch = b"--- /dev/null\n+++ b/mm/new.c\n@@ -0,0 +1,2 @@\n+a\n+b\n"
+        assert PatchMatcher(tree).check_content(patch) == (False, REASON_APPLICABLE)
+        (tree / "mm" / "new.c").write_bytes(b"a\nb\n")
+        assert PatchMatcher(tree).check_content(patch) == (True, REASON_ALREADY_APPLIED)
+    
+    def test_file_deletion(self, tree):
+        """Test deletion patches depend on whether the file is still there."""
+        patch = b"--- a/mm/old.c\n+++ /dev/null\n@@ -1,2 +0,0 @@\n-a\n-b\n"
+        assert PatchMatcher(tree).check_content(patch) == (True, REASON_ALREADY_APPLIED)
+        (tree / "mm" / "old.c").write_bytes(b"a\nb\n")
+        assert PatchMatcher(tree).check_content(patch) == (False, REASON_APPLICABLE)
+    
+    def test_unsupported_returns_none(self, tree):
+        """Test undecidable patches return None for git fallback."""
+        patch = b"diff --git a/a b/b\nrename from a\nrename to b\n"
+        assert PatchMatcher(tree).check_content(patch) is None
+    
+    def test_source_files_cached(self, tree):
+        """Test each touched file is read once across patches."""
+        source = tree / "mm" / "file.c"
+        source.write_bytes(SOURCE_NEW)
+        matcher = PatchMatcher(tree)
+        matcher.check_content(FORMAT_PATCH)
+        source.write_bytes(SOURCE_OLD)
+        # Cached image still reflects the first read
+        assert matcher.check_content(FORMAT_PATCH) == (True, REASON_ALREADY_APPLIED)
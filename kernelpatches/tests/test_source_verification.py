@@ -0,0 +1,190 @@
+"""Tests for source tarball verification of CVE patches."""
+
+import pytest
+
+from scripts.benchmark import benchmark_source_verification
+from scripts.config import KernelConfig
+from scripts.source_verification import SourceFileIndex, SourceVerifier
+from tests.test_kernel_source import make_tarball
+
+
+SOURCE = """static int sock_setsockopt(struct socket *sock, int level)
+{
+\tint ret = validate_level(level);
+\tif (ret < 0)
+\t\treturn ret;
+\treturn do_setsockopt(sock,   level);
+}
+"""
+
+INCLUDED_PATCH = """diff --git a/net/core/sock.c b/net/core/sock.c
+--- a/net/core/sock.c
++++ b/net/core/sock.c
+@@ -1,5 +1,6 @@
+ static int sock_setsockopt(struct socket *sock, int level)
+ {
+-\tint ret = check_level(level);
++\tint ret = validate_level(level);
+ \tif (ret < 0)
+ \t\treturn ret;
+"""
+
+MISSING_PATCH = """diff --git a/net/core/sock.c b/net/core/sock.c
+--- a/net/core/sock.c
++++ b/net/core/sock.c
+@@ -5,2 +5,3 @@
++\tsock_release_pending(sock);
++\tsock_put_reference(sock);
+ \treturn do_setsockopt(sock, level);
+"""
+
+# Removed line survives only as part of a longer source line
+EMBEDDED_REMOVAL_PATCH = """diff --git a/net/core/sock.c b/net/core/sock.c
+--- a/net/core/sock.c
++++ b/net/core/sock.c
+@@ -3,1 +3,3 @@
+-\tvalidate_level(level);
++\tint ret = validate_level(level);
++\tif (ret < 0)
++\t\treturn ret;
+"""
+
+
+@pytest.fixture
+def verifier(tmp_path):
+    """Create a verifier pointed at a small extracted source tree."""
+    source_dir = tmp_path / "linux-6.1.100"
+    (source_dir / "net" / "core").mkdir(parents=True)
+    (source_dir / "net" / "core" / "sock.c").write_text(SOURCE)
+    
+    verifier = SourceVerifier(KernelConfig(cache_dir=tmp_path / "cache"))
+    verifier._source_dir = source_dir
+    verifier._source_version = "6.1.100"
+    verifier._extracted = True
+    return verifier
+
+
+class TestSourceFileIndex:
+    """Tests for SourceFileIndex class."""
+    
+    def test_exact_line_lookup(self):
+        """Test whitespace-collapsed lines are found."""
+        index = SourceFileIndex(SOURCE)
+        assert index.contains("return do_setsockopt(sock, level);")
+    
+    def test_partial_line_is_not_a_match(self):
+        """Test only complete lines match, without a substring scan."""
+        index = SourceFileIndex(SOURCE)
+        assert index.contains("int ret = validate_level(level);")
+        assert not index.contains("validate_level(level);")
+        assert not index.contains("check_level(level);")
+    
+    def test_whitespace_is_collapsed(self):
+        """Test lines match regardless of indentation and inner spacing."""
+        index = SourceFileIndex(SOURCE)
+        assert index.contains("if (ret < 0)")
+        assert index.contains("return ret;")
+        assert not index.contains("ret; return")
+
+
+class TestSourceVerifier:
+    """Tests for SourceVerifier patch inclusion checks."""
+    
+    def test_included_patch(self, verifier):
+        """Test a patch whose changes are in the source is included."""
+        result = verifier.check_patch_included(INCLUDED_PATCH, "a" * 40, "CVE-2024-0001")
+        assert result.is_included
+        assert result.checked_files == 1
+    
+    def test_missing_patch(self, verifier):
+        """Test a patch whose added lines are absent is not included."""
+        result = verifier.check_patch_included(MISSING_PATCH, "b" * 40, "CVE-2024-0002")
+        assert not result.is_included
+    
+    def test_removed_line_inside_longer_line_is_absent(self, verifier):
+        """Test a removed line embedded in a longer source line counts as removed.
+        
+        Earlier versions searched removed lines as substrings of the whole
+        file and reported this patch as not included.
+        """
+        result = verifier.check_patch_included(EMBEDDED_REMOVAL_PATCH, "c" * 40, "CVE-2024-0003")
+        assert result.is_included
+    
+    def test_file_index_reused_across_patches(self, verifier, monkeypatch):
+        """Test each source file is read once for many patches."""
+        reads = []
+        original = SourceFileIndex.__init__
+        
+        def counting_init(self, text):
+            reads.append(text)
+            original(self, text)
+        
+        monkeypatch.setattr(SourceFileIndex, "__init__", counting_init)
+        for _ in range(5):
+            verifier.check_patch_included(INCLUDED_PATCH, "a" * 40)
+            verifier.check_patch_included(MISSING_PATCH, "b" * 40)
+        
+        assert len(reads) == 1
+    
+    def test_file_index_lru_bound(self, verifier, monkeypatch):
+        """Test the index cache stays within its size limit."""
+        monkeypatch.setattr(SourceVerifier, "FILE_INDEX_CACHE_SIZE", 2)
+        core = verifier._source_dir / "net" / "core"
+        for name in ["a.c", "b.c", "c.c"]:
+            (core / name).write_text(SOURCE)
+            verifier._get_file_index(core / name)
+        
+        assert list(verifier._file_index) == [core / "b.c", core / "c.c"]
+    
+    def test_cleanup_clears_index(self, verifier):
+        """Test cleanup drops cached file indexes."""
+        verifier.check_patch_included(INCLUDED_PATCH, "a" * 40)
+        assert verifier._file_index
+        verifier.cleanup()
+        assert not verifier._file_index
+    
+    def test_use_source_dir(self, verifier, tmp_path):
+        """Test an existing tree is reused and survives cleanup."""
+        source_dir = verifier._source_dir
+        other = SourceVerifier(KernelConfig(cache_dir=tmp_path / "cache"))
+        other.use_source_dir(source_dir, "6.1.100")
+        
+        assert other.extract_source("6.1.100") == source_dir
+        other.cleanup()
+        assert source_dir.exists()
+    
+    def test_extract_source_uses_shared_cache(self, tmp_path, monkeypatch):
+        """Test extraction goes through the shared kernel source cache."""
+        monkeypatch.setattr("scripts.kernel_source.MIN_TARBALL_SIZE", 0)
+        verifier = SourceVerifier(KernelConfig(cache_dir=tmp_path / "cache"))
+        make_tarball(verifier._source_cache.tarball_path("6.1.100"))
+        
+        source_dir = verifier.extract_source("6.1.100")
+        
+        assert source_dir == verifier._source_cache.cached_source("6.1.100")
+        verifier.cleanup()
+        assert (source_dir / "net/core/sock.c").exists()
+
+
+class TestVerifyPatches:
+    """Tests for verify_patches and its benchmark."""
+    
+    def test_results_in_input_order(self, verifier):
+        """Test every patch gets a result, keyed by SHA in input order."""
+        patches = [
+            (f"{n:040x}", INCLUDED_PATCH if n % 2 == 0 else MISSING_PATCH, f"CVE-2024-{n + 1000}")
+            for n in range(12)
+        ]
+        
+        results = verifier.verify_patches(patches, "6.1.100")
+        
+        assert list(results) == [sha for sha, _, _ in patches]
+        assert [r.is_included for r in results.values()] == [n % 2 == 0 for n in range(12)]
+    
+    def test_benchmark_reports_throughput(self):
+        """Test the fixture benchmark verifies every patch and reports a rate."""
+        row = benchmark_source_verification(num_files=4, num_patches=20, lines_per_file=40)
+        
+        assert row["patches"] == 20
+        assert row["included"] == 10
+        assert row["patches_per_sec"] > 0
@@ -1,9 +1,11 @@
 """Tests for spec_file module."""
 
+import os
+
 import pytest
 from pathlib import Path
 
-from scripts.spec_file import SpecFile
+from scripts.spec_file import ParsedSpec, SpecFile, parse_spec_file
 
 
 SAMPLE_SPEC = """
@@ -230,3 +232,83 @@ class TestSpecFileEdgeCases:
         repr_str = repr(spec_file)
         assert "linux.spec" in repr_str
         assert "6.1.159" in repr_str
+
+
+class TestParsedSpec:
+    """Tests for the parsed spec model and its cache."""
+    
+    def test_round_trip(self):
+        """Test serialization reproduces the original text."""
+        assert ParsedSpec.from_text(SAMPLE_SPEC).serialize() == SAMPLE_SPEC
+        assert ParsedSpec.from_text("Name: x").serialize() == "Name: x"
+    
+    def test_index(self):
+        """Test tags, patch table and changelog are tokenized."""
+        parsed = ParsedSpec.from_text(SAMPLE_SPEC)
+        
+        assert parsed.tag("Release") == "1%{?dist}"
+        assert [patch.number for _, patch in parsed.patches] == [1, 2, 100, 101]
+        assert [number for _, number in parsed.patch_applies] == [1, 2, 100, 101]
+        assert parsed.changelog[0].version_release == "6.1.159-1"
+        assert parsed.changelog[0].items == ["- Update to version 6.1.159"]
+    
+    def test_cache_shared_between_instances(self, tmp_path):
+        """Test a spec is parsed once while unchanged."""
+        spec_path = tmp_path / "linux.spec"
+        spec_path.write_text(SAMPLE_SPEC)
+        
+        assert SpecFile(spec_path).model is SpecFile(spec_path).model
+        assert parse_spec_file(spec_path) is SpecFile(spec_path).model
+    
+    def test_cache_invalidated_on_change(self, tmp_path):
+        """Test the cache follows file modifications."""
+        spec_path = tmp_path / "linux.spec"
+        spec_path.write_text(SAMPLE_SPEC)
+        before = parse_spec_file(spec_path)
+        
+        spec_path.write_text(SAMPLE_SPEC.replace("6.1.159", "6.1.160"))
+        os.utime(spec_path, ns=(0, spec_path.stat().st_mtime_ns + 1))
+        
+        assert parse_spec_file(spec_path) is not before
+        assert SpecFile(spec_path).version == "6.1.160"
+    
+    def test_edits_do_not_leak_into_cache(self, tmp_path):
+        """Test unsaved edits stay private to one SpecFile."""
+        spec_path = tmp_path / "linux.spec"
+        spec_path.write_text(SAMPLE_SPEC)
+        spec = SpecFile(spec_path)
+        
+        spec.set_version("6.1.160")
+        spec.add_patch("CVE-2024-99999.patch", 102)
+        
+        other = SpecFile(spec_path)
+        assert other.version == "6.1.159"
+        assert other.get_patch_count() == 4
+        
+        spec.save()
+        assert SpecFile(spec_path).version == "6.1.160"
+        assert SpecFile(spec_path).get_patch_count() == 5
+    
+    def test_save_keeps_shared_model_unchanged(self, tmp_path):
+        """Test saving an unedited spec does not modify the shared model."""
+        spec_path = tmp_path / "linux.spec"
+        spec_path.write_text("Name: linux")
+        shared = parse_spec_file(spec_path)
+        
+        spec = SpecFile(spec_path)
+        assert spec.name == "linux"
+        spec.save()
+        
+        assert shared.serialize() == "Name: linux"
+        assert spec_path.read_text() == "Name: linux\n"
+    
+    def test_content_cached_until_edit(self, spec_file):
+        """Test the serialized text is built once per model version."""
+        content = spec_file.content
+        assert spec_file.content is content
+        
+        spec_file.set_release(2)
+        
+        assert spec_file.content is not content
+        assert "Release:        2%{?dist}" in spec_file.content
+        assert spec_file.content is spec_file.content
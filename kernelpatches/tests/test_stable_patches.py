@@ -0,0 +1,147 @@
+"""Tests for stable patch downloads."""
+
+import asyncio
+import hashlib
+import lzma
+
+import pytest
+
+from scripts.config import KernelConfig
+from scripts.stable_patches import StablePatchManager
+
+
+def patch_body(version):
+    """Build a distinct stable patch for a version."""
+    return f"diff --git a/Makefile b/Makefile\n-SUBLEVEL = old\n+SUBLEVEL = {version}\n".encode()
+
+
+class FakeResponse:
+    """Minimal stand-in for an aiohttp response."""
+    
+    def __init__(self, body=b"", status=200):
+        self.body = body
+        self.status = status
+    
+    async def read(self):
+        return self.body
+    
+    async def text(self):
+        return self.body.decode()
+    
+    def raise_for_status(self):
+        if self.status >= 400:
+            raise RuntimeError(f"HTTP {self.status}")
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *args):
+        return False
+
+
+class FakeSession:
+    """Serve kernel.org files from a dict and record concurrency."""
+    
+    def __init__(self, files):
+        self.files = files
+        self.requested = []
+        self.active = 0
+        self.max_active = 0
+    
+    def get(self, url, **kwargs):
+        name = url.rsplit("/", 1)[-1]
+        self.requested.append(name)
+        session = self
+        
+        class Request:
+            async def __aenter__(self):
+                session.active += 1
+                session.max_active = max(session.max_active, session.active)
+                await asyncio.sleep(0.01)
+                session.active -= 1
+                if name not in session.files:
+                    return FakeResponse(status=404)
+                return FakeResponse(session.files[name])
+            
+            async def __aexit__(self, *args):
+                return False
+        
+        return Request()
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *args):
+        return False
+
+
+@pytest.fixture
+def kernel_org(monkeypatch):
+    """Fake kernel.org directory with patch-6.1.1 .. patch-6.1.10."""
+    files = {f"patch-6.1.{n}.xz": lzma.compress(patch_body(n)) for n in range(1, 11)}
+    files["sha256sums.asc"] = "\n".join(
+        f"{hashlib.sha256(data).hexdigest()}  {name}" for name, data in files.items()
+    ).encode()
+    session = FakeSession(files)
+    monkeypatch.setattr("scripts.stable_patches.aiohttp.ClientSession", lambda *a, **k: session)
+    return session
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    """Create a manager whose latest stable version is 6.1.10."""
+    config = KernelConfig(cache_dir=tmp_path / "cache")
+    config.download_concurrency = 3
+    manager = StablePatchManager(config)
+    monkeypatch.setattr(manager, "get_latest_stable_version", lambda kv: "6.1.10")
+    return manager
+
+
+class TestDownloadPatches:
+    """Tests for StablePatchManager.download_patches."""
+    
+    async def test_downloads_range_concurrently(self, manager, kernel_org, tmp_path):
+        """Test the whole range is fetched in order with bounded concurrency."""
+        patches = await manager.download_patches("6.1", tmp_path, start_subver=4)
+        
+        assert [p.version for p in patches] == [f"6.1.{n}" for n in range(4, 11)]
+        assert 1 < kernel_org.max_active <= 3
+        patch_dir = tmp_path / "stable_patches"
+        assert (patch_dir / "patch-6.1.7").read_bytes() == patch_body(7)
+        assert (patch_dir / "patch-6.1.7.xz").exists()
+        assert "patch-6.1.11.xz" not in kernel_org.requested
+    
+    async def test_valid_files_are_skipped(self, manager, kernel_org, tmp_path):
+        """Test patches matching the published checksum are not downloaded again."""
+        await manager.download_patches("6.1", tmp_path, start_subver=8)
+        kernel_org.requested.clear()
+        
+        patches = await manager.download_patches("6.1", tmp_path, start_subver=8)
+        
+        assert len(patches) == 3
+        assert kernel_org.requested == ["sha256sums.asc"]
+    
+    async def test_corrupt_file_is_replaced(self, manager, kernel_org, tmp_path):
+        """Test a damaged local copy is downloaded again."""
+        await manager.download_patches("6.1", tmp_path, start_subver=9)
+        (tmp_path / "stable_patches" / "patch-6.1.9.xz").write_bytes(b"garbage")
+        kernel_org.requested.clear()
+        
+        await manager.download_patches("6.1", tmp_path, start_subver=9)
+        
+        assert kernel_org.requested == ["sha256sums.asc", "patch-6.1.9.xz"]
+        assert (tmp_path / "stable_patches" / "patch-6.1.9").read_bytes() == patch_body(9)
+    
+    async def test_stops_at_first_gap(self, manager, kernel_org, tmp_path):
+        """Test results end before a version missing upstream."""
+        del kernel_org.files["patch-6.1.6.xz"]
+        
+        patches = await manager.download_patches("6.1", tmp_path, start_subver=4)
+        
+        assert [p.version for p in patches] == ["6.1.4", "6.1.5"]
+    
+    async def test_end_subver_limits_range(self, manager, kernel_org, tmp_path):
+        """Test an explicit end version is respected."""
+        patches = await manager.download_patches("6.1", tmp_path, start_subver=2, end_subver=3)
+        
+        assert [p.version for p in patches] == ["6.1.2", "6.1.3"]